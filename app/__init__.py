@@ -1,44 +1,74 @@
-# app/__init__.py
-import os
-from flask import Flask
-from flask_cors import CORS
-from app.config import config
-from app.models import db
-
-def create_app(config_name='development'):
-    """Application factory"""
-    # Get the directory of the app module
-    template_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), 'templates'))
-    
-    app = Flask(__name__, template_folder=template_dir)
-    
-    # Load configuration
-    app.config.from_object(config[config_name])
-    
-    # Initialize extensions
-    db.init_app(app)
-    CORS(app)
-    
-    # Register blueprints
-    from app.routes import register_routes
-    register_routes(app)
-    
-    # Setup scheduler
-    from app.schedulers import setup_billing_scheduler
-    with app.app_context():
-        setup_billing_scheduler(app)
-    
-    # Create database tables
-    with app.app_context():
-        db.create_all()
-    
-    # Error handlers
-    @app.errorhandler(404)
-    def not_found(error):
-        return {'error': 'Not found'}, 404
-    
-    @app.errorhandler(500)
-    def server_error(error):
-        return {'error': 'Server error'}, 500
-    
-    return app
+# app/__init__.py
+import os
+from flask import Flask
+from flask_cors import CORS
+from app.config import config
+from app.models import db
+from app.models.base import init_sqlite_pragmas
+from app.models.migrations import upgrade_schema
+from app.utils.cache import init_cache
+from app.utils.idempotency import init_idempotency
+from app.utils.signature import init_webhook_signing
+from app.utils.query_counter import init_query_counter
+from app.utils.metrics import init_metrics
+
+def create_app(config_name='development', config_overrides=None):
+    """Application factory
+    
+    Args:
+        config_name: Nama konfigurasi (development, testing, production)
+        config_overrides: dict opsional untuk menimpa nilai konfigurasi
+            (misal SQLALCHEMY_DATABASE_URI untuk benchmark)
+    """
+    # Get the directory of the app module
+    template_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), 'templates'))
+    
+    app = Flask(__name__, template_folder=template_dir)
+    
+    # Load configuration
+    app.config.from_object(config[config_name])
+    if config_overrides:
+        app.config.update(config_overrides)
+    
+    # Initialize extensions
+    db.init_app(app)
+    init_sqlite_pragmas(app)
+    CORS(app)
+    init_cache(app)
+    init_idempotency(app)
+    init_webhook_signing(app)
+    init_query_counter(app)
+    init_metrics(app)
+    
+    # Register blueprints
+    from app.routes import register_routes
+    register_routes(app)
+    
+    # Create database tables
+    with app.app_context():
+        db.create_all()
+        upgrade_schema()
+    
+    # Setup scheduler (setelah tabel ada: leader election memakai scheduler_leases)
+    from app.schedulers import setup_billing_scheduler
+    with app.app_context():
+        setup_billing_scheduler(app)
+    
+    # Start webhook inbox workers (hanya jika WEBHOOK_INBOX_ENABLED)
+    from app.schedulers import setup_webhook_workers
+    setup_webhook_workers(app)
+    
+    # Register CLI commands
+    from app.cli import register_commands
+    register_commands(app)
+    
+    # Error handlers
+    @app.errorhandler(404)
+    def not_found(error):
+        return {'error': 'Not found'}, 404
+    
+    @app.errorhandler(500)
+    def server_error(error):
+        return {'error': 'Server error'}, 500
+    
+    return app
@@ -0,0 +1,237 @@
+# app/cli.py
+import json
+import signal
+import threading
+import time
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from app.models import db
+from app.models.student import Student
+from app.models.job_run import JobRun
+from app.models.rollup import rebuild_rollups
+from app.schedulers.billing_scheduler import (
+    generate_billing_job, purge_idempotency_job, send_reminder_job, setup_billing_scheduler, shutdown_scheduler,
+    update_penalty_job
+)
+from app.services.webhook_inbox_service import WebhookInboxService
+from app.services.reconciliation_service import ReconciliationService
+from app.services.statement_ingestion_service import StatementIngestionService
+from app.utils.idempotency import purge_idempotency_keys
+from app.utils.query_plan import analyze_queries, exercise_routes, record_queries, route_samples
+from app.utils.seed_data import seed_synthetic_data
+
+
+def register_commands(app):
+    """Register all CLI commands to Flask app"""
+    app.cli.add_command(rebuild_outstanding_command)
+    app.cli.add_command(rebuild_rollups_command)
+    app.cli.add_command(purge_idempotency_keys_command)
+    app.cli.add_command(drain_webhook_inbox_command)
+    app.cli.add_command(reconcile_statement_command)
+    app.cli.add_command(explain_queries_command)
+    app.cli.add_command(seed_data_command)
+    app.cli.add_command(scheduler_command)
+    app.cli.add_command(run_job_command)
+
+
+@click.command('rebuild-outstanding')
+@with_appcontext
+def rebuild_outstanding_command():
+    """Hitung ulang outstanding_amount dan krs_blocked semua mahasiswa dari billings"""
+    updated = Student.refresh_outstanding()
+    db.session.commit()
+    blocked = Student.query.filter_by(krs_blocked=True).count()
+    click.echo(f"✅ Saldo {updated} mahasiswa dihitung ulang, {blocked} terblokir KRS")
+
+
+@click.command('rebuild-rollups')
+@with_appcontext
+def rebuild_rollups_command():
+    """Bangun ulang tabel rekap dashboard (billing_status_rollup, daily_payment_rollup)"""
+    result = rebuild_rollups()
+    db.session.commit()
+    click.echo(
+        f"✅ Rekap dibangun ulang: {result['billing_groups']} grup billing, "
+        f"{result['payment_groups']} grup pembayaran harian"
+    )
+
+
+@click.command('purge-idempotency-keys')
+@click.option('--days', type=int, default=None, help='Umur maksimal key dalam hari (default: IDEMPOTENCY_RETENTION_DAYS)')
+@with_appcontext
+def purge_idempotency_keys_command(days):
+    """Hapus response idempotency yang lebih tua dari masa retensi"""
+    days = current_app.config['IDEMPOTENCY_RETENTION_DAYS'] if days is None else days
+    deleted = purge_idempotency_keys(days)
+    click.echo(f"✅ {deleted} idempotency key lebih tua dari {days} hari dihapus")
+
+
+@click.command('drain-webhook-inbox')
+@click.option('--max-batches', type=int, default=None, help='Batas jumlah batch yang diproses')
+@with_appcontext
+def drain_webhook_inbox_command(max_batches):
+    """Proses webhook inbox sampai tidak ada entry yang siap diproses"""
+    inbox_service = WebhookInboxService()
+    totals = inbox_service.drain('cli-drain', max_batches=max_batches)
+    metrics = inbox_service.get_metrics()
+    click.echo(
+        f"✅ {totals['processed']} webhook diproses, {totals['retried']} dijadwalkan ulang, "
+        f"{totals['dead']} masuk dead-letter; backlog tersisa {metrics['backlog']}"
+    )
+
+
+@click.command('reconcile-statement')
+@click.argument('statement', type=click.Path(exists=True, dir_okay=False))
+@click.option('--payment-method-id', type=int, required=True, help='Metode pembayaran untuk payment baru dari VA')
+@click.option('--dry-run', is_flag=True, help='Hanya cocokkan, tidak menulis ke database')
+@click.option('--report', 'report_path', type=click.Path(dir_okay=False), default=None,
+              help='Simpan laporan lengkap (unmatched, ambiguous) sebagai JSON')
+@click.option('--workers', type=int, default=None, help='Jumlah process extract halaman PDF')
+@click.option('--year', type=int, default=None, help='Tahun untuk tanggal PDF tanpa header periode')
+@with_appcontext
+def reconcile_statement_command(statement, payment_method_id, dry_run, report_path, workers, year):
+    """Rekonsiliasi rekening koran (CSV atau PDF) terhadap payment pending dan billing terbuka"""
+    if statement.lower().endswith('.pdf'):
+        report = StatementIngestionService(workers=workers).ingest(
+            statement, payment_method_id, year=year, dry_run=dry_run
+        )
+    else:
+        with open(statement, newline='', encoding='utf-8-sig') as stream:
+            report = ReconciliationService().reconcile_csv(stream, payment_method_id, dry_run=dry_run)
+    
+    if report_path:
+        with open(report_path, 'w') as output:
+            json.dump(report, output, indent=2, default=str)
+    
+    if not report['success']:
+        raise click.ClickException(report['message'])
+    
+    if 'extraction' in report:
+        extraction = report['extraction']
+        click.echo(
+            f"📄 {extraction['pages']} halaman ({extraction['cached_pages']} dari cache), "
+            f"{extraction['rows']} baris transaksi dalam {extraction['seconds']}s"
+        )
+    
+    matched = report['matched']
+    click.echo(
+        f"✅ {report['total_lines']} baris dalam {report['elapsed_seconds']}s: "
+        f"{sum(matched.values())} cocok (reference {matched['reference']}, VA {matched['va_number']}, "
+        f"nominal+tanggal {matched['amount_date']}), {len(report['unmatched'])} tidak cocok, "
+        f"{len(report['ambiguous'])} ambigu, {report['duplicates']} duplikat"
+        + (' [dry-run]' if dry_run else '')
+    )
+
+
+@click.command('explain-queries')
+@click.option('--show-all', is_flag=True, help='Tampilkan juga query yang memakai index')
+@click.option('--strict', is_flag=True, help='Exit code 1 jika ada full scan (untuk CI)')
+@click.option('--output', 'output_path', type=click.Path(dir_okay=False), default=None,
+              help='Simpan hasil EXPLAIN semua query sebagai JSON')
+@with_appcontext
+def explain_queries_command(show_all, strict, output_path):
+    """Jalankan semua route GET, EXPLAIN QUERY PLAN setiap query, dan tandai full scan"""
+    if db.engine.dialect.name != 'sqlite':
+        raise click.ClickException('explain-queries hanya mendukung SQLite')
+    
+    samples = route_samples()
+    with record_queries(db.engine) as statements:
+        routes = exercise_routes(current_app, samples)
+    results = analyze_queries(db.engine, statements)
+    
+    if output_path:
+        with open(output_path, 'w') as output:
+            json.dump({'routes': routes, 'queries': results}, output, indent=2, default=str)
+    
+    for url, status_code in routes['visited']:
+        if status_code >= 400:
+            click.echo(f"⚠️  GET {url} -> {status_code}")
+    for rule in routes['skipped']:
+        click.echo(f"⏭️  {rule} dilewati (tidak ada data contoh)")
+    
+    flagged = [result for result in results if result['flagged']]
+    for result in results if show_all else flagged:
+        if result['flagged']:
+            marker = '❌ FULL SCAN ' + ', '.join(result['full_scans'])
+        elif result['temp_sorts']:
+            marker = '⚠️  TEMP SORT'
+        else:
+            marker = '✅'
+        click.echo(f"\n{marker} ({result['count']}x)\n  {' '.join(result['statement'].split())[:300]}")
+        for detail in result['plan']:
+            click.echo(f"    {detail}")
+    
+    click.echo(
+        f"\n{len(routes['visited'])} route, {len(results)} query unik, {len(flagged)} dengan full scan"
+    )
+    if flagged and strict:
+        raise SystemExit(1)
+
+
+@click.command('seed-data')
+@click.option('--students', 'num_students', type=int, default=10000, help='Jumlah mahasiswa (default: 10000)')
+@click.option('--semesters', 'num_semesters', type=int, default=4, help='Jumlah semester (default: 4)')
+@click.option('--seed', type=int, default=42, help='Seed random agar dataset bisa direproduksi')
+@click.option('--reset', is_flag=True, help='Hapus dan buat ulang seluruh tabel sebelum seeding')
+@with_appcontext
+def seed_data_command(num_students, num_semesters, seed, reset):
+    """Isi database dengan mahasiswa, billing, dan riwayat pembayaran sintetis"""
+    if reset:
+        click.confirm(f'Hapus seluruh data di {db.engine.url}?', abort=True)
+        db.drop_all()
+        db.create_all()
+    
+    started = time.perf_counter()
+    result = seed_synthetic_data(num_students, num_semesters=num_semesters, seed=seed)
+    elapsed = time.perf_counter() - started
+    
+    statuses = ', '.join(f'{status} {count}' for status, count in result['billing_status'].items())
+    click.echo(
+        f"✅ {result['students']} mahasiswa, {result['billings']} billing ({statuses}), "
+        f"{result['payments']} pembayaran dalam {elapsed:.1f}s; semester aktif {result['semesters'][-1]}"
+    )
+
+
+@click.command('scheduler')
+@with_appcontext
+def scheduler_command():
+    """Jalankan scheduler billing sebagai proses worker tersendiri (web worker: SCHEDULER_ENABLED=false)"""
+    election = setup_billing_scheduler(current_app._get_current_object(), force=True)
+    if election is None:
+        raise click.ClickException('Scheduler gagal dijalankan, lihat log')
+    
+    stop_event = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: stop_event.set())
+    
+    click.echo(f"⏰ Scheduler berjalan sebagai {election.holder_id} (lease {election.name}); Ctrl+C untuk berhenti")
+    while not stop_event.wait(1):
+        pass
+    
+    shutdown_scheduler()
+    click.echo("✅ Scheduler dihentikan, lease dilepas")
+
+
+SCHEDULER_JOBS = {
+    job.job_name: job
+    for job in (generate_billing_job, update_penalty_job, send_reminder_job, purge_idempotency_job)
+}
+
+
+@click.command('run-job')
+@click.argument('job_name', type=click.Choice(sorted(SCHEDULER_JOBS)))
+@with_appcontext
+def run_job_command(job_name):
+    """Jalankan satu job scheduler sekarang (melanjutkan checkpoint run yang gagal/terputus)"""
+    result = SCHEDULER_JOBS[job_name]()
+    run = JobRun.query.filter_by(job_name=job_name).order_by(JobRun.id.desc()).first()
+    
+    if result is None:
+        raise click.ClickException(f"{job_name} gagal atau sedang berjalan di proses lain, lihat log dan tabel job_runs")
+    
+    resumed = f", lanjutan run #{run.resumed_from_id}" if run.resumed_from_id else ''
+    click.echo(
+        f"✅ {job_name} run #{run.id}: {result} baris dalam {run.duration_seconds:.2f}s "
+        f"({run.chunks} chunk, {run.rows_scanned} dibaca, {run.rows_updated} ditulis{resumed})"
+    )
@@ -1,66 +1,175 @@
-# app/config.py
-import os
-from datetime import timedelta
-
-class Config:
-    """Konfigurasi Aplikasi SPP Management"""
-    
-    # Database
-    SQLALCHEMY_DATABASE_URI = 'sqlite:///spp_management.db'
-    SQLALCHEMY_TRACK_MODIFICATIONS = False
-    
-    # Security
-    SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key-change-in-production'
-    
-    # Payment Gateway
-    PAYMENT_GATEWAY_SECRET = os.environ.get('PAYMENT_GATEWAY_SECRET') or 'webhook-secret'
-    
-    # Email Configuration
-    MAIL_SERVER = os.environ.get('MAIL_SERVER') or 'smtp.gmail.com'
-    MAIL_PORT = int(os.environ.get('MAIL_PORT') or 587)
-    MAIL_USE_TLS = os.environ.get('MAIL_USE_TLS') or True
-    MAIL_USERNAME = os.environ.get('MAIL_USERNAME')
-    MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD')
-    
-    # Billing Configuration
-    BILLING_DAYS_BEFORE_DUE = 14  # Due date 2 minggu setelah semester start
-    OVERDUE_PENALTY_PER_DAY = 10000  # Rp 10.000 per hari
-    OVERDUE_MAX_PENALTY = 500000  # Max penalty Rp 500.000
-    
-    # Scheduler Configuration
-    SCHEDULER_API_ENABLED = True
-    SCHEDULER_TIMEZONE = 'Asia/Jakarta'
-    
-    # AI Configuration
-    AI_MODEL = 'gpt-3.5-turbo'  # Bisa diganti dengan model lain
-    
-    # Program Studi dan SPP Amount
-    PROGRAM_STUDI_SPP = {
-        'Teknik Informatika': 5000000,      # Rp 5 juta
-        'Ekonomi': 4000000,                 # Rp 4 juta
-        'Hukum': 3500000,                   # Rp 3.5 juta
-        'Teknik Sipil': 5500000,            # Rp 5.5 juta
-    }
-    
-class DevelopmentConfig(Config):
-    """Development Configuration"""
-    DEBUG = True
-    TESTING = False
-
-class TestingConfig(Config):
-    """Testing Configuration"""
-    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
-    TESTING = True
-    WTF_CSRF_ENABLED = False
-
-class ProductionConfig(Config):
-    """Production Configuration"""
-    DEBUG = False
-    TESTING = False
-
-config = {
-    'development': DevelopmentConfig,
-    'testing': TestingConfig,
-    'production': ProductionConfig,
-    'default': DevelopmentConfig
-}
+# app/config.py
+import os
+from datetime import timedelta
+from flask import current_app, has_app_context
+
+class Config:
+    """Konfigurasi Aplikasi SPP Management"""
+    
+    # Database
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///spp_management.db'
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+    
+    # PRAGMA SQLite per koneksi (app.models.base.apply_sqlite_pragmas), diabaikan untuk DB lain
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS') or 5000)
+    SQLITE_PRAGMAS = {
+        'busy_timeout': SQLITE_BUSY_TIMEOUT_MS,  # Tunggu lock writer lain, bukan langsung "database is locked"
+    }
+    
+    # Security
+    SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key-change-in-production'
+    
+    # Payment Gateway
+    PAYMENT_GATEWAY_SECRET = os.environ.get('PAYMENT_GATEWAY_SECRET') or 'webhook-secret'
+    # Rotasi secret: beberapa secret aktif dipisah koma, yang pertama dipakai untuk signing
+    PAYMENT_GATEWAY_SECRETS = [
+        secret.strip()
+        for secret in (os.environ.get('PAYMENT_GATEWAY_SECRETS') or PAYMENT_GATEWAY_SECRET).split(',')
+        if secret.strip()
+    ]
+    WEBHOOK_SIGNATURE_HEADER = 'X-Signature'  # Hex HMAC-SHA256 atas raw body
+    
+    PAYMENT_MAX_RETRIES = 5  # Retry saat billing diubah transaksi lain (optimistic concurrency)
+    
+    IDEMPOTENCY_CACHE_MAX_ENTRIES = 10000  # Key terbaru yang disimpan di memori (LRU)
+    IDEMPOTENCY_CACHE_TTL = 3600  # Detik entry LRU berlaku; setelah itu dibaca ulang dari tabel
+    IDEMPOTENCY_RETENTION_DAYS = int(os.environ.get('IDEMPOTENCY_RETENTION_DAYS') or 30)  # Umur baris idempotency_keys
+    
+    # Webhook Inbox Configuration
+    WEBHOOK_INBOX_ENABLED = os.environ.get('WEBHOOK_INBOX_ENABLED', 'false').lower() == 'true'
+    WEBHOOK_WORKERS = int(os.environ.get('WEBHOOK_WORKERS') or 2)  # Jumlah thread worker
+    WEBHOOK_BATCH_SIZE = 50  # Jumlah webhook yang diklaim per batch
+    WEBHOOK_POLL_INTERVAL = 1.0  # Detik jeda saat antrian kosong
+    WEBHOOK_LEASE_SECONDS = 300  # Klaim worker dianggap basi setelah ini (worker mati)
+    WEBHOOK_MAX_ATTEMPTS = 5  # Setelah ini webhook masuk dead-letter
+    WEBHOOK_RETRY_BASE_SECONDS = 30  # Backoff: base * 2^(attempt-1)
+    WEBHOOK_RETRY_MAX_SECONDS = 3600
+    WEBHOOK_BATCH_MAX_ITEMS = 1000  # Maksimal notifikasi per request /payment/batch
+    WEBHOOK_BATCH_CHUNK_SIZE = 200  # Notifikasi per transaksi database
+    
+    # Rekonsiliasi Rekening Koran
+    BANK_VA_PREFIX = os.environ.get('BANK_VA_PREFIX') or '8808'  # Nomor VA = prefix + NIM
+    RECONCILIATION_CHUNK_SIZE = 2000  # Baris mutasi per transaksi database
+    STATEMENT_PDF_WORKERS = int(os.environ.get('STATEMENT_PDF_WORKERS') or os.cpu_count() or 1)  # Process extract PDF
+    STATEMENT_PDF_PAGES_PER_TASK = 20  # Halaman per task process pool
+    STATEMENT_CACHE_DIR = os.environ.get('STATEMENT_CACHE_DIR') or os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'instance', 'statement_cache'
+    )  # Cache hasil parse per halaman, per hash file
+    
+    # Pagination
+    PAGINATION_MAX_LIMIT = 500  # Batas atas parameter limit di endpoint list
+    
+    # Export
+    EXPORT_YIELD_PER = 1000  # Baris per fetch cursor saat streaming export
+    EXPORT_GZIP_LEVEL = 6  # Level kompresi export gzip
+    
+    # Instrumentasi query per request (header X-Query-Count / Server-Timing)
+    QUERY_COUNTER_ENABLED = os.environ.get('QUERY_COUNTER_ENABLED', 'true').lower() == 'true'
+    QUERY_COUNTER_REPEAT_THRESHOLD = 5  # Statement identik >= ini per request dicatat sebagai N+1
+    
+    # Metrics Prometheus (GET /metrics)
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+    METRICS_PATH = '/metrics'
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')  # Jika di-set, scrape wajib header Authorization: Bearer <token>
+    
+    # Query Plan Advisor (flask explain-queries)
+    QUERY_PLAN_SCAN_ALLOWED_TABLES = [
+        # Tabel referensi/rekap kecil, full scan lebih murah dari lookup index
+        'program_studi', 'payment_methods', 'semesters', 'billing_status_rollup', 'daily_payment_rollup'
+    ]
+    
+    # Email Configuration
+    MAIL_SERVER = os.environ.get('MAIL_SERVER') or 'smtp.gmail.com'
+    MAIL_PORT = int(os.environ.get('MAIL_PORT') or 587)
+    MAIL_USE_TLS = os.environ.get('MAIL_USE_TLS') or True
+    MAIL_USERNAME = os.environ.get('MAIL_USERNAME')
+    MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD')
+    
+    # Billing Configuration
+    BILLING_DAYS_BEFORE_DUE = 14  # Due date 2 minggu setelah semester start
+    OVERDUE_PENALTY_PER_DAY = 10000  # Rp 10.000 per hari
+    OVERDUE_MAX_PENALTY = 500000  # Max penalty Rp 500.000
+    BILLING_BULK_CHUNK_SIZE = 1000  # Jumlah baris per bulk insert billing
+    
+    # Dashboard Cache Configuration
+    DASHBOARD_CACHE_ENABLED = True
+    DASHBOARD_CACHE_TTL = 30  # Detik, batas basi untuk perubahan dari proses lain
+    DASHBOARD_CACHE_MAX_ENTRIES = 256
+    
+    # Scheduler Configuration
+    SCHEDULER_API_ENABLED = True
+    SCHEDULER_TIMEZONE = 'Asia/Jakarta'
+    # false di web worker jika scheduler dijalankan terpisah lewat `flask scheduler`
+    SCHEDULER_ENABLED = os.environ.get('SCHEDULER_ENABLED', 'true').lower() == 'true'
+    SCHEDULER_LEASE_NAME = 'billing-scheduler'
+    SCHEDULER_LEASE_TTL = int(os.environ.get('SCHEDULER_LEASE_TTL') or 60)  # Detik sampai failover jika leader mati
+    SCHEDULER_HEARTBEAT_INTERVAL = int(os.environ.get('SCHEDULER_HEARTBEAT_INTERVAL') or 15)
+    JOB_CHUNK_SIZE = 1000  # Baris per chunk (satu commit + checkpoint) job scheduler
+    JOB_RUN_STALE_SECONDS = 300  # Run 'running' tanpa commit chunk selama ini dianggap crash
+    JOB_RUN_RESUME_MAX_AGE = 6 * 3600  # Run gagal/crash yang lebih tua dari ini tidak dilanjutkan
+    
+    # AI Configuration
+    AI_MODEL = 'gpt-3.5-turbo'  # Bisa diganti dengan model lain
+    
+    # Program Studi dan SPP Amount
+    PROGRAM_STUDI_SPP = {
+        'Teknik Informatika': 5000000,      # Rp 5 juta
+        'Ekonomi': 4000000,                 # Rp 4 juta
+        'Hukum': 3500000,                   # Rp 3.5 juta
+        'Teknik Sipil': 5500000,            # Rp 5.5 juta
+    }
+
+class DevelopmentConfig(Config):
+    """Development Configuration"""
+    DEBUG = True
+    TESTING = False
+
+class TestingConfig(Config):
+    """Testing Configuration"""
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    TESTING = True
+    WTF_CSRF_ENABLED = False
+    SCHEDULER_ENABLED = False
+
+class ProductionConfig(Config):
+    """Production Configuration"""
+    DEBUG = False
+    TESTING = False
+    
+    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///spp_management.db'
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        # Worker Flask, thread scheduler dan webhook worker masing-masing butuh koneksi
+        'pool_size': int(os.environ.get('DB_POOL_SIZE') or 10),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW') or 10),
+        'pool_timeout': 30,
+        'pool_pre_ping': True,
+    }
+    
+    # WAL: pembaca tidak diblok writer dan sebaliknya, hanya writer yang antri satu per satu
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',  # Aman di WAL: commit hanya bisa hilang saat OS crash, DB tidak korup
+        'busy_timeout': Config.SQLITE_BUSY_TIMEOUT_MS,
+        'cache_size': -int(os.environ.get('SQLITE_CACHE_SIZE_KB') or 65536),  # Negatif = KiB per koneksi
+        'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE') or 268435456),  # 256 MB read lewat mmap
+        'temp_store': 'MEMORY',
+        'journal_size_limit': 67108864,  # Potong file -wal ke 64 MB setelah checkpoint
+    }
+
+config = {
+    'development': DevelopmentConfig,
+    'testing': TestingConfig,
+    'production': ProductionConfig,
+    'default': DevelopmentConfig
+}
+
+
+def get_config_value(name):
+    """
+    Nilai konfigurasi dari app aktif (termasuk config_overrides), atau
+    default Config jika dipanggil di luar app context (mis. CLI extract PDF)
+    """
+    if has_app_context():
+        return current_app.config[name]
+    return getattr(Config, name)
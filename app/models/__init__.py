@@ -1,15 +1,26 @@
-# app/models/__init__.py
-from .base import db
-from .student import Student, ProgramStudi
-from .billing import Billing
-from .payment import Payment
-from .payment_method import PaymentMethod
-
-__all__ = [
-    'db',
-    'Student',
-    'Billing',
-    'Payment',
-    'PaymentMethod',
-    'ProgramStudi'
-]
+# app/models/__init__.py
+from .base import db
+from .student import Student, ProgramStudi
+from .billing import Billing
+from .payment import Payment
+from .payment_method import PaymentMethod
+from .rollup import DailyPaymentRollup, BillingStatusRollup
+from .webhook_inbox import WebhookInbox
+from .idempotency import IdempotencyKey
+from .scheduler_lease import SchedulerLease
+from .job_run import JobRun
+
+__all__ = [
+    'db',
+    'Student',
+    'Billing',
+    'Payment',
+    'PaymentMethod',
+    'ProgramStudi',
+    'DailyPaymentRollup',
+    'BillingStatusRollup',
+    'WebhookInbox',
+    'IdempotencyKey',
+    'SchedulerLease',
+    'JobRun'
+]
@@ -1,5 +1,98 @@
-# app/models/base.py
-from flask_sqlalchemy import SQLAlchemy
-
-# Single instance untuk semua models
-db = SQLAlchemy()
+# app/models/base.py
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import Float, Integer, event
+from sqlalchemy.exc import CompileError
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+
+# Single instance untuk semua models
+db = SQLAlchemy()
+
+
+class days_between(FunctionElement):
+    """
+    Selisih dua DateTime dalam hari (pecahan), dikompilasi per dialect
+    
+    days_between(end, start) -> julianday(end) - julianday(start) di SQLite,
+    EXTRACT(EPOCH ...) di PostgreSQL, TIMESTAMPDIFF di MySQL.
+    """
+    type = Float()
+    name = 'days_between'
+    inherit_cache = True
+
+
+class whole_days_between(FunctionElement):
+    """Selisih dua DateTime dalam hari penuh, dibulatkan ke bawah (seperti timedelta.days untuk nilai positif)"""
+    type = Integer()
+    name = 'whole_days_between'
+    inherit_cache = True
+
+
+@compiles(days_between)
+@compiles(whole_days_between)
+def _compile_days_between_default(element, compiler, **kw):
+    raise CompileError(f"{element.name}() belum didukung untuk database {compiler.dialect.name}")
+
+
+@compiles(days_between, 'sqlite')
+def _compile_days_between_sqlite(element, compiler, **kw):
+    end, start = list(element.clauses)
+    return f"(julianday({compiler.process(end, **kw)}) - julianday({compiler.process(start, **kw)}))"
+
+
+@compiles(whole_days_between, 'sqlite')
+def _compile_whole_days_between_sqlite(element, compiler, **kw):
+    return f"CAST({_compile_days_between_sqlite(element, compiler, **kw)} AS INTEGER)"
+
+
+@compiles(days_between, 'postgresql')
+def _compile_days_between_postgresql(element, compiler, **kw):
+    end, start = list(element.clauses)
+    return f"(EXTRACT(EPOCH FROM ({compiler.process(end, **kw)} - {compiler.process(start, **kw)})) / 86400.0)"
+
+
+@compiles(whole_days_between, 'postgresql')
+def _compile_whole_days_between_postgresql(element, compiler, **kw):
+    return f"CAST(FLOOR({_compile_days_between_postgresql(element, compiler, **kw)}) AS INTEGER)"
+
+
+@compiles(days_between, 'mysql')
+def _compile_days_between_mysql(element, compiler, **kw):
+    end, start = list(element.clauses)
+    return f"(TIMESTAMPDIFF(MICROSECOND, {compiler.process(start, **kw)}, {compiler.process(end, **kw)}) / 86400000000.0)"
+
+
+@compiles(whole_days_between, 'mysql')
+def _compile_whole_days_between_mysql(element, compiler, **kw):
+    return f"FLOOR({_compile_days_between_mysql(element, compiler, **kw)})"
+
+
+def apply_sqlite_pragmas(engine, pragmas):
+    """
+    Set PRAGMA SQLite di setiap koneksi baru dari engine
+    
+    PRAGMA seperti busy_timeout, synchronous dan cache_size berlaku per
+    koneksi, jadi harus dijalankan lewat event connect (bukan sekali saat
+    startup). Engine non-SQLite diabaikan.
+    
+    Args:
+        engine: SQLAlchemy engine
+        pragmas: dict nama PRAGMA -> nilai, misal {'journal_mode': 'WAL'}
+    """
+    if engine.dialect.name != 'sqlite' or not pragmas:
+        return
+    
+    @event.listens_for(engine, 'connect')
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f'PRAGMA {name}={value}')
+        finally:
+            cursor.close()
+
+
+def init_sqlite_pragmas(app):
+    """Pasang SQLITE_PRAGMAS dari konfigurasi ke engine aplikasi"""
+    with app.app_context():
+        apply_sqlite_pragmas(db.engine, app.config.get('SQLITE_PRAGMAS'))
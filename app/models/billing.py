@@ -1,86 +1,128 @@
-# app/models/billing.py
-from app.models.base import db
-from datetime import datetime
-
-class Billing(db.Model):
-    """Model untuk data tagihan SPP"""
-    __tablename__ = 'billings'
-    
-    # Status: unpaid, partial, paid, overdue
-    STATUS_UNPAID = 'unpaid'
-    STATUS_PARTIAL = 'partial'
-    STATUS_PAID = 'paid'
-    STATUS_OVERDUE = 'overdue'
-    
-    VALID_STATUSES = [STATUS_UNPAID, STATUS_PARTIAL, STATUS_PAID, STATUS_OVERDUE]
-    
-    id = db.Column(db.Integer, primary_key=True)
-    student_id = db.Column(db.Integer, db.ForeignKey('students.id'), nullable=False, index=True)
-    semester = db.Column(db.String(20), nullable=False)  # e.g., "2023/2024-Ganjil"
-    total_amount = db.Column(db.Integer, nullable=False)  # Total SPP
-    paid_amount = db.Column(db.Integer, default=0)  # Sudah dibayar
-    remaining_amount = db.Column(db.Integer, nullable=False)  # Sisa pembayaran
-    penalty = db.Column(db.Integer, default=0)  # Denda keterlambatan
-    status = db.Column(db.String(20), default=STATUS_UNPAID)  # Status pembayaran
-    due_date = db.Column(db.DateTime, nullable=False)
-    last_payment_date = db.Column(db.DateTime)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-    
-    # Relationships
-    payments = db.relationship('Payment', backref='billing', cascade='all, delete-orphan')
-    
-    def __repr__(self):
-        return f'<Billing {self.semester} - {self.status}>'
-    
-    @property
-    def is_overdue(self):
-        """Cek apakah tagihan sudah melampaui due date"""
-        return datetime.utcnow() > self.due_date and self.status != self.STATUS_PAID
-    
-    @property
-    def days_overdue(self):
-        """Hitung berapa hari tagihan terlambat"""
-        if not self.is_overdue:
-            return 0
-        return (datetime.utcnow() - self.due_date).days
-    
-    def calculate_penalty(self, penalty_per_day, max_penalty):
-        """Hitung denda keterlambatan"""
-        if not self.is_overdue:
-            return 0
-        
-        days = self.days_overdue
-        calculated_penalty = days * penalty_per_day
-        
-        # Jangan melebihi max penalty
-        return min(calculated_penalty, max_penalty)
-    
-    def update_status(self):
-        """Update status berdasarkan jumlah pembayaran"""
-        if self.paid_amount == 0:
-            self.status = self.STATUS_UNPAID
-        elif self.paid_amount < self.total_amount:
-            self.status = self.STATUS_PARTIAL
-        else:
-            self.status = self.STATUS_PAID
-        
-        # Cek jika overdue
-        if self.is_overdue and self.status != self.STATUS_PAID:
-            self.status = self.STATUS_OVERDUE
-
-
-class Semester(db.Model):
-    """Model untuk data semester"""
-    __tablename__ = 'semesters'
-    
-    id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(50), unique=True, nullable=False)  # e.g., "2023/2024-Ganjil"
-    start_date = db.Column(db.DateTime, nullable=False)
-    end_date = db.Column(db.DateTime, nullable=False)
-    billing_generation_date = db.Column(db.DateTime)  # Tanggal tagihan dibuat
-    is_active = db.Column(db.Boolean, default=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    
-    def __repr__(self):
-        return f'<Semester {self.name}>'
+# app/models/billing.py
+from app.models.base import db
+from app.models.student import Student
+from datetime import datetime
+from sqlalchemy import event, inspect
+
+class Billing(db.Model):
+    """Model untuk data tagihan SPP"""
+    __tablename__ = 'billings'
+    __table_args__ = (
+        # Filter status per mahasiswa dan billing terakhir per mahasiswa
+        db.Index('ix_billings_student_status', 'student_id', 'status'),
+        db.Index('ix_billings_student_created', 'student_id', 'created_at'),
+        # Keyset pagination billing outstanding per status, terbaru dulu
+        db.Index('ix_billings_status_created_id', 'status', 'created_at', 'id'),
+        # Export per semester dibaca berurutan id tanpa sort
+        db.Index('ix_billings_semester_id', 'semester', 'id'),
+        # Cek billing semester berjalan per mahasiswa (generate billing, KRS)
+        db.Index('ix_billings_student_semester', 'student_id', 'semester'),
+        # Job denda/reminder: billing terbuka yang lewat jatuh tempo
+        db.Index('ix_billings_status_due_date', 'status', 'due_date'),
+    )
+    
+    # Status: unpaid, partial, paid, overdue
+    STATUS_UNPAID = 'unpaid'
+    STATUS_PARTIAL = 'partial'
+    STATUS_PAID = 'paid'
+    STATUS_OVERDUE = 'overdue'
+    
+    VALID_STATUSES = [STATUS_UNPAID, STATUS_PARTIAL, STATUS_PAID, STATUS_OVERDUE]
+    OPEN_STATUSES = [STATUS_UNPAID, STATUS_PARTIAL, STATUS_OVERDUE]
+    
+    id = db.Column(db.Integer, primary_key=True)
+    student_id = db.Column(db.Integer, db.ForeignKey('students.id'), nullable=False, index=True)
+    semester = db.Column(db.String(20), nullable=False)  # e.g., "2023/2024-Ganjil"
+    total_amount = db.Column(db.Integer, nullable=False)  # Total SPP
+    paid_amount = db.Column(db.Integer, default=0)  # Sudah dibayar
+    remaining_amount = db.Column(db.Integer, nullable=False)  # Sisa pembayaran
+    penalty = db.Column(db.Integer, default=0)  # Denda keterlambatan
+    status = db.Column(db.String(20), default=STATUS_UNPAID)  # Status pembayaran
+    due_date = db.Column(db.DateTime, nullable=False)
+    last_payment_date = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    version = db.Column(db.Integer, nullable=False, default=1)  # Optimistic concurrency
+    
+    __mapper_args__ = {'version_id_col': version}
+    
+    # Relationships
+    payments = db.relationship('Payment', backref='billing', cascade='all, delete-orphan')
+    
+    def __repr__(self):
+        return f'<Billing {self.semester} - {self.status}>'
+    
+    @property
+    def is_overdue(self):
+        """Cek apakah tagihan sudah melampaui due date"""
+        return datetime.utcnow() > self.due_date and self.status != self.STATUS_PAID
+    
+    @property
+    def days_overdue(self):
+        """Hitung berapa hari tagihan terlambat"""
+        if not self.is_overdue:
+            return 0
+        return (datetime.utcnow() - self.due_date).days
+    
+    def calculate_penalty(self, penalty_per_day, max_penalty):
+        """Hitung denda keterlambatan"""
+        if not self.is_overdue:
+            return 0
+        
+        days = self.days_overdue
+        calculated_penalty = days * penalty_per_day
+        
+        # Jangan melebihi max penalty
+        return min(calculated_penalty, max_penalty)
+    
+    def update_status(self):
+        """Update status berdasarkan jumlah pembayaran"""
+        if self.paid_amount == 0:
+            self.status = self.STATUS_UNPAID
+        elif self.paid_amount < self.total_amount:
+            self.status = self.STATUS_PARTIAL
+        else:
+            self.status = self.STATUS_PAID
+        
+        # Cek jika overdue
+        if self.is_overdue and self.status != self.STATUS_PAID:
+            self.status = self.STATUS_OVERDUE
+
+
+# Jaga Student.outstanding_amount / krs_blocked tetap sinkron untuk setiap
+# perubahan billing lewat ORM, di dalam transaksi flush yang sama.
+# Jalur bulk (Core insert/update) memanggil Student.refresh_outstanding sendiri.
+@event.listens_for(Billing, 'after_insert')
+@event.listens_for(Billing, 'after_delete')
+def _refresh_student_outstanding(mapper, connection, target):
+    Student.refresh_outstanding([target.student_id], connection=connection)
+
+
+@event.listens_for(Billing, 'after_update')
+def _refresh_student_outstanding_on_update(mapper, connection, target):
+    state = inspect(target)
+    if not any(
+        state.attrs[attr].history.has_changes()
+        for attr in ('remaining_amount', 'status', 'student_id')
+    ):
+        return
+    
+    student_ids = {target.student_id}
+    student_ids.update(state.attrs.student_id.history.deleted or [])
+    Student.refresh_outstanding(student_ids, connection=connection)
+
+
+class Semester(db.Model):
+    """Model untuk data semester"""
+    __tablename__ = 'semesters'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(50), unique=True, nullable=False)  # e.g., "2023/2024-Ganjil"
+    start_date = db.Column(db.DateTime, nullable=False)
+    end_date = db.Column(db.DateTime, nullable=False)
+    billing_generation_date = db.Column(db.DateTime)  # Tanggal tagihan dibuat
+    is_active = db.Column(db.Boolean, default=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<Semester {self.name}>'
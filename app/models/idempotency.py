@@ -0,0 +1,21 @@
+# app/models/idempotency.py
+from app.models.base import db
+from datetime import datetime
+
+class IdempotencyKey(db.Model):
+    """Model untuk response tersimpan per idempotency key (replay request ganda)"""
+    __tablename__ = 'idempotency_keys'
+    __table_args__ = (
+        db.UniqueConstraint('scope', 'key', name='uq_idempotency_keys_scope_key'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    scope = db.Column(db.String(50), nullable=False)  # Nama endpoint, e.g. "payment.process"
+    key = db.Column(db.String(128), nullable=False)  # transaction_id atau header Idempotency-Key
+    request_hash = db.Column(db.String(64))  # SHA-256 body request pertama
+    status_code = db.Column(db.Integer, nullable=False)
+    response_body = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    
+    def __repr__(self):
+        return f'<IdempotencyKey {self.scope}:{self.key} - {self.status_code}>'
@@ -0,0 +1,62 @@
+# app/models/job_run.py
+from app.models.base import db
+from datetime import datetime
+
+class JobRun(db.Model):
+    """Model untuk riwayat run job scheduler: statistik dan checkpoint per chunk"""
+    __tablename__ = 'job_runs'
+    __table_args__ = (
+        db.Index('ix_job_runs_job_name_id', 'job_name', 'id'),
+    )
+    
+    # Status run
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCESS = 'success'
+    STATUS_FAILED = 'failed'
+    STATUS_INTERRUPTED = 'interrupted'  # Proses mati di tengah run, dilanjutkan run berikutnya
+    
+    VALID_STATUSES = [STATUS_RUNNING, STATUS_SUCCESS, STATUS_FAILED, STATUS_INTERRUPTED]
+    
+    id = db.Column(db.Integer, primary_key=True)
+    job_name = db.Column(db.String(50), nullable=False)  # e.g. "update_penalty_job"
+    status = db.Column(db.String(20), nullable=False, default=STATUS_RUNNING)
+    holder = db.Column(db.String(128))  # Proses yang menjalankan run
+    
+    # Parameter run (mis. timestamp as-of) dan posisi terakhir yang sudah di-commit
+    params = db.Column(db.JSON)
+    checkpoint = db.Column(db.JSON)
+    resumed_from_id = db.Column(db.Integer, db.ForeignKey('job_runs.id'))
+    
+    # Statistik
+    chunks = db.Column(db.Integer, nullable=False, default=0)
+    rows_scanned = db.Column(db.Integer, nullable=False, default=0)
+    rows_updated = db.Column(db.Integer, nullable=False, default=0)
+    duration_seconds = db.Column(db.Float)
+    error = db.Column(db.Text)
+    
+    started_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    heartbeat_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)  # Commit chunk terakhir
+    finished_at = db.Column(db.DateTime)
+    
+    def __repr__(self):
+        return f'<JobRun {self.job_name} #{self.id} - {self.status}>'
+    
+    def to_dict(self):
+        """Convert to dictionary"""
+        return {
+            'id': self.id,
+            'job_name': self.job_name,
+            'status': self.status,
+            'holder': self.holder,
+            'params': self.params,
+            'checkpoint': self.checkpoint,
+            'resumed_from_id': self.resumed_from_id,
+            'chunks': self.chunks,
+            'rows_scanned': self.rows_scanned,
+            'rows_updated': self.rows_updated,
+            'duration_seconds': self.duration_seconds,
+            'error': self.error,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'heartbeat_at': self.heartbeat_at.isoformat() if self.heartbeat_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
@@ -0,0 +1,67 @@
+# app/models/migrations.py
+from sqlalchemy import inspect, text
+from app.models.base import db
+from app.utils.logger import logger
+
+# Kolom yang ditambahkan setelah tabel awal dibuat.
+# db.create_all() tidak mengubah tabel yang sudah ada, jadi database lama
+# (misal instance/spp_management.db) di-upgrade lewat ALTER TABLE di sini.
+ADDED_COLUMNS = [
+    ('students', 'outstanding_amount', 'INTEGER NOT NULL DEFAULT 0'),
+    ('students', 'krs_blocked', 'BOOLEAN NOT NULL DEFAULT 0'),
+    ('billings', 'version', 'INTEGER NOT NULL DEFAULT 1'),
+    ('payment_reconciliations', 'statement_line_hash', 'VARCHAR(40)'),
+    ('webhook_inbox', 'raw_body', 'TEXT'),
+]
+
+
+def upgrade_schema():
+    """
+    Upgrade skema database yang sudah ada agar sesuai dengan models
+    
+    - Tambahkan kolom baru yang belum ada
+    - Buat index yang dideklarasikan di models tapi belum ada
+    - Isi ulang data denormalisasi untuk kolom yang baru ditambahkan
+    
+    Returns:
+        list: Daftar perubahan yang dilakukan
+    """
+    inspector = inspect(db.engine)
+    existing_tables = set(inspector.get_table_names())
+    changes = []
+    
+    with db.engine.begin() as connection:
+        for table_name, column_name, ddl in ADDED_COLUMNS:
+            if table_name not in existing_tables:
+                continue
+            columns = {c['name'] for c in inspector.get_columns(table_name)}
+            if column_name not in columns:
+                connection.execute(text(f'ALTER TABLE {table_name} ADD COLUMN {column_name} {ddl}'))
+                changes.append(f'{table_name}.{column_name}')
+        
+        for table in db.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing_indexes = {i['name'] for i in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing_indexes:
+                    index.create(connection)
+                    changes.append(index.name)
+    
+    if 'students.outstanding_amount' in changes:
+        from app.models.student import Student
+        Student.refresh_outstanding()
+        db.session.commit()
+    
+    # Tabel rekap yang baru dibuat masih kosong padahal data sudah ada
+    from app.models.billing import Billing
+    from app.models.rollup import BillingStatusRollup, rebuild_rollups
+    if db.session.query(Billing.id).first() and not db.session.query(BillingStatusRollup.id).first():
+        rebuild_rollups()
+        db.session.commit()
+        changes.append('rollups')
+    
+    if changes:
+        logger.info(f"Database schema upgraded: {', '.join(changes)}")
+    
+    return changes
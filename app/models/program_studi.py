@@ -1,3 +1,3 @@
-# app/models/program_studi.py
-# Ini didefinisikan di student.py karena sudah ada ProgramStudi model
-# File ini hanya untuk referensi
+# app/models/program_studi.py
+# Ini didefinisikan di student.py karena sudah ada ProgramStudi model
+# File ini hanya untuk referensi
@@ -0,0 +1,307 @@
+# app/models/rollup.py
+from app.models.base import db
+from app.models.student import Student
+from app.models.billing import Billing
+from app.models.payment import Payment
+from datetime import datetime
+from sqlalchemy import event, func, insert, inspect, select, update
+
+class DailyPaymentRollup(db.Model):
+    """Rekap pembayaran terkonfirmasi per hari, program studi, dan metode pembayaran"""
+    __tablename__ = 'daily_payment_rollup'
+    __table_args__ = (
+        db.UniqueConstraint('date', 'program_studi_id', 'payment_method_id', name='uq_daily_payment_rollup'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    date = db.Column(db.Date, nullable=False, index=True)
+    program_studi_id = db.Column(db.Integer, db.ForeignKey('program_studi.id'))
+    payment_method_id = db.Column(db.Integer, db.ForeignKey('payment_methods.id'))
+    count = db.Column(db.Integer, nullable=False, default=0)
+    amount = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<DailyPaymentRollup {self.date} - {self.count}x Rp {self.amount:,}>'
+    
+    @classmethod
+    def apply_delta(cls, executor, date, program_studi_id, payment_method_id, count, amount):
+        """
+        Tambahkan delta ke satu baris rekap (update, atau insert jika belum ada)
+        
+        Args:
+            executor: db.session atau Connection yang sedang flush
+            date: Tanggal konfirmasi pembayaran
+            program_studi_id: ID program studi mahasiswa
+            payment_method_id: ID metode pembayaran
+            count: Delta jumlah pembayaran
+            amount: Delta total nominal
+        """
+        table = cls.__table__
+        key = {
+            'date': date,
+            'program_studi_id': program_studi_id,
+            'payment_method_id': payment_method_id
+        }
+        _upsert_delta(executor, table, key, {'count': count, 'amount': amount})
+
+
+class BillingStatusRollup(db.Model):
+    """Rekap billing per semester, program studi, dan status"""
+    __tablename__ = 'billing_status_rollup'
+    __table_args__ = (
+        db.UniqueConstraint('semester', 'program_studi_id', 'status', name='uq_billing_status_rollup'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    semester = db.Column(db.String(20), nullable=False)
+    program_studi_id = db.Column(db.Integer, db.ForeignKey('program_studi.id'))
+    status = db.Column(db.String(20), nullable=False, index=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    total = db.Column(db.Integer, nullable=False, default=0)
+    remaining = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<BillingStatusRollup {self.semester} {self.status} - {self.count}>'
+    
+    @classmethod
+    def apply_delta(cls, executor, semester, program_studi_id, status, count, total, remaining):
+        """
+        Tambahkan delta ke satu baris rekap (update, atau insert jika belum ada)
+        
+        Args:
+            executor: db.session atau Connection yang sedang flush
+            semester: Nama semester billing
+            program_studi_id: ID program studi mahasiswa
+            status: Status billing
+            count: Delta jumlah billing
+            total: Delta total_amount
+            remaining: Delta remaining_amount
+        """
+        table = cls.__table__
+        key = {
+            'semester': semester,
+            'program_studi_id': program_studi_id,
+            'status': status
+        }
+        _upsert_delta(executor, table, key, {'count': count, 'total': total, 'remaining': remaining})
+
+
+def _payment_day():
+    """
+    Tanggal pembayaran (konfirmasi, bayar, atau dibuat) sebagai ekspresi SQL
+    
+    Bertipe Date agar hasilnya selalu objek date: SQLite mengembalikan string
+    ISO yang di-parse oleh tipe Date, driver lain sudah mengembalikan date.
+    """
+    return func.date(
+        func.coalesce(Payment.confirmation_date, Payment.payment_date, Payment.created_at),
+        type_=db.Date
+    )
+
+
+def _upsert_delta(executor, table, key, deltas):
+    """UPDATE kolom += delta pada baris dengan key tertentu, INSERT jika belum ada"""
+    if not any(deltas.values()):
+        return
+    
+    result = executor.execute(
+        update(table)
+        .where(*[table.c[name] == value for name, value in key.items()])
+        .values({name: table.c[name] + value for name, value in deltas.items()})
+    )
+    if result.rowcount == 0:
+        executor.execute(insert(table).values(**key, **deltas))
+
+
+def rebuild_rollups():
+    """
+    Bangun ulang seluruh tabel rekap dari billings dan payments
+    
+    Returns:
+        dict: {billing_groups: int, payment_groups: int}
+    """
+    billing_rollup = BillingStatusRollup.__table__
+    payment_rollup = DailyPaymentRollup.__table__
+    
+    db.session.execute(billing_rollup.delete())
+    db.session.execute(payment_rollup.delete())
+    
+    db.session.execute(
+        insert(billing_rollup).from_select(
+            ['semester', 'program_studi_id', 'status', 'count', 'total', 'remaining'],
+            select(
+                Billing.semester,
+                Student.program_studi_id,
+                Billing.status,
+                func.count(Billing.id),
+                func.coalesce(func.sum(Billing.total_amount), 0),
+                func.coalesce(func.sum(Billing.remaining_amount), 0)
+            ).join(Student, Billing.student_id == Student.id)
+            .group_by(Billing.semester, Student.program_studi_id, Billing.status)
+        )
+    )
+    
+    payment_date = _payment_day()
+    payment_rows = db.session.execute(
+        select(
+            payment_date,
+            Student.program_studi_id,
+            Payment.payment_method_id,
+            func.count(Payment.id),
+            func.coalesce(func.sum(Payment.amount), 0)
+        ).join(Student, Payment.student_id == Student.id)
+        .where(Payment.status == Payment.STATUS_CONFIRMED)
+        .group_by(payment_date, Student.program_studi_id, Payment.payment_method_id)
+    ).all()
+    
+    if payment_rows:
+        db.session.execute(insert(payment_rollup), [
+            {
+                'date': day,
+                'program_studi_id': program_studi_id,
+                'payment_method_id': payment_method_id,
+                'count': count,
+                'amount': amount
+            }
+            for day, program_studi_id, payment_method_id, count, amount in payment_rows
+        ])
+    
+    billing_groups = db.session.query(func.count(BillingStatusRollup.id)).scalar()
+    return {'billing_groups': billing_groups, 'payment_groups': len(payment_rows)}
+
+
+# ============================================================
+# INCREMENTAL MAINTENANCE
+# Perubahan lewat ORM dijaga oleh mapper event di bawah, di dalam flush yang
+# sama. Jalur bulk (Core insert/update) memanggil apply_delta sendiri.
+# ============================================================
+
+BILLING_ROLLUP_ATTRS = ('semester', 'student_id', 'status', 'total_amount', 'remaining_amount')
+PAYMENT_ROLLUP_ATTRS = ('student_id', 'payment_method_id', 'status', 'amount',
+                        'confirmation_date', 'payment_date', 'created_at')
+
+
+def _committed_values(target, attrs):
+    """Nilai atribut sebelum perubahan yang sedang di-flush"""
+    state = inspect(target)
+    values = {}
+    for attr in attrs:
+        history = state.attrs[attr].history
+        values[attr] = history.deleted[0] if history.deleted else getattr(target, attr)
+    return values
+
+
+def _current_values(target, attrs):
+    return {attr: getattr(target, attr) for attr in attrs}
+
+
+def _has_changes(target, attrs):
+    state = inspect(target)
+    return any(state.attrs[attr].history.has_changes() for attr in attrs)
+
+
+def _program_studi_id(connection, student_id):
+    return connection.execute(
+        select(Student.program_studi_id).where(Student.id == student_id)
+    ).scalar()
+
+
+def _apply_billing(connection, values, sign):
+    BillingStatusRollup.apply_delta(
+        connection,
+        values['semester'],
+        _program_studi_id(connection, values['student_id']),
+        values['status'],
+        sign,
+        sign * (values['total_amount'] or 0),
+        sign * (values['remaining_amount'] or 0)
+    )
+
+
+def _apply_payment(connection, values, sign):
+    if values['status'] != Payment.STATUS_CONFIRMED:
+        return
+    
+    paid_at = values['confirmation_date'] or values['payment_date'] or values['created_at'] or datetime.utcnow()
+    DailyPaymentRollup.apply_delta(
+        connection,
+        paid_at.date(),
+        _program_studi_id(connection, values['student_id']),
+        values['payment_method_id'],
+        sign,
+        sign * (values['amount'] or 0)
+    )
+
+
+@event.listens_for(Billing, 'after_insert')
+def _billing_rollup_insert(mapper, connection, target):
+    _apply_billing(connection, _current_values(target, BILLING_ROLLUP_ATTRS), 1)
+
+
+@event.listens_for(Billing, 'after_update')
+def _billing_rollup_update(mapper, connection, target):
+    if not _has_changes(target, BILLING_ROLLUP_ATTRS):
+        return
+    _apply_billing(connection, _committed_values(target, BILLING_ROLLUP_ATTRS), -1)
+    _apply_billing(connection, _current_values(target, BILLING_ROLLUP_ATTRS), 1)
+
+
+@event.listens_for(Billing, 'after_delete')
+def _billing_rollup_delete(mapper, connection, target):
+    _apply_billing(connection, _committed_values(target, BILLING_ROLLUP_ATTRS), -1)
+
+
+@event.listens_for(Payment, 'after_insert')
+def _payment_rollup_insert(mapper, connection, target):
+    _apply_payment(connection, _current_values(target, PAYMENT_ROLLUP_ATTRS), 1)
+
+
+@event.listens_for(Payment, 'after_update')
+def _payment_rollup_update(mapper, connection, target):
+    if not _has_changes(target, PAYMENT_ROLLUP_ATTRS):
+        return
+    _apply_payment(connection, _committed_values(target, PAYMENT_ROLLUP_ATTRS), -1)
+    _apply_payment(connection, _current_values(target, PAYMENT_ROLLUP_ATTRS), 1)
+
+
+@event.listens_for(Payment, 'after_delete')
+def _payment_rollup_delete(mapper, connection, target):
+    _apply_payment(connection, _committed_values(target, PAYMENT_ROLLUP_ATTRS), -1)
+
+
+@event.listens_for(Student, 'after_update')
+def _student_program_changed(mapper, connection, target):
+    """Pindahkan rekap billing dan pembayaran mahasiswa saat program studinya berubah"""
+    history = inspect(target).attrs.program_studi_id.history
+    if not history.has_changes() or not history.deleted:
+        return
+    
+    old_program, new_program = history.deleted[0], target.program_studi_id
+    
+    billing_groups = connection.execute(
+        select(
+            Billing.semester,
+            Billing.status,
+            func.count(Billing.id),
+            func.sum(Billing.total_amount),
+            func.sum(Billing.remaining_amount)
+        ).where(Billing.student_id == target.id)
+        .group_by(Billing.semester, Billing.status)
+    ).all()
+    for semester, status, count, total, remaining in billing_groups:
+        BillingStatusRollup.apply_delta(connection, semester, old_program, status, -count, -total, -remaining)
+        BillingStatusRollup.apply_delta(connection, semester, new_program, status, count, total, remaining)
+    
+    payment_date = _payment_day()
+    payment_groups = connection.execute(
+        select(
+            payment_date,
+            Payment.payment_method_id,
+            func.count(Payment.id),
+            func.sum(Payment.amount)
+        ).where(Payment.student_id == target.id, Payment.status == Payment.STATUS_CONFIRMED)
+        .group_by(payment_date, Payment.payment_method_id)
+    ).all()
+    for day, payment_method_id, count, amount in payment_groups:
+        DailyPaymentRollup.apply_delta(connection, day, old_program, payment_method_id, -count, -amount)
+        DailyPaymentRollup.apply_delta(connection, day, new_program, payment_method_id, count, amount)
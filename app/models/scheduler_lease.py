@@ -0,0 +1,25 @@
+# app/models/scheduler_lease.py
+from app.models.base import db
+from datetime import datetime
+
+class SchedulerLease(db.Model):
+    """Model untuk lease leader scheduler: satu baris per lease, dipegang satu proses"""
+    __tablename__ = 'scheduler_leases'
+    
+    name = db.Column(db.String(50), primary_key=True)  # e.g. "billing-scheduler"
+    holder = db.Column(db.String(128))  # host-pid-uuid proses leader, NULL jika dilepas
+    acquired_at = db.Column(db.DateTime)  # Awal masa kepemimpinan holder saat ini
+    heartbeat_at = db.Column(db.DateTime)  # Perpanjangan terakhir
+    expires_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<SchedulerLease {self.name} - {self.holder}>'
+    
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'holder': self.holder,
+            'acquired_at': self.acquired_at.isoformat() if self.acquired_at else None,
+            'heartbeat_at': self.heartbeat_at.isoformat() if self.heartbeat_at else None,
+            'expires_at': self.expires_at.isoformat() if self.expires_at else None
+        }
@@ -1,61 +1,103 @@
-# app/models/student.py
-from app.models.base import db
-from datetime import datetime
-
-class Student(db.Model):
-    """Model untuk data mahasiswa"""
-    __tablename__ = 'students'
-    
-    id = db.Column(db.Integer, primary_key=True)
-    nim = db.Column(db.String(20), unique=True, nullable=False, index=True)
-    name = db.Column(db.String(100), nullable=False)
-    email = db.Column(db.String(100), unique=True, nullable=False)
-    phone = db.Column(db.String(15))
-    program_studi_id = db.Column(db.Integer, db.ForeignKey('program_studi.id'), nullable=False)
-    status = db.Column(db.String(20), default='active')  # active, inactive, graduated
-    registration_date = db.Column(db.DateTime, default=datetime.utcnow)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-    
-    # Relationships
-    program_studi = db.relationship('ProgramStudi', backref='students')
-    billings = db.relationship('Billing', backref='student', cascade='all, delete-orphan')
-    payments = db.relationship('Payment', backref='student', cascade='all, delete-orphan')
-    
-    def __repr__(self):
-        return f'<Student {self.nim} - {self.name}>'
-    
-    def can_register_krs(self):
-        """Cek apakah mahasiswa dapat mendaftar KRS (tidak ada tunggakan)"""
-        # Import here to avoid circular dependency
-        from app.models.billing import Billing
-        unpaid_billings = Billing.query.filter(
-            Billing.student_id == self.id,
-            Billing.status.in_(['unpaid', 'partial', 'overdue'])
-        ).first()
-        return unpaid_billings is None
-    
-    def get_total_outstanding(self):
-        """Hitung total tunggakan mahasiswa"""
-        from sqlalchemy import func
-        from app.models.billing import Billing
-        outstanding = db.session.query(func.sum(Billing.remaining_amount)).filter(
-            Billing.student_id == self.id,
-            Billing.status.in_(['unpaid', 'partial', 'overdue'])
-        ).scalar()
-        return outstanding or 0
-
-
-class ProgramStudi(db.Model):
-    """Model untuk data program studi"""
-    __tablename__ = 'program_studi'
-    
-    id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(100), unique=True, nullable=False)
-    code = db.Column(db.String(10), unique=True, nullable=False)
-    spp_amount = db.Column(db.Integer, nullable=False)  # Jumlah SPP per semester
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-    
-    def __repr__(self):
-        return f'<ProgramStudi {self.name} - Rp {self.spp_amount:,}>'
+# app/models/student.py
+from app.models.base import db
+from datetime import datetime
+from sqlalchemy import func, select, update
+
+class Student(db.Model):
+    """Model untuk data mahasiswa"""
+    __tablename__ = 'students'
+    __table_args__ = (
+        # Laporan eligibility KRS: filter mahasiswa aktif per status blokir
+        db.Index('ix_students_status_krs_blocked', 'status', 'krs_blocked'),
+        # Keyset pagination per id: daftar mahasiswa aktif dan per program studi
+        db.Index('ix_students_status_id', 'status', 'id'),
+        db.Index('ix_students_program_id', 'program_studi_id', 'id'),
+        # Statistik/scheduler: mahasiswa aktif per program studi
+        db.Index('ix_students_status_program', 'status', 'program_studi_id'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    nim = db.Column(db.String(20), unique=True, nullable=False, index=True)
+    name = db.Column(db.String(100), nullable=False)
+    email = db.Column(db.String(100), unique=True, nullable=False)
+    phone = db.Column(db.String(15))
+    program_studi_id = db.Column(db.Integer, db.ForeignKey('program_studi.id'), nullable=False)
+    status = db.Column(db.String(20), default='active')  # active, inactive, graduated
+    # Denormalisasi dari billings: total remaining_amount billing yang belum lunas
+    outstanding_amount = db.Column(db.Integer, default=0, nullable=False)
+    krs_blocked = db.Column(db.Boolean, default=False, nullable=False, index=True)
+    registration_date = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # Relationships
+    program_studi = db.relationship('ProgramStudi', backref='students')
+    billings = db.relationship('Billing', backref='student', cascade='all, delete-orphan')
+    payments = db.relationship('Payment', backref='student', cascade='all, delete-orphan')
+    
+    def __repr__(self):
+        return f'<Student {self.nim} - {self.name}>'
+    
+    def can_register_krs(self):
+        """Cek apakah mahasiswa dapat mendaftar KRS (tidak ada tunggakan)"""
+        return not self.krs_blocked
+    
+    def get_total_outstanding(self):
+        """Hitung total tunggakan mahasiswa"""
+        return self.outstanding_amount or 0
+    
+    @classmethod
+    def refresh_outstanding(cls, student_ids=None, connection=None):
+        """
+        Hitung ulang outstanding_amount dan krs_blocked dari tabel billings
+        
+        Args:
+            student_ids: Daftar ID mahasiswa (default: semua mahasiswa)
+            connection: Connection yang sedang flush (dipakai dari mapper event),
+                default memakai db.session
+                
+        Returns:
+            int: Jumlah baris mahasiswa yang diperbarui
+        """
+        # Import here to avoid circular dependency
+        from app.models.billing import Billing
+        
+        students = cls.__table__
+        outstanding = select(func.coalesce(func.sum(Billing.remaining_amount), 0)).where(
+            Billing.student_id == students.c.id,
+            Billing.status.in_(Billing.OPEN_STATUSES)
+        ).scalar_subquery()
+        
+        stmt = update(students).values(
+            outstanding_amount=outstanding,
+            krs_blocked=outstanding > 0,
+            # Perubahan saldo bukan perubahan profil mahasiswa
+            updated_at=students.c.updated_at
+        )
+        
+        executor = connection if connection is not None else db.session
+        
+        if student_ids is None:
+            return executor.execute(stmt).rowcount
+        
+        student_ids = list(set(student_ids))
+        updated = 0
+        for start in range(0, len(student_ids), 500):
+            chunk = student_ids[start:start + 500]
+            updated += executor.execute(stmt.where(students.c.id.in_(chunk))).rowcount
+        return updated
+
+
+class ProgramStudi(db.Model):
+    """Model untuk data program studi"""
+    __tablename__ = 'program_studi'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), unique=True, nullable=False)
+    code = db.Column(db.String(10), unique=True, nullable=False)
+    spp_amount = db.Column(db.Integer, nullable=False)  # Jumlah SPP per semester
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<ProgramStudi {self.name} - Rp {self.spp_amount:,}>'
@@ -0,0 +1,52 @@
+# app/models/webhook_inbox.py
+from app.models.base import db
+from datetime import datetime
+
+class WebhookInbox(db.Model):
+    """Model untuk antrian webhook payment gateway yang diproses secara asinkron"""
+    __tablename__ = 'webhook_inbox'
+    __table_args__ = (
+        db.Index('ix_webhook_inbox_status_next_attempt', 'status', 'next_attempt_at'),
+    )
+    
+    # Status antrian
+    STATUS_PENDING = 'pending'
+    STATUS_PROCESSING = 'processing'
+    STATUS_DONE = 'done'
+    STATUS_DEAD = 'dead'  # Dead-letter: gagal permanen, perlu ditangani manual
+    
+    VALID_STATUSES = [STATUS_PENDING, STATUS_PROCESSING, STATUS_DONE, STATUS_DEAD]
+    
+    id = db.Column(db.Integer, primary_key=True)
+    transaction_id = db.Column(db.String(100), unique=True, nullable=False)  # Dari payment gateway
+    payload = db.Column(db.JSON, nullable=False)  # Payload hasil parse
+    raw_body = db.Column(db.Text)  # Body request persis seperti yang ditandatangani HMAC
+    status = db.Column(db.String(20), nullable=False, default=STATUS_PENDING)
+    
+    # Retry information
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_error = db.Column(db.Text)
+    
+    # Lease worker yang sedang memproses
+    locked_by = db.Column(db.String(64))
+    locked_until = db.Column(db.DateTime)
+    
+    received_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    processed_at = db.Column(db.DateTime)
+    
+    def __repr__(self):
+        return f'<WebhookInbox {self.transaction_id} - {self.status}>'
+    
+    def to_dict(self):
+        """Convert to dictionary"""
+        return {
+            'id': self.id,
+            'transaction_id': self.transaction_id,
+            'status': self.status,
+            'attempts': self.attempts,
+            'next_attempt_at': self.next_attempt_at.isoformat() if self.next_attempt_at else None,
+            'last_error': self.last_error,
+            'received_at': self.received_at.isoformat() if self.received_at else None,
+            'processed_at': self.processed_at.isoformat() if self.processed_at else None
+        }
@@ -1,387 +1,387 @@
-# app/routes/dashboard_routes.py
-from flask import Blueprint, request, jsonify
-from app.services.ai_service import AIFinancialService
-from app.utils.logger import logger
-from datetime import datetime, timedelta
-
-dashboard_bp = Blueprint('dashboard', __name__, url_prefix='/api/dashboard')
-ai_service = AIFinancialService()
-
-@dashboard_bp.route('/financial-report', methods=['GET'])
-def get_financial_report():
-    """
-    Dapatkan laporan keuangan dengan AI insights
-    
-    GET /api/dashboard/financial-report?days=30
-    """
-    try:
-        days = request.args.get('days', 30, type=int)
-        
-        start_date = datetime.utcnow() - timedelta(days=days)
-        end_date = datetime.utcnow()
-        
-        report = ai_service.generate_financial_report(start_date, end_date)
-        
-        return jsonify(report), 200
-        
-    except Exception as e:
-        error_msg = f"Error generating financial report: {str(e)}"
-        logger.error(error_msg)
-        return jsonify({'error': error_msg}), 500
-
-@dashboard_bp.route('/student-profile/<int:student_id>', methods=['GET'])
-def get_student_profile(student_id):
-    """
-    Dapatkan profil finansial lengkap untuk satu mahasiswa
-    
-    GET /api/dashboard/student-profile/<student_id>
-    """
-    try:
-        profile = ai_service.get_student_financial_profile(student_id)
-        
-        if 'error' in profile:
-            return jsonify(profile), 404
-        
-        return jsonify(profile), 200
-        
-    except Exception as e:
-        error_msg = f"Error fetching student profile: {str(e)}"
-        logger.error(error_msg)
-        return jsonify({'error': error_msg}), 500
-
-@dashboard_bp.route('/summary', methods=['GET'])
-def get_dashboard_summary():
-    """
-    Dapatkan ringkasan dashboard (quick stats)
-    
-    GET /api/dashboard/summary
-    """
-    try:
-        from app.models import db
-        from app.models.billing import Billing
-        from app.models.student import Student
-        from app.models.payment import Payment
-        from sqlalchemy import func
-        
-        # Calculate metrics
-        total_students = Student.query.filter_by(status='active').count()
-        
-        total_billed_query = db.session.query(func.sum(Billing.total_amount)).filter(
-            Billing.status != Billing.STATUS_PAID
-        ).scalar()
-        total_billed = total_billed_query or 0
-        
-        total_outstanding_query = db.session.query(func.sum(Billing.remaining_amount)).filter(
-            Billing.status.in_([Billing.STATUS_UNPAID, Billing.STATUS_PARTIAL, Billing.STATUS_OVERDUE])
-        ).scalar()
-        total_outstanding = total_outstanding_query or 0
-        
-        total_paid_query = db.session.query(func.sum(Payment.amount)).filter(
-            Payment.status == Payment.STATUS_CONFIRMED
-        ).scalar()
-        total_paid = total_paid_query or 0
-        
-        num_overdue = Billing.query.filter_by(status=Billing.STATUS_OVERDUE).count()
-        
-        collection_rate = (total_paid / total_billed * 100) if total_billed > 0 else 0
-        
-        summary = {
-            'timestamp': datetime.utcnow().isoformat(),
-            'metrics': {
-                'total_active_students': total_students,
-                'total_billed': total_billed,
-                'total_paid': total_paid,
-                'total_outstanding': total_outstanding,
-                'collection_rate': round(collection_rate, 2),
-                'students_with_overdue': num_overdue
-            }
-        }
-        
-        return jsonify(summary), 200
-        
-    except Exception as e:
-        error_msg = f"Error generating dashboard summary: {str(e)}"
-        logger.error(error_msg)
-        return jsonify({'error': error_msg}), 500
-
-@dashboard_bp.route('/program-studi-stats', methods=['GET'])
-def get_program_studi_statistics():
-    """
-    Dapatkan statistik per program studi
-    
-    GET /api/dashboard/program-studi-stats
-    """
-    try:
-        from app.models import db
-        from app.models.student import ProgramStudi
-        from app.models.student import Student
-        from app.models.billing import Billing
-        from app.models.payment import Payment
-        from sqlalchemy import func
-        
-        program_studi_list = ProgramStudi.query.all()
-        
-        stats = []
-        for program in program_studi_list:
-            students = Student.query.filter_by(program_studi_id=program.id, status='active').count()
-            
-            billings_total = db.session.query(func.sum(Billing.total_amount)).filter(
-                Billing.student_id.in_(
-                    db.session.query(Student.id).filter_by(program_studi_id=program.id)
-                )
-            ).scalar() or 0
-            
-            paid_total = db.session.query(func.sum(Payment.amount)).filter(
-                Payment.student_id.in_(
-                    db.session.query(Student.id).filter_by(program_studi_id=program.id)
-                ),
-                Payment.status == Payment.STATUS_CONFIRMED
-            ).scalar() or 0
-            
-            collection_rate = (paid_total / billings_total * 100) if billings_total > 0 else 0
-            
-            stats.append({
-                'program_studi': program.name,
-                'num_students': students,
-                'total_billed': billings_total,
-                'total_paid': paid_total,
-                'collection_rate': round(collection_rate, 2)
-            })
-        
-        return jsonify({
-            'program_studi_statistics': stats
-        }), 200
-        
-    except Exception as e:
-        error_msg = f"Error generating program studi statistics: {str(e)}"
-        logger.error(error_msg)
-        return jsonify({'error': error_msg}), 500
-
-@dashboard_bp.route('/billing-breakdown', methods=['GET'])
-def get_billing_breakdown():
-    """
-    Dapatkan breakdown billing berdasarkan status (real-time)
-    
-    GET /api/dashboard/billing-breakdown
-    
-    Response:
-    {
-        "timestamp": "2026-01-17T...",
-        "breakdown": {
-            "unpaid": {"count": 5, "total": 25000000},
-            "partial": {"count": 2, "total": 10000000},
-            "paid": {"count": 10, "total": 50000000},
-            "overdue": {"count": 1, "total": 5000000}
-        }
-    }
-    """
-    try:
-        from app.models import db
-        from app.models.billing import Billing
-        from sqlalchemy import func
-        
-        statuses = [Billing.STATUS_UNPAID, Billing.STATUS_PARTIAL, Billing.STATUS_PAID, Billing.STATUS_OVERDUE]
-        
-        breakdown = {}
-        for status in statuses:
-            count = Billing.query.filter_by(status=status).count()
-            total = db.session.query(func.sum(Billing.total_amount)).filter_by(status=status).scalar() or 0
-            
-            breakdown[status.lower()] = {
-                'count': count,
-                'total': total
-            }
-        
-        return jsonify({
-            'timestamp': datetime.utcnow().isoformat(),
-            'breakdown': breakdown
-        }), 200
-        
-    except Exception as e:
-        error_msg = f"Error generating billing breakdown: {str(e)}"
-        logger.error(error_msg)
-        return jsonify({'error': error_msg}), 500
-
-@dashboard_bp.route('/students-status', methods=['GET'])
-def get_students_payment_status():
-    """
-    Dapatkan status pembayaran semua mahasiswa (real-time)
-    
-    GET /api/dashboard/students-status?status=unpaid
-    
-    Query parameters:
-    - status: unpaid, partial, paid, overdue, all (default: all)
-    - limit: max rows (default: 100)
-    - offset: pagination (default: 0)
-    
-    Response:
-    {
-        "timestamp": "2026-01-17T...",
-        "students": [
-            {
-                "student_id": 1,
-                "nim": "2023001",
-                "name": "John Doe",
-                "program_studi": "Teknik Informatika",
-                "total_outstanding": 4000000,
-                "latest_billing_status": "unpaid",
-                "can_register_krs": false
-            },
-            ...
-        ]
-    }
-    """
-    try:
-        from app.models import db
-        from app.models.student import Student
-        from app.models.billing import Billing
-        
-        status_filter = request.args.get('status', 'all').lower()
-        limit = request.args.get('limit', 100, type=int)
-        offset = request.args.get('offset', 0, type=int)
-        
-        # Get active students
-        query = Student.query.filter_by(status='active')
-        
-        # Apply status filter if specified
-        if status_filter != 'all':
-            valid_statuses = ['unpaid', 'partial', 'paid', 'overdue']
-            if status_filter not in valid_statuses:
-                return jsonify({
-                    'error': f'Invalid status. Must be one of: {", ".join(valid_statuses)}'
-                }), 400
-            
-            # Get students with specific billing status
-            students_with_status = db.session.query(Student.id).join(Billing).filter(
-                Billing.status == status_filter.upper()
-            ).distinct()
-            query = query.filter(Student.id.in_(students_with_status))
-        
-        total_students = query.count()
-        students = query.offset(offset).limit(limit).all()
-        
-        students_data = []
-        for student in students:
-            # Calculate total outstanding
-            outstanding_billings = Billing.query.filter(
-                Billing.student_id == student.id,
-                Billing.status.in_([Billing.STATUS_UNPAID, Billing.STATUS_PARTIAL, Billing.STATUS_OVERDUE])
-            ).all()
-            
-            total_outstanding = sum(b.remaining_amount for b in outstanding_billings)
-            
-            # Get latest billing status
-            latest_billing = Billing.query.filter_by(student_id=student.id).order_by(
-                Billing.created_at.desc()
-            ).first()
-            
-            students_data.append({
-                'student_id': student.id,
-                'nim': student.nim,
-                'name': student.name,
-                'program_studi': student.program_studi.name if student.program_studi else None,
-                'total_outstanding': total_outstanding,
-                'latest_billing_status': latest_billing.status if latest_billing else None,
-                'can_register_krs': total_outstanding == 0
-            })
-        
-        return jsonify({
-            'timestamp': datetime.utcnow().isoformat(),
-            'filter': status_filter,
-            'pagination': {
-                'offset': offset,
-                'limit': limit,
-                'total': total_students
-            },
-            'students': students_data
-        }), 200
-        
-    except Exception as e:
-        error_msg = f"Error fetching students payment status: {str(e)}"
-        logger.error(error_msg)
-        return jsonify({'error': error_msg}), 500
-
-@dashboard_bp.route('/daily-report', methods=['GET'])
-def get_daily_report():
-    """
-    Dapatkan laporan harian (real-time)
-    
-    GET /api/dashboard/daily-report
-    
-    Response:
-    {
-        "timestamp": "2026-01-17T...",
-        "report_date": "2026-01-17",
-        "summary": {
-            "payments_received_today": 5000000,
-            "payments_count": 2,
-            "new_billings": 0,
-            "overdue_count": 1
-        },
-        "trends": {
-            "collection_rate": 33.33,
-            "average_payment": 2500000
-        }
-    }
-    """
-    try:
-        from app.models import db
-        from app.models.billing import Billing
-        from app.models.payment import Payment
-        from sqlalchemy import func
-        
-        today = datetime.utcnow().date()
-        today_start = datetime.combine(today, datetime.min.time())
-        today_end = datetime.combine(today, datetime.max.time())
-        
-        # Payments received today
-        payments_today_total = db.session.query(func.sum(Payment.amount)).filter(
-            Payment.status == Payment.STATUS_CONFIRMED,
-            Payment.created_at.between(today_start, today_end)
-        ).scalar() or 0
-        
-        payments_today_count = Payment.query.filter(
-            Payment.status == Payment.STATUS_CONFIRMED,
-            Payment.created_at.between(today_start, today_end)
-        ).count()
-        
-        # New billings today
-        new_billings = Billing.query.filter(
-            Billing.created_at.between(today_start, today_end)
-        ).count()
-        
-        # Overdue count
-        overdue_count = Billing.query.filter(
-            Billing.status == Billing.STATUS_OVERDUE
-        ).count()
-        
-        # Collection rate
-        total_billed = db.session.query(func.sum(Billing.total_amount)).scalar() or 0
-        total_paid = db.session.query(func.sum(Payment.amount)).filter(
-            Payment.status == Payment.STATUS_CONFIRMED
-        ).scalar() or 0
-        collection_rate = (total_paid / total_billed * 100) if total_billed > 0 else 0
-        
-        # Average payment
-        average_payment = (payments_today_total / payments_today_count) if payments_today_count > 0 else 0
-        
-        return jsonify({
-            'timestamp': datetime.utcnow().isoformat(),
-            'report_date': str(today),
-            'summary': {
-                'payments_received_today': payments_today_total,
-                'payments_count': payments_today_count,
-                'new_billings': new_billings,
-                'overdue_count': overdue_count
-            },
-            'trends': {
-                'collection_rate': round(collection_rate, 2),
-                'average_payment': round(average_payment, 0)
-            }
-        }), 200
-        
-    except Exception as e:
-        error_msg = f"Error generating daily report: {str(e)}"
-        logger.error(error_msg)
-        return jsonify({'error': error_msg}), 500
-
+# app/routes/dashboard_routes.py
+from flask import Blueprint, request, jsonify
+from app.services.ai_service import AIFinancialService
+from app.services.dashboard_service import DashboardService
+from app.utils.logger import logger
+from app.utils.cache import cached_response
+from app.utils.pagination import InvalidCursor, get_page_args, paginate_keyset
+from datetime import datetime, timedelta
+
+dashboard_bp = Blueprint('dashboard', __name__, url_prefix='/api/dashboard')
+ai_service = AIFinancialService()
+dashboard_service = DashboardService()
+
+@dashboard_bp.route('/financial-report', methods=['GET'])
+@cached_response
+def get_financial_report():
+    """
+    Dapatkan laporan keuangan dengan AI insights
+    
+    GET /api/dashboard/financial-report?days=30
+    """
+    try:
+        days = request.args.get('days', 30, type=int)
+        
+        start_date = datetime.utcnow() - timedelta(days=days)
+        end_date = datetime.utcnow()
+        
+        report = ai_service.generate_financial_report(start_date, end_date)
+        
+        return jsonify(report), 200
+        
+    except Exception as e:
+        error_msg = f"Error generating financial report: {str(e)}"
+        logger.error(error_msg)
+        return jsonify({'error': error_msg}), 500
+
+@dashboard_bp.route('/student-profile/<int:student_id>', methods=['GET'])
+@cached_response
+def get_student_profile(student_id):
+    """
+    Dapatkan profil finansial lengkap untuk satu mahasiswa
+    
+    GET /api/dashboard/student-profile/<student_id>
+    """
+    try:
+        profile = ai_service.get_student_financial_profile(student_id)
+        
+        if 'error' in profile:
+            return jsonify(profile), 404
+        
+        return jsonify(profile), 200
+        
+    except Exception as e:
+        error_msg = f"Error fetching student profile: {str(e)}"
+        logger.error(error_msg)
+        return jsonify({'error': error_msg}), 500
+
+@dashboard_bp.route('/summary', methods=['GET'])
+@cached_response
+def get_dashboard_summary():
+    """
+    Dapatkan ringkasan dashboard (quick stats)
+    
+    GET /api/dashboard/summary
+    """
+    try:
+        from app.models.billing import Billing
+        from app.models.student import Student
+        
+        # Calculate metrics
+        total_students = Student.query.filter_by(status='active').count()
+        
+        # Angka billing dan pembayaran dibaca dari tabel rekap
+        status_totals = dashboard_service.get_billing_status_totals()
+        
+        total_billed = sum(
+            totals['total'] for status, totals in status_totals.items()
+            if status != Billing.STATUS_PAID
+        )
+        
+        total_outstanding = sum(
+            status_totals[status]['remaining'] for status in Billing.OPEN_STATUSES
+        )
+        
+        total_paid = dashboard_service.get_payment_totals()['amount']
+        
+        num_overdue = status_totals[Billing.STATUS_OVERDUE]['count']
+        
+        collection_rate = (total_paid / total_billed * 100) if total_billed > 0 else 0
+        
+        summary = {
+            'timestamp': datetime.utcnow().isoformat(),
+            'metrics': {
+                'total_active_students': total_students,
+                'total_billed': total_billed,
+                'total_paid': total_paid,
+                'total_outstanding': total_outstanding,
+                'collection_rate': round(collection_rate, 2),
+                'students_with_overdue': num_overdue
+            }
+        }
+        
+        return jsonify(summary), 200
+        
+    except Exception as e:
+        error_msg = f"Error generating dashboard summary: {str(e)}"
+        logger.error(error_msg)
+        return jsonify({'error': error_msg}), 500
+
+@dashboard_bp.route('/program-studi-stats', methods=['GET'])
+@cached_response
+def get_program_studi_statistics():
+    """
+    Dapatkan statistik per program studi
+    
+    GET /api/dashboard/program-studi-stats?semester=2026/2027-Ganjil&start_date=2026-01-01&end_date=2026-06-30
+    
+    Query parameters (semua optional):
+    - semester: nama semester untuk drilldown
+    - start_date, end_date: rentang tanggal (ISO format) untuk billing dan pembayaran
+    """
+    try:
+        semester = request.args.get('semester')
+        
+        try:
+            start_date = _parse_date_arg('start_date')
+            end_date = _parse_date_arg('end_date', end_of_day=True)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        stats = dashboard_service.get_program_studi_statistics(
+            semester=semester,
+            start_date=start_date,
+            end_date=end_date
+        )
+        
+        return jsonify({
+            'filters': {
+                'semester': semester,
+                'start_date': start_date.isoformat() if start_date else None,
+                'end_date': end_date.isoformat() if end_date else None
+            },
+            'program_studi_statistics': stats
+        }), 200
+        
+    except Exception as e:
+        error_msg = f"Error generating program studi statistics: {str(e)}"
+        logger.error(error_msg)
+        return jsonify({'error': error_msg}), 500
+
+def _parse_date_arg(name, end_of_day=False):
+    """Parse query parameter tanggal ISO (YYYY-MM-DD atau datetime lengkap)"""
+    value = request.args.get(name)
+    if not value:
+        return None
+    
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f'Invalid {name}. Use ISO format, e.g. 2026-01-31')
+    
+    # Tanggal tanpa jam pada end_date mencakup seluruh hari tersebut
+    if end_of_day and len(value) == 10:
+        parsed = datetime.combine(parsed.date(), datetime.max.time())
+    return parsed
+
+@dashboard_bp.route('/billing-breakdown', methods=['GET'])
+@cached_response
+def get_billing_breakdown():
+    """
+    Dapatkan breakdown billing berdasarkan status (real-time)
+    
+    GET /api/dashboard/billing-breakdown
+    
+    Response:
+    {
+        "timestamp": "2026-01-17T...",
+        "breakdown": {
+            "unpaid": {"count": 5, "total": 25000000},
+            "partial": {"count": 2, "total": 10000000},
+            "paid": {"count": 10, "total": 50000000},
+            "overdue": {"count": 1, "total": 5000000}
+        }
+    }
+    """
+    try:
+        status_totals = dashboard_service.get_billing_status_totals()
+        
+        breakdown = {
+            status.lower(): {
+                'count': totals['count'],
+                'total': totals['total']
+            }
+            for status, totals in status_totals.items()
+        }
+        
+        return jsonify({
+            'timestamp': datetime.utcnow().isoformat(),
+            'breakdown': breakdown
+        }), 200
+        
+    except Exception as e:
+        error_msg = f"Error generating billing breakdown: {str(e)}"
+        logger.error(error_msg)
+        return jsonify({'error': error_msg}), 500
+
+@dashboard_bp.route('/students-status', methods=['GET'])
+@cached_response
+def get_students_payment_status():
+    """
+    Dapatkan status pembayaran semua mahasiswa (real-time)
+    
+    GET /api/dashboard/students-status?status=unpaid
+    
+    Query parameters:
+    - status: unpaid, partial, paid, overdue, all (default: all)
+    - limit: max rows (default: 100)
+    - cursor: next_cursor dari halaman sebelumnya (keyset per student id)
+    - offset: pagination lama, tetap diterima tanpa cursor
+    - include_total: true/false (default: hanya di halaman pertama)
+    
+    Response:
+    {
+        "timestamp": "2026-01-17T...",
+        "students": [
+            {
+                "student_id": 1,
+                "nim": "2023001",
+                "name": "John Doe",
+                "program_studi": "Teknik Informatika",
+                "total_outstanding": 4000000,
+                "latest_billing_status": "unpaid",
+                "can_register_krs": false
+            },
+            ...
+        ]
+    }
+    """
+    try:
+        from app.models import db
+        from app.models.student import Student, ProgramStudi
+        from app.models.billing import Billing
+        from sqlalchemy import exists, select
+        
+        status_filter = request.args.get('status', 'all').lower()
+        page_args = get_page_args(default_limit=100)
+        
+        # Status billing terakhir per mahasiswa (correlated subquery,
+        # memakai index billings(student_id, created_at))
+        latest_status = select(Billing.status).where(
+            Billing.student_id == Student.id
+        ).order_by(
+            Billing.created_at.desc(), Billing.id.desc()
+        ).limit(1).correlate(Student).scalar_subquery()
+        
+        query = db.session.query(
+            Student.id,
+            Student.nim,
+            Student.name,
+            Student.outstanding_amount,
+            ProgramStudi.name,
+            latest_status.label('latest_billing_status')
+        ).outerjoin(
+            ProgramStudi, Student.program_studi_id == ProgramStudi.id
+        ).filter(Student.status == 'active')
+        
+        # Apply status filter if specified
+        if status_filter != 'all':
+            valid_statuses = ['unpaid', 'partial', 'paid', 'overdue']
+            if status_filter not in valid_statuses:
+                return jsonify({
+                    'error': f'Invalid status. Must be one of: {", ".join(valid_statuses)}'
+                }), 400
+            
+            # Mahasiswa yang punya billing dengan status tertentu
+            # (memakai index billings(student_id, status))
+            query = query.filter(exists().where(
+                Billing.student_id == Student.id,
+                Billing.status == status_filter
+            ))
+        
+        rows, pagination = paginate_keyset(
+            query, [Student.id], page_args,
+            count_query=query.order_by(None).with_entities(Student.id)
+        )
+        
+        students_data = [
+            {
+                'student_id': student_id,
+                'nim': nim,
+                'name': name,
+                'program_studi': program_name,
+                'total_outstanding': outstanding,
+                'latest_billing_status': latest_billing_status,
+                'can_register_krs': outstanding == 0
+            }
+            for student_id, nim, name, outstanding, program_name, latest_billing_status in rows
+        ]
+        
+        return jsonify({
+            'timestamp': datetime.utcnow().isoformat(),
+            'filter': status_filter,
+            'pagination': pagination,
+            'students': students_data
+        }), 200
+        
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        error_msg = f"Error fetching students payment status: {str(e)}"
+        logger.error(error_msg)
+        return jsonify({'error': error_msg}), 500
+
+@dashboard_bp.route('/daily-report', methods=['GET'])
+@cached_response
+def get_daily_report():
+    """
+    Dapatkan laporan harian (real-time)
+    
+    GET /api/dashboard/daily-report
+    
+    Response:
+    {
+        "timestamp": "2026-01-17T...",
+        "report_date": "2026-01-17",
+        "summary": {
+            "payments_received_today": 5000000,
+            "payments_count": 2,
+            "new_billings": 0,
+            "overdue_count": 1
+        },
+        "trends": {
+            "collection_rate": 33.33,
+            "average_payment": 2500000
+        }
+    }
+    """
+    try:
+        from app.models.billing import Billing
+        
+        today = datetime.utcnow().date()
+        today_start = datetime.combine(today, datetime.min.time())
+        today_end = datetime.combine(today, datetime.max.time())
+        
+        # Payments received today (dari rekap harian)
+        payments_today = dashboard_service.get_payment_totals(day=today)
+        payments_today_total = payments_today['amount']
+        payments_today_count = payments_today['count']
+        
+        # New billings today (range scan di index billings.created_at)
+        new_billings = Billing.query.filter(
+            Billing.created_at.between(today_start, today_end)
+        ).count()
+        
+        status_totals = dashboard_service.get_billing_status_totals()
+        
+        # Overdue count
+        overdue_count = status_totals[Billing.STATUS_OVERDUE]['count']
+        
+        # Collection rate
+        total_billed = sum(totals['total'] for totals in status_totals.values())
+        total_paid = dashboard_service.get_payment_totals()['amount']
+        collection_rate = (total_paid / total_billed * 100) if total_billed > 0 else 0
+        
+        # Average payment
+        average_payment = (payments_today_total / payments_today_count) if payments_today_count > 0 else 0
+        
+        return jsonify({
+            'timestamp': datetime.utcnow().isoformat(),
+            'report_date': str(today),
+            'summary': {
+                'payments_received_today': payments_today_total,
+                'payments_count': payments_today_count,
+                'new_billings': new_billings,
+                'overdue_count': overdue_count
+            },
+            'trends': {
+                'collection_rate': round(collection_rate, 2),
+                'average_payment': round(average_payment, 0)
+            }
+        }), 200
+        
+    except Exception as e:
+        error_msg = f"Error generating daily report: {str(e)}"
+        logger.error(error_msg)
+        return jsonify({'error': error_msg}), 500
+
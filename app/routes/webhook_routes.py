@@ -1,323 +1,522 @@
-# app/routes/webhook_routes.py
-from flask import Blueprint, request, jsonify
-from app.services.payment_service import PaymentService
-from app.utils.logger import logger
-from app.config import Config
-from app.models import db
-from app.models.billing import Billing
-from app.models.payment import Payment
-from datetime import datetime
-from uuid import uuid4
-
-webhook_bp = Blueprint('webhook', __name__, url_prefix='/api/webhook')
-payment_service = PaymentService()
-
-def _validate_webhook_payload(payload):
-    """Validate webhook payload structure and required fields"""
-    required_fields = ['transaction_id', 'amount', 'status', 'billing_id', 'student_id']
-    
-    errors = []
-    for field in required_fields:
-        if field not in payload:
-            errors.append(f"Missing required field: {field}")
-    
-    # Validate amount
-    if 'amount' in payload and payload['amount'] <= 0:
-        errors.append("Amount must be greater than 0")
-    
-    # Validate status
-    if 'status' in payload and payload['status'] not in ['success', 'pending', 'failed']:
-        errors.append("Status must be one of: success, pending, failed")
-    
-    # Validate billing exists
-    if 'billing_id' in payload:
-        billing = Billing.query.get(payload['billing_id'])
-        if not billing:
-            errors.append(f"Billing ID {payload['billing_id']} not found")
-    
-    return errors
-
-@webhook_bp.route('/payment', methods=['POST'])
-def payment_webhook():
-    """
-    Handle payment webhook notification dari payment gateway
-    
-    POST /api/webhook/payment
-    Required fields:
-    - transaction_id: str (unique transaction identifier)
-    - billing_id: int (billing ID yang dibayar)
-    - student_id: int (student ID)
-    - amount: float (jumlah pembayaran)
-    - status: str (success, pending, failed)
-    - payment_method: str (optional: credit_card, transfer, etc)
-    - timestamp: str (optional: ISO format timestamp)
-    
-    Example:
-    {
-        "transaction_id": "TXN-2026-001",
-        "billing_id": 1,
-        "student_id": 1,
-        "amount": 2500000,
-        "status": "success",
-        "payment_method": "transfer",
-        "timestamp": "2026-01-17T17:30:00"
-    }
-    """
-    try:
-        if not request.is_json:
-            return jsonify({
-                'success': False,
-                'error': 'Content-Type must be application/json'
-            }), 400
-        
-        payload = request.get_json()
-        
-        if not payload:
-            return jsonify({
-                'success': False,
-                'error': 'Request body is required'
-            }), 400
-        
-        # Validate payload
-        validation_errors = _validate_webhook_payload(payload)
-        if validation_errors:
-            logger.warning(f"Webhook validation failed: {validation_errors}")
-            return jsonify({
-                'success': False,
-                'error': 'Validation failed',
-                'details': validation_errors
-            }), 400
-        
-        # Only process successful payments
-        if payload['status'] != 'success':
-            logger.info(f"Webhook received with status '{payload['status']}' - not processing")
-            return jsonify({
-                'success': True,
-                'message': f"Webhook received with status '{payload['status']}' - acknowledged"
-            }), 200
-        
-        # Handle webhook
-        result = payment_service.handle_webhook(payload, Config.PAYMENT_GATEWAY_SECRET)
-        
-        # Return appropriate status code
-        status_code = result.get('status_code', 200 if result['success'] else 400)
-        
-        response = {
-            'success': result['success'],
-            'message': result.get('message'),
-            'payment_id': result.get('payment_id')
-        }
-        
-        logger.info(f"Webhook processed successfully: {result['message']}")
-        
-        return jsonify(response), status_code
-        
-    except Exception as e:
-        error_msg = f"Error processing webhook: {str(e)}"
-        logger.error(error_msg)
-        return jsonify({
-            'success': False,
-            'error': error_msg
-        }), 500
-
-@webhook_bp.route('/test', methods=['POST'])
-def test_webhook():
-    """
-    Test endpoint untuk webhook - untuk development/testing saja
-    Echo back the payload yang dikirim
-    
-    POST /api/webhook/test
-    {
-        "any_data": "can be anything"
-    }
-    """
-    try:
-        # Hanya izinkan di development mode
-        if not Config.DEBUG:
-            return jsonify({
-                'success': False,
-                'error': 'Test webhook not available in production'
-            }), 403
-        
-        # Echo back the payload
-        payload = request.get_json()
-        
-        return jsonify({
-            'success': True,
-            'message': 'Webhook test successful',
-            'received_payload': payload,
-            'timestamp': datetime.utcnow().isoformat()
-        }), 200
-        
-    except Exception as e:
-        return jsonify({
-            'success': False,
-            'error': str(e)
-        }), 500
-
-@webhook_bp.route('/health', methods=['GET'])
-def webhook_health():
-    """
-    Health check endpoint untuk payment gateway
-    
-    GET /api/webhook/health
-    """
-    return jsonify({
-        'status': 'healthy',
-        'service': 'SPP Payment Webhook Handler',
-        'timestamp': str(datetime.utcnow())
-    }), 200
-
-@webhook_bp.route('/simulate-payment', methods=['POST'])
-def simulate_payment():
-    """
-    Simulate payment untuk testing (DEVELOPMENT ONLY)
-    
-    POST /api/webhook/simulate-payment
-    {
-        "billing_id": 1,
-        "student_id": 1,
-        "amount": 2500000,
-        "payment_method": "transfer"
-    }
-    
-    Ini akan send webhook ke /api/webhook/payment secara internal
-    untuk simulate payment gateway notification
-    """
-    try:
-        if not Config.DEBUG:
-            return jsonify({
-                'success': False,
-                'error': 'Simulate payment only available in development mode'
-            }), 403
-        
-        payload = request.get_json()
-        if not payload:
-            return jsonify({
-                'success': False,
-                'error': 'Request body is required'
-            }), 400
-        
-        # Validate required fields
-        required_fields = ['billing_id', 'student_id', 'amount']
-        for field in required_fields:
-            if field not in payload:
-                return jsonify({
-                    'success': False,
-                    'error': f'Missing required field: {field}'
-                }), 400
-        
-        # Create webhook payload
-        webhook_payload = {
-            'transaction_id': f'SIM-{uuid4().hex[:12].upper()}',
-            'reference_code': f'SIM-{datetime.utcnow().strftime("%Y%m%d%H%M%S")}',
-            'billing_id': payload['billing_id'],
-            'student_id': payload['student_id'],
-            'amount': payload['amount'],
-            'status': 'success',
-            'payment_method': payload.get('payment_method', 'simulated'),
-            'timestamp': datetime.utcnow().isoformat()
-        }
-        
-        # Process the simulated payment
-        result = payment_service.handle_webhook(webhook_payload, Config.PAYMENT_GATEWAY_SECRET)
-        
-        return jsonify({
-            'success': result['success'],
-            'message': result.get('message'),
-            'simulated_payload': webhook_payload,
-            'payment_id': result.get('payment_id')
-        }), (200 if result['success'] else 400)
-        
-    except Exception as e:
-        error_msg = f"Error simulating payment: {str(e)}"
-        logger.error(error_msg)
-        return jsonify({
-            'success': False,
-            'error': error_msg
-        }), 500
-
-@webhook_bp.route('/test-all-students', methods=['POST'])
-def test_all_students():
-    """
-    Test payment untuk semua mahasiswa (DEVELOPMENT ONLY)
-    Simulate pembayaran sebagian untuk semua pending billings
-    
-    POST /api/webhook/test-all-students
-    {
-        "amount_percentage": 50  (optional: 0-100, default 50)
-    }
-    """
-    try:
-        if not Config.DEBUG:
-            return jsonify({
-                'success': False,
-                'error': 'Test endpoint only available in development mode'
-            }), 403
-        
-        payload = request.get_json() if request.is_json else {}
-        amount_percentage = payload.get('amount_percentage', 50)
-        
-        if not (0 < amount_percentage <= 100):
-            return jsonify({
-                'success': False,
-                'error': 'amount_percentage must be between 1 and 100'
-            }), 400
-        
-        # Get all pending billings
-        pending_billings = Billing.query.filter(
-            Billing.status.in_([Billing.STATUS_UNPAID, Billing.STATUS_PARTIAL])
-        ).all()
-        
-        if not pending_billings:
-            return jsonify({
-                'success': True,
-                'message': 'No pending billings to process',
-                'processed': 0
-            }), 200
-        
-        results = []
-        for billing in pending_billings:
-            # Calculate payment amount
-            payment_amount = int(billing.remaining_amount * (amount_percentage / 100))
-            
-            if payment_amount == 0:
-                continue
-            
-            # Create simulated payment
-            webhook_payload = {
-                'transaction_id': f'TEST-{uuid4().hex[:12].upper()}',
-                'reference_code': f'TEST-{billing.student_id}-{datetime.utcnow().strftime("%Y%m%d%H%M%S")}',
-                'billing_id': billing.id,
-                'student_id': billing.student_id,
-                'amount': payment_amount,
-                'status': 'success',
-                'payment_method': 'test_transfer',
-                'timestamp': datetime.utcnow().isoformat()
-            }
-            
-            # Process payment
-            result = payment_service.handle_webhook(webhook_payload, Config.PAYMENT_GATEWAY_SECRET)
-            
-            results.append({
-                'billing_id': billing.id,
-                'student_id': billing.student_id,
-                'amount_paid': payment_amount,
-                'success': result['success']
-            })
-        
-        return jsonify({
-            'success': True,
-            'message': f'Processed {len(results)} test payments',
-            'processed': len(results),
-            'results': results
-        }), 200
-        
-    except Exception as e:
-        error_msg = f"Error in test-all-students: {str(e)}"
-        logger.error(error_msg)
-        return jsonify({
-            'success': False,
-            'error': error_msg
-        }), 500
-
+# app/routes/webhook_routes.py
+from flask import Blueprint, current_app, request, jsonify
+from app.services.payment_service import PaymentService
+from app.services.webhook_inbox_service import WebhookInboxService
+from app.utils.logger import logger
+from app.utils.idempotency import idempotent
+from app.utils.metrics import WEBHOOK_EVENTS
+from app.config import Config
+from app.models import db
+from app.models.billing import Billing
+from app.models.payment import Payment
+from datetime import datetime
+from functools import wraps
+from uuid import uuid4
+import json
+
+webhook_bp = Blueprint('webhook', __name__, url_prefix='/api/webhook')
+payment_service = PaymentService()
+inbox_service = WebhookInboxService(payment_service)
+
+def _validate_webhook_payload(payload, check_billing=True):
+    """Validate webhook payload structure and required fields
+    
+    check_billing=False melewati lookup billing ke database (mode batch,
+    billing divalidasi sekaligus oleh PaymentService).
+    """
+    required_fields = ['transaction_id', 'amount', 'status', 'billing_id', 'student_id']
+    
+    errors = []
+    for field in required_fields:
+        if field not in payload:
+            errors.append(f"Missing required field: {field}")
+    
+    # Validate amount
+    if 'amount' in payload and payload['amount'] <= 0:
+        errors.append("Amount must be greater than 0")
+    
+    # Validate status
+    if 'status' in payload and payload['status'] not in ['success', 'pending', 'failed']:
+        errors.append("Status must be one of: success, pending, failed")
+    
+    # Validate billing exists
+    if check_billing and 'billing_id' in payload:
+        billing = Billing.query.get(payload['billing_id'])
+        if not billing:
+            errors.append(f"Billing ID {payload['billing_id']} not found")
+    
+    return errors
+
+def _webhook_idempotency_key(payload):
+    """Key per transaksi dan status, agar notifikasi pending tidak menutupi success"""
+    if not payload.get('transaction_id'):
+        return None
+    return f"{payload['transaction_id']}:{payload.get('status')}"
+
+def _request_signature_valid():
+    """Verifikasi HMAC dari header signature atas raw body request"""
+    signature = request.headers.get(current_app.config['WEBHOOK_SIGNATURE_HEADER'])
+    if payment_service.verify_webhook(request.get_data(), signature):
+        return True
+    
+    logger.warning("Webhook signature verification failed")
+    return False
+
+def _signature_failed_response(source):
+    WEBHOOK_EVENTS.inc(source=source, outcome='rejected')
+    return jsonify({
+        'success': False,
+        'error': 'Webhook signature verification failed'
+    }), 401
+
+def require_webhook_signature(source):
+    """
+    Decorator: tolak request tanpa signature valid sebelum handler dan
+    lookup idempotency, agar request palsu tidak bisa memancing replay
+    response tersimpan (dipasang di atas @idempotent)
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if not _request_signature_valid():
+                return _signature_failed_response(source)
+            return f(*args, **kwargs)
+        return decorated_function
+    return decorator
+
+@webhook_bp.route('/payment', methods=['POST'])
+@require_webhook_signature('direct')
+@idempotent('webhook.payment', _webhook_idempotency_key)
+def payment_webhook():
+    """
+    Handle payment webhook notification dari payment gateway
+    
+    POST /api/webhook/payment
+    Header X-Signature: hex HMAC-SHA256 atas raw body dengan secret gateway
+    
+    Required fields:
+    - transaction_id: str (unique transaction identifier)
+    - billing_id: int (billing ID yang dibayar)
+    - student_id: int (student ID)
+    - amount: float (jumlah pembayaran)
+    - status: str (success, pending, failed)
+    - payment_method: str (optional: credit_card, transfer, etc)
+    - timestamp: str (optional: ISO format timestamp)
+    
+    Jika WEBHOOK_INBOX_ENABLED aktif, endpoint hanya memverifikasi signature,
+    menyimpan payload ke webhook_inbox, dan mengembalikan 202; pemrosesan
+    dilakukan worker di background.
+    
+    Example:
+    {
+        "transaction_id": "TXN-2026-001",
+        "billing_id": 1,
+        "student_id": 1,
+        "amount": 2500000,
+        "status": "success",
+        "payment_method": "transfer",
+        "timestamp": "2026-01-17T17:30:00"
+    }
+    """
+    try:
+        if not request.is_json:
+            return jsonify({
+                'success': False,
+                'error': 'Content-Type must be application/json'
+            }), 400
+        
+        payload = request.get_json()
+        
+        if not payload:
+            return jsonify({
+                'success': False,
+                'error': 'Request body is required'
+            }), 400
+        
+        # Mode inbox: simpan raw body terverifikasi, validasi dilakukan worker
+        if current_app.config.get('WEBHOOK_INBOX_ENABLED', False):
+            return _enqueue_webhook(payload)
+        
+        # Validate payload
+        validation_errors = _validate_webhook_payload(payload)
+        if validation_errors:
+            logger.warning(f"Webhook validation failed: {validation_errors}")
+            WEBHOOK_EVENTS.inc(source='direct', outcome='invalid')
+            return jsonify({
+                'success': False,
+                'error': 'Validation failed',
+                'details': validation_errors
+            }), 400
+        
+        # Only process successful payments
+        if payload['status'] != 'success':
+            logger.info(f"Webhook received with status '{payload['status']}' - not processing")
+            WEBHOOK_EVENTS.inc(source='direct', outcome='acknowledged')
+            return jsonify({
+                'success': True,
+                'message': f"Webhook received with status '{payload['status']}' - acknowledged"
+            }), 200
+        
+        # Handle webhook (signature sudah diverifikasi di atas)
+        result = payment_service.apply_webhook(payload)
+        WEBHOOK_EVENTS.inc(source='direct', outcome='processed' if result['success'] else 'failed')
+        
+        # Return appropriate status code
+        status_code = result.get('status_code', 200 if result['success'] else 400)
+        
+        response = {
+            'success': result['success'],
+            'message': result.get('message'),
+            'payment_id': result.get('payment_id')
+        }
+        
+        logger.info(f"Webhook processed successfully: {result['message']}")
+        
+        return jsonify(response), status_code
+    
+    except Exception as e:
+        error_msg = f"Error processing webhook: {str(e)}"
+        logger.error(error_msg)
+        return jsonify({
+            'success': False,
+            'error': error_msg
+        }), 500
+
+def _enqueue_webhook(payload):
+    """Simpan webhook terverifikasi ke inbox (202 Accepted)"""
+    result = inbox_service.enqueue(payload, raw_body=request.get_data())
+    if not result['success']:
+        return jsonify({
+            'success': False,
+            'error': result['message']
+        }), 400
+    
+    logger.info(f"Webhook queued: {payload['transaction_id']} (inbox {result['inbox_id']})")
+    WEBHOOK_EVENTS.inc(source='direct', outcome='duplicate' if result['duplicate'] else 'queued')
+    
+    return jsonify({
+        'success': True,
+        'message': result['message'],
+        'inbox_id': result['inbox_id'],
+        'duplicate': result['duplicate']
+    }), 202
+
+@webhook_bp.route('/payment/batch', methods=['POST'])
+@require_webhook_signature('batch')
+@idempotent('webhook.payment_batch')
+def payment_webhook_batch():
+    """
+    Handle banyak notifikasi pembayaran sekaligus (settlement file)
+    
+    POST /api/webhook/payment/batch
+    Header X-Signature: hex HMAC-SHA256 atas raw body seluruh batch
+    {
+        "notifications": [
+            {"transaction_id": "TXN-2026-001", "reference_code": "PAY...", "billing_id": 1,
+             "student_id": 1, "amount": 2500000, "status": "success"},
+            ...
+        ]
+    }
+    
+    Maksimal WEBHOOK_BATCH_MAX_ITEMS notifikasi. Signature diverifikasi sekali
+    untuk seluruh body, lalu setiap notifikasi divalidasi sendiri; hasil
+    dikembalikan per item dengan status processed, duplicate, acknowledged,
+    atau failed.
+    """
+    try:
+        if not request.is_json:
+            return jsonify({
+                'success': False,
+                'error': 'Content-Type must be application/json'
+            }), 400
+        
+        body = request.get_json()
+        notifications = body.get('notifications') if isinstance(body, dict) else body
+        
+        if not isinstance(notifications, list) or not notifications:
+            return jsonify({
+                'success': False,
+                'error': 'notifications must be a non-empty list'
+            }), 400
+        
+        max_items = current_app.config['WEBHOOK_BATCH_MAX_ITEMS']
+        if len(notifications) > max_items:
+            return jsonify({
+                'success': False,
+                'error': f'Maximum {max_items} notifications per batch'
+            }), 413
+        
+        results = [None] * len(notifications)
+        to_apply = []
+        
+        for index, item in enumerate(notifications):
+            if not isinstance(item, dict):
+                results[index] = {'status': 'failed', 'message': 'Notification must be an object'}
+                continue
+            
+            # Billing divalidasi sekaligus oleh PaymentService (satu query IN)
+            validation_errors = _validate_webhook_payload(item, check_billing=False)
+            if validation_errors:
+                results[index] = {'status': 'failed', 'message': '; '.join(validation_errors)}
+            elif item['status'] != 'success':
+                results[index] = {
+                    'status': 'acknowledged',
+                    'message': f"Webhook received with status '{item['status']}' - acknowledged"
+                }
+            else:
+                to_apply.append(index)
+        
+        applied = payment_service.apply_webhook_batch([notifications[i] for i in to_apply])
+        for index, result in zip(to_apply, applied):
+            results[index] = result
+        
+        summary = {'total': len(results)}
+        for index, result in enumerate(results):
+            result['index'] = index
+            result.setdefault('transaction_id', notifications[index].get('transaction_id')
+                              if isinstance(notifications[index], dict) else None)
+            summary[result['status']] = summary.get(result['status'], 0) + 1
+            WEBHOOK_EVENTS.inc(source='batch', outcome=result['status'])
+        
+        logger.info(f"Webhook batch processed: {summary}")
+        
+        return jsonify({
+            'success': True,
+            'summary': summary,
+            'results': results
+        }), 200
+    
+    except Exception as e:
+        error_msg = f"Error processing webhook batch: {str(e)}"
+        logger.error(error_msg)
+        return jsonify({
+            'success': False,
+            'error': error_msg
+        }), 500
+
+@webhook_bp.route('/inbox/metrics', methods=['GET'])
+def webhook_inbox_metrics():
+    """
+    Metrik webhook inbox: kedalaman antrian per status dan lag pemrosesan
+    
+    GET /api/webhook/inbox/metrics
+    """
+    try:
+        return jsonify(inbox_service.get_metrics()), 200
+    
+    except Exception as e:
+        error_msg = f"Error fetching webhook inbox metrics: {str(e)}"
+        logger.error(error_msg)
+        return jsonify({
+            'success': False,
+            'error': error_msg
+        }), 500
+
+@webhook_bp.route('/test', methods=['POST'])
+def test_webhook():
+    """
+    Test endpoint untuk webhook - untuk development/testing saja
+    Echo back the payload yang dikirim
+    
+    POST /api/webhook/test
+    {
+        "any_data": "can be anything"
+    }
+    """
+    try:
+        # Hanya izinkan di development mode
+        if not Config.DEBUG:
+            return jsonify({
+                'success': False,
+                'error': 'Test webhook not available in production'
+            }), 403
+        
+        # Echo back the payload
+        payload = request.get_json()
+        
+        return jsonify({
+            'success': True,
+            'message': 'Webhook test successful',
+            'received_payload': payload,
+            'timestamp': datetime.utcnow().isoformat()
+        }), 200
+    
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@webhook_bp.route('/health', methods=['GET'])
+def webhook_health():
+    """
+    Health check endpoint untuk payment gateway
+    
+    GET /api/webhook/health
+    """
+    return jsonify({
+        'status': 'healthy',
+        'service': 'SPP Payment Webhook Handler',
+        'timestamp': str(datetime.utcnow())
+    }), 200
+
+@webhook_bp.route('/simulate-payment', methods=['POST'])
+@idempotent('webhook.simulate_payment', lambda payload: payload.get('transaction_id'))
+def simulate_payment():
+    """
+    Simulate payment untuk testing (DEVELOPMENT ONLY)
+    
+    POST /api/webhook/simulate-payment
+    {
+        "billing_id": 1,
+        "student_id": 1,
+        "amount": 2500000,
+        "payment_method": "transfer",
+        "transaction_id": "SIM-001"  (optional, juga dipakai sebagai idempotency key)
+    }
+    
+    Ini akan send webhook ke /api/webhook/payment secara internal
+    untuk simulate payment gateway notification
+    """
+    try:
+        if not Config.DEBUG:
+            return jsonify({
+                'success': False,
+                'error': 'Simulate payment only available in development mode'
+            }), 403
+        
+        payload = request.get_json()
+        if not payload:
+            return jsonify({
+                'success': False,
+                'error': 'Request body is required'
+            }), 400
+        
+        # Validate required fields
+        required_fields = ['billing_id', 'student_id', 'amount']
+        for field in required_fields:
+            if field not in payload:
+                return jsonify({
+                    'success': False,
+                    'error': f'Missing required field: {field}'
+                }), 400
+        
+        # Create webhook payload
+        webhook_payload = {
+            'transaction_id': payload.get('transaction_id') or f'SIM-{uuid4().hex[:12].upper()}',
+            'reference_code': f'SIM-{datetime.utcnow().strftime("%Y%m%d%H%M%S")}',
+            'billing_id': payload['billing_id'],
+            'student_id': payload['student_id'],
+            'amount': payload['amount'],
+            'status': 'success',
+            'payment_method': payload.get('payment_method', 'simulated'),
+            'timestamp': datetime.utcnow().isoformat()
+        }
+        
+        # Process the simulated payment lewat jalur verifikasi yang sama dengan gateway
+        body = json.dumps(webhook_payload).encode()
+        result = payment_service.handle_webhook(body, payment_service.sign_webhook(body))
+        
+        return jsonify({
+            'success': result['success'],
+            'message': result.get('message'),
+            'simulated_payload': webhook_payload,
+            'payment_id': result.get('payment_id')
+        }), (200 if result['success'] else 400)
+    
+    except Exception as e:
+        error_msg = f"Error simulating payment: {str(e)}"
+        logger.error(error_msg)
+        return jsonify({
+            'success': False,
+            'error': error_msg
+        }), 500
+
+@webhook_bp.route('/test-all-students', methods=['POST'])
+@idempotent('webhook.test_all_students')
+def test_all_students():
+    """
+    Test payment untuk semua mahasiswa (DEVELOPMENT ONLY)
+    Simulate pembayaran sebagian untuk semua pending billings
+    
+    POST /api/webhook/test-all-students
+    {
+        "amount_percentage": 50  (optional: 0-100, default 50)
+    }
+    
+    Kirim header Idempotency-Key agar request ulang tidak membayar dua kali.
+    """
+    try:
+        if not Config.DEBUG:
+            return jsonify({
+                'success': False,
+                'error': 'Test endpoint only available in development mode'
+            }), 403
+        
+        payload = request.get_json() if request.is_json else {}
+        amount_percentage = payload.get('amount_percentage', 50)
+        
+        if not (0 < amount_percentage <= 100):
+            return jsonify({
+                'success': False,
+                'error': 'amount_percentage must be between 1 and 100'
+            }), 400
+        
+        # Get all pending billings
+        pending_billings = Billing.query.filter(
+            Billing.status.in_([Billing.STATUS_UNPAID, Billing.STATUS_PARTIAL])
+        ).all()
+        
+        if not pending_billings:
+            return jsonify({
+                'success': True,
+                'message': 'No pending billings to process',
+                'processed': 0
+            }), 200
+        
+        results = []
+        for billing in pending_billings:
+            # Calculate payment amount
+            payment_amount = int(billing.remaining_amount * (amount_percentage / 100))
+            
+            if payment_amount == 0:
+                continue
+            
+            # Create simulated payment
+            webhook_payload = {
+                'transaction_id': f'TEST-{uuid4().hex[:12].upper()}',
+                'reference_code': f'TEST-{billing.student_id}-{datetime.utcnow().strftime("%Y%m%d%H%M%S")}',
+                'billing_id': billing.id,
+                'student_id': billing.student_id,
+                'amount': payment_amount,
+                'status': 'success',
+                'payment_method': 'test_transfer',
+                'timestamp': datetime.utcnow().isoformat()
+            }
+            
+            # Process payment
+            body = json.dumps(webhook_payload).encode()
+            result = payment_service.handle_webhook(body, payment_service.sign_webhook(body))
+            
+            results.append({
+                'billing_id': billing.id,
+                'student_id': billing.student_id,
+                'amount_paid': payment_amount,
+                'success': result['success']
+            })
+        
+        return jsonify({
+            'success': True,
+            'message': f'Processed {len(results)} test payments',
+            'processed': len(results),
+            'results': results
+        }), 200
+    
+    except Exception as e:
+        error_msg = f"Error in test-all-students: {str(e)}"
+        logger.error(error_msg)
+        return jsonify({
+            'success': False,
+            'error': error_msg
+        }), 500
+
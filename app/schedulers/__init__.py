@@ -1,4 +1,7 @@
-# app/schedulers/__init__.py
-from .billing_scheduler import setup_billing_scheduler
-
-__all__ = ['setup_billing_scheduler']
+# app/schedulers/__init__.py
+from .billing_scheduler import setup_billing_scheduler, shutdown_scheduler
+from .leader import LeaderElection
+from .job_runner import JobRunner, JobContext, job_runner
+from .webhook_worker import WebhookWorkerPool, setup_webhook_workers
+
+__all__ = ['setup_billing_scheduler', 'shutdown_scheduler', 'LeaderElection', 'JobRunner', 'JobContext', 'job_runner', 'WebhookWorkerPool', 'setup_webhook_workers']
@@ -1,168 +1,264 @@
-# app/schedulers/billing_scheduler.py
-from apscheduler.schedulers.background import BackgroundScheduler
-from apscheduler.triggers.cron import CronTrigger
-from app.services.billing_service import BillingService
-from app.models import db
-from app.models.billing import Semester, Billing
-from app.models.student import Student
-from app.utils.logger import logger
-from datetime import datetime, timedelta
-from app.config import Config
-
-scheduler = BackgroundScheduler()
-billing_service = BillingService()
-
-def generate_billing_job():
-    """
-    Cron job untuk generate billing otomatis
-    Dijalankan di awal semester
-    """
-    try:
-        logger.info("Starting billing generation job...")
-        
-        # Ambil semester aktif
-        active_semester = Semester.query.filter_by(is_active=True).first()
-        
-        if not active_semester:
-            logger.warning("No active semester found")
-            return
-        
-        # Cek apakah billing sudah di-generate untuk semester ini
-        if active_semester.billing_generation_date:
-            logger.info(f"Billing already generated for {active_semester.name}")
-            return
-        
-        # Generate billing
-        result = billing_service.generate_billing_for_semester(active_semester.id)
-        
-        if result['success']:
-            # Update billing generation date
-            active_semester.billing_generation_date = datetime.utcnow()
-            db.session.commit()
-            
-            logger.info(f"Billing generation completed: {result['message']}")
-        else:
-            logger.error(f"Billing generation failed: {result['message']}")
-            
-    except Exception as e:
-        logger.error(f"Error in billing generation job: {str(e)}")
-
-def update_penalty_job():
-    """
-    Cron job untuk update denda keterlambatan
-    Dijalankan setiap hari pada jam 00:00
-    """
-    try:
-        logger.info("Starting penalty update job...")
-        
-        # Ambil semua billing yang belum dibayar
-        unpaid_billings = Billing.query.filter(
-            Billing.status.in_([Billing.STATUS_UNPAID, Billing.STATUS_PARTIAL, Billing.STATUS_OVERDUE])
-        ).all()
-        
-        updated_count = 0
-        for billing in unpaid_billings:
-            penalty = billing.calculate_penalty(
-                Config.OVERDUE_PENALTY_PER_DAY,
-                Config.OVERDUE_MAX_PENALTY
-            )
-            
-            if penalty != billing.penalty:
-                billing.penalty = penalty
-                
-                # Update status to overdue if necessary
-                if billing.is_overdue and billing.status != Billing.STATUS_PAID:
-                    billing.status = Billing.STATUS_OVERDUE
-                
-                updated_count += 1
-        
-        if updated_count > 0:
-            db.session.commit()
-            logger.info(f"Penalty update completed: {updated_count} billings updated")
-        else:
-            logger.info("No penalty updates needed")
-            
-    except Exception as e:
-        logger.error(f"Error in penalty update job: {str(e)}")
-
-def send_reminder_job():
-    """
-    Cron job untuk send reminder pembayaran
-    Dijalankan setiap hari pukul 09:00
-    """
-    try:
-        logger.info("Starting payment reminder job...")
-        
-        # Ambil billing yang akan jatuh tempo dalam 7 hari ke depan
-        upcoming_due = Billing.query.filter(
-            Billing.status != Billing.STATUS_PAID,
-            Billing.due_date <= datetime.utcnow() + timedelta(days=7),
-            Billing.due_date >= datetime.utcnow()
-        ).all()
-        
-        # Ambil billing yang sudah overdue
-        overdue_billings = Billing.query.filter(
-            Billing.status == Billing.STATUS_OVERDUE
-        ).all()
-        
-        all_reminders = upcoming_due + overdue_billings
-        
-        # TODO: Send email reminders
-        # Implementasi email sending di sini
-        
-        logger.info(f"Reminder job completed: {len(all_reminders)} reminders to send")
-        
-    except Exception as e:
-        logger.error(f"Error in reminder job: {str(e)}")
-
-def setup_billing_scheduler(app):
-    """
-    Setup scheduler untuk billing tasks
-    
-    Args:
-        app: Flask application instance
-    """
-    try:
-        # Start scheduler
-        if not scheduler.running:
-            scheduler.start()
-            logger.info("Scheduler started")
-        
-        # Add jobs
-        # 1. Generate billing di awal semester (hari pertama setiap bulan)
-        scheduler.add_job(
-            func=generate_billing_job,
-            trigger=CronTrigger(day=1, hour=0, minute=0),
-            id='generate_billing_job',
-            name='Generate Billing',
-            replace_existing=True
-        )
-        
-        # 2. Update penalty setiap hari (00:00)
-        scheduler.add_job(
-            func=update_penalty_job,
-            trigger=CronTrigger(hour=0, minute=0),
-            id='update_penalty_job',
-            name='Update Penalty',
-            replace_existing=True
-        )
-        
-        # 3. Send reminder setiap hari (09:00)
-        scheduler.add_job(
-            func=send_reminder_job,
-            trigger=CronTrigger(hour=9, minute=0),
-            id='send_reminder_job',
-            name='Send Payment Reminder',
-            replace_existing=True
-        )
-        
-        logger.info("Billing scheduler configured successfully")
-        
-    except Exception as e:
-        logger.error(f"Error setting up scheduler: {str(e)}")
-
-def shutdown_scheduler():
-    """Shutdown scheduler"""
-    if scheduler.running:
-        scheduler.shutdown()
-        logger.info("Scheduler shutdown")
+# app/schedulers/billing_scheduler.py
+import atexit
+from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.triggers.cron import CronTrigger
+from flask import current_app
+from sqlalchemy import and_, or_, select
+from app.services.billing_service import BillingService
+from app.models import db
+from app.models.billing import Semester, Billing
+from app.models.student import Student
+from app.utils.idempotency import purge_idempotency_keys
+from app.utils.logger import logger
+from app.utils.metrics import track_job
+from app.schedulers.leader import LeaderElection
+from app.schedulers.job_runner import job_runner
+from datetime import datetime, timedelta
+
+scheduler = BackgroundScheduler()
+billing_service = BillingService()
+leader_election = None
+
+@track_job('generate_billing_job')
+@job_runner.job('generate_billing_job')
+def generate_billing_job(run):
+    """
+    Cron job untuk generate billing otomatis
+    Dijalankan di awal semester
+    
+    Billing di-insert dan di-commit per chunk mahasiswa; run yang terputus
+    dilanjutkan dari mahasiswa terakhir yang sudah di-commit.
+    
+    Returns:
+        int: Jumlah billing dibuat
+    """
+    logger.info("Starting billing generation job...")
+    
+    # Ambil semester aktif (run lanjutan tetap memakai semester run sebelumnya)
+    semester_id = run.params.get('semester_id')
+    if semester_id is not None:
+        active_semester = db.session.get(Semester, semester_id)
+    else:
+        active_semester = Semester.query.filter_by(is_active=True).first()
+    
+    if not active_semester:
+        logger.warning("No active semester found")
+        return 0
+    
+    # Cek apakah billing sudah di-generate untuk semester ini
+    if active_semester.billing_generation_date:
+        logger.info(f"Billing already generated for {active_semester.name}")
+        return 0
+    
+    run.param('semester_id', active_semester.id)
+    
+    # Generate billing
+    result = billing_service.generate_billing_for_semester(
+        active_semester.id,
+        chunk_size=run.chunk_size,
+        start_after_id=run.last_id,
+        on_chunk=run.record_chunk
+    )
+    if not result['success']:
+        raise RuntimeError(result['message'])
+    
+    # Update billing generation date
+    active_semester.billing_generation_date = datetime.utcnow()
+    db.session.commit()
+    
+    logger.info(f"Billing generation completed: {result['message']}")
+    return result['created_count']
+
+@track_job('update_penalty_job')
+@job_runner.job('update_penalty_job')
+def update_penalty_job(run):
+    """
+    Cron job untuk update denda keterlambatan
+    Dijalankan setiap hari pada jam 00:00
+    
+    Returns:
+        int: Jumlah billing diperbarui
+    """
+    logger.info("Starting penalty update job...")
+    
+    # Satu timestamp acuan untuk seluruh run (termasuk run lanjutan), UPDATE set-based per chunk
+    as_of = datetime.fromisoformat(run.param('as_of', datetime.utcnow().isoformat()))
+    
+    result = billing_service.update_overdue_penalties(
+        current_app.config['OVERDUE_PENALTY_PER_DAY'],
+        current_app.config['OVERDUE_MAX_PENALTY'],
+        as_of=as_of,
+        chunk_size=run.chunk_size,
+        start_after_id=run.last_id,
+        on_chunk=run.record_chunk
+    )
+    if not result['success']:
+        raise RuntimeError(result['message'])
+    
+    if result['updated_count'] > 0:
+        logger.info(f"Penalty update completed: {result['updated_count']} billings updated")
+    else:
+        logger.info("No penalty updates needed")
+    return result['updated_count']
+
+@track_job('send_reminder_job')
+@job_runner.job('send_reminder_job')
+def send_reminder_job(run):
+    """
+    Cron job untuk send reminder pembayaran
+    Dijalankan setiap hari pukul 09:00
+    
+    Billing dibaca per chunk ID (keyset), checkpoint di-commit per chunk
+    agar run yang terputus tidak mengirim ulang reminder yang sudah terkirim.
+    
+    Returns:
+        int: Jumlah reminder
+    """
+    logger.info("Starting payment reminder job...")
+    
+    as_of = datetime.fromisoformat(run.param('as_of', datetime.utcnow().isoformat()))
+    
+    # Billing yang akan jatuh tempo dalam 7 hari ke depan, atau yang sudah overdue
+    reminder_filter = or_(
+        and_(
+            Billing.status != Billing.STATUS_PAID,
+            Billing.due_date <= as_of + timedelta(days=7),
+            Billing.due_date >= as_of
+        ),
+        Billing.status == Billing.STATUS_OVERDUE
+    )
+    
+    last_id = run.last_id or 0
+    reminder_count = 0
+    while True:
+        chunk = db.session.execute(
+            select(Billing.id, Billing.student_id, Billing.status)
+            .where(Billing.id > last_id, reminder_filter)
+            .order_by(Billing.id)
+            .limit(run.chunk_size)
+        ).all()
+        if not chunk:
+            break
+        
+        # TODO: Send email reminders
+        # Implementasi email sending di sini
+        
+        last_id = chunk[-1].id
+        reminder_count += len(chunk)
+        run.commit_chunk(last_id, scanned=len(chunk))
+    
+    logger.info(f"Reminder job completed: {reminder_count} reminders to send")
+    return reminder_count
+
+@track_job('purge_idempotency_job')
+@job_runner.job('purge_idempotency_job')
+def purge_idempotency_job(run):
+    """
+    Cron job untuk menghapus response idempotency yang melewati masa retensi
+    Dijalankan setiap hari pukul 01:00
+    
+    Returns:
+        int: Jumlah key dihapus
+    """
+    now = datetime.fromisoformat(run.param('as_of', datetime.utcnow().isoformat()))
+    deleted = purge_idempotency_keys(chunk_size=run.chunk_size, now=now, on_chunk=run.record_chunk)
+    
+    logger.info(f"Idempotency purge completed: {deleted} keys deleted")
+    return deleted
+
+def setup_billing_scheduler(app, force=False):
+    """
+    Setup scheduler untuk billing tasks
+    
+    Scheduler berjalan di setiap proses yang mengaktifkannya, tetapi job
+    hanya dieksekusi oleh proses yang memegang lease leader (tabel
+    scheduler_leases), sehingga deployment multi-worker menjalankan setiap
+    job sekali. Dengan SCHEDULER_ENABLED=false web worker tidak menjalankan
+    scheduler sama sekali; gunakan `flask scheduler` sebagai proses terpisah.
+    
+    Args:
+        app: Flask application instance
+        force: Jalankan meskipun SCHEDULER_ENABLED=false (command `flask scheduler`)
+    
+    Returns:
+        LeaderElection proses ini, atau None jika scheduler tidak dijalankan
+    """
+    global leader_election
+    
+    if not (force or app.config.get('SCHEDULER_ENABLED', True)):
+        logger.info("Billing scheduler disabled in this process (SCHEDULER_ENABLED=false)")
+        return None
+    
+    try:
+        # Job dijalankan dari thread APScheduler: runner mendorong app context ini
+        job_runner.init_app(app)
+        
+        if leader_election is None:
+            leader_election = LeaderElection(app)
+            leader_election.start()
+            atexit.register(shutdown_scheduler)
+        
+        # Start scheduler
+        if not scheduler.running:
+            scheduler.start()
+            logger.info("Scheduler started")
+        
+        # Add jobs
+        # 1. Generate billing di awal semester (hari pertama setiap bulan)
+        scheduler.add_job(
+            func=leader_election.run_if_leader,
+            args=[generate_billing_job],
+            trigger=CronTrigger(day=1, hour=0, minute=0),
+            id='generate_billing_job',
+            name='Generate Billing',
+            replace_existing=True
+        )
+        
+        # 2. Update penalty setiap hari (00:00)
+        scheduler.add_job(
+            func=leader_election.run_if_leader,
+            args=[update_penalty_job],
+            trigger=CronTrigger(hour=0, minute=0),
+            id='update_penalty_job',
+            name='Update Penalty',
+            replace_existing=True
+        )
+        
+        # 3. Send reminder setiap hari (09:00)
+        scheduler.add_job(
+            func=leader_election.run_if_leader,
+            args=[send_reminder_job],
+            trigger=CronTrigger(hour=9, minute=0),
+            id='send_reminder_job',
+            name='Send Payment Reminder',
+            replace_existing=True
+        )
+        
+        # 4. Hapus idempotency key kedaluwarsa setiap hari (01:00)
+        scheduler.add_job(
+            func=leader_election.run_if_leader,
+            args=[purge_idempotency_job],
+            trigger=CronTrigger(hour=1, minute=0),
+            id='purge_idempotency_job',
+            name='Purge Idempotency Keys',
+            replace_existing=True
+        )
+        
+        logger.info("Billing scheduler configured successfully")
+        return leader_election
+    
+    except Exception as e:
+        logger.error(f"Error setting up scheduler: {str(e)}")
+        return None
+
+def shutdown_scheduler():
+    """Shutdown scheduler dan lepas lease leader"""
+    global leader_election
+    
+    if scheduler.running:
+        scheduler.shutdown()
+        logger.info("Scheduler shutdown")
+    
+    if leader_election is not None:
+        leader_election.stop()
+        leader_election = None
@@ -0,0 +1,242 @@
+# app/schedulers/job_runner.py
+import os
+import socket
+import time
+from datetime import datetime, timedelta
+from functools import wraps
+from flask import current_app, has_app_context
+from sqlalchemy import update
+from app.models import db
+from app.models.job_run import JobRun
+from app.utils.logger import logger
+
+class JobContext:
+    """
+    State satu run job: parameter, checkpoint, dan statistik per chunk
+    
+    Job memproses pekerjaannya per chunk dan memanggil record_chunk() tepat
+    sebelum commit chunk tersebut, sehingga checkpoint dan statistik di
+    job_runs ikut ter-commit dalam transaksi yang sama dengan datanya.
+    """
+    
+    def __init__(self, run_id, job_name, params=None, checkpoint=None, chunk_size=None, resumed_from_id=None):
+        self.run_id = run_id
+        self.job_name = job_name
+        self.params = dict(params or {})
+        self.checkpoint = dict(checkpoint or {})
+        self.chunk_size = chunk_size
+        self.resumed_from_id = resumed_from_id
+        self.chunks = 0
+        self.rows_scanned = 0
+        self.rows_updated = 0
+    
+    @property
+    def resumed(self):
+        return self.resumed_from_id is not None
+    
+    @property
+    def last_id(self):
+        """ID terakhir yang sudah di-commit run ini/run yang dilanjutkan (None jika mulai dari awal)"""
+        return self.checkpoint.get('last_id')
+    
+    def param(self, name, default=None):
+        """
+        Ambil parameter run; run baru menyimpan default-nya agar run lanjutan
+        memakai nilai yang sama (mis. timestamp as-of)
+        """
+        return self.params.setdefault(name, default)
+    
+    def record_chunk(self, last_id, scanned=0, updated=0):
+        """
+        Catat checkpoint dan statistik satu chunk di session saat ini
+        
+        Tidak commit: pemanggil commit bersama perubahan data chunk tersebut.
+        
+        Args:
+            last_id: ID terakhir yang selesai diproses di chunk ini
+            scanned: Jumlah baris yang diperiksa
+            updated: Jumlah baris yang ditulis
+        """
+        self.checkpoint['last_id'] = last_id
+        self.chunks += 1
+        self.rows_scanned += scanned
+        self.rows_updated += updated
+        
+        db.session.execute(
+            update(JobRun)
+            .where(JobRun.id == self.run_id)
+            .values(
+                params=self.params,
+                checkpoint=self.checkpoint,
+                chunks=JobRun.chunks + 1,
+                rows_scanned=JobRun.rows_scanned + scanned,
+                rows_updated=JobRun.rows_updated + updated,
+                heartbeat_at=datetime.utcnow()
+            )
+            .execution_options(synchronize_session=False)
+        )
+    
+    def commit_chunk(self, last_id, scanned=0, updated=0):
+        """record_chunk() lalu commit, untuk job yang menulis lewat session sendiri"""
+        self.record_chunk(last_id, scanned, updated)
+        db.session.commit()
+
+
+class JobRunner:
+    """
+    Runner job scheduler: app context, checkpoint, dan riwayat run di job_runs
+    
+    Setiap run dijalankan di dalam Flask app context (thread APScheduler tidak
+    punya context sendiri) dan dicatat sebagai satu baris job_runs. Jika run
+    sebelumnya gagal atau prosesnya mati di tengah jalan, run berikutnya
+    melanjutkan dari checkpoint dan parameter run tersebut.
+    """
+    
+    def __init__(self, app=None, holder_id=None):
+        self.app = app
+        self.holder_id = holder_id or f"{socket.gethostname()}-{os.getpid()}"
+    
+    def init_app(self, app):
+        self.app = app
+    
+    def job(self, job_name):
+        """
+        Decorator job: fungsi menerima JobContext, wrapper dipanggil tanpa argumen
+        
+        Returns:
+            Hasil job, atau None jika gagal/dilewati
+        """
+        def decorator(fn):
+            @wraps(fn)
+            def wrapper():
+                return self.run(job_name, fn)
+            wrapper.job_name = job_name
+            return wrapper
+        return decorator
+    
+    def run(self, job_name, fn):
+        """
+        Jalankan fn(JobContext) di app context dan catat hasilnya
+        
+        App context yang sudah aktif (request, CLI, test) dipakai apa adanya;
+        dari thread scheduler dipakai app yang didaftarkan lewat init_app().
+        """
+        if has_app_context():
+            return self._run(job_name, fn)
+        
+        if self.app is None:
+            logger.error(f"Cannot run {job_name}: job runner has no Flask app")
+            return None
+        
+        with self.app.app_context():
+            return self._run(job_name, fn)
+    
+    def _run(self, job_name, fn):
+        try:
+            context = self._start(job_name)
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error starting {job_name}: {str(e)}")
+            return None
+        
+        if context is None:
+            return None
+        
+        started = time.perf_counter()
+        try:
+            result = fn(context)
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error in {job_name} (run #{context.run_id}): {str(e)}")
+            self._finish(context, JobRun.STATUS_FAILED, started, error=str(e))
+            return None
+        
+        self._finish(context, JobRun.STATUS_SUCCESS, started)
+        return result
+    
+    def _start(self, job_name):
+        """
+        Buat baris run baru, melanjutkan run terakhir yang gagal/crash
+        
+        Returns:
+            JobContext, atau None jika run lain untuk job ini masih berjalan
+        """
+        config = current_app.config
+        now = datetime.utcnow()
+        
+        previous = JobRun.query.filter_by(job_name=job_name).order_by(JobRun.id.desc()).first()
+        resume = None
+        
+        if previous is not None and previous.status == JobRun.STATUS_RUNNING:
+            if previous.heartbeat_at >= now - timedelta(seconds=config['JOB_RUN_STALE_SECONDS']):
+                logger.warning(f"Skipping {job_name}: run #{previous.id} by {previous.holder} is still running")
+                return None
+            # Tidak ada commit chunk terlalu lama: proses run tersebut mati
+            previous.status = JobRun.STATUS_INTERRUPTED
+            previous.finished_at = now
+            logger.warning(f"{job_name} run #{previous.id} by {previous.holder} marked interrupted")
+        
+        if (
+            previous is not None
+            and previous.status in (JobRun.STATUS_FAILED, JobRun.STATUS_INTERRUPTED)
+            and previous.checkpoint
+            and previous.started_at >= now - timedelta(seconds=config['JOB_RUN_RESUME_MAX_AGE'])
+        ):
+            resume = previous
+        
+        run = JobRun(
+            job_name=job_name,
+            status=JobRun.STATUS_RUNNING,
+            holder=self.holder_id,
+            params=resume.params if resume else None,
+            checkpoint=resume.checkpoint if resume else None,
+            resumed_from_id=resume.id if resume else None,
+            started_at=now,
+            heartbeat_at=now
+        )
+        db.session.add(run)
+        db.session.commit()
+        
+        if resume:
+            logger.info(f"{job_name} run #{run.id} resuming run #{resume.id} from checkpoint {resume.checkpoint}")
+        
+        return JobContext(
+            run.id, job_name,
+            params=run.params,
+            checkpoint=run.checkpoint,
+            chunk_size=config['JOB_CHUNK_SIZE'],
+            resumed_from_id=run.resumed_from_id
+        )
+    
+    def _finish(self, context, status, started, error=None):
+        duration = time.perf_counter() - started
+        values = {
+            'status': status,
+            'duration_seconds': round(duration, 3),
+            'error': error,
+            'finished_at': datetime.utcnow()
+        }
+        if status == JobRun.STATUS_SUCCESS:
+            values['params'] = context.params
+        # Saat gagal checkpoint dibiarkan: nilai di database adalah chunk terakhir yang benar-benar ter-commit
+        
+        try:
+            db.session.execute(
+                update(JobRun)
+                .where(JobRun.id == context.run_id)
+                .values(**values)
+                .execution_options(synchronize_session=False)
+            )
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error recording {context.job_name} run #{context.run_id}: {str(e)}")
+            return
+        
+        logger.info(
+            f"{context.job_name} run #{context.run_id} {status} in {duration:.2f}s: "
+            f"{context.chunks} chunks, {context.rows_scanned} rows scanned, {context.rows_updated} rows updated"
+        )
+
+
+job_runner = JobRunner()
@@ -0,0 +1,157 @@
+# app/schedulers/leader.py
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+from uuid import uuid4
+from sqlalchemy import case, or_, update
+from sqlalchemy.exc import IntegrityError
+from app.models import db
+from app.models.scheduler_lease import SchedulerLease
+from app.utils.logger import logger
+from app.utils.metrics import SCHEDULER_LEADER
+
+class LeaderElection:
+    """
+    Leader election berbasis lease di tabel scheduler_leases
+    
+    Setiap proses yang menjalankan scheduler mencoba mengambil/memperpanjang
+    lease dengan UPDATE bersyarat (holder sendiri, kosong, atau sudah
+    kedaluwarsa), sehingga paling banyak satu proses memegang lease pada
+    satu waktu. Leader memperpanjang lease setiap heartbeat; jika leader
+    mati, proses lain mengambil alih setelah lease kedaluwarsa (TTL).
+    """
+    
+    def __init__(self, app, name=None, holder_id=None, ttl=None, heartbeat_interval=None):
+        self.app = app
+        self.name = name or app.config['SCHEDULER_LEASE_NAME']
+        self.holder_id = holder_id or f"{socket.gethostname()}-{os.getpid()}-{uuid4().hex[:8]}"
+        self.ttl = ttl or app.config['SCHEDULER_LEASE_TTL']
+        self.heartbeat_interval = heartbeat_interval or app.config['SCHEDULER_HEARTBEAT_INTERVAL']
+        self._deadline = None  # time.monotonic() saat lease lokal dianggap habis
+        self._stop_event = threading.Event()
+        self._thread = None
+    
+    @property
+    def is_leader(self):
+        deadline = self._deadline
+        return deadline is not None and time.monotonic() < deadline
+    
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+    
+    def try_acquire(self):
+        """
+        Ambil atau perpanjang lease
+        
+        Returns:
+            bool: True jika proses ini leader sampai TTL berikutnya
+        """
+        was_leader = self.is_leader
+        started = time.monotonic()
+        now = datetime.utcnow()
+        
+        try:
+            with self.app.app_context():
+                if db.session.get(SchedulerLease, self.name) is None:
+                    try:
+                        db.session.add(SchedulerLease(name=self.name, expires_at=now))
+                        db.session.commit()
+                    except IntegrityError:
+                        # Proses lain membuat baris lease lebih dulu
+                        db.session.rollback()
+                
+                result = db.session.execute(
+                    update(SchedulerLease)
+                    .where(
+                        SchedulerLease.name == self.name,
+                        or_(
+                            SchedulerLease.holder == self.holder_id,
+                            SchedulerLease.holder.is_(None),
+                            SchedulerLease.expires_at < now
+                        )
+                    )
+                    .values(
+                        holder=self.holder_id,
+                        acquired_at=case(
+                            (SchedulerLease.holder == self.holder_id, SchedulerLease.acquired_at), else_=now
+                        ),
+                        heartbeat_at=now,
+                        expires_at=now + timedelta(seconds=self.ttl)
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+                db.session.commit()
+                acquired = result.rowcount == 1
+        except Exception as e:
+            # Database sibuk/terputus: tetap leader hanya sampai lease lokal habis
+            logger.warning(f"Scheduler lease heartbeat failed for {self.holder_id}: {str(e)}")
+            return self.is_leader
+        
+        self._deadline = started + self.ttl if acquired else None
+        SCHEDULER_LEADER.set(1 if acquired else 0)
+        
+        if acquired and not was_leader:
+            logger.info(f"Scheduler leadership acquired by {self.holder_id} (lease {self.name})")
+        elif was_leader and not acquired:
+            logger.warning(f"Scheduler leadership lost by {self.holder_id} (lease {self.name})")
+        return acquired
+    
+    def release(self):
+        """Lepas lease agar proses lain bisa langsung mengambil alih"""
+        self._deadline = None
+        SCHEDULER_LEADER.set(0)
+        try:
+            with self.app.app_context():
+                db.session.execute(
+                    update(SchedulerLease)
+                    .where(SchedulerLease.name == self.name, SchedulerLease.holder == self.holder_id)
+                    .values(holder=None, expires_at=datetime.utcnow())
+                    .execution_options(synchronize_session=False)
+                )
+                db.session.commit()
+        except Exception as e:
+            logger.warning(f"Error releasing scheduler lease for {self.holder_id}: {str(e)}")
+    
+    def start(self):
+        """Start thread heartbeat"""
+        if self.running:
+            return
+        
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='scheduler-leader', daemon=True)
+        self._thread.start()
+        logger.info(
+            f"Scheduler leader election started as {self.holder_id} "
+            f"(ttl {self.ttl}s, heartbeat {self.heartbeat_interval}s)"
+        )
+    
+    def stop(self, timeout=10):
+        """Hentikan heartbeat dan lepas lease"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.release()
+    
+    def run_if_leader(self, job, *args, **kwargs):
+        """
+        Jalankan job hanya di leader
+        
+        Lease diperbarui tepat sebelum job, sehingga proses yang baru saja
+        kehilangan lease (atau belum sempat heartbeat) tidak ikut menjalankan.
+        
+        Returns:
+            Hasil job, atau None jika proses ini bukan leader
+        """
+        if not self.try_acquire():
+            logger.debug(f"Skipping {job.__name__} on {self.holder_id}: not scheduler leader")
+            return None
+        return job(*args, **kwargs)
+    
+    def _run(self):
+        while not self._stop_event.is_set():
+            self.try_acquire()
+            self._stop_event.wait(self.heartbeat_interval)
@@ -0,0 +1,92 @@
+# app/schedulers/webhook_worker.py
+import os
+import socket
+import threading
+from app.models import db
+from app.services.webhook_inbox_service import WebhookInboxService
+from app.utils.logger import logger
+
+class WebhookWorkerPool:
+    """Pool thread yang menguras webhook inbox secara batch"""
+    
+    def __init__(self, app, num_workers=None, poll_interval=None):
+        self.app = app
+        self.num_workers = num_workers or app.config['WEBHOOK_WORKERS']
+        self.poll_interval = poll_interval or app.config['WEBHOOK_POLL_INTERVAL']
+        self.inbox_service = WebhookInboxService()
+        self._stop_event = threading.Event()
+        self._threads = []
+    
+    @property
+    def running(self):
+        return any(thread.is_alive() for thread in self._threads)
+    
+    def start(self):
+        """Start semua thread worker"""
+        if self.running:
+            return
+        
+        self._stop_event.clear()
+        prefix = f"{socket.gethostname()}-{os.getpid()}"
+        self._threads = [
+            threading.Thread(
+                target=self._run,
+                args=(f"{prefix}-webhook-{n}",),
+                name=f"webhook-worker-{n}",
+                daemon=True
+            )
+            for n in range(self.num_workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+        
+        logger.info(f"Webhook worker pool started with {self.num_workers} workers")
+    
+    def stop(self, timeout=10):
+        """Hentikan worker setelah batch yang sedang berjalan selesai"""
+        self._stop_event.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        logger.info("Webhook worker pool stopped")
+    
+    def _run(self, worker_id):
+        while not self._stop_event.is_set():
+            claimed = 0
+            try:
+                with self.app.app_context():
+                    stats = self.inbox_service.process_batch(worker_id)
+                    claimed = stats['claimed']
+                    if claimed:
+                        logger.info(f"Webhook worker {worker_id} batch: {stats}")
+            except Exception as e:
+                logger.error(f"Error in webhook worker {worker_id}: {str(e)}")
+            finally:
+                with self.app.app_context():
+                    db.session.remove()
+            
+            # Antrian kosong (atau error): tunggu sebelum polling lagi
+            if not claimed:
+                self._stop_event.wait(self.poll_interval)
+
+def setup_webhook_workers(app):
+    """
+    Start worker pool webhook inbox jika mode inbox aktif
+    
+    Args:
+        app: Flask application instance
+    
+    Returns:
+        WebhookWorkerPool atau None
+    """
+    if not app.config.get('WEBHOOK_INBOX_ENABLED') or app.config.get('TESTING'):
+        return None
+    
+    try:
+        pool = WebhookWorkerPool(app)
+        pool.start()
+        app.extensions['webhook_worker_pool'] = pool
+        return pool
+    except Exception as e:
+        logger.error(f"Error starting webhook workers: {str(e)}")
+        return None
@@ -1,10 +1,20 @@
-# app/services/__init__.py
-from .billing_service import BillingService
-from .payment_service import PaymentService
-from .ai_service import AIFinancialService
-
-__all__ = [
-    'BillingService',
-    'PaymentService',
-    'AIFinancialService'
-]
+# app/services/__init__.py
+from .billing_service import BillingService
+from .payment_service import PaymentService
+from .ai_service import AIFinancialService
+from .dashboard_service import DashboardService
+from .webhook_inbox_service import WebhookInboxService
+from .reconciliation_service import ReconciliationService
+from .statement_ingestion_service import StatementIngestionService
+from .export_service import ExportService
+
+__all__ = [
+    'BillingService',
+    'PaymentService',
+    'AIFinancialService',
+    'DashboardService',
+    'WebhookInboxService',
+    'ReconciliationService',
+    'StatementIngestionService',
+    'ExportService'
+]
@@ -1,203 +1,424 @@
-# app/services/billing_service.py
-from datetime import datetime, timedelta
-from app.models import db
-from app.models.student import Student, ProgramStudi
-from app.models.billing import Billing, Semester
-from app.utils.logger import logger
-
-class BillingService:
-    """Service untuk mengelola billing/tagihan SPP"""
-    
-    def __init__(self, app=None):
-        self.app = app
-        
-    def generate_billing_for_semester(self, semester_id, billing_due_days=14):
-        """
-        Generate billing untuk semua mahasiswa aktif di semester tertentu
-        
-        Args:
-            semester_id: ID semester
-            billing_due_days: Jumlah hari untuk due date (default: 14 hari)
-            
-        Returns:
-            dict: {success: bool, message: str, created_count: int, failed_count: int}
-        """
-        try:
-            semester = Semester.query.get(semester_id)
-            if not semester:
-                return {
-                    'success': False,
-                    'message': f'Semester dengan ID {semester_id} tidak ditemukan'
-                }
-            
-            # Ambil semua mahasiswa aktif
-            active_students = Student.query.filter_by(status='active').all()
-            
-            created_count = 0
-            failed_count = 0
-            
-            for student in active_students:
-                try:
-                    # Cek apakah sudah ada billing untuk semester ini
-                    existing_billing = Billing.query.filter_by(
-                        student_id=student.id,
-                        semester=semester.name
-                    ).first()
-                    
-                    if existing_billing:
-                        continue
-                    
-                    # Ambil SPP amount dari program studi
-                    spp_amount = student.program_studi.spp_amount
-                    
-                    # Calculate due date
-                    due_date = datetime.utcnow() + timedelta(days=billing_due_days)
-                    
-                    # Create billing
-                    billing = Billing(
-                        student_id=student.id,
-                        semester=semester.name,
-                        total_amount=spp_amount,
-                        remaining_amount=spp_amount,
-                        due_date=due_date,
-                        status=Billing.STATUS_UNPAID
-                    )
-                    
-                    db.session.add(billing)
-                    created_count += 1
-                    
-                except Exception as e:
-                    logger.error(f"Error creating billing for student {student.nim}: {str(e)}")
-                    failed_count += 1
-            
-            db.session.commit()
-            
-            message = f"Berhasil generate billing untuk {created_count} mahasiswa"
-            if failed_count > 0:
-                message += f", {failed_count} gagal"
-            
-            logger.info(message)
-            
-            return {
-                'success': True,
-                'message': message,
-                'created_count': created_count,
-                'failed_count': failed_count
-            }
-            
-        except Exception as e:
-            db.session.rollback()
-            error_msg = f"Error generating billing: {str(e)}"
-            logger.error(error_msg)
-            return {
-                'success': False,
-                'message': error_msg
-            }
-    
-    def calculate_and_update_penalty(self, billing_id, penalty_per_day, max_penalty):
-        """
-        Hitung dan update denda keterlambatan
-        
-        Args:
-            billing_id: ID billing
-            penalty_per_day: Denda per hari (dalam Rupiah)
-            max_penalty: Denda maksimum
-            
-        Returns:
-            dict: {success: bool, billing: Billing, penalty: int}
-        """
-        try:
-            billing = Billing.query.get(billing_id)
-            if not billing:
-                return {'success': False, 'message': 'Billing tidak ditemukan'}
-            
-            # Calculate penalty
-            penalty = billing.calculate_penalty(penalty_per_day, max_penalty)
-            billing.penalty = penalty
-            
-            # Update status jika overdue
-            if billing.is_overdue and billing.status != Billing.STATUS_PAID:
-                billing.status = Billing.STATUS_OVERDUE
-            
-            db.session.commit()
-            
-            return {
-                'success': True,
-                'billing': billing,
-                'penalty': penalty
-            }
-            
-        except Exception as e:
-            db.session.rollback()
-            logger.error(f"Error calculating penalty: {str(e)}")
-            return {
-                'success': False,
-                'message': str(e)
-            }
-    
-    def can_student_register_krs(self, student_id):
-        """
-        Cek apakah mahasiswa bisa mendaftar KRS (tidak ada tunggakan)
-        
-        Args:
-            student_id: ID mahasiswa
-            
-        Returns:
-            dict: {can_register: bool, message: str, outstanding: int}
-        """
-        student = Student.query.get(student_id)
-        if not student:
-            return {
-                'can_register': False,
-                'message': 'Mahasiswa tidak ditemukan',
-                'outstanding': 0
-            }
-        
-        # Cek tunggakan yang belum lunas
-        outstanding_billings = Billing.query.filter(
-            Billing.student_id == student_id,
-            Billing.status.in_([Billing.STATUS_UNPAID, Billing.STATUS_PARTIAL, Billing.STATUS_OVERDUE])
-        ).all()
-        
-        total_outstanding = sum(b.remaining_amount for b in outstanding_billings)
-        
-        if total_outstanding > 0:
-            return {
-                'can_register': False,
-                'message': f'Mahasiswa memiliki tunggakan sebesar Rp {total_outstanding:,}',
-                'outstanding': total_outstanding
-            }
-        
-        return {
-            'can_register': True,
-            'message': 'Mahasiswa bisa mendaftar KRS',
-            'outstanding': 0
-        }
-    
-    def get_billing_summary(self, student_id):
-        """
-        Dapatkan ringkasan billing untuk satu mahasiswa
-        
-        Args:
-            student_id: ID mahasiswa
-            
-        Returns:
-            dict: {student, total_billed, total_paid, total_outstanding, billings}
-        """
-        student = Student.query.get(student_id)
-        if not student:
-            return {'error': 'Mahasiswa tidak ditemukan'}
-        
-        billings = Billing.query.filter_by(student_id=student_id).all()
-        
-        total_billed = sum(b.total_amount for b in billings)
-        total_paid = sum(b.paid_amount for b in billings)
-        total_outstanding = sum(b.remaining_amount for b in billings)
-        
-        return {
-            'student': student,
-            'total_billed': total_billed,
-            'total_paid': total_paid,
-            'total_outstanding': total_outstanding,
-            'billings': billings
-        }
+# app/services/billing_service.py
+from collections import defaultdict
+from datetime import datetime, timedelta
+from sqlalchemy import and_, bindparam, case, exists, func, or_, select, update
+from app.config import Config
+from app.models import db
+from app.models.base import whole_days_between
+from app.models.student import Student, ProgramStudi
+from app.models.billing import Billing, Semester
+from app.models.rollup import BillingStatusRollup
+from app.utils.logger import logger
+from app.utils.cache import bump_finance_version
+
+class BillingService:
+    """Service untuk mengelola billing/tagihan SPP"""
+    
+    def __init__(self, app=None):
+        self.app = app
+    
+    def generate_billing_for_semester(self, semester_id, billing_due_days=14, bulk=True, chunk_size=None,
+                                      start_after_id=None, on_chunk=None):
+        """
+        Generate billing untuk semua mahasiswa aktif di semester tertentu
+        
+        Args:
+            semester_id: ID semester
+            billing_due_days: Jumlah hari untuk due date (default: 14 hari)
+            bulk: True untuk mode set-based (anti-join + bulk insert),
+                False untuk loop per mahasiswa via ORM
+            chunk_size: Jumlah baris per bulk insert (default: Config.BILLING_BULK_CHUNK_SIZE)
+            start_after_id: Lewati mahasiswa dengan ID <= nilai ini (lanjutan checkpoint, mode bulk)
+            on_chunk: Callback (last_student_id, scanned, created) sebelum commit per chunk;
+                jika diberikan setiap chunk di-commit sendiri (mode bulk)
+        
+        Returns:
+            dict: {success: bool, message: str, created_count: int, failed_count: int}
+        """
+        try:
+            semester = Semester.query.get(semester_id)
+            if not semester:
+                return {
+                    'success': False,
+                    'message': f'Semester dengan ID {semester_id} tidak ditemukan'
+                }
+            
+            if bulk:
+                created_count, failed_count = self._bulk_create_billings(
+                    semester, billing_due_days, chunk_size or Config.BILLING_BULK_CHUNK_SIZE,
+                    start_after_id=start_after_id, on_chunk=on_chunk
+                )
+            else:
+                created_count, failed_count = self._loop_create_billings(semester, billing_due_days)
+            
+            db.session.commit()
+            bump_finance_version()
+            
+            message = f"Berhasil generate billing untuk {created_count} mahasiswa"
+            if failed_count > 0:
+                message += f", {failed_count} gagal"
+            
+            logger.info(message)
+            
+            return {
+                'success': True,
+                'message': message,
+                'created_count': created_count,
+                'failed_count': failed_count
+            }
+        
+        except Exception as e:
+            db.session.rollback()
+            error_msg = f"Error generating billing: {str(e)}"
+            logger.error(error_msg)
+            return {
+                'success': False,
+                'message': error_msg
+            }
+    
+    def _loop_create_billings(self, semester, billing_due_days):
+        """
+        Buat billing satu per satu via ORM (query per mahasiswa)
+        
+        Returns:
+            tuple: (created_count, failed_count)
+        """
+        # Ambil semua mahasiswa aktif
+        active_students = Student.query.filter_by(status='active').all()
+        
+        created_count = 0
+        failed_count = 0
+        
+        for student in active_students:
+            try:
+                # Cek apakah sudah ada billing untuk semester ini
+                existing_billing = Billing.query.filter_by(
+                    student_id=student.id,
+                    semester=semester.name
+                ).first()
+                
+                if existing_billing:
+                    continue
+                
+                # Ambil SPP amount dari program studi
+                spp_amount = student.program_studi.spp_amount
+                
+                # Calculate due date
+                due_date = datetime.utcnow() + timedelta(days=billing_due_days)
+                
+                # Create billing
+                billing = Billing(
+                    student_id=student.id,
+                    semester=semester.name,
+                    total_amount=spp_amount,
+                    remaining_amount=spp_amount,
+                    due_date=due_date,
+                    status=Billing.STATUS_UNPAID
+                )
+                
+                db.session.add(billing)
+                created_count += 1
+            
+            except Exception as e:
+                logger.error(f"Error creating billing for student {student.nim}: {str(e)}")
+                failed_count += 1
+        
+        return created_count, failed_count
+    
+    def _bulk_create_billings(self, semester, billing_due_days, chunk_size, start_after_id=None, on_chunk=None):
+        """
+        Buat billing secara set-based: satu anti-join untuk mencari mahasiswa
+        aktif yang belum punya billing di semester ini (sekaligus join ke
+        program_studi untuk SPP), lalu insert dalam chunk via executemany
+        
+        Anti-join membuat generate aman diulang: run yang terputus cukup
+        dijalankan lagi, mahasiswa yang sudah ditagih otomatis dilewati.
+        
+        Returns:
+            tuple: (created_count, failed_count)
+        """
+        now = datetime.utcnow()
+        due_date = now + timedelta(days=billing_due_days)
+        
+        already_billed = exists().where(
+            Billing.student_id == Student.id,
+            Billing.semester == semester.name
+        )
+        
+        query = (
+            select(Student.id, ProgramStudi.id, ProgramStudi.spp_amount)
+            .outerjoin(ProgramStudi, Student.program_studi_id == ProgramStudi.id)
+            .where(Student.status == 'active', ~already_billed)
+            .order_by(Student.id)
+        )
+        if start_after_id is not None:
+            query = query.where(Student.id > start_after_id)
+        rows = db.session.execute(query).all()
+        
+        # Mahasiswa tanpa program studi tidak punya SPP, sama seperti mode loop dihitung gagal
+        missing_program = [student_id for student_id, _, spp_amount in rows if spp_amount is None]
+        if missing_program:
+            logger.error(f"Program studi tidak ditemukan untuk mahasiswa ID: {missing_program[:20]}")
+        
+        insert_stmt = Billing.__table__.insert()
+        created_count = 0
+        for start in range(0, len(rows), chunk_size):
+            chunk_rows = rows[start:start + chunk_size]
+            chunk = [
+                {
+                    'student_id': student_id,
+                    'semester': semester.name,
+                    'total_amount': spp_amount,
+                    'paid_amount': 0,
+                    'remaining_amount': spp_amount,
+                    'penalty': 0,
+                    'status': Billing.STATUS_UNPAID,
+                    'due_date': due_date,
+                    'version': 1,
+                    'created_at': now,
+                    'updated_at': now
+                }
+                for student_id, _, spp_amount in chunk_rows
+                if spp_amount is not None
+            ]
+            
+            if chunk:
+                db.session.execute(insert_stmt, chunk)
+                # Core insert tidak memicu mapper event, sinkronkan saldo dan rekap per chunk
+                Student.refresh_outstanding([row['student_id'] for row in chunk])
+                
+                per_program = defaultdict(lambda: [0, 0])
+                for _, program_studi_id, spp_amount in chunk_rows:
+                    if spp_amount is not None:
+                        per_program[program_studi_id][0] += 1
+                        per_program[program_studi_id][1] += spp_amount
+                for program_studi_id, (count, total) in per_program.items():
+                    BillingStatusRollup.apply_delta(
+                        db.session, semester.name, program_studi_id, Billing.STATUS_UNPAID,
+                        count, total, total
+                    )
+                created_count += len(chunk)
+            
+            if on_chunk is not None:
+                on_chunk(chunk_rows[-1][0], len(chunk_rows), len(chunk))
+                db.session.commit()
+        
+        return created_count, len(missing_program)
+    
+    def calculate_and_update_penalty(self, billing_id, penalty_per_day, max_penalty):
+        """
+        Hitung dan update denda keterlambatan
+        
+        Args:
+            billing_id: ID billing
+            penalty_per_day: Denda per hari (dalam Rupiah)
+            max_penalty: Denda maksimum
+        
+        Returns:
+            dict: {success: bool, billing: Billing, penalty: int}
+        """
+        try:
+            billing = Billing.query.get(billing_id)
+            if not billing:
+                return {'success': False, 'message': 'Billing tidak ditemukan'}
+            
+            # Calculate penalty
+            penalty = billing.calculate_penalty(penalty_per_day, max_penalty)
+            billing.penalty = penalty
+            
+            # Update status jika overdue
+            if billing.is_overdue and billing.status != Billing.STATUS_PAID:
+                billing.status = Billing.STATUS_OVERDUE
+            
+            db.session.commit()
+            bump_finance_version()
+            
+            return {
+                'success': True,
+                'billing': billing,
+                'penalty': penalty
+            }
+        
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error calculating penalty: {str(e)}")
+            return {
+                'success': False,
+                'message': str(e)
+            }
+    
+    def update_overdue_penalties(self, penalty_per_day, max_penalty, as_of=None, chunk_size=None,
+                                 start_after_id=None, on_chunk=None):
+        """
+        Hitung ulang denda dan status overdue untuk semua billing yang lewat
+        due date secara set-based: satu UPDATE per chunk ID, memakai satu
+        timestamp "as-of" yang sama untuk seluruh run
+        
+        Hanya baris yang denda atau statusnya benar-benar berubah yang ditulis,
+        sehingga biaya job sebanding dengan jumlah perubahan.
+        
+        Args:
+            penalty_per_day: Denda per hari (dalam Rupiah)
+            max_penalty: Denda maksimum
+            as_of: Waktu acuan perhitungan (default: datetime.utcnow())
+            chunk_size: Rentang ID billing per UPDATE (default: Config.BILLING_BULK_CHUNK_SIZE)
+            start_after_id: Lewati billing dengan ID <= nilai ini (lanjutan checkpoint)
+            on_chunk: Callback (last_billing_id, scanned, updated) sebelum commit per chunk
+        
+        Returns:
+            dict: {success: bool, updated_count: int, as_of: datetime}
+        """
+        as_of = as_of or datetime.utcnow()
+        chunk_size = chunk_size or Config.BILLING_BULK_CHUNK_SIZE
+        open_statuses = [Billing.STATUS_UNPAID, Billing.STATUS_PARTIAL, Billing.STATUS_OVERDUE]
+        
+        try:
+            as_of_param = bindparam('as_of', as_of, type_=db.DateTime)
+            overdue_filter = and_(
+                Billing.status.in_(open_statuses),
+                Billing.due_date < as_of_param
+            )
+            
+            min_id, max_id = db.session.execute(
+                select(func.min(Billing.id), func.max(Billing.id)).where(overdue_filter)
+            ).one()
+            
+            if start_after_id is not None and min_id is not None:
+                min_id = max(min_id, start_after_id + 1)
+            
+            if min_id is None or min_id > max_id:
+                return {'success': True, 'updated_count': 0, 'as_of': as_of}
+            
+            # (now - due_date).days, dibulatkan ke bawah seperti Billing.days_overdue
+            days_overdue = whole_days_between(as_of_param, Billing.due_date)
+            new_penalty = case(
+                (days_overdue * penalty_per_day > max_penalty, max_penalty),
+                else_=days_overdue * penalty_per_day
+            )
+            
+            updated_count = 0
+            for start in range(min_id, max_id + 1, chunk_size):
+                chunk_filter = and_(
+                    Billing.id.between(start, start + chunk_size - 1),
+                    overdue_filter
+                )
+                
+                # Billing unpaid/partial di chunk ini akan pindah ke overdue,
+                # pindahkan angkanya di rekap status sebelum UPDATE
+                transitions = db.session.execute(
+                    select(
+                        Billing.semester,
+                        Student.program_studi_id,
+                        Billing.status,
+                        func.count(Billing.id),
+                        func.sum(Billing.total_amount),
+                        func.sum(Billing.remaining_amount)
+                    ).join(Student, Billing.student_id == Student.id)
+                    .where(chunk_filter, Billing.status != Billing.STATUS_OVERDUE)
+                    .group_by(Billing.semester, Student.program_studi_id, Billing.status)
+                ).all()
+                for semester, program_studi_id, status, count, total, remaining in transitions:
+                    BillingStatusRollup.apply_delta(
+                        db.session, semester, program_studi_id, status, -count, -total, -remaining
+                    )
+                    BillingStatusRollup.apply_delta(
+                        db.session, semester, program_studi_id, Billing.STATUS_OVERDUE, count, total, remaining
+                    )
+                
+                stmt = (
+                    update(Billing.__table__)
+                    .where(
+                        chunk_filter,
+                        or_(
+                            Billing.penalty.is_(None),
+                            Billing.penalty != new_penalty,
+                            Billing.status != Billing.STATUS_OVERDUE
+                        )
+                    )
+                    .values(
+                        penalty=new_penalty,
+                        status=Billing.STATUS_OVERDUE,
+                        version=Billing.version + 1
+                    )
+                )
+                result = db.session.execute(stmt)
+                if on_chunk is not None:
+                    scanned = db.session.execute(select(func.count(Billing.id)).where(chunk_filter)).scalar()
+                    on_chunk(min(start + chunk_size - 1, max_id), scanned, result.rowcount)
+                db.session.commit()
+                updated_count += result.rowcount
+            
+            if updated_count:
+                bump_finance_version()
+            
+            return {'success': True, 'updated_count': updated_count, 'as_of': as_of}
+        
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error updating overdue penalties: {str(e)}")
+            return {
+                'success': False,
+                'message': str(e)
+            }
+    
+    def can_student_register_krs(self, student_id):
+        """
+        Cek apakah mahasiswa bisa mendaftar KRS (tidak ada tunggakan)
+        
+        Args:
+            student_id: ID mahasiswa
+        
+        Returns:
+            dict: {can_register: bool, message: str, outstanding: int}
+        """
+        student = Student.query.get(student_id)
+        if not student:
+            return {
+                'can_register': False,
+                'message': 'Mahasiswa tidak ditemukan',
+                'outstanding': 0
+            }
+        
+        # Tunggakan sudah dijaga di kolom students.outstanding_amount
+        total_outstanding = student.get_total_outstanding()
+        
+        if total_outstanding > 0:
+            return {
+                'can_register': False,
+                'message': f'Mahasiswa memiliki tunggakan sebesar Rp {total_outstanding:,}',
+                'outstanding': total_outstanding
+            }
+        
+        return {
+            'can_register': True,
+            'message': 'Mahasiswa bisa mendaftar KRS',
+            'outstanding': 0
+        }
+    
+    def get_billing_summary(self, student_id):
+        """
+        Dapatkan ringkasan billing untuk satu mahasiswa
+        
+        Args:
+            student_id: ID mahasiswa
+        
+        Returns:
+            dict: {student, total_billed, total_paid, total_outstanding, billings}
+        """
+        student = Student.query.get(student_id)
+        if not student:
+            return {'error': 'Mahasiswa tidak ditemukan'}
+        
+        billings = Billing.query.filter_by(student_id=student_id).all()
+        
+        total_billed = sum(b.total_amount for b in billings)
+        total_paid = sum(b.paid_amount for b in billings)
+        total_outstanding = sum(b.remaining_amount for b in billings)
+        
+        return {
+            'student': student,
+            'total_billed': total_billed,
+            'total_paid': total_paid,
+            'total_outstanding': total_outstanding,
+            'billings': billings
+        }
@@ -0,0 +1,127 @@
+# app/services/dashboard_service.py
+from sqlalchemy import and_, func
+from app.models import db
+from app.models.student import Student, ProgramStudi
+from app.models.billing import Billing
+from app.models.payment import Payment
+from app.models.rollup import BillingStatusRollup, DailyPaymentRollup
+
+class DashboardService:
+    """Service untuk agregasi data dashboard keuangan"""
+    
+    def __init__(self, app=None):
+        self.app = app
+    
+    def get_program_studi_statistics(self, semester=None, start_date=None, end_date=None):
+        """
+        Hitung statistik per program studi dengan jumlah query tetap
+        (satu GROUP BY program_studi_id untuk mahasiswa, billing, dan pembayaran)
+        
+        Args:
+            semester: Nama semester untuk drilldown (opsional)
+            start_date: Batas awal billing.created_at / payment.confirmation_date (opsional)
+            end_date: Batas akhir billing.created_at / payment.confirmation_date (opsional)
+            
+        Returns:
+            list: [{program_studi_id, program_studi, num_students, total_billed,
+                    total_paid, collection_rate}]
+        """
+        # Jumlah mahasiswa aktif per program studi
+        programs = db.session.query(
+            ProgramStudi.id,
+            ProgramStudi.name,
+            func.count(Student.id)
+        ).outerjoin(
+            Student,
+            and_(Student.program_studi_id == ProgramStudi.id, Student.status == 'active')
+        ).group_by(ProgramStudi.id, ProgramStudi.name).order_by(ProgramStudi.id).all()
+        
+        # Total tagihan per program studi
+        billed_query = db.session.query(
+            Student.program_studi_id,
+            func.sum(Billing.total_amount)
+        ).join(Student, Billing.student_id == Student.id)
+        
+        if semester:
+            billed_query = billed_query.filter(Billing.semester == semester)
+        if start_date:
+            billed_query = billed_query.filter(Billing.created_at >= start_date)
+        if end_date:
+            billed_query = billed_query.filter(Billing.created_at <= end_date)
+        
+        billed = dict(billed_query.group_by(Student.program_studi_id).all())
+        
+        # Total pembayaran terkonfirmasi per program studi
+        paid_query = db.session.query(
+            Student.program_studi_id,
+            func.sum(Payment.amount)
+        ).join(Student, Payment.student_id == Student.id).filter(
+            Payment.status == Payment.STATUS_CONFIRMED
+        )
+        
+        if semester:
+            paid_query = paid_query.join(Billing, Payment.billing_id == Billing.id).filter(
+                Billing.semester == semester
+            )
+        if start_date:
+            paid_query = paid_query.filter(Payment.confirmation_date >= start_date)
+        if end_date:
+            paid_query = paid_query.filter(Payment.confirmation_date <= end_date)
+        
+        paid = dict(paid_query.group_by(Student.program_studi_id).all())
+        
+        stats = []
+        for program_id, program_name, num_students in programs:
+            billings_total = billed.get(program_id) or 0
+            paid_total = paid.get(program_id) or 0
+            collection_rate = (paid_total / billings_total * 100) if billings_total > 0 else 0
+            
+            stats.append({
+                'program_studi_id': program_id,
+                'program_studi': program_name,
+                'num_students': num_students,
+                'total_billed': billings_total,
+                'total_paid': paid_total,
+                'collection_rate': round(collection_rate, 2)
+            })
+        
+        return stats
+    
+    def get_billing_status_totals(self):
+        """
+        Total billing per status dari tabel rekap (O(jumlah grup), bukan O(billings))
+        
+        Returns:
+            dict: {status: {count, total, remaining}} untuk semua status valid
+        """
+        rows = db.session.query(
+            BillingStatusRollup.status,
+            func.sum(BillingStatusRollup.count),
+            func.sum(BillingStatusRollup.total),
+            func.sum(BillingStatusRollup.remaining)
+        ).group_by(BillingStatusRollup.status).all()
+        
+        totals = {status: {'count': 0, 'total': 0, 'remaining': 0} for status in Billing.VALID_STATUSES}
+        for status, count, total, remaining in rows:
+            totals[status] = {'count': count or 0, 'total': total or 0, 'remaining': remaining or 0}
+        return totals
+    
+    def get_payment_totals(self, day=None):
+        """
+        Jumlah dan total pembayaran terkonfirmasi dari tabel rekap harian
+        
+        Args:
+            day: Tanggal tertentu (default: semua tanggal)
+            
+        Returns:
+            dict: {count, amount}
+        """
+        query = db.session.query(
+            func.coalesce(func.sum(DailyPaymentRollup.count), 0),
+            func.coalesce(func.sum(DailyPaymentRollup.amount), 0)
+        )
+        if day is not None:
+            query = query.filter(DailyPaymentRollup.date == day)
+        
+        count, amount = query.one()
+        return {'count': count, 'amount': amount}
@@ -0,0 +1,189 @@
+# app/services/export_service.py
+import csv
+import io
+import json
+import zlib
+from datetime import date, datetime
+from sqlalchemy import select
+from app.config import get_config_value
+from app.models import db
+from app.models.student import Student, ProgramStudi
+from app.models.billing import Billing
+from app.models.payment import Payment
+from app.models.payment_method import PaymentMethod
+
+BILLING_EXPORT_COLUMNS = [
+    ('id', Billing.id),
+    ('nim', Student.nim),
+    ('name', Student.name),
+    ('program_studi', ProgramStudi.code),
+    ('semester', Billing.semester),
+    ('total_amount', Billing.total_amount),
+    ('paid_amount', Billing.paid_amount),
+    ('remaining_amount', Billing.remaining_amount),
+    ('penalty', Billing.penalty),
+    ('status', Billing.status),
+    ('due_date', Billing.due_date),
+    ('last_payment_date', Billing.last_payment_date),
+    ('created_at', Billing.created_at),
+]
+
+PAYMENT_EXPORT_COLUMNS = [
+    ('id', Payment.id),
+    ('reference_code', Payment.reference_code),
+    ('transaction_id', Payment.transaction_id),
+    ('billing_id', Payment.billing_id),
+    ('nim', Student.nim),
+    ('name', Student.name),
+    ('semester', Billing.semester),
+    ('amount', Payment.amount),
+    ('status', Payment.status),
+    ('payment_method', PaymentMethod.name),
+    ('gateway', Payment.gateway_name),
+    ('payment_date', Payment.payment_date),
+    ('confirmation_date', Payment.confirmation_date),
+    ('created_at', Payment.created_at),
+]
+
+# Ukuran chunk yang dikirim ke client, baris kecil digabung dulu
+OUTPUT_CHUNK_SIZE = 64 * 1024
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+class ExportService:
+    """
+    Service untuk streaming export billing dan pembayaran per semester
+    
+    Query memakai select kolom Core (bukan entity ORM) sehingga identity map
+    session tidak bertambah, dan hasil di-fetch per EXPORT_YIELD_PER baris.
+    Output dihasilkan generator per chunk, jadi memori tetap konstan berapa
+    pun jumlah barisnya dan byte pertama langsung terkirim.
+    """
+    
+    FORMAT_CSV = 'csv'
+    FORMAT_NDJSON = 'ndjson'
+    VALID_FORMATS = [FORMAT_CSV, FORMAT_NDJSON]
+    
+    MIMETYPES = {
+        FORMAT_CSV: 'text/csv',
+        FORMAT_NDJSON: 'application/x-ndjson'
+    }
+    
+    def __init__(self, yield_per=None):
+        # None = EXPORT_YIELD_PER app aktif; instance route dibuat saat import, sebelum ada app
+        self._yield_per = yield_per
+    
+    @property
+    def yield_per(self):
+        return self._yield_per or get_config_value('EXPORT_YIELD_PER')
+    
+    def billing_statement(self, semester):
+        """Select billing satu semester beserta mahasiswa dan program studi, urut id"""
+        return (
+            select(*[column for _, column in BILLING_EXPORT_COLUMNS])
+            .join(Student, Billing.student_id == Student.id)
+            .join(ProgramStudi, Student.program_studi_id == ProgramStudi.id)
+            .where(Billing.semester == semester)
+            .order_by(Billing.id)
+        )
+    
+    def payment_statement(self, semester):
+        """Select pembayaran untuk billing satu semester, urut billing lalu id"""
+        return (
+            select(*[column for _, column in PAYMENT_EXPORT_COLUMNS])
+            .select_from(Billing)
+            .join(Payment, Payment.billing_id == Billing.id)
+            .join(Student, Payment.student_id == Student.id)
+            .join(PaymentMethod, Payment.payment_method_id == PaymentMethod.id)
+            .where(Billing.semester == semester)
+            .order_by(Billing.id, Payment.id)
+        )
+    
+    def export_billings(self, semester, fmt=FORMAT_CSV, compress=False):
+        """
+        Generator byte export billing satu semester
+        
+        Args:
+            semester: Nama semester, misal "2023/2024-Ganjil"
+            fmt: 'csv' atau 'ndjson'
+            compress: True untuk output gzip
+        
+        Returns:
+            generator: Chunk bytes siap dikirim sebagai response
+        """
+        return self._export(self.billing_statement(semester), BILLING_EXPORT_COLUMNS, fmt, compress)
+    
+    def export_payments(self, semester, fmt=FORMAT_CSV, compress=False):
+        """
+        Generator byte export pembayaran untuk billing satu semester
+        
+        Args:
+            semester: Nama semester, misal "2023/2024-Ganjil"
+            fmt: 'csv' atau 'ndjson'
+            compress: True untuk output gzip
+        
+        Returns:
+            generator: Chunk bytes siap dikirim sebagai response
+        """
+        return self._export(self.payment_statement(semester), PAYMENT_EXPORT_COLUMNS, fmt, compress)
+    
+    def _export(self, statement, columns, fmt, compress):
+        if fmt not in self.VALID_FORMATS:
+            raise ValueError(f'Invalid export format: {fmt}. Valid: {self.VALID_FORMATS}')
+        
+        chunks = self._encode(statement, [name for name, _ in columns], fmt)
+        return self._gzip(chunks) if compress else chunks
+    
+    def _rows(self, statement):
+        result = db.session.execute(statement, execution_options={'yield_per': self.yield_per})
+        try:
+            for partition in result.partitions():
+                yield partition
+        finally:
+            # Client bisa putus di tengah export; cursor tetap ditutup
+            result.close()
+    
+    def _encode(self, statement, names, fmt):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer) if fmt == self.FORMAT_CSV else None
+        
+        if writer is not None:
+            writer.writerow(names)
+            # Header dikirim sebelum query pertama selesai agar download langsung mulai
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+        
+        for partition in self._rows(statement):
+            if writer is not None:
+                writer.writerows(
+                    [value.isoformat() if isinstance(value, (datetime, date)) else value for value in row]
+                    for row in partition
+                )
+            else:
+                for row in partition:
+                    buffer.write(json.dumps(dict(zip(names, row)), default=_json_default))
+                    buffer.write('\n')
+            
+            if buffer.tell() >= OUTPUT_CHUNK_SIZE:
+                yield buffer.getvalue().encode('utf-8')
+                buffer.seek(0)
+                buffer.truncate()
+        
+        if buffer.tell():
+            yield buffer.getvalue().encode('utf-8')
+    
+    @staticmethod
+    def _gzip(chunks):
+        # wbits 31 = format gzip (header + trailer CRC), dikompres incremental
+        compressor = zlib.compressobj(get_config_value('EXPORT_GZIP_LEVEL'), zlib.DEFLATED, 31)
+        for chunk in chunks:
+            compressed = compressor.compress(chunk)
+            if compressed:
+                yield compressed
+        yield compressor.flush()
@@ -1,262 +1,516 @@
-# app/services/payment_service.py
-from datetime import datetime
-import hashlib
-import hmac
-from app.models import db
-from app.models.payment import Payment, PaymentReconciliation
-from app.models.billing import Billing
-from app.utils.logger import logger
-
-class PaymentService:
-    """Service untuk mengelola pembayaran dan webhook handling"""
-    
-    def __init__(self, app=None):
-        self.app = app
-        
-    def process_payment(self, billing_id, amount, payment_method_id, transaction_id, gateway_name='manual'):
-        """
-        Proses pembayaran untuk billing tertentu
-        
-        Args:
-            billing_id: ID billing
-            amount: Jumlah pembayaran
-            payment_method_id: ID metode pembayaran
-            transaction_id: ID transaksi dari payment gateway
-            gateway_name: Nama payment gateway
-            
-        Returns:
-            dict: {success: bool, message: str, payment: Payment, billing: Billing}
-        """
-        try:
-            billing = Billing.query.get(billing_id)
-            if not billing:
-                return {'success': False, 'message': 'Billing tidak ditemukan'}
-            
-            if amount <= 0:
-                return {'success': False, 'message': 'Jumlah pembayaran harus lebih dari 0'}
-            
-            # Create payment record
-            payment = Payment(
-                student_id=billing.student_id,
-                billing_id=billing_id,
-                payment_method_id=payment_method_id,
-                transaction_id=transaction_id,
-                reference_code=Payment.generate_reference_code(),
-                amount=amount,
-                gateway_name=gateway_name,
-                status=Payment.STATUS_CONFIRMED,
-                payment_date=datetime.utcnow(),
-                confirmation_date=datetime.utcnow()
-            )
-            
-            # Update billing
-            billing.paid_amount += amount
-            billing.remaining_amount = billing.total_amount - billing.paid_amount
-            billing.last_payment_date = datetime.utcnow()
-            
-            # Update status
-            if billing.paid_amount == 0:
-                billing.status = Billing.STATUS_UNPAID
-            elif billing.paid_amount < billing.total_amount:
-                billing.status = Billing.STATUS_PARTIAL
-            else:
-                billing.status = Billing.STATUS_PAID
-            
-            db.session.add(payment)
-            db.session.commit()
-            
-            logger.info(f"Payment processed: {payment.reference_code} for billing {billing_id}")
-            
-            return {
-                'success': True,
-                'message': f'Pembayaran sebesar Rp {amount:,} berhasil dicatat',
-                'payment': payment,
-                'billing': billing
-            }
-            
-        except Exception as e:
-            db.session.rollback()
-            error_msg = f"Error processing payment: {str(e)}"
-            logger.error(error_msg)
-            return {'success': False, 'message': error_msg}
-    
-    def handle_webhook(self, payload, webhook_secret):
-        """
-        Handle webhook notification dari payment gateway
-        
-        Args:
-            payload: Data dari webhook (JSON)
-            webhook_secret: Secret key untuk verifikasi signature
-            
-        Returns:
-            dict: {success: bool, message: str, payment: Payment}
-        """
-        try:
-            # Verifikasi signature
-            if not self._verify_webhook_signature(payload, webhook_secret):
-                logger.warning("Webhook signature verification failed")
-                return {
-                    'success': False,
-                    'message': 'Webhook signature verification failed',
-                    'status_code': 401
-                }
-            
-            # Extract data
-            transaction_id = payload.get('transaction_id')
-            reference_code = payload.get('reference_code')
-            amount = payload.get('amount')
-            status = payload.get('status')  # success, failed, pending
-            
-            if not all([transaction_id, reference_code, amount, status]):
-                return {
-                    'success': False,
-                    'message': 'Invalid webhook payload',
-                    'status_code': 400
-                }
-            
-            # Cari payment berdasarkan reference code
-            payment = Payment.query.filter_by(reference_code=reference_code).first()
-            if not payment:
-                return {
-                    'success': False,
-                    'message': 'Payment not found',
-                    'status_code': 404
-                }
-            
-            # Update payment status
-            if status == 'success':
-                payment.status = Payment.STATUS_CONFIRMED
-                payment.confirmation_date = datetime.utcnow()
-                
-                # Process the payment
-                result = self.process_payment(
-                    payment.billing_id,
-                    amount,
-                    payment.payment_method_id,
-                    transaction_id,
-                    'webhook'
-                )
-                
-                if not result['success']:
-                    payment.status = Payment.STATUS_FAILED
-                    db.session.commit()
-                    return result
-                    
-            elif status == 'failed':
-                payment.status = Payment.STATUS_FAILED
-                
-            payment.gateway_response = payload
-            db.session.commit()
-            
-            # Log webhook processing
-            reconciliation = PaymentReconciliation(
-                payment_id=payment.id,
-                gateway_name=payment.gateway_name,
-                status='synced',
-                gateway_response=payload
-            )
-            db.session.add(reconciliation)
-            db.session.commit()
-            
-            logger.info(f"Webhook processed for payment {reference_code}: {status}")
-            
-            return {
-                'success': True,
-                'message': 'Webhook processed successfully',
-                'payment': payment,
-                'status_code': 200
-            }
-            
-        except Exception as e:
-            db.session.rollback()
-            error_msg = f"Error handling webhook: {str(e)}"
-            logger.error(error_msg)
-            return {
-                'success': False,
-                'message': error_msg,
-                'status_code': 500
-            }
-    
-    @staticmethod
-    def _verify_webhook_signature(payload, webhook_secret):
-        """
-        Verify webhook signature untuk memastikan authenticity
-        
-        Args:
-            payload: Webhook payload
-            webhook_secret: Secret key
-            
-        Returns:
-            bool: True if signature is valid
-        """
-        # Implementation tergantung payment gateway
-        # Contoh sederhana menggunakan HMAC-SHA256
-        
-        signature = payload.pop('signature', None) if isinstance(payload, dict) else None
-        
-        if not signature:
-            return False
-        
-        # Create message string
-        message = str(payload) if isinstance(payload, dict) else str(payload)
-        
-        # Calculate expected signature
-        expected_signature = hmac.new(
-            webhook_secret.encode(),
-            message.encode(),
-            hashlib.sha256
-        ).hexdigest()
-        
-        # Compare signatures (constant time comparison)
-        return hmac.compare_digest(signature, expected_signature)
-    
-    def get_payment_history(self, student_id, limit=10):
-        """
-        Dapatkan riwayat pembayaran untuk satu mahasiswa
-        
-        Args:
-            student_id: ID mahasiswa
-            limit: Jumlah record
-            
-        Returns:
-            list: Daftar pembayaran
-        """
-        payments = Payment.query.filter_by(student_id=student_id)\
-            .order_by(Payment.created_at.desc())\
-            .limit(limit)\
-            .all()
-        
-        return payments
-    
-    def get_payment_statistics(self, start_date=None, end_date=None):
-        """
-        Dapatkan statistik pembayaran
-        
-        Args:
-            start_date: Tanggal mulai
-            end_date: Tanggal akhir
-            
-        Returns:
-            dict: Statistik pembayaran
-        """
-        from sqlalchemy import func
-        
-        query = Payment.query.filter_by(status=Payment.STATUS_CONFIRMED)
-        
-        if start_date:
-            query = query.filter(Payment.confirmation_date >= start_date)
-        if end_date:
-            query = query.filter(Payment.confirmation_date <= end_date)
-        
-        payments = query.all()
-        
-        total_payments = len(payments)
-        total_amount = sum(p.amount for p in payments)
-        average_amount = total_amount / total_payments if total_payments > 0 else 0
-        
-        return {
-            'total_payments': total_payments,
-            'total_amount': total_amount,
-            'average_amount': average_amount,
-            'payments': payments
-        }
+# app/services/payment_service.py
+from datetime import datetime
+import json
+from flask import current_app
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload
+from sqlalchemy.orm.exc import StaleDataError
+from app.config import Config
+from app.models import db
+from app.models.payment import Payment, PaymentReconciliation
+from app.models.billing import Billing
+from app.utils.logger import logger
+from app.utils.cache import bump_finance_version
+from app.utils.pagination import paginate_keyset
+from app.utils.signature import get_webhook_verifier
+
+class PaymentService:
+    """Service untuk mengelola pembayaran dan webhook handling"""
+    
+    def __init__(self, app=None):
+        self.app = app
+    
+    @staticmethod
+    def _max_retries():
+        """Batas retry optimistic concurrency dari konfigurasi app aktif"""
+        return current_app.config.get('PAYMENT_MAX_RETRIES', Config.PAYMENT_MAX_RETRIES)
+    
+    def process_payment(self, billing_id, amount, payment_method_id, transaction_id, gateway_name='manual'):
+        """
+        Proses pembayaran untuk billing tertentu
+        
+        Billing memakai optimistic concurrency (kolom version): jika billing
+        diubah worker lain di antara baca dan commit, transaksi di-rollback
+        lalu diulang dari data terbaru sampai PAYMENT_MAX_RETRIES kali.
+        
+        Args:
+            billing_id: ID billing
+            amount: Jumlah pembayaran
+            payment_method_id: ID metode pembayaran
+            transaction_id: ID transaksi dari payment gateway
+            gateway_name: Nama payment gateway
+        
+        Returns:
+            dict: {success: bool, message: str, payment: Payment, billing: Billing}
+        """
+        try:
+            for attempt in range(1, self._max_retries() + 1):
+                result = self.apply_payment(billing_id, amount, payment_method_id, transaction_id, gateway_name)
+                if not result['success'] or result.get('duplicate'):
+                    return result
+                
+                try:
+                    db.session.commit()
+                    break
+                except StaleDataError:
+                    db.session.rollback()
+                    logger.warning(
+                        f"Concurrent update on billing {billing_id}, retrying payment "
+                        f"(attempt {attempt}/{self._max_retries()})"
+                    )
+            else:
+                return {
+                    'success': False,
+                    'message': f'Billing {billing_id} sedang diproses transaksi lain, silakan coba lagi'
+                }
+            
+            bump_finance_version()
+            
+            payment = result['payment']
+            logger.info(f"Payment processed: {payment.reference_code} for billing {billing_id}")
+            
+            return {
+                'success': True,
+                'message': f'Pembayaran sebesar Rp {amount:,} berhasil dicatat',
+                'payment': payment,
+                'billing': result['billing']
+            }
+        
+        except Exception as e:
+            db.session.rollback()
+            error_msg = f"Error processing payment: {str(e)}"
+            logger.error(error_msg)
+            return {'success': False, 'message': error_msg}
+    
+    def apply_payment(self, billing_id, amount, payment_method_id, transaction_id, gateway_name='manual',
+                      check_duplicate=True):
+        """
+        Terapkan pembayaran ke session tanpa commit
+        
+        UPDATE billing yang dihasilkan membawa paid_amount, remaining_amount,
+        status, dan version baru dalam satu statement dengan syarat
+        version lama; caller yang commit dan menangani StaleDataError.
+        
+        Returns:
+            dict: {success: bool, message: str, payment: Payment, billing: Billing, duplicate: bool}
+        """
+        # Replay transaction_id: kembalikan pembayaran asli sebelum menyentuh billing
+        existing = Payment.query.filter_by(transaction_id=transaction_id).first() if check_duplicate else None
+        if existing:
+            logger.info(f"Duplicate transaction {transaction_id}, returning payment {existing.reference_code}")
+            return {
+                'success': True,
+                'message': f'Transaksi {transaction_id} sudah tercatat sebelumnya',
+                'payment': existing,
+                'billing': existing.billing,
+                'duplicate': True
+            }
+        
+        billing = db.session.get(Billing, billing_id)
+        if not billing:
+            return {'success': False, 'message': 'Billing tidak ditemukan'}
+        
+        if amount <= 0:
+            return {'success': False, 'message': 'Jumlah pembayaran harus lebih dari 0'}
+        
+        now = datetime.utcnow()
+        
+        # Create payment record
+        payment = Payment(
+            student_id=billing.student_id,
+            billing_id=billing_id,
+            payment_method_id=payment_method_id,
+            transaction_id=transaction_id,
+            reference_code=Payment.generate_reference_code(),
+            amount=amount,
+            gateway_name=gateway_name,
+            status=Payment.STATUS_CONFIRMED,
+            payment_date=now,
+            confirmation_date=now
+        )
+        
+        # Update billing
+        billing.paid_amount += amount
+        billing.remaining_amount = billing.total_amount - billing.paid_amount
+        billing.last_payment_date = now
+        
+        # Update status
+        if billing.paid_amount == 0:
+            billing.status = Billing.STATUS_UNPAID
+        elif billing.paid_amount < billing.total_amount:
+            billing.status = Billing.STATUS_PARTIAL
+        else:
+            billing.status = Billing.STATUS_PAID
+        
+        db.session.add(payment)
+        
+        return {'success': True, 'payment': payment, 'billing': billing}
+    
+    def handle_webhook(self, body, signature):
+        """
+        Handle webhook notification dari payment gateway
+        
+        Args:
+            body: Raw body request (bytes) persis seperti yang diterima
+            signature: Nilai header signature (HMAC-SHA256 hex atas body)
+        
+        Returns:
+            dict: {success: bool, message: str, payment: Payment}
+        """
+        # Verifikasi signature
+        if not self.verify_webhook(body, signature):
+            logger.warning("Webhook signature verification failed")
+            return {
+                'success': False,
+                'message': 'Webhook signature verification failed',
+                'status_code': 401
+            }
+        
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            payload = None
+        
+        if not isinstance(payload, dict):
+            return {
+                'success': False,
+                'message': 'Invalid webhook payload',
+                'status_code': 400
+            }
+        
+        return self.apply_webhook(payload)
+    
+    def verify_webhook(self, body, signature):
+        """
+        Verifikasi signature webhook atas raw body tanpa memproses isinya
+        
+        Args:
+            body: Raw body request (bytes)
+            signature: Nilai header signature
+        
+        Returns:
+            bool: True if signature is valid
+        """
+        return get_webhook_verifier().verify(body, signature)
+    
+    def sign_webhook(self, body):
+        """Signature untuk body dengan secret utama (simulasi gateway di development)"""
+        return get_webhook_verifier().sign(body)
+    
+    def apply_webhook(self, payload):
+        """
+        Terapkan webhook yang signature-nya sudah diverifikasi
+        
+        Dipanggil langsung oleh handle_webhook (mode sinkron) atau oleh
+        worker webhook inbox (mode asinkron).
+        
+        Args:
+            payload: Data dari webhook (JSON) tanpa field signature
+        
+        Returns:
+            dict: {success: bool, message: str, payment: Payment, status_code: int}
+        """
+        try:
+            for attempt in range(1, self._max_retries() + 1):
+                result = self.stage_webhook(payload)
+                
+                try:
+                    db.session.commit()
+                    break
+                except StaleDataError:
+                    db.session.rollback()
+                    logger.warning(
+                        f"Concurrent update while applying webhook {payload.get('transaction_id')}, "
+                        f"retrying (attempt {attempt}/{self._max_retries()})"
+                    )
+            else:
+                return {
+                    'success': False,
+                    'message': 'Billing sedang diproses transaksi lain, silakan coba lagi',
+                    'status_code': 409
+                }
+            
+            bump_finance_version()
+            
+            if result['success']:
+                logger.info(f"Webhook processed for payment {payload.get('reference_code')}: {payload.get('status')}")
+            
+            return result
+        
+        except Exception as e:
+            db.session.rollback()
+            error_msg = f"Error handling webhook: {str(e)}"
+            logger.error(error_msg)
+            return {
+                'success': False,
+                'message': error_msg,
+                'status_code': 500
+            }
+    
+    def stage_webhook(self, payload, payment=None, check_duplicate=True):
+        """
+        Terapkan satu webhook ke session tanpa commit
+        
+        Args:
+            payload: Data dari webhook (JSON) tanpa field signature
+            payment: Payment dengan reference_code payload jika sudah dimuat caller
+            check_duplicate: Cek transaction_id ke database (False jika caller
+                sudah mengecek secara batch)
+        
+        Returns:
+            dict: {success: bool, message: str, payment: Payment, status_code: int}
+        """
+        # Extract data
+        transaction_id = payload.get('transaction_id')
+        reference_code = payload.get('reference_code')
+        amount = payload.get('amount')
+        status = payload.get('status')  # success, failed, pending
+        
+        if not all([transaction_id, reference_code, amount, status]):
+            return {
+                'success': False,
+                'message': 'Invalid webhook payload',
+                'status_code': 400
+            }
+        
+        # Cari payment berdasarkan reference code
+        if payment is None:
+            payment = Payment.query.filter_by(reference_code=reference_code).first()
+        if not payment:
+            return {
+                'success': False,
+                'message': 'Payment not found',
+                'status_code': 404
+            }
+        
+        # Update payment status
+        if status == 'success':
+            payment.status = Payment.STATUS_CONFIRMED
+            payment.confirmation_date = datetime.utcnow()
+            
+            # Process the payment
+            result = self.apply_payment(
+                payment.billing_id,
+                amount,
+                payment.payment_method_id,
+                transaction_id,
+                'webhook',
+                check_duplicate=check_duplicate
+            )
+            
+            if not result['success']:
+                payment.status = Payment.STATUS_FAILED
+                return result
+            
+            if result.get('duplicate'):
+                return {
+                    'success': True,
+                    'message': result['message'],
+                    'payment': payment,
+                    'duplicate': True,
+                    'status_code': 200
+                }
+        
+        elif status == 'failed':
+            payment.status = Payment.STATUS_FAILED
+        
+        payment.gateway_response = payload
+        
+        # Log webhook processing
+        reconciliation = PaymentReconciliation(
+            payment_id=payment.id,
+            gateway_name=payment.gateway_name,
+            status='synced',
+            gateway_response=payload
+        )
+        db.session.add(reconciliation)
+        
+        return {
+            'success': True,
+            'message': 'Webhook processed successfully',
+            'payment': payment,
+            'status_code': 200
+        }
+    
+    def apply_webhook_batch(self, payloads, chunk_size=None):
+        """
+        Terapkan banyak webhook (settlement file) dalam satu transaksi per chunk
+        
+        Billing divalidasi dengan satu lookup IN; payment per reference_code
+        dan transaction_id yang sudah tercatat dimuat sekali per chunk. Item
+        yang error dikeluarkan dan chunk diulang tanpa item tersebut.
+        
+        Args:
+            payloads: List payload webhook terverifikasi dengan status success
+            chunk_size: Jumlah item per transaksi (default WEBHOOK_BATCH_CHUNK_SIZE)
+        
+        Returns:
+            list: Hasil per item (urutan sama dengan payloads), masing-masing
+                {transaction_id, status: processed|duplicate|failed, message, payment_id}
+        """
+        chunk_size = chunk_size or current_app.config['WEBHOOK_BATCH_CHUNK_SIZE']
+        results = [None] * len(payloads)
+        
+        # Validasi semua billing dengan satu query IN
+        billing_ids = {payload.get('billing_id') for payload in payloads}
+        known_billings = set(db.session.execute(
+            select(Billing.id).where(Billing.id.in_(billing_ids))
+        ).scalars())
+        
+        pending = []
+        for index, payload in enumerate(payloads):
+            if payload.get('billing_id') in known_billings:
+                pending.append(index)
+            else:
+                results[index] = self._batch_item_result(
+                    payload, 'failed', f"Billing ID {payload.get('billing_id')} not found"
+                )
+        
+        for start in range(0, len(pending), chunk_size):
+            chunk = pending[start:start + chunk_size]
+            chunk_results = self._apply_webhook_chunk(payloads, chunk)
+            for index, result in chunk_results.items():
+                results[index] = result
+        
+        return results
+    
+    def _apply_webhook_chunk(self, payloads, chunk):
+        """Satu transaksi untuk satu chunk; ulangi tanpa item error atau saat konflik versi"""
+        failed = {}
+        
+        for attempt in range(1, self._max_retries() + 1):
+            chunk_results = dict(failed)
+            items = [index for index in chunk if index not in failed]
+            
+            try:
+                payments = {
+                    payment.reference_code: payment
+                    for payment in Payment.query.filter(
+                        Payment.reference_code.in_({payloads[i].get('reference_code') for i in items})
+                    )
+                }
+                # Billing chunk dimuat sekaligus ke identity map untuk apply_payment
+                billings = Billing.query.filter(
+                    Billing.id.in_({payloads[i]['billing_id'] for i in items})
+                ).all()
+                recorded = set(db.session.execute(
+                    select(Payment.transaction_id).where(
+                        Payment.transaction_id.in_({payloads[i].get('transaction_id') for i in items})
+                    )
+                ).scalars())
+                
+                error_index = None
+                for index in items:
+                    payload = payloads[index]
+                    transaction_id = payload.get('transaction_id')
+                    
+                    if transaction_id in recorded:
+                        chunk_results[index] = self._batch_item_result(
+                            payload, 'duplicate', f'Transaksi {transaction_id} sudah tercatat sebelumnya'
+                        )
+                        continue
+                    
+                    try:
+                        result = self.stage_webhook(
+                            payload,
+                            payment=payments.get(payload.get('reference_code')),
+                            check_duplicate=False
+                        )
+                        db.session.flush()
+                    except StaleDataError:
+                        raise
+                    except Exception as e:
+                        error_index = index
+                        failed[index] = self._batch_item_result(payload, 'failed', str(e))
+                        break
+                    
+                    recorded.add(transaction_id)
+                    chunk_results[index] = self._batch_item_result(
+                        payload,
+                        'processed' if result['success'] else 'failed',
+                        result['message'],
+                        result.get('payment')
+                    )
+                
+                if error_index is not None:
+                    db.session.rollback()
+                    continue
+                
+                db.session.commit()
+                bump_finance_version()
+                return chunk_results
+            
+            except StaleDataError:
+                db.session.rollback()
+                logger.warning(
+                    f"Concurrent update while applying webhook batch chunk, "
+                    f"retrying (attempt {attempt}/{self._max_retries()})"
+                )
+        
+        db.session.rollback()
+        message = 'Billing sedang diproses transaksi lain, silakan coba lagi'
+        return {
+            index: failed.get(index) or self._batch_item_result(payloads[index], 'failed', message)
+            for index in chunk
+        }
+    
+    @staticmethod
+    def _batch_item_result(payload, status, message, payment=None):
+        return {
+            'transaction_id': payload.get('transaction_id'),
+            'status': status,
+            'message': message,
+            'payment_id': payment.id if payment is not None else None
+        }
+    
+    def get_payment_history(self, student_id, page_args):
+        """
+        Dapatkan riwayat pembayaran untuk satu mahasiswa, terbaru dulu
+        
+        Args:
+            student_id: ID mahasiswa
+            page_args: PageArgs dari get_page_args() (limit, cursor)
+        
+        Returns:
+            tuple: (daftar pembayaran, pagination dict)
+        """
+        # Keyset di index payments(student_id, created_at)
+        return paginate_keyset(
+            Payment.query.options(joinedload(Payment.payment_method)).filter_by(student_id=student_id),
+            [Payment.created_at, Payment.id],
+            page_args,
+            descending=True
+        )
+    
+    def get_payment_statistics(self, start_date=None, end_date=None):
+        """
+        Dapatkan statistik pembayaran
+        
+        Args:
+            start_date: Tanggal mulai
+            end_date: Tanggal akhir
+        
+        Returns:
+            dict: Statistik pembayaran
+        """
+        from sqlalchemy import func
+        
+        query = Payment.query.filter_by(status=Payment.STATUS_CONFIRMED)
+        
+        if start_date:
+            query = query.filter(Payment.confirmation_date >= start_date)
+        if end_date:
+            query = query.filter(Payment.confirmation_date <= end_date)
+        
+        payments = query.all()
+        
+        total_payments = len(payments)
+        total_amount = sum(p.amount for p in payments)
+        average_amount = total_amount / total_payments if total_payments > 0 else 0
+        
+        return {
+            'total_payments': total_payments,
+            'total_amount': total_amount,
+            'average_amount': average_amount,
+            'payments': payments
+        }
@@ -0,0 +1,553 @@
+# app/services/reconciliation_service.py
+import csv
+import hashlib
+import re
+import time as timer
+from collections import Counter, defaultdict
+from datetime import datetime, time
+from functools import lru_cache
+from sqlalchemy import bindparam, select, update
+from app.models import db
+from app.models.student import Student
+from app.models.billing import Billing
+from app.models.payment import Payment, PaymentReconciliation
+from app.models.payment_method import PaymentMethod
+from app.models.rollup import BillingStatusRollup, DailyPaymentRollup
+from app.config import get_config_value
+from app.utils.cache import bump_finance_version
+from app.utils.logger import logger
+
+REFERENCE_CODE_PATTERN = re.compile(r'PAY\d{14}[0-9A-F]{6}')
+
+# Nama kolom CSV yang dikenali (ekspor internet banking berbeda-beda)
+COLUMN_ALIASES = {
+    'date': ('date', 'tanggal', 'tgl', 'transaction_date', 'posting_date'),
+    'description': ('description', 'keterangan', 'remark', 'berita'),
+    'amount': ('amount', 'nominal', 'credit', 'kredit', 'mutasi'),
+    'reference': ('reference', 'reference_code', 'ref', 'referensi'),
+    'va_number': ('va_number', 'va', 'virtual_account', 'no_va'),
+}
+
+DATE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%Y/%m/%d', '%d/%m/%y')
+
+
+@lru_cache(maxsize=8)
+def _va_pattern(va_prefix):
+    """Regex nomor VA (prefix + NIM) di keterangan mutasi, di-compile sekali per prefix"""
+    return re.compile(rf'{re.escape(va_prefix)}(\d{{6,20}})')
+
+
+class ReconciliationConflict(Exception):
+    """Billing diubah transaksi lain selama rekonsiliasi berjalan"""
+
+
+def parse_amount(value):
+    """
+    Parse nominal mutasi dalam format Indonesia maupun internasional
+    
+    "5.000.000,00", "5,000,000.00", "Rp 5000000" dan "2.500.000 CR" menjadi
+    integer Rupiah; nominal negatif atau berakhiran DB (debit) jadi negatif.
+    
+    Args:
+        value: Teks nominal dari rekening koran
+    
+    Returns:
+        int: Nominal dalam Rupiah
+    """
+    text = (value or '').strip().upper()
+    negative = text.startswith('-') or text.endswith('DB') or text.endswith(' D')
+    text = re.sub(r'[^\d,.]', '', text)
+    if not text:
+        raise ValueError(f'Nominal tidak valid: {value!r}')
+    
+    if ',' in text and '.' in text:
+        decimal = ',' if text.rfind(',') > text.rfind('.') else '.'
+        thousands = '.' if decimal == ',' else ','
+        text = text.replace(thousands, '').replace(decimal, '.')
+    elif ',' in text or '.' in text:
+        separator = ',' if ',' in text else '.'
+        head, _, tail = text.rpartition(separator)
+        if len(tail) == 3 or text.count(separator) > 1:
+            text = text.replace(separator, '')
+        else:
+            text = head.replace(separator, '') + '.' + tail
+    
+    amount = int(round(float(text)))
+    return -amount if negative else amount
+
+
+def parse_statement_date(value):
+    """Parse tanggal mutasi dari format yang umum dipakai bank"""
+    text = (value or '').strip()
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(text[:10], date_format).date()
+        except ValueError:
+            continue
+    raise ValueError(f'Tanggal tidak valid: {value!r}')
+
+
+def parse_statement_csv(stream):
+    """
+    Baca rekening koran CSV baris per baris (streaming, tidak dimuat sekaligus)
+    
+    Args:
+        stream: File teks yang terbuka (misal open(path, newline=''))
+    
+    Yields:
+        dict: {line_no, date, amount, description, reference, va_number},
+            atau {line_no, error, raw} untuk baris yang tidak bisa dibaca
+    """
+    reader = csv.reader(stream)
+    header = next(reader, None)
+    if header is None:
+        return
+    
+    normalized = [column.strip().lower().replace(' ', '_') for column in header]
+    positions = {}
+    for field, aliases in COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in normalized:
+                positions[field] = normalized.index(alias)
+                break
+    
+    missing = [field for field in ('date', 'amount') if field not in positions]
+    if missing:
+        raise ValueError(f'Kolom wajib tidak ditemukan di header CSV: {missing}')
+    
+    def column(row, field):
+        position = positions.get(field)
+        if position is None or position >= len(row):
+            return ''
+        return row[position].strip()
+    
+    # Baris 1 adalah header
+    for line_no, row in enumerate(reader, start=2):
+        if not any(cell.strip() for cell in row):
+            continue
+        try:
+            yield {
+                'line_no': line_no,
+                'date': parse_statement_date(column(row, 'date')),
+                'amount': parse_amount(column(row, 'amount')),
+                'description': column(row, 'description'),
+                'reference': column(row, 'reference'),
+                'va_number': column(row, 'va_number'),
+            }
+        except ValueError as e:
+            yield {'line_no': line_no, 'error': str(e), 'raw': row}
+
+
+class ReconciliationService:
+    """
+    Service untuk rekonsiliasi massal rekening koran bank
+    
+    Semua billing terbuka beserta payment pending dimuat dengan satu query
+    menjadi index hash in-memory (reference code, NIM, nominal+tanggal),
+    sehingga pencocokan per baris tidak menyentuh database. Hasil cocok
+    ditulis per chunk lewat Core executemany; karena itu saldo mahasiswa
+    dan tabel rekap disinkronkan manual seperti jalur bulk billing.
+    """
+    
+    MATCH_REFERENCE = 'reference'
+    MATCH_VA = 'va_number'
+    MATCH_AMOUNT_DATE = 'amount_date'
+    
+    def __init__(self, va_prefix=None, chunk_size=None):
+        # None = ambil dari konfigurasi app aktif saat dipakai; instance route dibuat saat import
+        self._va_prefix = va_prefix
+        self._chunk_size = chunk_size
+    
+    @property
+    def va_prefix(self):
+        return self._va_prefix if self._va_prefix is not None else get_config_value('BANK_VA_PREFIX')
+    
+    @property
+    def chunk_size(self):
+        return self._chunk_size or get_config_value('RECONCILIATION_CHUNK_SIZE')
+    
+    def reconcile_csv(self, stream, payment_method_id, **kwargs):
+        """Rekonsiliasi rekening koran CSV, lihat reconcile_lines"""
+        return self.reconcile_lines(parse_statement_csv(stream), payment_method_id, **kwargs)
+    
+    def reconcile_lines(self, lines, payment_method_id, source='bank_statement', dry_run=False):
+        """
+        Cocokkan baris mutasi kredit ke payment pending atau billing terbuka
+        
+        Urutan pencocokan per baris:
+        1. Reference code payment (kolom reference atau di keterangan)
+        2. Nomor VA (prefix + NIM) -> billing terbuka tertua mahasiswa tersebut,
+           dibuatkan payment baru
+        3. Nominal + tanggal sama dengan tepat satu payment pending
+        
+        Baris yang sudah pernah direkonsiliasi (hash baris sama) dilewati,
+        sehingga file yang sama aman diimpor ulang.
+        
+        Args:
+            lines: Iterable dict baris mutasi (lihat parse_statement_csv)
+            payment_method_id: Metode pembayaran untuk payment yang dibuat dari VA
+            source: Nama sumber, disimpan sebagai gateway_name
+            dry_run: True untuk hanya mencocokkan tanpa menulis ke database
+        
+        Returns:
+            dict: Laporan {success, total_lines, matched, matched_amount,
+                duplicates, skipped, invalid, unmatched, ambiguous, elapsed_seconds}
+        """
+        started = timer.perf_counter()
+        
+        if db.session.get(PaymentMethod, payment_method_id) is None:
+            return {'success': False, 'message': 'Payment method tidak ditemukan'}
+        
+        index = self._build_index()
+        report = {
+            'success': True,
+            'dry_run': dry_run,
+            'total_lines': 0,
+            'matched': {self.MATCH_REFERENCE: 0, self.MATCH_VA: 0, self.MATCH_AMOUNT_DATE: 0},
+            'matched_amount': 0,
+            'duplicates': 0,
+            'skipped': 0,
+            'invalid': [],
+            'unmatched': [],
+            'ambiguous': []
+        }
+        
+        occurrences = Counter()
+        chunk = []
+        try:
+            for line in lines:
+                report['total_lines'] += 1
+                if 'error' in line:
+                    report['invalid'].append({'line_no': line['line_no'], 'reason': line['error']})
+                    continue
+                # Hanya mutasi kredit (uang masuk) yang relevan
+                if line['amount'] <= 0:
+                    report['skipped'] += 1
+                    continue
+                
+                content = '|'.join(str(line[field] or '') for field in ('date', 'amount', 'description', 'reference', 'va_number'))
+                occurrences[content] += 1
+                line['hash'] = hashlib.sha1(f'{content}|{occurrences[content]}'.encode()).hexdigest()
+                
+                chunk.append(line)
+                if len(chunk) >= self.chunk_size:
+                    self._process_chunk(chunk, index, report, payment_method_id, source, dry_run)
+                    chunk = []
+            
+            if chunk:
+                self._process_chunk(chunk, index, report, payment_method_id, source, dry_run)
+        except ReconciliationConflict as e:
+            db.session.rollback()
+            report['success'] = False
+            report['message'] = str(e)
+        
+        if not dry_run and sum(report['matched'].values()):
+            bump_finance_version()
+        
+        report['elapsed_seconds'] = round(timer.perf_counter() - started, 3)
+        logger.info(
+            f"Rekonsiliasi {source}: {report['total_lines']} baris, "
+            f"{sum(report['matched'].values())} cocok, {len(report['unmatched'])} tidak cocok, "
+            f"{len(report['ambiguous'])} ambigu, {report['duplicates']} duplikat "
+            f"({report['elapsed_seconds']}s)"
+        )
+        return report
+    
+    def _build_index(self):
+        """
+        Muat billing terbuka + payment pending dengan satu query
+        
+        Returns:
+            dict: {by_reference, by_nim, by_amount_date}
+        """
+        rows = db.session.execute(
+            select(
+                Billing.id, Billing.student_id, Billing.semester, Billing.total_amount,
+                Billing.paid_amount, Billing.remaining_amount, Billing.status,
+                Billing.version, Billing.due_date,
+                Student.nim, Student.program_studi_id,
+                Payment.id, Payment.reference_code, Payment.amount,
+                Payment.payment_method_id, Payment.payment_date, Payment.created_at
+            )
+            .join(Student, Billing.student_id == Student.id)
+            .outerjoin(Payment, (Payment.billing_id == Billing.id) & (Payment.status == Payment.STATUS_PENDING))
+            .where(Billing.status.in_(Billing.OPEN_STATUSES))
+            .order_by(Billing.due_date, Billing.id)
+        ).all()
+        
+        billings = {}
+        by_reference = {}
+        by_nim = defaultdict(list)
+        by_amount_date = defaultdict(list)
+        
+        for (billing_id, student_id, semester, total_amount, paid_amount, remaining_amount, status,
+             version, due_date, nim, program_studi_id, payment_id, reference_code, payment_amount,
+             payment_method_id, payment_date, created_at) in rows:
+            billing = billings.get(billing_id)
+            if billing is None:
+                billing = {
+                    'id': billing_id,
+                    'student_id': student_id,
+                    'semester': semester,
+                    'program_studi_id': program_studi_id,
+                    'total_amount': total_amount,
+                    'paid_amount': paid_amount or 0,
+                    'remaining_amount': remaining_amount,
+                    'status': status,
+                    'version': version,
+                    'original': (status, remaining_amount)
+                }
+                billings[billing_id] = billing
+                by_nim[nim].append(billing)
+            
+            if payment_id is None:
+                continue
+            
+            payment = {
+                'id': payment_id,
+                'reference_code': reference_code,
+                'amount': payment_amount,
+                'payment_method_id': payment_method_id,
+                'date': (payment_date or created_at).date() if (payment_date or created_at) else None,
+                'billing': billing,
+                'matched': False
+            }
+            by_reference[reference_code] = payment
+            by_amount_date[(payment_amount, payment['date'])].append(payment)
+        
+        return {'by_reference': by_reference, 'by_nim': by_nim, 'by_amount_date': by_amount_date}
+    
+    def _match_line(self, line, index):
+        """
+        Cari target satu baris mutasi di index
+        
+        Returns:
+            tuple: (kind, payment, billing) jika cocok, ('ambiguous', candidates)
+                atau ('unmatched', reason)
+        """
+        references = [line['reference']] if line['reference'] else []
+        references += REFERENCE_CODE_PATTERN.findall(line['description'])
+        for reference in references:
+            payment = index['by_reference'].get(reference)
+            if payment is not None and not payment['matched']:
+                return self.MATCH_REFERENCE, payment, payment['billing']
+        
+        nims = []
+        va_prefix = self.va_prefix
+        if va_prefix:
+            if line['va_number'] and line['va_number'].startswith(va_prefix):
+                nims.append(line['va_number'][len(va_prefix):])
+            nims += _va_pattern(va_prefix).findall(line['description'])
+        for nim in nims:
+            open_billings = [b for b in index['by_nim'].get(nim, ()) if b['remaining_amount'] > 0]
+            if open_billings:
+                # Utamakan billing yang sisa tagihannya persis sama, lalu yang jatuh tempo paling awal
+                exact = [b for b in open_billings if b['remaining_amount'] == line['amount']]
+                return self.MATCH_VA, None, (exact or open_billings)[0]
+        
+        candidates = [
+            payment for payment in index['by_amount_date'].get((line['amount'], line['date']), ())
+            if not payment['matched']
+        ]
+        if len(candidates) == 1:
+            return self.MATCH_AMOUNT_DATE, candidates[0], candidates[0]['billing']
+        if candidates:
+            return 'ambiguous', [payment['reference_code'] for payment in candidates]
+        
+        if nims:
+            return 'unmatched', 'Tidak ada billing terbuka untuk nomor VA'
+        return 'unmatched', 'Tidak ada payment atau billing yang cocok'
+    
+    def _process_chunk(self, chunk, index, report, payment_method_id, source, dry_run):
+        """Cocokkan satu chunk baris lalu tulis hasilnya dalam satu transaksi"""
+        recorded = set(db.session.execute(
+            select(PaymentReconciliation.statement_line_hash)
+            .where(PaymentReconciliation.statement_line_hash.in_([line['hash'] for line in chunk]))
+        ).scalars())
+        
+        matches = []
+        for line in chunk:
+            if line['hash'] in recorded:
+                report['duplicates'] += 1
+                continue
+            
+            result = self._match_line(line, index)
+            summary = {
+                'line_no': line['line_no'],
+                'date': line['date'].isoformat(),
+                'amount': line['amount'],
+                'description': line['description']
+            }
+            if result[0] == 'ambiguous':
+                report['ambiguous'].append({**summary, 'candidates': result[1]})
+                continue
+            if result[0] == 'unmatched':
+                report['unmatched'].append({**summary, 'reason': result[1]})
+                continue
+            
+            kind, payment, billing = result
+            if payment is not None:
+                payment['matched'] = True
+            billing['paid_amount'] += line['amount']
+            billing['remaining_amount'] = billing['total_amount'] - billing['paid_amount']
+            billing['status'] = self._billing_status(billing)
+            
+            matches.append((line, kind, payment, billing))
+            report['matched'][kind] += 1
+            report['matched_amount'] += line['amount']
+        
+        if matches and not dry_run:
+            self._write_matches(matches, payment_method_id, source)
+            db.session.commit()
+    
+    @staticmethod
+    def _billing_status(billing):
+        """Status billing setelah pembayaran, sama seperti PaymentService.apply_payment"""
+        if billing['paid_amount'] == 0:
+            return Billing.STATUS_UNPAID
+        if billing['paid_amount'] < billing['total_amount']:
+            return Billing.STATUS_PARTIAL
+        return Billing.STATUS_PAID
+    
+    def _write_matches(self, matches, payment_method_id, source):
+        """
+        Tulis hasil cocok satu chunk dengan Core executemany
+        
+        Core update/insert tidak memicu mapper event, jadi outstanding
+        mahasiswa dan tabel rekap diperbarui di sini.
+        """
+        now = datetime.utcnow()
+        payments = Payment.__table__
+        billings = Billing.__table__
+        
+        confirmed = []
+        new_payments = []
+        for line, kind, payment, billing in matches:
+            paid_at = datetime.combine(line['date'], time())
+            if payment is not None:
+                confirmed.append({'_id': payment['id'], 'amount': line['amount'], 'confirmation_date': paid_at})
+            else:
+                new_payments.append({
+                    'student_id': billing['student_id'],
+                    'billing_id': billing['id'],
+                    'payment_method_id': payment_method_id,
+                    'transaction_id': f"BANK-{line['hash'][:32]}",
+                    'reference_code': Payment.generate_reference_code(),
+                    'amount': line['amount'],
+                    'status': Payment.STATUS_CONFIRMED,
+                    'gateway_name': source,
+                    'payment_date': paid_at,
+                    'confirmation_date': paid_at,
+                    'created_at': now,
+                    'updated_at': now
+                })
+        
+        if confirmed:
+            result = db.session.execute(
+                update(payments)
+                .where(payments.c.id == bindparam('_id'), payments.c.status == Payment.STATUS_PENDING)
+                .values(
+                    status=Payment.STATUS_CONFIRMED,
+                    amount=bindparam('amount'),
+                    confirmation_date=bindparam('confirmation_date'),
+                    updated_at=now
+                ),
+                confirmed
+            )
+            if result.rowcount != len(confirmed):
+                raise ReconciliationConflict('Payment pending berubah selama rekonsiliasi, jalankan ulang')
+        
+        if new_payments:
+            db.session.execute(payments.insert(), new_payments)
+        
+        # Billing ditulis sekali per chunk dengan nilai akhirnya; cek versi seperti version_id_col ORM
+        touched = {billing['id']: billing for _, _, _, billing in matches}
+        last_payment = {}
+        for line, _, _, billing in matches:
+            paid_at = datetime.combine(line['date'], time())
+            last_payment[billing['id']] = max(last_payment.get(billing['id'], paid_at), paid_at)
+        
+        result = db.session.execute(
+            update(billings)
+            .where(billings.c.id == bindparam('_id'), billings.c.version == bindparam('_version'))
+            .values(
+                paid_amount=bindparam('paid_amount'),
+                remaining_amount=bindparam('remaining_amount'),
+                status=bindparam('status'),
+                last_payment_date=bindparam('last_payment_date'),
+                version=billings.c.version + 1,
+                updated_at=now
+            ),
+            [
+                {
+                    '_id': billing['id'],
+                    '_version': billing['version'],
+                    'paid_amount': billing['paid_amount'],
+                    'remaining_amount': billing['remaining_amount'],
+                    'status': billing['status'],
+                    'last_payment_date': last_payment[billing['id']]
+                }
+                for billing in touched.values()
+            ]
+        )
+        if result.rowcount != len(touched):
+            raise ReconciliationConflict('Billing diubah transaksi lain selama rekonsiliasi, jalankan ulang')
+        
+        payment_ids = {}
+        if new_payments:
+            payment_ids = dict(db.session.execute(
+                select(Payment.transaction_id, Payment.id)
+                .where(Payment.transaction_id.in_([row['transaction_id'] for row in new_payments]))
+            ).all())
+        
+        reconciliations = []
+        for line, kind, payment, billing in matches:
+            payment_id = payment['id'] if payment is not None else payment_ids[f"BANK-{line['hash'][:32]}"]
+            reconciliations.append({
+                'payment_id': payment_id,
+                'gateway_name': source,
+                'status': 'matched',
+                'gateway_response': {
+                    'line_no': line['line_no'],
+                    'date': line['date'].isoformat(),
+                    'amount': line['amount'],
+                    'description': line['description'],
+                    'reference': line['reference'],
+                    'va_number': line['va_number'],
+                    'match': kind
+                },
+                'statement_line_hash': line['hash'],
+                'created_at': now,
+                'updated_at': now
+            })
+        db.session.execute(PaymentReconciliation.__table__.insert(), reconciliations)
+        
+        Student.refresh_outstanding(list({billing['student_id'] for billing in touched.values()}))
+        
+        billing_deltas = defaultdict(lambda: [0, 0, 0])
+        for billing in touched.values():
+            old_status, old_remaining = billing['original']
+            old_key = (billing['semester'], billing['program_studi_id'], old_status)
+            new_key = (billing['semester'], billing['program_studi_id'], billing['status'])
+            billing_deltas[old_key][0] -= 1
+            billing_deltas[old_key][1] -= billing['total_amount']
+            billing_deltas[old_key][2] -= old_remaining
+            billing_deltas[new_key][0] += 1
+            billing_deltas[new_key][1] += billing['total_amount']
+            billing_deltas[new_key][2] += billing['remaining_amount']
+            
+            billing['version'] += 1
+            billing['original'] = (billing['status'], billing['remaining_amount'])
+        
+        for (semester, program_studi_id, status), (count, total, remaining) in billing_deltas.items():
+            BillingStatusRollup.apply_delta(db.session, semester, program_studi_id, status, count, total, remaining)
+        
+        payment_deltas = defaultdict(lambda: [0, 0])
+        for line, kind, payment, billing in matches:
+            method_id = payment['payment_method_id'] if payment is not None else payment_method_id
+            key = (line['date'], billing['program_studi_id'], method_id)
+            payment_deltas[key][0] += 1
+            payment_deltas[key][1] += line['amount']
+        
+        for (date, program_studi_id, method_id), (count, amount) in payment_deltas.items():
+            DailyPaymentRollup.apply_delta(db.session, date, program_studi_id, method_id, count, amount)
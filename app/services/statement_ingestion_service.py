@@ -0,0 +1,251 @@
+# app/services/statement_ingestion_service.py
+import hashlib
+import json
+import os
+import re
+import time as timer
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, datetime
+import pdfplumber
+from app.config import get_config_value
+from app.services.reconciliation_service import ReconciliationService, parse_amount
+from app.utils.logger import logger
+
+# "01/10 TRSF E-BANKING ... 5,000,000.00 CR 1,005,000,000.00"
+TRANSACTION_LINE_PATTERN = re.compile(
+    r'^(?P<day>\d{2})/(?P<month>\d{2})(?:/(?P<year>\d{2,4}))?\s+'
+    r'(?P<description>.*?)\s+'
+    r'(?P<amount>\d[\d.,]*[.,]\d{2})'
+    r'(?:\s+(?P<kind>CR|DB))?'
+    r'(?:\s+(?P<balance>-?\d[\d.,]*[.,]\d{2}))?\s*$'
+)
+PERIOD_PATTERN = re.compile(r'PERIODE\b[^\d]*(?:\d{1,2}[^\d]+)?(\d{4})', re.IGNORECASE)
+# Header/footer yang berulang di setiap halaman, bukan lanjutan keterangan
+NON_DESCRIPTION_PATTERN = re.compile(
+    r'^(SALDO|HALAMAN|BERSAMBUNG|PERIODE|REKENING|NO\. REKENING|TANGGAL|MUTASI|TOTAL)\b',
+    re.IGNORECASE
+)
+# Bagian dari key cache halaman: naikkan jika hasil parse_statement_text berubah
+STATEMENT_PARSER_VERSION = 1
+
+
+def parse_statement_text(text, year=None):
+    """
+    Parse teks satu halaman rekening koran menjadi baris transaksi
+    
+    Baris tanpa tanggal tepat di bawah transaksi dianggap lanjutan
+    keterangan (bank sering memecah berita transfer / nomor VA ke baris
+    berikutnya).
+    
+    Args:
+        text: Hasil extract_text() satu halaman
+        year: Tahun untuk tanggal DD/MM jika halaman tidak punya header PERIODE
+    
+    Returns:
+        list: [{date: 'YYYY-MM-DD', amount: int, description: str}], debit bernilai negatif
+    """
+    period = PERIOD_PATTERN.search(text)
+    page_year = int(period.group(1)) if period else (year or datetime.utcnow().year)
+    
+    rows = []
+    last = None
+    for raw_line in text.splitlines():
+        line = raw_line.strip()
+        if not line:
+            continue
+        
+        match = TRANSACTION_LINE_PATTERN.match(line)
+        if match is None:
+            if last is not None and not NON_DESCRIPTION_PATTERN.match(line):
+                last['description'] = f"{last['description']} {line}"
+            else:
+                last = None
+            continue
+        
+        line_year = match.group('year')
+        if line_year:
+            line_year = int(line_year) + (2000 if len(line_year) == 2 else 0)
+        try:
+            transaction_date = date(line_year or page_year, int(match.group('month')), int(match.group('day')))
+        except ValueError:
+            last = None
+            continue
+        
+        amount = parse_amount(match.group('amount'))
+        if match.group('kind') == 'DB':
+            amount = -amount
+        
+        last = {
+            'date': transaction_date.isoformat(),
+            'amount': amount,
+            'description': match.group('description')
+        }
+        rows.append(last)
+    
+    return rows
+
+
+def _extract_pages(pdf_path, page_numbers, year):
+    """Worker process pool: buka PDF sekali lalu extract dan parse halaman yang diminta"""
+    results = []
+    with pdfplumber.open(pdf_path) as pdf:
+        for page_no in page_numbers:
+            page = pdf.pages[page_no - 1]
+            text = page.extract_text() or ''
+            # Objek karakter per halaman besar, lepas sebelum halaman berikutnya
+            page.flush_cache()
+            results.append((page_no, parse_statement_text(text, year)))
+    return results
+
+
+def file_sha256(path, block_size=1024 * 1024):
+    """Hash SHA-256 isi file, dibaca per blok"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as source:
+        for block in iter(lambda: source.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class StatementIngestionService:
+    """
+    Service untuk ingestion rekening koran PDF
+    
+    Halaman di-extract paralel dengan process pool (pdfplumber terikat CPU,
+    thread tidak membantu karena GIL). Hasil parse per halaman di-cache di
+    disk per hash file, tahun fallback, dan versi parser, sehingga file yang
+    sama diproses ulang (atau run yang terhenti dilanjutkan) hanya
+    meng-extract halaman yang belum ada.
+    """
+    
+    def __init__(self, cache_dir=None, workers=None, pages_per_task=None):
+        # None = ambil dari konfigurasi app aktif saat dipakai
+        self._cache_dir = cache_dir
+        self._workers = workers
+        self._pages_per_task = pages_per_task
+    
+    @property
+    def cache_dir(self):
+        return self._cache_dir or get_config_value('STATEMENT_CACHE_DIR')
+    
+    @property
+    def workers(self):
+        return self._workers or get_config_value('STATEMENT_PDF_WORKERS')
+    
+    @property
+    def pages_per_task(self):
+        return self._pages_per_task or get_config_value('STATEMENT_PDF_PAGES_PER_TASK')
+    
+    def extract(self, pdf_path, year=None):
+        """
+        Extract baris transaksi dari seluruh halaman PDF
+        
+        Args:
+            pdf_path: Lokasi file PDF rekening koran
+            year: Tahun default untuk tanggal tanpa tahun
+        
+        Returns:
+            dict: {file_hash, pages, cached_pages, extracted_pages, rows, seconds}
+        """
+        started = timer.perf_counter()
+        file_hash = file_sha256(pdf_path)
+        # Tahun fallback ikut menentukan hasil parse, jadi ikut menjadi key cache
+        year = year or datetime.utcnow().year
+        page_dir = os.path.join(self.cache_dir, f'{file_hash}-{year}-v{STATEMENT_PARSER_VERSION}')
+        os.makedirs(page_dir, exist_ok=True)
+        
+        with pdfplumber.open(pdf_path) as pdf:
+            total_pages = len(pdf.pages)
+        
+        pages = self._load_cached_pages(page_dir)
+        missing = [page_no for page_no in range(1, total_pages + 1) if page_no not in pages]
+        tasks = [missing[i:i + self.pages_per_task] for i in range(0, len(missing), self.pages_per_task)]
+        
+        if self.workers <= 1 or len(tasks) <= 1:
+            for task in tasks:
+                for page_no, rows in _extract_pages(pdf_path, task, year):
+                    pages[page_no] = self._save_page(page_dir, page_no, rows)
+        else:
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(tasks))) as pool:
+                futures = [pool.submit(_extract_pages, pdf_path, task, year) for task in tasks]
+                # Cache disimpan begitu task selesai, run yang terhenti tidak mengulang halaman ini
+                for future in as_completed(futures):
+                    for page_no, rows in future.result():
+                        pages[page_no] = self._save_page(page_dir, page_no, rows)
+        
+        rows = []
+        for page_no in range(1, total_pages + 1):
+            for row in pages[page_no]:
+                rows.append({**row, 'page': page_no})
+        
+        return {
+            'file_hash': file_hash,
+            'pages': total_pages,
+            'cached_pages': total_pages - len(missing),
+            'extracted_pages': len(missing),
+            'rows': rows,
+            'seconds': round(timer.perf_counter() - started, 3)
+        }
+    
+    def ingest(self, pdf_path, payment_method_id, year=None, dry_run=False):
+        """
+        Extract rekening koran PDF lalu rekonsiliasi ke payment dan billing
+        
+        Args:
+            pdf_path: Lokasi file PDF rekening koran
+            payment_method_id: Metode pembayaran untuk payment baru dari VA
+            year: Tahun default untuk tanggal tanpa tahun
+            dry_run: True untuk hanya mencocokkan tanpa menulis ke database
+        
+        Returns:
+            dict: Laporan ReconciliationService ditambah ringkasan extraction
+        """
+        extraction = self.extract(pdf_path, year=year)
+        lines = (
+            {
+                'line_no': line_no,
+                'date': date.fromisoformat(row['date']),
+                'amount': row['amount'],
+                'description': row['description'],
+                'reference': '',
+                'va_number': '',
+                'page': row['page']
+            }
+            for line_no, row in enumerate(extraction['rows'], start=1)
+        )
+        
+        report = ReconciliationService().reconcile_lines(
+            lines, payment_method_id, source='bank_statement_pdf', dry_run=dry_run
+        )
+        report['extraction'] = {key: value for key, value in extraction.items() if key != 'rows'}
+        report['extraction']['rows'] = len(extraction['rows'])
+        
+        logger.info(
+            f"Ingestion PDF {os.path.basename(pdf_path)}: {extraction['pages']} halaman "
+            f"({extraction['cached_pages']} dari cache), {len(extraction['rows'])} baris transaksi "
+            f"dalam {extraction['seconds']}s"
+        )
+        return report
+    
+    @staticmethod
+    def _load_cached_pages(page_dir):
+        pages = {}
+        for name in os.listdir(page_dir):
+            if not name.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(page_dir, name)) as cached:
+                    pages[int(name[:-5])] = json.load(cached)
+            except (ValueError, OSError):
+                # File cache rusak (misal proses mati saat menulis), extract ulang halamannya
+                continue
+        return pages
+    
+    @staticmethod
+    def _save_page(page_dir, page_no, rows):
+        path = os.path.join(page_dir, f'{page_no:05d}.json')
+        temporary = f'{path}.tmp'
+        with open(temporary, 'w') as output:
+            json.dump(rows, output)
+        os.replace(temporary, path)
+        return rows
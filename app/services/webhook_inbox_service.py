@@ -0,0 +1,345 @@
+# app/services/webhook_inbox_service.py
+import json
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from app.models import db
+from app.models.base import days_between
+from app.models.webhook_inbox import WebhookInbox
+from app.services.payment_service import PaymentService
+from app.utils.logger import logger
+from app.utils.metrics import WEBHOOK_EVENTS
+
+def _payload_status(payload):
+    """Status pembayaran dari payload yang tersimpan (None jika payload bukan object)"""
+    return payload.get('status') if isinstance(payload, dict) else None
+
+
+class WebhookInboxService:
+    """Service untuk antrian webhook: simpan cepat di request, proses di worker"""
+    
+    def __init__(self, payment_service=None):
+        self.payment_service = payment_service or PaymentService()
+    
+    def enqueue(self, payload, raw_body=None):
+        """
+        Simpan payload webhook terverifikasi ke inbox
+        
+        transaction_id bersifat unik, sehingga retry dari gateway untuk
+        transaksi yang sama tidak membuat entry (dan pembayaran) ganda.
+        Pengecualiannya notifikasi success untuk transaksi yang entry-nya
+        belum success (mis. pending lalu success): payload entry tersebut
+        diganti dan dijadwalkan ulang agar pembayarannya tetap diterapkan.
+        Validasi field dilakukan worker; payload tidak valid masuk dead-letter.
+        
+        Args:
+            payload: Data webhook yang signature-nya sudah diverifikasi
+            raw_body: Body request asli (bytes) yang dicakup signature, disimpan
+                sebagai salinan audit dan dipakai worker saat memproses
+        
+        Returns:
+            dict: {success: bool, message: str, inbox_id: int, duplicate: bool}
+        """
+        transaction_id = payload.get('transaction_id') if isinstance(payload, dict) else None
+        if not transaction_id:
+            return {'success': False, 'message': 'transaction_id is required'}
+        
+        if isinstance(raw_body, bytes):
+            raw_body = raw_body.decode('utf-8')
+        
+        existing = WebhookInbox.query.filter_by(transaction_id=transaction_id).first()
+        if existing:
+            return self._merge_existing(existing, payload, raw_body)
+        
+        entry = WebhookInbox(
+            transaction_id=transaction_id,
+            payload=payload,
+            raw_body=raw_body,
+            status=WebhookInbox.STATUS_PENDING,
+            next_attempt_at=datetime.utcnow()
+        )
+        db.session.add(entry)
+        
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # Request paralel untuk transaksi yang sama sudah lebih dulu tersimpan
+            db.session.rollback()
+            existing = WebhookInbox.query.filter_by(transaction_id=transaction_id).one()
+            return self._merge_existing(existing, payload, raw_body)
+        
+        return self._queued_result(entry.id)
+    
+    def _merge_existing(self, existing, payload, raw_body):
+        """
+        Tangani webhook untuk transaction_id yang sudah ada di inbox
+        
+        Notifikasi success menggantikan entry yang payload-nya belum success
+        (entry dikembalikan ke pending, termasuk yang sedang dipegang worker);
+        selain itu webhook dianggap duplikat.
+        """
+        if payload.get('status') != 'success' or _payload_status(existing.payload) == 'success':
+            return self._duplicate_result(existing.id)
+        
+        previous_status = _payload_status(existing.payload)
+        db.session.execute(
+            update(WebhookInbox)
+            .where(WebhookInbox.id == existing.id)
+            .values(
+                payload=payload,
+                raw_body=raw_body,
+                status=WebhookInbox.STATUS_PENDING,
+                attempts=0,
+                next_attempt_at=datetime.utcnow(),
+                last_error=None,
+                locked_by=None,
+                locked_until=None,
+                processed_at=None
+            )
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        
+        logger.info(f"Webhook {existing.transaction_id} updated from '{previous_status}' to 'success' in inbox")
+        return self._queued_result(existing.id)
+    
+    @staticmethod
+    def _queued_result(inbox_id):
+        return {
+            'success': True,
+            'message': 'Webhook queued for processing',
+            'inbox_id': inbox_id,
+            'duplicate': False
+        }
+    
+    @staticmethod
+    def _duplicate_result(inbox_id):
+        return {
+            'success': True,
+            'message': 'Webhook already received',
+            'inbox_id': inbox_id,
+            'duplicate': True
+        }
+    
+    def claim_batch(self, worker_id, batch_size=None):
+        """
+        Klaim sejumlah entry yang siap diproses untuk satu worker
+        
+        Klaim memakai UPDATE bersyarat, sehingga dua worker tidak pernah
+        memegang entry yang sama. Entry 'processing' dengan lease yang
+        sudah lewat (worker mati) ikut diklaim ulang.
+        
+        Args:
+            worker_id: Identitas unik worker
+            batch_size: Jumlah maksimal entry (default WEBHOOK_BATCH_SIZE)
+        
+        Returns:
+            list: Daftar WebhookInbox milik worker ini
+        """
+        batch_size = batch_size or current_app.config['WEBHOOK_BATCH_SIZE']
+        now = datetime.utcnow()
+        
+        claimable = or_(
+            and_(
+                WebhookInbox.status == WebhookInbox.STATUS_PENDING,
+                WebhookInbox.next_attempt_at <= now
+            ),
+            and_(
+                WebhookInbox.status == WebhookInbox.STATUS_PROCESSING,
+                WebhookInbox.locked_until < now
+            )
+        )
+        
+        candidate_ids = db.session.execute(
+            select(WebhookInbox.id).where(claimable).order_by(WebhookInbox.id).limit(batch_size)
+        ).scalars().all()
+        if not candidate_ids:
+            return []
+        
+        db.session.execute(
+            update(WebhookInbox)
+            .where(WebhookInbox.id.in_(candidate_ids), claimable)
+            .values(
+                status=WebhookInbox.STATUS_PROCESSING,
+                locked_by=worker_id,
+                locked_until=now + timedelta(seconds=current_app.config['WEBHOOK_LEASE_SECONDS'])
+            )
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        
+        return WebhookInbox.query.filter(
+            WebhookInbox.id.in_(candidate_ids),
+            WebhookInbox.status == WebhookInbox.STATUS_PROCESSING,
+            WebhookInbox.locked_by == worker_id
+        ).order_by(WebhookInbox.id).all()
+    
+    def process_batch(self, worker_id, batch_size=None):
+        """
+        Klaim lalu proses satu batch webhook lewat PaymentService
+        
+        Args:
+            worker_id: Identitas unik worker
+            batch_size: Jumlah maksimal entry
+        
+        Returns:
+            dict: {claimed, processed, retried, dead}
+        """
+        stats = {'claimed': 0, 'processed': 0, 'retried': 0, 'dead': 0}
+        
+        for entry in self.claim_batch(worker_id, batch_size):
+            stats['claimed'] += 1
+            outcome = self._process_entry(entry, worker_id)
+            stats[outcome] += 1
+            WEBHOOK_EVENTS.inc(source='inbox', outcome=outcome)
+        
+        return stats
+    
+    def _process_entry(self, entry, worker_id):
+        """
+        Proses satu entry dan tandai done, jadwalkan retry, atau dead-letter
+        
+        Hasil hanya ditulis selama entry masih dipegang worker ini: entry yang
+        diganti notifikasi success di tengah proses sudah kembali ke pending.
+        """
+        entry_id = entry.id
+        transaction_id = entry.transaction_id
+        attempts = entry.attempts + 1
+        
+        try:
+            # Proses body yang ditandatangani, bukan salinan hasil parse ulang
+            payload = json.loads(entry.raw_body) if entry.raw_body is not None else entry.payload
+            if not isinstance(payload, dict):
+                result = {'success': False, 'message': 'Webhook payload must be an object', 'status_code': 400}
+            elif payload.get('status') in ('pending', 'failed'):
+                # Sama dengan mode sinkron: hanya status success yang diproses
+                result = {'success': True, 'message': f"Webhook status '{payload['status']}' acknowledged"}
+            elif payload.get('status') != 'success':
+                result = {'success': False, 'message': 'Status must be one of: success, pending, failed',
+                          'status_code': 400}
+            else:
+                result = self.payment_service.apply_webhook(payload)
+        except ValueError as e:
+            result = {'success': False, 'message': f'Invalid JSON body: {str(e)}', 'status_code': 400}
+        except Exception as e:
+            db.session.rollback()
+            result = {'success': False, 'message': str(e), 'status_code': 500}
+        
+        now = datetime.utcnow()
+        values = {'attempts': attempts, 'locked_by': None, 'locked_until': None}
+        
+        if result['success']:
+            values.update(status=WebhookInbox.STATUS_DONE, processed_at=now, last_error=None)
+            outcome = 'processed'
+        elif self._is_permanent_failure(result) or attempts >= current_app.config['WEBHOOK_MAX_ATTEMPTS']:
+            # Payload tidak valid / billing tidak ada tidak akan berhasil dengan retry
+            values.update(status=WebhookInbox.STATUS_DEAD, processed_at=now, last_error=result.get('message'))
+            outcome = 'dead'
+            logger.error(
+                f"Webhook {transaction_id} moved to dead-letter after "
+                f"{attempts} attempts: {result.get('message')}"
+            )
+        else:
+            next_attempt_at = now + timedelta(seconds=self._backoff_seconds(attempts))
+            values.update(
+                status=WebhookInbox.STATUS_PENDING,
+                next_attempt_at=next_attempt_at,
+                last_error=result.get('message')
+            )
+            outcome = 'retried'
+            logger.warning(
+                f"Webhook {transaction_id} failed (attempt {attempts}), "
+                f"retry at {next_attempt_at.isoformat()}: {result.get('message')}"
+            )
+        
+        updated = db.session.execute(
+            update(WebhookInbox)
+            .where(WebhookInbox.id == entry_id, WebhookInbox.locked_by == worker_id)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if not updated:
+            logger.info(f"Webhook {transaction_id} was replaced while processing; result discarded")
+        
+        db.session.commit()
+        return outcome
+    
+    @staticmethod
+    def _is_permanent_failure(result):
+        """Error 4xx permanen, kecuali 409 (bentrok optimistic concurrency, boleh dicoba lagi)"""
+        status_code = result.get('status_code') or 500
+        return 400 <= status_code < 500 and status_code != 409
+    
+    @staticmethod
+    def _backoff_seconds(attempts):
+        """Exponential backoff: base * 2^(attempts-1), dibatasi WEBHOOK_RETRY_MAX_SECONDS"""
+        base = current_app.config['WEBHOOK_RETRY_BASE_SECONDS']
+        return min(base * (2 ** (attempts - 1)), current_app.config['WEBHOOK_RETRY_MAX_SECONDS'])
+    
+    def drain(self, worker_id, max_batches=None):
+        """
+        Proses batch berulang sampai tidak ada entry yang siap diproses
+        
+        Args:
+            worker_id: Identitas unik worker
+            max_batches: Batas jumlah batch (None = sampai habis)
+        
+        Returns:
+            dict: Akumulasi {claimed, processed, retried, dead}
+        """
+        totals = {'claimed': 0, 'processed': 0, 'retried': 0, 'dead': 0}
+        batches = 0
+        
+        while max_batches is None or batches < max_batches:
+            stats = self.process_batch(worker_id)
+            if stats['claimed'] == 0:
+                break
+            for key, value in stats.items():
+                totals[key] += value
+            batches += 1
+        
+        return totals
+    
+    def get_metrics(self):
+        """
+        Metrik antrian: kedalaman per status dan lag pemrosesan
+        
+        Returns:
+            dict: {depth, oldest_pending_age_seconds, avg_processing_lag_seconds, ...}
+        """
+        now = datetime.utcnow()
+        
+        depth = {status: 0 for status in WebhookInbox.VALID_STATUSES}
+        rows = db.session.query(
+            WebhookInbox.status,
+            func.count(WebhookInbox.id),
+            func.min(WebhookInbox.received_at)
+        ).group_by(WebhookInbox.status).all()
+        
+        oldest_pending = None
+        for status, count, oldest in rows:
+            depth[status] = count
+            if status in (WebhookInbox.STATUS_PENDING, WebhookInbox.STATUS_PROCESSING) and oldest:
+                oldest_pending = oldest if oldest_pending is None else min(oldest_pending, oldest)
+        
+        # Lag = received_at -> processed_at untuk entry selesai dalam 1 jam terakhir
+        lag_days = days_between(WebhookInbox.processed_at, WebhookInbox.received_at)
+        avg_lag, max_lag, processed_last_hour = db.session.query(
+            func.avg(lag_days),
+            func.max(lag_days),
+            func.count(WebhookInbox.id)
+        ).filter(
+            WebhookInbox.status == WebhookInbox.STATUS_DONE,
+            WebhookInbox.processed_at >= now - timedelta(hours=1)
+        ).one()
+        
+        return {
+            'timestamp': now.isoformat(),
+            'depth': depth,
+            'backlog': depth[WebhookInbox.STATUS_PENDING] + depth[WebhookInbox.STATUS_PROCESSING],
+            'oldest_pending_age_seconds': round((now - oldest_pending).total_seconds(), 3) if oldest_pending else 0,
+            'processed_last_hour': processed_last_hour,
+            'avg_processing_lag_seconds': round(avg_lag * 86400, 3) if avg_lag is not None else 0,
+            'max_processing_lag_seconds': round(max_lag * 86400, 3) if max_lag is not None else 0
+        }
@@ -1,5 +1,5 @@
-# app/utils/__init__.py
-from .logger import logger
-from .decorators import jwt_required
-
-__all__ = ['logger', 'jwt_required']
+# app/utils/__init__.py
+from .logger import logger
+from .decorators import jwt_required
+
+__all__ = ['logger', 'jwt_required']
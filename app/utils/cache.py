@@ -0,0 +1,124 @@
+# app/utils/cache.py
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import current_app, has_app_context, request
+
+class LRUCache:
+    """Cache in-process dengan TTL dan eviksi LRU, aman untuk worker thread"""
+    
+    def __init__(self, maxsize=256, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        """Ambil value, None jika tidak ada atau sudah kedaluwarsa"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            
+            value, expires_at = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            
+            self._entries.move_to_end(key)
+            return value
+    
+    def set(self, key, value):
+        """Simpan value, buang entry paling lama tidak dipakai jika penuh"""
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def __len__(self):
+        return len(self._entries)
+
+
+class ResponseCache(LRUCache):
+    """LRU cache untuk response endpoint dengan counter versi data keuangan"""
+    
+    def __init__(self, maxsize=256, ttl=None):
+        super().__init__(maxsize, ttl)
+        self._version = 0
+        self._version_lock = threading.Lock()
+    
+    @property
+    def version(self):
+        return self._version
+    
+    def bump_version(self):
+        """Naikkan versi data; entry lama otomatis tidak terpakai dan tergeser LRU"""
+        with self._version_lock:
+            self._version += 1
+            return self._version
+
+
+def init_cache(app):
+    """Pasang response cache ke Flask app"""
+    app.extensions['response_cache'] = ResponseCache(
+        maxsize=app.config.get('DASHBOARD_CACHE_MAX_ENTRIES', 256),
+        ttl=app.config.get('DASHBOARD_CACHE_TTL', 30)
+    )
+
+
+def bump_finance_version():
+    """
+    Tandai data keuangan berubah (payment, billing, atau mahasiswa)
+    Dipanggil setelah commit di setiap jalur tulis.
+    """
+    if not has_app_context():
+        return
+    cache = current_app.extensions.get('response_cache')
+    if cache is not None:
+        cache.bump_version()
+
+
+def cached_response(f):
+    """
+    Decorator untuk cache response GET berdasarkan endpoint, query args, dan
+    versi data keuangan. Response membawa ETag sehingga refresh berulang
+    dengan If-None-Match dijawab 304.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        cache = current_app.extensions.get('response_cache')
+        if cache is None or not current_app.config.get('DASHBOARD_CACHE_ENABLED', True):
+            return f(*args, **kwargs)
+        
+        key = (
+            request.endpoint,
+            tuple(sorted(kwargs.items())),
+            tuple(sorted(request.args.items(multi=True))),
+            cache.version
+        )
+        
+        entry = cache.get(key)
+        if entry is None:
+            response = current_app.make_response(f(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+            
+            body = response.get_data()
+            entry = (body, response.mimetype, hashlib.sha1(body).hexdigest())
+            cache.set(key, entry)
+        
+        body, mimetype, etag = entry
+        response = current_app.response_class(body, mimetype=mimetype)
+        response.set_etag(etag)
+        response.cache_control.no_cache = True
+        return response.make_conditional(request)
+    
+    return decorated_function
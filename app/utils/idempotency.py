@@ -0,0 +1,171 @@
+# app/utils/idempotency.py
+import hashlib
+from datetime import datetime, timedelta
+from functools import wraps
+from flask import current_app, jsonify, request
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
+from app.models import db
+from app.models.idempotency import IdempotencyKey
+from app.utils.cache import LRUCache
+from app.utils.logger import logger
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+
+class IdempotencyStore:
+    """Response tersimpan per (scope, key): LRU in-memory di depan tabel idempotency_keys"""
+    
+    def __init__(self, maxsize=10000, ttl=None):
+        self._cache = LRUCache(maxsize, ttl)
+    
+    def get(self, scope, key):
+        """
+        Cari response tersimpan
+        
+        Returns:
+            tuple (request_hash, status_code, body) atau None
+        """
+        entry = self._cache.get((scope, key))
+        if entry is not None:
+            return entry
+        
+        row = db.session.execute(
+            select(
+                IdempotencyKey.request_hash,
+                IdempotencyKey.status_code,
+                IdempotencyKey.response_body
+            ).where(IdempotencyKey.scope == scope, IdempotencyKey.key == key)
+        ).first()
+        if row is None:
+            return None
+        
+        entry = tuple(row)
+        self._cache.set((scope, key), entry)
+        return entry
+    
+    def save(self, scope, key, request_hash, status_code, body):
+        """Simpan response pertama untuk key; request paralel yang kalah diabaikan"""
+        db.session.add(IdempotencyKey(
+            scope=scope,
+            key=key,
+            request_hash=request_hash,
+            status_code=status_code,
+            response_body=body
+        ))
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            return
+        
+        self._cache.set((scope, key), (request_hash, status_code, body))
+    
+    def clear(self):
+        self._cache.clear()
+
+
+def init_idempotency(app):
+    """Pasang idempotency store ke Flask app"""
+    app.extensions['idempotency_store'] = IdempotencyStore(
+        maxsize=app.config.get('IDEMPOTENCY_CACHE_MAX_ENTRIES', 10000),
+        ttl=app.config.get('IDEMPOTENCY_CACHE_TTL')
+    )
+
+
+def purge_idempotency_keys(retention_days=None, chunk_size=1000, now=None, on_chunk=None):
+    """
+    Hapus response tersimpan yang lebih tua dari masa retensi, per chunk ID
+    
+    Args:
+        retention_days: Umur maksimal key (default: IDEMPOTENCY_RETENTION_DAYS)
+        chunk_size: Jumlah baris per DELETE/commit
+        now: Waktu acuan (default: datetime.utcnow())
+        on_chunk: Callback (last_id, scanned, deleted) sebelum commit per chunk
+    
+    Returns:
+        int: Jumlah key yang dihapus
+    """
+    if retention_days is None:
+        retention_days = current_app.config['IDEMPOTENCY_RETENTION_DAYS']
+    cutoff = (now or datetime.utcnow()) - timedelta(days=retention_days)
+    
+    deleted = 0
+    while True:
+        ids = db.session.execute(
+            select(IdempotencyKey.id)
+            .where(IdempotencyKey.created_at < cutoff)
+            .order_by(IdempotencyKey.id)
+            .limit(chunk_size)
+        ).scalars().all()
+        if not ids:
+            break
+        
+        db.session.execute(delete(IdempotencyKey).where(IdempotencyKey.id.in_(ids)))
+        if on_chunk is not None:
+            on_chunk(ids[-1], len(ids), len(ids))
+        db.session.commit()
+        deleted += len(ids)
+    
+    # Key yang dihapus tidak boleh tetap di-replay dari LRU proses ini
+    store = current_app.extensions.get('idempotency_store')
+    if deleted and store is not None:
+        store.clear()
+    
+    return deleted
+
+
+def idempotent(scope, key_from_payload=None):
+    """
+    Decorator untuk endpoint POST yang harus aman dikirim ulang
+    
+    Key diambil dari header Idempotency-Key, atau dari payload lewat
+    key_from_payload(payload) (misal transaction_id). Jika key sudah
+    pernah sukses (2xx), response asli dikembalikan tanpa menyentuh
+    billing; response gagal tidak disimpan sehingga boleh dicoba lagi.
+    
+    Args:
+        scope: Nama namespace key, biasanya nama endpoint
+        key_from_payload: Fungsi opsional payload -> key
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            store = current_app.extensions.get('idempotency_store')
+            if store is None:
+                return f(*args, **kwargs)
+            
+            key = request.headers.get(IDEMPOTENCY_HEADER)
+            from_header = bool(key)
+            if not key and key_from_payload is not None:
+                payload = request.get_json(silent=True)
+                key = key_from_payload(payload) if isinstance(payload, dict) else None
+            
+            if not key:
+                return f(*args, **kwargs)
+            
+            key = str(key)[:128]
+            request_hash = hashlib.sha256(request.get_data()).hexdigest()
+            
+            stored = store.get(scope, key)
+            if stored is not None:
+                stored_hash, status_code, body = stored
+                
+                # Header key yang dipakai ulang untuk request berbeda adalah kesalahan client
+                if from_header and stored_hash != request_hash:
+                    return jsonify({
+                        'success': False,
+                        'error': f'{IDEMPOTENCY_HEADER} already used for a different request'
+                    }), 422
+                
+                logger.info(f"Idempotent replay for {scope}:{key}")
+                response = current_app.response_class(body, status=status_code, mimetype='application/json')
+                response.headers['Idempotent-Replay'] = 'true'
+                return response
+            
+            response = current_app.make_response(f(*args, **kwargs))
+            if 200 <= response.status_code < 300:
+                store.save(scope, key, request_hash, response.status_code, response.get_data(as_text=True))
+            return response
+        
+        return decorated_function
+    return decorator
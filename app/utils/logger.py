@@ -1,33 +1,33 @@
-# app/utils/logger.py
-import logging
-import os
-from datetime import datetime
-
-# Create logs directory if it doesn't exist
-log_dir = 'logs'
-if not os.path.exists(log_dir):
-    os.makedirs(log_dir)
-
-# Configure logger
-logger = logging.getLogger('SPP_Management')
-logger.setLevel(logging.DEBUG)
-
-# File handler
-log_file = os.path.join(log_dir, f'app_{datetime.now().strftime("%Y%m%d")}.log')
-file_handler = logging.FileHandler(log_file)
-file_handler.setLevel(logging.DEBUG)
-
-# Console handler
-console_handler = logging.StreamHandler()
-console_handler.setLevel(logging.INFO)
-
-# Formatter
-formatter = logging.Formatter(
-    '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
-file_handler.setFormatter(formatter)
-console_handler.setFormatter(formatter)
-
-# Add handlers to logger
-logger.addHandler(file_handler)
-logger.addHandler(console_handler)
+# app/utils/logger.py
+import logging
+import os
+from datetime import datetime
+
+# Create logs directory if it doesn't exist
+log_dir = 'logs'
+if not os.path.exists(log_dir):
+    os.makedirs(log_dir)
+
+# Configure logger
+logger = logging.getLogger('SPP_Management')
+logger.setLevel(logging.DEBUG)
+
+# File handler
+log_file = os.path.join(log_dir, f'app_{datetime.now().strftime("%Y%m%d")}.log')
+file_handler = logging.FileHandler(log_file)
+file_handler.setLevel(logging.DEBUG)
+
+# Console handler
+console_handler = logging.StreamHandler()
+console_handler.setLevel(logging.INFO)
+
+# Formatter
+formatter = logging.Formatter(
+    '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+file_handler.setFormatter(formatter)
+console_handler.setFormatter(formatter)
+
+# Add handlers to logger
+logger.addHandler(file_handler)
+logger.addHandler(console_handler)
@@ -0,0 +1,250 @@
+# app/utils/metrics.py
+import bisect
+import hmac
+import threading
+import time
+from functools import wraps
+from flask import Response, current_app, g, request
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape_label(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    """
+    Dasar metric berlabel
+    
+    Nilai per kombinasi label disimpan di dict dengan satu lock per metric;
+    critical section hanya lookup + tambah, jadi aman dan murah untuk worker
+    thread (request Flask, scheduler, webhook worker).
+    """
+    
+    metric_type = None
+    
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+    
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f'{self.name} expects labels {self.labelnames}, got {tuple(labels)}')
+        return tuple(str(labels[name]) for name in self.labelnames)
+    
+    def _snapshot(self):
+        with self._lock:
+            return [(key, list(value) if isinstance(value, list) else value) for key, value in self._values.items()]
+    
+    def get(self, **labels):
+        """Nilai saat ini untuk satu kombinasi label (untuk test dan debugging)"""
+        with self._lock:
+            value = self._values.get(self._key(labels))
+            return list(value) if isinstance(value, list) else value
+    
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.metric_type}']
+        lines.extend(self._render_samples())
+        return lines
+    
+    def _render_samples(self):
+        for key, value in sorted(self._snapshot()):
+            yield f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}'
+
+
+class Counter(_Metric):
+    """Counter monoton naik"""
+    
+    metric_type = 'counter'
+    
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    """Nilai terakhir yang di-set"""
+    
+    metric_type = 'gauge'
+    
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    """Histogram dengan bucket tetap; state per label: [count per bucket..., count +Inf, sum]"""
+    
+    metric_type = 'histogram'
+    
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+    
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        # Bucket pertama dengan batas atas >= value (semantik le Prometheus)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            state[index] += 1
+            state[-1] += value
+    
+    def _render_samples(self):
+        for key, state in sorted(self._snapshot()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), state[:-1]):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield f'{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}'
+            yield f'{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(state[-1])}'
+            yield f'{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}'
+
+
+class MetricsRegistry:
+    """Kumpulan metric proses ini, dirender ke format teks Prometheus"""
+    
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+    
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+    
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames))
+    
+    def gauge(self, name, documentation, labelnames=()):
+        return self._register(Gauge(name, documentation, labelnames))
+    
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+    
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+HTTP_REQUEST_DURATION = registry.histogram(
+    'http_request_duration_seconds', 'Latency request HTTP per endpoint dan status code',
+    ('endpoint', 'method', 'status')
+)
+HTTP_REQUEST_DB_DURATION = registry.histogram(
+    'http_request_db_duration_seconds', 'Waktu database per request', ('endpoint',)
+)
+HTTP_REQUEST_QUERIES = registry.histogram(
+    'http_request_queries', 'Jumlah query SQL per request', ('endpoint',),
+    buckets=(1, 2, 3, 5, 10, 20, 50, 100)
+)
+SCHEDULER_JOB_DURATION = registry.histogram(
+    'scheduler_job_duration_seconds', 'Durasi job scheduler', ('job', 'status'),
+    buckets=(0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0, 1800.0)
+)
+SCHEDULER_JOB_ROWS = registry.counter(
+    'scheduler_job_rows_total', 'Baris yang diproses job scheduler', ('job',)
+)
+SCHEDULER_LEADER = registry.gauge(
+    'scheduler_leader', 'Bernilai 1 jika proses ini memegang lease leader scheduler'
+)
+SCHEDULER_JOB_LAST_SUCCESS = registry.gauge(
+    'scheduler_job_last_success_timestamp_seconds', 'Unix timestamp run sukses terakhir job scheduler', ('job',)
+)
+WEBHOOK_EVENTS = registry.counter(
+    'webhook_events_total', 'Notifikasi webhook per sumber dan hasil pemrosesan', ('source', 'outcome')
+)
+
+
+def track_job(job_id):
+    """
+    Decorator job scheduler: catat durasi, status, dan baris yang diproses
+    
+    Job mengembalikan jumlah baris yang diproses jika sukses, atau None jika
+    gagal (job menangani dan me-log error-nya sendiri).
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            status = 'error'
+            try:
+                rows = fn(*args, **kwargs)
+                status = 'failed' if rows is None else 'success'
+                return rows
+            finally:
+                SCHEDULER_JOB_DURATION.observe(time.perf_counter() - started, job=job_id, status=status)
+                if status == 'success':
+                    SCHEDULER_JOB_ROWS.inc(rows, job=job_id)
+                    SCHEDULER_JOB_LAST_SUCCESS.set(time.time(), job=job_id)
+        return wrapper
+    return decorator
+
+
+def init_metrics(app):
+    """
+    Pasang pengukuran latency per endpoint dan endpoint /metrics ke Flask app
+    
+    Endpoint dilabeli dengan nama endpoint Flask (blueprint.fungsi), bukan
+    path, agar jumlah seri tetap terbatas; request tanpa route -> "unmatched".
+    """
+    if not app.config.get('METRICS_ENABLED', True):
+        return
+    
+    @app.before_request
+    def _start_request_timer():
+        g.metrics_started = time.perf_counter()
+    
+    @app.after_request
+    def _observe_request(response):
+        started = g.pop('metrics_started', None)
+        if started is None:
+            return response
+        
+        endpoint = request.endpoint or 'unmatched'
+        HTTP_REQUEST_DURATION.observe(
+            time.perf_counter() - started, endpoint=endpoint, method=request.method, status=response.status_code
+        )
+        stats = g.get('query_stats')
+        if stats is not None:
+            HTTP_REQUEST_DB_DURATION.observe(stats.db_seconds, endpoint=endpoint)
+            HTTP_REQUEST_QUERIES.observe(stats.count, endpoint=endpoint)
+        return response
+    
+    def metrics_view():
+        token = current_app.config.get('METRICS_TOKEN')
+        if token and not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            return {'error': 'Unauthorized'}, 401
+        return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+    
+    app.add_url_rule(app.config.get('METRICS_PATH', '/metrics'), 'metrics', metrics_view, methods=['GET'])
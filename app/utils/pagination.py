@@ -0,0 +1,138 @@
+# app/utils/pagination.py
+import base64
+import json
+from collections import namedtuple
+from datetime import datetime
+from flask import request
+from sqlalchemy import tuple_
+from sqlalchemy.engine import Row
+from app.config import Config
+
+PageArgs = namedtuple('PageArgs', ['limit', 'cursor', 'offset', 'include_total'])
+
+
+class InvalidCursor(ValueError):
+    """Cursor tidak bisa di-decode atau tidak cocok dengan urutan endpoint"""
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {'dt': value.isoformat()}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict) and 'dt' in value:
+        return datetime.fromisoformat(value['dt'])
+    return value
+
+
+def encode_cursor(values):
+    """Nilai sort key baris terakhir -> cursor opaque (base64url JSON)"""
+    payload = json.dumps([_encode_value(value) for value in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, size):
+    """
+    Cursor opaque -> nilai sort key
+    
+    Args:
+        cursor: String dari next_cursor response sebelumnya
+        size: Jumlah kolom sort key endpoint
+    
+    Raises:
+        InvalidCursor: Cursor rusak atau berasal dari endpoint lain
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor('Invalid cursor') from e
+    
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidCursor('Invalid cursor')
+    try:
+        return [_decode_value(value) for value in values]
+    except ValueError as e:
+        raise InvalidCursor('Invalid cursor') from e
+
+
+def get_page_args(default_limit=20):
+    """
+    Baca parameter pagination dari query string
+    
+    - limit: jumlah baris (dibatasi PAGINATION_MAX_LIMIT)
+    - cursor: next_cursor dari halaman sebelumnya
+    - offset: pagination lama, tetap diterima jika tanpa cursor
+    - include_total: true/false; default hanya dihitung di halaman pertama
+    
+    Returns:
+        PageArgs
+    """
+    limit = request.args.get('limit', default_limit, type=int)
+    limit = max(1, min(limit, Config.PAGINATION_MAX_LIMIT))
+    cursor = request.args.get('cursor') or None
+    offset = None if cursor else request.args.get('offset', type=int)
+    
+    include_total = request.args.get('include_total')
+    if include_total is None:
+        include_total = cursor is None
+    else:
+        include_total = include_total.lower() == 'true'
+    
+    return PageArgs(limit, cursor, max(offset, 0) if offset else None, include_total)
+
+
+def _row_key(row, order_by):
+    if isinstance(row, Row):
+        return [row._mapping[column] for column in order_by]
+    return [getattr(row, column.key) for column in order_by]
+
+
+def paginate_keyset(query, order_by, page_args, descending=False, count_query=None):
+    """
+    Keyset pagination: WHERE (k1, k2) > (cursor) ORDER BY k1, k2 LIMIT n+1
+    
+    Halaman dalam sama murahnya dengan halaman pertama karena database
+    langsung seek ke posisi cursor lewat index, bukan membuang OFFSET baris.
+    Kolom terakhir order_by harus unik (biasanya id) agar urutan stabil.
+    
+    Args:
+        query: Query yang sudah difilter, tanpa order_by/limit
+        order_by: List kolom sort key, misal [Billing.created_at, Billing.id]
+        page_args: Hasil get_page_args()
+        descending: True untuk urutan terbaru dulu
+        count_query: Query untuk total (default: query.order_by(None))
+    
+    Returns:
+        tuple: (rows, pagination dict {limit, next_cursor, has_more[, total, offset]})
+    
+    Raises:
+        InvalidCursor: Cursor tidak valid
+    """
+    page_query = query
+    if page_args.cursor:
+        values = decode_cursor(page_args.cursor, len(order_by))
+        key = tuple_(*order_by)
+        page_query = page_query.filter(key < tuple_(*values) if descending else key > tuple_(*values))
+    
+    page_query = page_query.order_by(*[column.desc() if descending else column.asc() for column in order_by])
+    if page_args.offset:
+        page_query = page_query.offset(page_args.offset)
+    
+    rows = page_query.limit(page_args.limit + 1).all()
+    has_more = len(rows) > page_args.limit
+    rows = rows[:page_args.limit]
+    
+    pagination = {
+        'limit': page_args.limit,
+        'next_cursor': encode_cursor(_row_key(rows[-1], order_by)) if has_more else None,
+        'has_more': has_more
+    }
+    if page_args.offset is not None:
+        pagination['offset'] = page_args.offset
+    if page_args.include_total:
+        pagination['total'] = (count_query if count_query is not None else query.order_by(None)).count()
+    
+    return rows, pagination
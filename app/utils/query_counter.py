@@ -0,0 +1,118 @@
+# app/utils/query_counter.py
+import time
+from collections import Counter
+from contextlib import contextmanager
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.models.base import db
+from app.utils.logger import logger
+
+
+class RequestQueryStats:
+    """Statistik query SQL satu request: jumlah, waktu database, dan bentuk statement"""
+    
+    def __init__(self):
+        self.count = 0
+        self.db_seconds = 0.0
+        self.started = time.perf_counter()
+        self.statements = Counter()
+    
+    def record(self, statement, seconds):
+        self.count += 1
+        self.db_seconds += seconds
+        self.statements[statement] += 1
+    
+    def repeated(self, threshold):
+        """Statement yang dijalankan >= threshold kali (kandidat N+1)"""
+        return [(statement, count) for statement, count in self.statements.most_common() if count >= threshold]
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and has_request_context() and 'query_stats' in g:
+        context._query_counter_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, '_query_counter_started', None)
+    if started is not None and has_request_context() and 'query_stats' in g:
+        g.query_stats.record(statement, time.perf_counter() - started)
+
+
+def init_query_counter(app):
+    """
+    Pasang penghitung query per request ke Flask app
+    
+    Setiap response mendapat header X-Query-Count dan Server-Timing
+    (waktu database dan total). Statement identik yang berulang lebih dari
+    QUERY_COUNTER_REPEAT_THRESHOLD kali dalam satu request (pola N+1, misal
+    lazy load relasi di dalam loop) dicatat sebagai warning.
+    """
+    if not app.config.get('QUERY_COUNTER_ENABLED', True):
+        return
+    
+    threshold = app.config.get('QUERY_COUNTER_REPEAT_THRESHOLD', 5)
+    
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+    
+    @app.before_request
+    def _start_query_stats():
+        g.query_stats = RequestQueryStats()
+    
+    @app.after_request
+    def _add_query_headers(response):
+        stats = g.get('query_stats')
+        if stats is None:
+            return response
+        
+        total_ms = (time.perf_counter() - stats.started) * 1000
+        response.headers['X-Query-Count'] = str(stats.count)
+        response.headers.add(
+            'Server-Timing',
+            f'db;dur={stats.db_seconds * 1000:.2f};desc="{stats.count} queries", app;dur={total_ms:.2f}'
+        )
+        
+        for statement, count in stats.repeated(threshold):
+            logger.warning(
+                f"Possible N+1 on {request.method} {request.path}: statement executed {count}x: "
+                f"{' '.join(statement.split())[:200]}"
+            )
+        return response
+
+
+@contextmanager
+def assert_max_queries(max_queries, engine=Engine):
+    """
+    Test helper: gagal jika blok with menjalankan lebih dari max_queries statement
+    
+    Contoh:
+        with assert_max_queries(2) as statements:
+            response = self.client.get('/api/dashboard/students-status')
+    
+    Args:
+        max_queries: Batas jumlah statement SQL
+        engine: Engine yang diamati (default semua engine)
+    
+    Yields:
+        list: Statement yang tereksekusi, untuk assertion tambahan
+    """
+    statements = []
+    
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    
+    event.listen(engine, 'before_cursor_execute', _record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', _record)
+    
+    if len(statements) > max_queries:
+        repeated = Counter(statements).most_common(3)
+        details = '\n'.join(f"  {count}x {' '.join(statement.split())[:200]}" for statement, count in repeated)
+        raise AssertionError(
+            f"Expected at most {max_queries} queries, {len(statements)} executed. Most repeated:\n{details}"
+        )
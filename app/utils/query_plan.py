@@ -0,0 +1,172 @@
+# app/utils/query_plan.py
+import re
+from contextlib import contextmanager
+from sqlalchemy import event
+from app.config import Config
+
+EXPLAINABLE_PREFIXES = ('SELECT', 'WITH', 'UPDATE', 'DELETE')
+
+# "SCAN billings", "SCAN b", "SCAN students_1" - tanpa USING INDEX berarti baca seluruh tabel
+FULL_SCAN_PATTERN = re.compile(r'^SCAN (?P<name>\w+)$')
+ALIAS_PATTERN = re.compile(r'\b(?:FROM|JOIN|UPDATE)\s+"?(?P<table>\w+)"?\s+(?:AS\s+)?"?(?P<alias>\w+)"?', re.IGNORECASE)
+TEMP_SORT_PATTERN = re.compile(r'^USE TEMP B-TREE FOR (ORDER BY|GROUP BY|DISTINCT)')
+LIMIT_PATTERN = re.compile(r'\bORDER BY\b.*\bLIMIT\b', re.IGNORECASE | re.DOTALL)
+
+
+@contextmanager
+def record_queries(engine):
+    """
+    Rekam semua statement SQL yang dijalankan engine selama blok with
+    
+    Yields:
+        dict: statement -> {'parameters': contoh parameter pertama, 'count': jumlah eksekusi}
+    """
+    statements = {}
+    
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        entry = statements.setdefault(statement, {'parameters': parameters, 'count': 0, 'executemany': executemany})
+        entry['count'] += 1
+    
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', _before_cursor_execute)
+
+
+def _resolve_table(statement, name):
+    for match in ALIAS_PATTERN.finditer(statement):
+        if match.group('alias') == name:
+            return match.group('table')
+    return name
+
+
+def explain_statement(connection, statement, parameters):
+    """
+    Jalankan EXPLAIN QUERY PLAN untuk satu statement SQLite
+    
+    Scan urut rowid/index untuk ORDER BY ... LIMIT tanpa temp B-tree
+    (misal halaman pertama daftar mahasiswa) berhenti setelah LIMIT baris,
+    jadi dicatat sebagai limited_scans, bukan full_scans.
+    
+    Returns:
+        dict: {plan: [detail], full_scans: [tabel], limited_scans: [tabel], temp_sorts: [detail]}
+    """
+    rows = connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters).all()
+    plan = [row[-1] for row in rows]
+    temp_sorts = [detail for detail in plan if TEMP_SORT_PATTERN.match(detail)]
+    limited = not temp_sorts and bool(LIMIT_PATTERN.search(statement))
+    
+    full_scans, limited_scans = [], []
+    for detail in plan:
+        match = FULL_SCAN_PATTERN.match(detail)
+        if match:
+            table = _resolve_table(statement, match.group('name'))
+            (limited_scans if limited else full_scans).append(table)
+    
+    return {
+        'plan': plan,
+        'full_scans': full_scans,
+        'limited_scans': limited_scans,
+        'temp_sorts': temp_sorts
+    }
+
+
+def analyze_queries(engine, statements, allowed_scan_tables=None):
+    """
+    EXPLAIN setiap statement terekam dan tandai full scan
+    
+    Args:
+        engine: SQLAlchemy engine (SQLite)
+        statements: Hasil record_queries()
+        allowed_scan_tables: Tabel kecil yang boleh di-scan penuh
+            (default Config.QUERY_PLAN_SCAN_ALLOWED_TABLES)
+    
+    Returns:
+        list: [{statement, count, plan, full_scans, temp_sorts, flagged}], yang flagged dulu
+    """
+    allowed = set(Config.QUERY_PLAN_SCAN_ALLOWED_TABLES if allowed_scan_tables is None else allowed_scan_tables)
+    results = []
+    
+    with engine.connect() as connection:
+        for statement, entry in statements.items():
+            if entry['executemany'] or not statement.lstrip().upper().startswith(EXPLAINABLE_PREFIXES):
+                continue
+            
+            explained = explain_statement(connection, statement, entry['parameters'])
+            explained['full_scans'] = [table for table in explained['full_scans'] if table not in allowed]
+            results.append({
+                'statement': statement,
+                'count': entry['count'],
+                **explained,
+                'flagged': bool(explained['full_scans'])
+            })
+        connection.rollback()
+    
+    results.sort(key=lambda result: (not result['flagged'], -result['count']))
+    return results
+
+
+def route_samples():
+    """
+    Nilai contoh dari database untuk argumen URL dan query string route
+    
+    Dipanggil sebelum record_queries agar query pengambil contoh tidak
+    ikut dianalisis.
+    
+    Returns:
+        tuple: ({nama argumen: id}, {parameter query string: nilai})
+    """
+    from app.models.base import db
+    from app.models.student import Student, ProgramStudi
+    from app.models.billing import Billing, Semester
+    from app.models.payment import Payment
+    
+    samples = {
+        'student_id': db.session.query(Student.id).order_by(Student.id.desc()).limit(1).scalar(),
+        'billing_id': db.session.query(Billing.id).order_by(Billing.id.desc()).limit(1).scalar(),
+        'payment_id': db.session.query(Payment.id).order_by(Payment.id.desc()).limit(1).scalar(),
+        'semester_id': db.session.query(Semester.id).order_by(Semester.id.desc()).limit(1).scalar(),
+        'program_id': db.session.query(ProgramStudi.id).order_by(ProgramStudi.id).limit(1).scalar(),
+    }
+    semester = db.session.query(Billing.semester).order_by(Billing.id.desc()).limit(1).scalar()
+    nim = db.session.query(Student.nim).order_by(Student.id.desc()).limit(1).scalar()
+    db.session.rollback()
+    return samples, {'semester': semester or '', 'q': (nim or 'mahasiswa')[:4]}
+
+
+def exercise_routes(app, samples):
+    """
+    Panggil semua route GET aplikasi lewat test client (read-only)
+    
+    Argumen URL diisi id contoh dari database; route yang argumennya tidak
+    bisa diisi dilewati.
+    
+    Args:
+        app: Flask app
+        samples: Hasil route_samples()
+    
+    Returns:
+        dict: {visited: [(url, status_code)], skipped: [rule]}
+    """
+    samples, query_string = samples
+    visited, skipped = [], []
+    client = app.test_client()
+    
+    for rule in sorted(app.url_map.iter_rules(), key=lambda rule: rule.rule):
+        if 'GET' not in rule.methods or rule.endpoint == 'static':
+            continue
+        values = {argument: samples.get(argument) for argument in rule.arguments}
+        if any(value is None for value in values.values()):
+            skipped.append(rule.rule)
+            continue
+        
+        url = rule.rule
+        for argument, value in values.items():
+            url = re.sub(rf'<(?:\w+:)?{argument}>', str(value), url)
+        response = client.get(url, query_string=query_string)
+        # Export streaming baru menjalankan query saat body dibaca
+        response.get_data()
+        visited.append((url, response.status_code))
+    
+    return {'visited': visited, 'skipped': skipped}
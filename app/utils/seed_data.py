@@ -0,0 +1,316 @@
+# app/utils/seed_data.py
+import random
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from sqlalchemy import column, func, table
+from app.config import Config
+from app.models import db
+from app.models.student import Student, ProgramStudi
+from app.models.billing import Billing, Semester
+from app.models.payment import Payment
+from app.models.payment_method import PaymentMethod
+from app.models.rollup import rebuild_rollups
+from app.utils.cache import bump_finance_version
+
+PROGRAM_CODES = {
+    'Teknik Informatika': 'TI',
+    'Ekonomi': 'EK',
+    'Hukum': 'HK',
+    'Teknik Sipil': 'TS',
+}
+
+PAYMENT_METHODS = [
+    ('Virtual Account BCA', 'virtual_account', 'BCA'),
+    ('Virtual Account Mandiri', 'virtual_account', 'Mandiri'),
+    ('Transfer Bank BNI', 'bank_transfer', 'BNI'),
+    ('QRIS', 'e_wallet', 'QRIS'),
+]
+
+FIRST_NAMES = [
+    'Ahmad', 'Budi', 'Citra', 'Dewi', 'Eko', 'Fajar', 'Gita', 'Hendra', 'Indah', 'Joko',
+    'Kartika', 'Lestari', 'Muhammad', 'Nur', 'Putri', 'Rizky', 'Sari', 'Taufik', 'Wahyu', 'Yusuf',
+]
+LAST_NAMES = [
+    'Pratama', 'Saputra', 'Wijaya', 'Hidayat', 'Nugroho', 'Santoso', 'Kurniawan', 'Setiawan',
+    'Rahmawati', 'Lubis', 'Siregar', 'Hasibuan', 'Simanjuntak', 'Putra', 'Utami', 'Firmansyah',
+]
+
+SEMESTER_LENGTH_DAYS = 182
+BILLING_DUE_DAYS = 14
+INSERT_CHUNK_SIZE = 5000
+
+
+def _semester_names(count, now):
+    """Nama semester dari yang terlama sampai yang berjalan, misal 2025/2026-Genap"""
+    year, term = (now.year, 'Ganjil') if now.month >= 8 else (now.year - 1, 'Genap')
+    names = []
+    for _ in range(count):
+        names.append(f'{year}/{year + 1}-{term}')
+        year, term = (year, 'Ganjil') if term == 'Genap' else (year - 1, 'Genap')
+    return names[::-1]
+
+
+def _get_or_create_programs():
+    programs = {ps.name: ps for ps in ProgramStudi.query.all()}
+    for name, spp_amount in Config.PROGRAM_STUDI_SPP.items():
+        if name not in programs:
+            programs[name] = ProgramStudi(
+                name=name, code=PROGRAM_CODES.get(name, name[:3].upper()), spp_amount=spp_amount
+            )
+            db.session.add(programs[name])
+    db.session.flush()
+    return sorted(((ps.id, ps.spp_amount) for ps in programs.values()))
+
+
+def _get_or_create_payment_methods():
+    methods = {pm.name: pm for pm in PaymentMethod.query.all()}
+    for name, method_type, provider in PAYMENT_METHODS:
+        if name not in methods:
+            methods[name] = PaymentMethod(name=name, method_type=method_type, provider=provider)
+            db.session.add(methods[name])
+    db.session.flush()
+    return [(methods[name].id, provider) for name, _, provider in PAYMENT_METHODS]
+
+
+def _get_or_create_semesters(count, now):
+    """Semester berurutan; yang terbaru aktif dan sudah berjalan 30 hari"""
+    names = _semester_names(count, now)
+    existing = {semester.name: semester for semester in Semester.query.filter(Semester.name.in_(names))}
+    if names[-1] not in existing:
+        Semester.query.filter_by(is_active=True).update({'is_active': False})
+    
+    semesters = []
+    newest_start = now - timedelta(days=30)
+    for age, name in enumerate(reversed(names)):
+        semester = existing.get(name)
+        if semester is None:
+            start = newest_start - timedelta(days=SEMESTER_LENGTH_DAYS * age)
+            semester = Semester(
+                name=name,
+                start_date=start,
+                end_date=start + timedelta(days=SEMESTER_LENGTH_DAYS - 62),
+                billing_generation_date=start,
+                is_active=(age == 0)
+            )
+            db.session.add(semester)
+        semesters.append(semester)
+    db.session.flush()
+    return semesters[::-1]
+
+
+@contextmanager
+def _deferred_indexes(tables):
+    """
+    Lepas index tabel yang masih kosong selama bulk insert lalu buat ulang
+    
+    Membangun index sekali dari data yang sudah ada lebih murah daripada
+    memeliharanya baris per baris; tabel yang sudah berisi tidak disentuh.
+    """
+    connection = db.session.connection()
+    dropped = []
+    for table in tables:
+        if db.session.execute(table.select().limit(1)).first() is None:
+            for index in table.indexes:
+                index.drop(connection)
+                dropped.append(index)
+    
+    failed = False
+    try:
+        yield
+    except BaseException:
+        # Insert yang gagal di-rollback, tetapi DROP INDEX tidak (pysqlite
+        # menjalankan DDL di luar transaksi DML): index tetap dibuat ulang
+        db.session.rollback()
+        failed = True
+        raise
+    finally:
+        connection = db.session.connection()
+        for index in dropped:
+            index.create(connection, checkfirst=True)
+        if failed:
+            db.session.commit()
+
+
+def _timestamp(value):
+    """Format penyimpanan DateTime SQLAlchemy untuk SQLite"""
+    return value.strftime('%Y-%m-%d %H:%M:%S.%f') if value else None
+
+
+def _insert_chunked(model_table, rows):
+    """
+    Bulk insert per chunk lewat tabel tanpa tipe kolom
+    
+    Nilai sudah dalam bentuk siap simpan (timestamp via _timestamp), sehingga
+    bind processor DateTime per nilai - bagian terbesar biaya insert ORM/Core
+    untuk ratusan ribu baris - dilewati.
+    """
+    if not rows:
+        return
+    target = table(model_table.name, *(column(name) for name in rows[0]))
+    for start in range(0, len(rows), INSERT_CHUNK_SIZE):
+        db.session.execute(target.insert(), rows[start:start + INSERT_CHUNK_SIZE])
+
+
+def seed_synthetic_data(num_students, num_semesters=4, seed=42, now=None):
+    """
+    Isi database dengan data sintetis berskala produksi
+    
+    Program studi dan metode pembayaran dibuat jika belum ada. Mahasiswa
+    mendapat billing di setiap semester dengan campuran status (paid,
+    partial, unpaid, overdue) dan riwayat pembayaran (cicilan confirmed,
+    percobaan failed, pending yang menunggu webhook). Insert dilakukan via
+    Core executemany per chunk dengan ID eksplisit, lalu outstanding mahasiswa
+    dan tabel rekap dibangun ulang sekali di akhir.
+    
+    Args:
+        num_students: Jumlah mahasiswa baru
+        num_semesters: Jumlah semester (yang terbaru menjadi semester aktif)
+        seed: Seed random agar dataset bisa direproduksi
+        now: Waktu acuan (default: datetime.utcnow())
+    
+    Returns:
+        dict: {students, semesters, billings, payments, billing_status: {status: count}}
+    """
+    rng = random.Random(seed)
+    now = now or datetime.utcnow()
+    
+    programs = _get_or_create_programs()
+    methods = _get_or_create_payment_methods()
+    semesters = _get_or_create_semesters(num_semesters, now)
+    
+    next_student_id = (db.session.query(func.max(Student.id)).scalar() or 0) + 1
+    next_billing_id = (db.session.query(func.max(Billing.id)).scalar() or 0) + 1
+    next_payment_id = (db.session.query(func.max(Payment.id)).scalar() or 0) + 1
+    
+    now_ts = _timestamp(now)
+    registration_ts = _timestamp(semesters[0].start_date)
+    semester_dates = [
+        (semester.name, semester.start_date, _timestamp(semester.start_date),
+         _timestamp(semester.start_date + timedelta(days=BILLING_DUE_DAYS)))
+        for semester in reversed(semesters)
+    ]
+    
+    students, billings, payments = [], [], []
+    status_counts = {status: 0 for status in Billing.VALID_STATUSES}
+    
+    for student_id in range(next_student_id, next_student_id + num_students):
+        program_studi_id, spp_amount = programs[student_id % len(programs)]
+        roll = rng.random()
+        status = 'graduated' if roll < 0.08 else 'inactive' if roll < 0.12 else 'active'
+        name = f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}'
+        students.append({
+            'id': student_id,
+            'nim': f'9{student_id:09d}',
+            'name': name,
+            'email': f'mahasiswa{student_id}@seed.local',
+            'phone': f'08{rng.randrange(10 ** 9, 10 ** 10)}',
+            'program_studi_id': program_studi_id,
+            'status': status,
+            'outstanding_amount': 0,
+            'krs_blocked': False,
+            'registration_date': registration_ts,
+            'created_at': registration_ts,
+            'updated_at': registration_ts
+        })
+        
+        for age, (semester_name, start_date, start_ts, due_ts) in enumerate(semester_dates):
+            current = age == 0
+            # Mahasiswa non-aktif tidak ditagih di semester berjalan
+            if current and status != 'active':
+                continue
+            
+            roll = rng.random()
+            if current:
+                paid_fraction = 1 if roll < 0.35 else rng.choice((0.3, 0.5, 0.7)) if roll < 0.6 else 0
+            else:
+                paid_fraction = 1 if roll < 0.88 else rng.choice((0.3, 0.5)) if roll < 0.93 else 0
+            
+            billing_id = next_billing_id
+            next_billing_id += 1
+            paid_amount = int(spp_amount * paid_fraction)
+            remaining_amount = spp_amount - paid_amount
+            
+            installments = []
+            if paid_amount:
+                if paid_fraction == 1 and rng.random() < 0.3:
+                    installments = [paid_amount // 2, paid_amount - paid_amount // 2]
+                else:
+                    installments = [paid_amount]
+            
+            last_payment_date = None
+            for number, amount in enumerate(installments):
+                last_payment_date = _timestamp(start_date + timedelta(
+                    days=rng.randrange(0, BILLING_DUE_DAYS + 30 * number + 1), seconds=rng.randrange(86400)
+                ))
+                payments.append((billing_id, student_id, amount, Payment.STATUS_CONFIRMED, last_payment_date))
+            if rng.random() < 0.05:
+                failed_date = _timestamp(start_date + timedelta(days=rng.randrange(0, BILLING_DUE_DAYS)))
+                payments.append((billing_id, student_id, spp_amount, Payment.STATUS_FAILED, failed_date))
+            if current and remaining_amount and rng.random() < 0.2:
+                payments.append((billing_id, student_id, remaining_amount, Payment.STATUS_PENDING, None))
+            
+            # Semester lampau: denda sudah dihitung job; semester berjalan: job belum jalan sejak due date
+            if not remaining_amount:
+                billing_status, penalty = Billing.STATUS_PAID, 0
+            elif current:
+                billing_status = Billing.STATUS_PARTIAL if paid_amount else Billing.STATUS_UNPAID
+                penalty = 0
+            else:
+                billing_status, penalty = Billing.STATUS_OVERDUE, Config.OVERDUE_MAX_PENALTY
+            status_counts[billing_status] += 1
+            
+            billings.append({
+                'id': billing_id,
+                'student_id': student_id,
+                'semester': semester_name,
+                'total_amount': spp_amount,
+                'paid_amount': paid_amount,
+                'remaining_amount': remaining_amount,
+                'penalty': penalty,
+                'status': billing_status,
+                'due_date': due_ts,
+                'last_payment_date': last_payment_date,
+                'version': 1 + len(installments),
+                'created_at': start_ts,
+                'updated_at': last_payment_date or start_ts
+            })
+    
+    payment_rows = []
+    for billing_id, student_id, amount, payment_status, payment_date in payments:
+        payment_id = next_payment_id
+        next_payment_id += 1
+        method_id, provider = methods[payment_id % len(methods)]
+        payment_rows.append({
+            'id': payment_id,
+            'student_id': student_id,
+            'billing_id': billing_id,
+            'payment_method_id': method_id,
+            'transaction_id': f'SEED-TRX-{payment_id}',
+            'reference_code': f'SEED-REF-{payment_id}',
+            'amount': amount,
+            'status': payment_status,
+            'gateway_name': provider,
+            'payment_date': payment_date,
+            'confirmation_date': payment_date if payment_status == Payment.STATUS_CONFIRMED else None,
+            'created_at': payment_date or now_ts,
+            'updated_at': payment_date or now_ts
+        })
+    
+    with _deferred_indexes([Student.__table__, Billing.__table__, Payment.__table__]):
+        _insert_chunked(Student.__table__, students)
+        _insert_chunked(Billing.__table__, billings)
+        _insert_chunked(Payment.__table__, payment_rows)
+    
+    # Core insert tidak memicu mapper event, sinkronkan saldo dan rekap sekali di akhir
+    Student.refresh_outstanding()
+    rebuild_rollups()
+    db.session.commit()
+    bump_finance_version()
+    
+    return {
+        'students': len(students),
+        'semesters': [semester.name for semester in semesters],
+        'billings': len(billings),
+        'payments': len(payment_rows),
+        'billing_status': status_counts
+    }
@@ -0,0 +1,76 @@
+# app/utils/signature.py
+import hashlib
+import hmac
+from flask import current_app
+
+class WebhookSignatureVerifier:
+    """
+    Verifikasi HMAC-SHA256 atas raw body request webhook
+    
+    Key setiap secret di-encode dan di-hash sekali saat startup; per request
+    hanya template HMAC yang di-copy lalu di-update dengan body. Beberapa
+    secret boleh aktif bersamaan untuk rotasi; secret pertama dipakai sign().
+    """
+    
+    SIGNATURE_PREFIX = 'sha256='
+    
+    def __init__(self, secrets, digestmod=hashlib.sha256):
+        if isinstance(secrets, str):
+            secrets = [secrets]
+        self._templates = tuple(
+            hmac.new(secret.encode(), digestmod=digestmod)
+            for secret in secrets if secret
+        )
+        if not self._templates:
+            raise ValueError('At least one webhook secret is required')
+    
+    def sign(self, body):
+        """Signature hex untuk body dengan secret utama"""
+        mac = self._templates[0].copy()
+        mac.update(body)
+        return mac.hexdigest()
+    
+    def verify(self, body, signature):
+        """
+        Cek signature (hex, boleh berprefix "sha256=") terhadap raw body
+        
+        Semua secret selalu dibandingkan dengan compare_digest, sehingga
+        waktu verifikasi tidak bergantung pada secret mana yang cocok.
+        
+        Args:
+            body: bytes persis seperti yang diterima (request.get_data())
+            signature: Nilai header signature
+        
+        Returns:
+            bool: True if signature is valid
+        """
+        if not signature:
+            return False
+        
+        signature = signature.strip()
+        if signature.lower().startswith(self.SIGNATURE_PREFIX):
+            signature = signature[len(self.SIGNATURE_PREFIX):]
+        
+        try:
+            provided = bytes.fromhex(signature)
+        except ValueError:
+            return False
+        
+        valid = False
+        for template in self._templates:
+            mac = template.copy()
+            mac.update(body)
+            valid |= hmac.compare_digest(mac.digest(), provided)
+        return valid
+
+
+def init_webhook_signing(app):
+    """Siapkan verifier webhook dari PAYMENT_GATEWAY_SECRETS saat startup"""
+    app.extensions['webhook_signature_verifier'] = WebhookSignatureVerifier(
+        app.config['PAYMENT_GATEWAY_SECRETS']
+    )
+
+
+def get_webhook_verifier():
+    """Verifier milik app aktif"""
+    return current_app.extensions['webhook_signature_verifier']
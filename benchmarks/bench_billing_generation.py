@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Benchmark generate billing per semester: mode loop (ORM per mahasiswa)
+vs mode bulk (anti-join + chunked executemany)
+
+Jalankan dari root project:
+    python benchmarks/bench_billing_generation.py --sizes 10000,50000,100000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app, db
+from app.models.student import Student, ProgramStudi
+from app.models.billing import Semester
+from app.services.billing_service import BillingService
+
+PROGRAM_STUDI = [
+    ('Teknik Informatika', 'TI', 5000000),
+    ('Ekonomi', 'EK', 4000000),
+    ('Hukum', 'HK', 3500000),
+    ('Teknik Sipil', 'TS', 5500000),
+]
+
+
+def seed(num_students):
+    """Isi database dengan program studi, mahasiswa aktif, dan satu semester"""
+    now = datetime.utcnow()
+    db.session.execute(ProgramStudi.__table__.insert(), [
+        {'name': name, 'code': code, 'spp_amount': spp, 'created_at': now, 'updated_at': now}
+        for name, code, spp in PROGRAM_STUDI
+    ])
+    program_ids = [ps.id for ps in ProgramStudi.query.order_by(ProgramStudi.id).all()]
+    
+    students = [
+        {
+            'nim': f'B{i:09d}',
+            'name': f'Mahasiswa {i}',
+            'email': f'mahasiswa{i}@bench.local',
+            'program_studi_id': program_ids[i % len(program_ids)],
+            'status': 'active',
+            'registration_date': now,
+            'created_at': now,
+            'updated_at': now
+        }
+        for i in range(num_students)
+    ]
+    for start in range(0, len(students), 5000):
+        db.session.execute(Student.__table__.insert(), students[start:start + 5000])
+    
+    semester = Semester(
+        name='2026/2027-Ganjil',
+        start_date=now,
+        end_date=now + timedelta(days=120),
+        is_active=True
+    )
+    db.session.add(semester)
+    db.session.commit()
+    return semester.id
+
+
+def run_once(num_students, bulk):
+    """Jalankan satu skenario di database file sementara, return detik"""
+    fd, db_path = tempfile.mkstemp(suffix='.db', prefix='bench_billing_')
+    os.close(fd)
+    try:
+        app = create_app('testing', config_overrides={
+            'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_path}'
+        })
+        with app.app_context():
+            db.create_all()
+            semester_id = seed(num_students)
+            db.session.remove()
+            
+            started = time.perf_counter()
+            result = BillingService().generate_billing_for_semester(semester_id, bulk=bulk)
+            elapsed = time.perf_counter() - started
+            
+            if not result['success'] or result['created_count'] != num_students:
+                raise RuntimeError(f"Hasil tidak sesuai: {result}")
+            
+            db.session.remove()
+            db.engine.dispose()
+        return elapsed
+    finally:
+        os.remove(db_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='10000,50000,100000',
+                        help='Jumlah mahasiswa, dipisah koma (default: 10000,50000,100000)')
+    parser.add_argument('--modes', default='loop,bulk', help='Mode yang diukur: loop,bulk')
+    args = parser.parse_args()
+    
+    sizes = [int(s) for s in args.sizes.split(',') if s]
+    modes = [m for m in args.modes.split(',') if m]
+    
+    print(f"{'students':>10} | {'mode':>5} | {'seconds':>9} | {'rows/s':>10}")
+    print('-' * 44)
+    for size in sizes:
+        for mode in modes:
+            elapsed = run_once(size, bulk=(mode == 'bulk'))
+            print(f"{size:>10} | {mode:>5} | {elapsed:>9.3f} | {size / elapsed:>10.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Benchmark rekonsiliasi rekening koran CSV: satu bulan mutasi dengan
+campuran reference code, nomor VA, nominal+tanggal, dan baris tak dikenal
+
+Jalankan dari root project:
+    python benchmarks/bench_reconciliation.py --lines 10000,30000
+"""
+
+import argparse
+import csv
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app, db
+from app.config import Config
+from app.models.billing import Billing
+from app.models.payment import Payment
+from app.models.payment_method import PaymentMethod
+from app.services.billing_service import BillingService
+from app.services.reconciliation_service import ReconciliationService
+from bench_billing_generation import seed
+
+
+def seed_pending_payments(payment_method_id, count, day):
+    """Buat payment pending untuk billing pertama sebanyak count, return (reference, amount)"""
+    billings = Billing.query.order_by(Billing.id).limit(count).all()
+    rows = []
+    for i, billing in enumerate(billings):
+        rows.append({
+            'student_id': billing.student_id,
+            'billing_id': billing.id,
+            'payment_method_id': payment_method_id,
+            'transaction_id': f'PENDING-{i}',
+            # Format sama dengan Payment.generate_reference_code, dibuat deterministik
+            'reference_code': f"PAY{day:%Y%m%d}000000{i:06X}",
+            'amount': billing.total_amount - i,
+            'status': Payment.STATUS_PENDING,
+            'gateway_name': 'Midtrans',
+            'payment_date': day,
+            'created_at': day,
+            'updated_at': day
+        })
+    db.session.execute(Payment.__table__.insert(), rows)
+    db.session.commit()
+    return rows
+
+
+def write_statement(path, num_lines, pending, nims, day):
+    """Tulis rekening koran CSV: 40% reference, 40% VA, 10% nominal+tanggal, 10% tak dikenal"""
+    rng = random.Random(42)
+    with open(path, 'w', newline='') as output:
+        writer = csv.writer(output)
+        writer.writerow(['Tanggal', 'Keterangan', 'Kredit', 'Reference', 'VA'])
+        by_reference, by_amount = pending[:len(pending) // 2], pending[len(pending) // 2:]
+        for i in range(num_lines):
+            bucket = i % 10
+            date = (day + timedelta(days=rng.randrange(28))).strftime('%d/%m/%Y')
+            if bucket < 4 and by_reference:
+                payment = by_reference.pop()
+                writer.writerow([date, f"TRF SPP {payment['reference_code']}", f"{payment['amount']:,}".replace(',', '.') + ',00', '', ''])
+            elif bucket < 8 and nims:
+                writer.writerow([date, 'SETORAN VA', '2.500.000,00', '', f'{Config.BANK_VA_PREFIX}{nims.pop()}'])
+            elif bucket < 9 and by_amount:
+                payment = by_amount.pop()
+                writer.writerow([payment['payment_date'].strftime('%d/%m/%Y'), 'TRANSFER MASUK', str(payment['amount']), '', ''])
+            else:
+                writer.writerow([date, f'TRANSFER LAIN {i}', str(rng.randrange(10000, 900000)), '', ''])
+
+
+def run_once(num_lines):
+    """Jalankan satu skenario di database file sementara, return (detik, laporan)"""
+    fd, db_path = tempfile.mkstemp(suffix='.db', prefix='bench_reconcile_')
+    os.close(fd)
+    csv_path = db_path + '.csv'
+    try:
+        app = create_app('testing', config_overrides={
+            'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_path}'
+        })
+        with app.app_context():
+            db.create_all()
+            semester_id = seed(num_lines)
+            BillingService().generate_billing_for_semester(semester_id)
+            
+            payment_method = PaymentMethod(name='Bank Statement', method_type='bank_transfer', provider='BCA')
+            db.session.add(payment_method)
+            db.session.commit()
+            payment_method_id = payment_method.id
+            
+            day = datetime(2026, 10, 1)
+            pending = seed_pending_payments(payment_method_id, num_lines // 2, day)
+            nims = [f'B{i:09d}' for i in range(num_lines // 2, num_lines)]
+            write_statement(csv_path, num_lines, pending, nims, day)
+            db.session.remove()
+            
+            started = time.perf_counter()
+            with open(csv_path, newline='') as stream:
+                report = ReconciliationService().reconcile_csv(stream, payment_method_id)
+            elapsed = time.perf_counter() - started
+            
+            if not report['success']:
+                raise RuntimeError(f"Rekonsiliasi gagal: {report}")
+            
+            db.session.remove()
+            db.engine.dispose()
+        return elapsed, report
+    finally:
+        os.remove(db_path)
+        if os.path.exists(csv_path):
+            os.remove(csv_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--lines', default='10000,30000',
+                        help='Jumlah baris mutasi, dipisah koma (default: 10000,30000)')
+    args = parser.parse_args()
+    
+    sizes = [int(s) for s in args.lines.split(',') if s]
+    
+    print(f"{'lines':>8} | {'matched':>8} | {'unmatched':>9} | {'ambiguous':>9} | {'seconds':>8} | {'lines/s':>8}")
+    print('-' * 66)
+    for size in sizes:
+        elapsed, report = run_once(size)
+        print(
+            f"{size:>8} | {sum(report['matched'].values()):>8} | {len(report['unmatched']):>9} | "
+            f"{len(report['ambiguous']):>9} | {elapsed:>8.3f} | {size / elapsed:>8.0f}"
+        )
+
+
+if __name__ == '__main__':
+    main()
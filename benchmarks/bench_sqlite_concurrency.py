@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Benchmark konkurensi SQLite: thread pembaca (query dashboard/outstanding)
+dan thread penulis (insert payment + update billing) bersamaan, dengan
+profil default (rollback journal) dibanding profil production (WAL + PRAGMA)
+
+Jalankan dari root project:
+    python benchmarks/bench_sqlite_concurrency.py --students 20000 --readers 4 --writers 2 --seconds 5
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from app import create_app, db
+from app.config import ProductionConfig
+from app.models.payment_method import PaymentMethod
+from app.services.billing_service import BillingService
+from bench_billing_generation import seed
+
+PROFILES = {
+    # Perilaku sebelum profil production: tanpa PRAGMA, pool bawaan
+    'default': {'SQLITE_PRAGMAS': {}, 'SQLALCHEMY_ENGINE_OPTIONS': {}},
+    'production': {
+        'SQLITE_PRAGMAS': ProductionConfig.SQLITE_PRAGMAS,
+        'SQLALCHEMY_ENGINE_OPTIONS': ProductionConfig.SQLALCHEMY_ENGINE_OPTIONS
+    },
+}
+
+READ_QUERIES = [
+    text('SELECT status, COUNT(*), SUM(remaining_amount) FROM billings GROUP BY status'),
+    text(
+        'SELECT b.id, s.nim, b.remaining_amount FROM billings b JOIN students s ON s.id = b.student_id '
+        "WHERE b.status != 'paid' ORDER BY b.created_at DESC, b.id DESC LIMIT 20"
+    ),
+]
+
+INSERT_PAYMENT = text(
+    'INSERT INTO payments (student_id, billing_id, payment_method_id, transaction_id, reference_code, '
+    "amount, status, created_at, updated_at) VALUES (:student_id, :billing_id, :payment_method_id, "
+    ":transaction_id, :reference_code, 1000, 'confirmed', CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)"
+)
+UPDATE_BILLING = text(
+    'UPDATE billings SET paid_amount = paid_amount + 1000, remaining_amount = remaining_amount - 1000, '
+    'version = version + 1 WHERE id = :billing_id'
+)
+
+
+def reader(engine, deadline, stats):
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            with engine.connect() as connection:
+                for query in READ_QUERIES:
+                    connection.execute(query).all()
+            stats['reads'] += 1
+            stats['read_latency'].append(time.perf_counter() - started)
+        except OperationalError:
+            stats['read_errors'] += 1
+
+
+def writer(engine, deadline, stats, billings, payment_method_id, worker_id):
+    rng = random.Random(worker_id)
+    sequence = 0
+    while time.perf_counter() < deadline:
+        billing_id, student_id = rng.choice(billings)
+        sequence += 1
+        key = f'BENCH-{worker_id}-{sequence}'
+        started = time.perf_counter()
+        try:
+            with engine.begin() as connection:
+                connection.execute(INSERT_PAYMENT, {
+                    'student_id': student_id, 'billing_id': billing_id, 'payment_method_id': payment_method_id,
+                    'transaction_id': key, 'reference_code': key
+                })
+                connection.execute(UPDATE_BILLING, {'billing_id': billing_id})
+            stats['writes'] += 1
+            stats['write_latency'].append(time.perf_counter() - started)
+        except OperationalError:
+            stats['write_errors'] += 1
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def run_profile(profile, num_students, readers, writers, seconds):
+    """Jalankan satu profil di database file sementara, return statistik"""
+    fd, db_path = tempfile.mkstemp(suffix='.db', prefix=f'bench_sqlite_{profile}_')
+    os.close(fd)
+    try:
+        app = create_app('testing', config_overrides={
+            'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_path}',
+            **PROFILES[profile]
+        })
+        with app.app_context():
+            db.create_all()
+            semester_id = seed(num_students)
+            BillingService().generate_billing_for_semester(semester_id)
+            payment_method = PaymentMethod(name='Bench', method_type='bank_transfer', provider='BCA')
+            db.session.add(payment_method)
+            db.session.commit()
+            payment_method_id = payment_method.id
+            billings = [tuple(row) for row in db.session.execute(text('SELECT id, student_id FROM billings'))]
+            journal_mode = db.session.execute(text('PRAGMA journal_mode')).scalar()
+            db.session.remove()
+            engine = db.engine
+        
+        stats = {
+            'reads': 0, 'writes': 0, 'read_errors': 0, 'write_errors': 0,
+            'read_latency': [], 'write_latency': []
+        }
+        deadline = time.perf_counter() + seconds
+        threads = [threading.Thread(target=reader, args=(engine, deadline, stats)) for _ in range(readers)]
+        threads += [
+            threading.Thread(target=writer, args=(engine, deadline, stats, billings, payment_method_id, i))
+            for i in range(writers)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        engine.dispose()
+        stats['journal_mode'] = journal_mode
+        return stats
+    finally:
+        for suffix in ('', '-wal', '-shm', '-journal'):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--students', type=int, default=20000, help='Jumlah mahasiswa/billing (default: 20000)')
+    parser.add_argument('--readers', type=int, default=4, help='Thread pembaca (default: 4)')
+    parser.add_argument('--writers', type=int, default=2, help='Thread penulis (default: 2)')
+    parser.add_argument('--seconds', type=float, default=5, help='Durasi per profil (default: 5)')
+    args = parser.parse_args()
+    
+    print(f"{'profile':>10} | {'journal':>7} | {'reads/s':>8} | {'writes/s':>8} | {'p95 read':>9} | "
+          f"{'p95 write':>9} | {'errors':>6}")
+    print('-' * 78)
+    for profile in PROFILES:
+        stats = run_profile(profile, args.students, args.readers, args.writers, args.seconds)
+        print(
+            f"{profile:>10} | {stats['journal_mode']:>7} | {stats['reads'] / args.seconds:>8.1f} | "
+            f"{stats['writes'] / args.seconds:>8.1f} | {percentile(stats['read_latency'], 0.95) * 1000:>7.1f}ms | "
+            f"{percentile(stats['write_latency'], 0.95) * 1000:>7.1f}ms | "
+            f"{stats['read_errors'] + stats['write_errors']:>6}"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Benchmark extraction rekening koran PDF sintetis: serial vs process pool,
+lalu run ulang dari cache per halaman
+
+Jalankan dari root project:
+    python benchmarks/bench_statement_pdf.py --pages 500 --workers 4
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+from datetime import date
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.statement_ingestion_service import StatementIngestionService
+from synthetic_statement import statement_pages, write_text_pdf
+
+
+def synthetic_transactions(count, period=date(2026, 10, 1)):
+    """Campuran transfer dengan reference code, setoran VA, transfer lain, dan biaya admin"""
+    rng = random.Random(42)
+    transactions = []
+    for i in range(count):
+        day = period.replace(day=rng.randrange(1, 29))
+        bucket = i % 10
+        if bucket < 4:
+            transactions.append((day, f'TRSF E-BANKING PAY{period:%Y%m%d}000000{i:06X}', 5000000 - i))
+        elif bucket < 8:
+            transactions.append((day, f'SETORAN VA 8808B{i:09d}', 2500000))
+        elif bucket < 9:
+            transactions.append((day, f'TRANSFER LAIN {i}', rng.randrange(10000, 900000)))
+        else:
+            transactions.append((day, 'BIAYA ADM', -6500))
+    return transactions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pages', type=int, default=500, help='Jumlah halaman (default: 500)')
+    parser.add_argument('--lines-per-page', type=int, default=60, help='Transaksi per halaman (default: 60)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='Jumlah process untuk mode pool (default: jumlah CPU)')
+    args = parser.parse_args()
+    
+    workdir = tempfile.mkdtemp(prefix='bench_statement_pdf_')
+    try:
+        pdf_path = os.path.join(workdir, 'statement.pdf')
+        transactions = synthetic_transactions(args.pages * args.lines_per_page)
+        write_text_pdf(pdf_path, statement_pages(transactions, lines_per_page=args.lines_per_page))
+        size_mb = os.path.getsize(pdf_path) / 1024 / 1024
+        print(f"PDF sintetis: {args.pages} halaman, {len(transactions)} transaksi, {size_mb:.1f} MB\n")
+        
+        print(f"{'mode':>16} | {'extracted':>9} | {'cached':>6} | {'rows':>6} | {'seconds':>8} | {'pages/s':>8}")
+        print('-' * 68)
+        scenarios = [
+            ('serial', 1, 'serial'),
+            (f'pool x{args.workers}', args.workers, 'pool'),
+            ('cached re-run', args.workers, 'pool'),
+        ]
+        for label, workers, cache_name in scenarios:
+            service = StatementIngestionService(cache_dir=os.path.join(workdir, cache_name), workers=workers)
+            result = service.extract(pdf_path)
+            print(
+                f"{label:>16} | {result['extracted_pages']:>9} | {result['cached_pages']:>6} | "
+                f"{len(result['rows']):>6} | {result['seconds']:>8.3f} | {result['pages'] / result['seconds']:>8.0f}"
+            )
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main()
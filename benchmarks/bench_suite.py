@@ -0,0 +1,279 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Benchmark suite jalur panas billing/pembayaran terhadap dataset sintetis
+(seed_synthetic_data): generate billing, job denda, laporan KRS, endpoint
+dashboard, ingest webhook, dan pencarian mahasiswa
+
+Hasil disimpan sebagai JSON (default benchmarks/results/<waktu>-<commit>.json)
+agar bisa dibandingkan antar commit dengan --compare.
+
+Jalankan dari root project:
+    python benchmarks/bench_suite.py --students 100000 --repeat 5
+    python benchmarks/bench_suite.py --students 100000 --compare benchmarks/results/<baseline>.json
+"""
+
+import argparse
+import hashlib
+import hmac
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from app import create_app, db
+from app.config import Config, ProductionConfig
+from app.models.billing import Semester
+from app.models.payment import Payment
+from app.services.billing_service import BillingService
+from app.utils.seed_data import seed_synthetic_data
+
+DASHBOARD_URLS = [
+    '/api/dashboard/summary',
+    '/api/dashboard/financial-report',
+    '/api/dashboard/program-studi-stats',
+    '/api/dashboard/billing-breakdown',
+    '/api/dashboard/students-status',
+    '/api/dashboard/daily-report',
+]
+
+SEARCH_QUERIES = ['Wijaya', 'Putri Lubis', '90000123']
+
+
+def git_revision():
+    """Commit saat ini dan apakah working tree kotor (None di luar git)"""
+    try:
+        commit = subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=ROOT, text=True).strip()
+        dirty = bool(subprocess.check_output(['git', 'status', '--porcelain', '--untracked-files=no'],
+                                             cwd=ROOT, text=True).strip())
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+
+def summarize(samples, **extra):
+    """Statistik durasi (detik) dari beberapa pengulangan"""
+    ordered = sorted(samples)
+    return {
+        'runs': len(ordered),
+        'min': round(ordered[0], 6),
+        'median': round(statistics.median(ordered), 6),
+        'p95': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 6),
+        'mean': round(statistics.fmean(ordered), 6),
+        **extra
+    }
+
+
+def time_once(fn):
+    started = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - started, result
+
+
+def bench_get(client, url, repeat, query_string=None):
+    """GET berulang setelah satu warm-up; catat status dan jumlah query SQL"""
+    response = client.get(url, query_string=query_string)
+    if response.status_code != 200:
+        raise RuntimeError(f'GET {url} -> {response.status_code}: {response.get_data(as_text=True)[:200]}')
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = client.get(url, query_string=query_string)
+        response.get_data()
+        samples.append(time.perf_counter() - started)
+    return summarize(samples, status=response.status_code, queries=int(response.headers.get('X-Query-Count', -1)))
+
+
+def bench_billing_generation(app):
+    """Generate billing semester baru untuk semua mahasiswa aktif (mode bulk)"""
+    with app.app_context():
+        now = datetime.utcnow()
+        semester = Semester(name=f'BENCH-{now:%Y%m%d%H%M%S}', start_date=now, end_date=now, is_active=False)
+        db.session.add(semester)
+        db.session.commit()
+        semester_id = semester.id
+        db.session.remove()
+        
+        elapsed, result = time_once(lambda: BillingService().generate_billing_for_semester(semester_id))
+        if not result['success']:
+            raise RuntimeError(result['message'])
+        db.session.remove()
+    return summarize([elapsed], rows=result['created_count'], rows_per_second=round(result['created_count'] / elapsed))
+
+
+def bench_penalty_job(app):
+    """Job denda: run pertama memindahkan billing lewat jatuh tempo ke overdue, run kedua tanpa perubahan"""
+    results = {}
+    with app.app_context():
+        for name in ('penalty_job', 'penalty_job_noop'):
+            elapsed, result = time_once(lambda: BillingService().update_overdue_penalties(
+                Config.OVERDUE_PENALTY_PER_DAY, Config.OVERDUE_MAX_PENALTY
+            ))
+            if not result['success']:
+                raise RuntimeError(result['message'])
+            results[name] = summarize([elapsed], rows=result['updated_count'])
+            db.session.remove()
+    return results
+
+
+def bench_webhooks(app, client, count, batch_size):
+    """Webhook success bertanda tangan untuk payment pending: satu per request dan batch"""
+    with app.app_context():
+        pending = db.session.query(Payment.reference_code, Payment.billing_id, Payment.student_id, Payment.amount) \
+            .filter(Payment.status == Payment.STATUS_PENDING).order_by(Payment.id).limit(count * 2).all()
+        db.session.remove()
+    
+    def payload(reference_code, billing_id, student_id, amount):
+        return {
+            'transaction_id': f'BENCH-{reference_code}', 'reference_code': reference_code,
+            'billing_id': billing_id, 'student_id': student_id, 'amount': amount, 'status': 'success'
+        }
+    
+    def post(url, body):
+        raw = json.dumps(body).encode()
+        signature = hmac.new(Config.PAYMENT_GATEWAY_SECRET.encode(), raw, hashlib.sha256).hexdigest()
+        started = time.perf_counter()
+        response = client.post(url, data=raw, content_type='application/json', headers={'X-Signature': signature})
+        elapsed = time.perf_counter() - started
+        if response.status_code != 200:
+            raise RuntimeError(f'{url} -> {response.status_code}: {response.get_data(as_text=True)[:200]}')
+        return elapsed
+    
+    single, batch = pending[:count], pending[count:]
+    samples = [post('/api/webhook/payment', payload(*row)) for row in single]
+    results = {'webhook_single': summarize(samples, rows=len(samples), rows_per_second=round(len(samples) / sum(samples)))}
+    
+    if batch:
+        samples = [
+            post('/api/webhook/payment/batch', {'notifications': [payload(*row) for row in batch[start:start + batch_size]]})
+            for start in range(0, len(batch), batch_size)
+        ]
+        results['webhook_batch'] = summarize(
+            samples, rows=len(batch), batch_size=batch_size, rows_per_second=round(len(batch) / sum(samples))
+        )
+    return results
+
+
+def run_suite(args, db_path):
+    results = {}
+    app = create_app('testing', config_overrides={
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_path}',
+        'SQLITE_PRAGMAS': ProductionConfig.SQLITE_PRAGMAS,
+        'SQLALCHEMY_ENGINE_OPTIONS': ProductionConfig.SQLALCHEMY_ENGINE_OPTIONS,
+        # Ukur query sebenarnya, bukan hit cache response
+        'DASHBOARD_CACHE_ENABLED': False
+    })
+    client = app.test_client()
+    
+    with app.app_context():
+        db.create_all()
+        elapsed, seeded = time_once(lambda: seed_synthetic_data(args.students, num_semesters=args.semesters, seed=args.seed))
+        db.session.remove()
+    results['seed'] = summarize([elapsed], rows=seeded['students'] + seeded['billings'] + seeded['payments'])
+    print(f"seed: {seeded['students']} mahasiswa, {seeded['billings']} billing, {seeded['payments']} pembayaran "
+          f"dalam {elapsed:.2f}s")
+    
+    # Endpoint baca diukur sebelum job tulis agar dataset sama antar commit
+    results['krs_report'] = bench_get(client, '/api/billing/krs-eligibility-report', args.repeat)
+    results['krs_report_blocked'] = bench_get(
+        client, '/api/billing/krs-eligibility-report', args.repeat, {'eligible': 'not_eligible'}
+    )
+    for url in DASHBOARD_URLS:
+        results['dashboard_' + url.rsplit('/', 1)[-1].replace('-', '_')] = bench_get(client, url, args.repeat)
+    for query in SEARCH_QUERIES:
+        results['student_search_' + query.replace(' ', '_').lower()] = bench_get(
+            client, '/api/billing/student/search', args.repeat, {'q': query}
+        )
+    
+    results.update(bench_webhooks(app, client, args.webhooks, args.batch_size))
+    results.update(bench_penalty_job(app))
+    results['billing_generation'] = bench_billing_generation(app)
+    
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+    return seeded, results
+
+
+def compare(results, baseline_path):
+    """Cetak perubahan median terhadap hasil baseline"""
+    with open(baseline_path) as stream:
+        baseline = json.load(stream)
+    print(f"\nvs {baseline['meta'].get('commit') or baseline_path}")
+    print(f"{'benchmark':>36} | {'baseline':>10} | {'current':>10} | {'change':>8}")
+    print('-' * 74)
+    for name, result in results.items():
+        before = baseline['results'].get(name)
+        if not before:
+            continue
+        change = (result['median'] - before['median']) / before['median'] * 100 if before['median'] else 0
+        print(f"{name:>36} | {before['median'] * 1000:>8.1f}ms | {result['median'] * 1000:>8.1f}ms | {change:>+7.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--students', type=int, default=20000, help='Jumlah mahasiswa (default: 20000)')
+    parser.add_argument('--semesters', type=int, default=4, help='Jumlah semester (default: 4)')
+    parser.add_argument('--seed', type=int, default=42, help='Seed dataset (default: 42)')
+    parser.add_argument('--repeat', type=int, default=5, help='Pengulangan per endpoint GET (default: 5)')
+    parser.add_argument('--webhooks', type=int, default=200, help='Jumlah webhook satu per request (default: 200)')
+    parser.add_argument('--batch-size', type=int, default=100, help='Notifikasi per request batch (default: 100)')
+    parser.add_argument('--output', default=None, help='File JSON hasil (default: benchmarks/results/...)')
+    parser.add_argument('--compare', default=None, help='File JSON baseline untuk dibandingkan')
+    args = parser.parse_args()
+    
+    fd, db_path = tempfile.mkstemp(suffix='.db', prefix='bench_suite_')
+    os.close(fd)
+    try:
+        seeded, results = run_suite(args, db_path)
+    finally:
+        for suffix in ('', '-wal', '-shm', '-journal'):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+    
+    commit, dirty = git_revision()
+    report = {
+        'meta': {
+            'commit': commit,
+            'dirty': dirty,
+            'timestamp': datetime.utcnow().isoformat(timespec='seconds') + 'Z',
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'args': vars(args),
+            'dataset': seeded
+        },
+        'results': results
+    }
+    
+    output = args.output or os.path.join(
+        ROOT, 'benchmarks', 'results',
+        f"{datetime.utcnow():%Y%m%d-%H%M%S}-{(commit or 'nogit')[:8]}{'-dirty' if dirty else ''}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as stream:
+        json.dump(report, stream, indent=2)
+    
+    print(f"\n{'benchmark':>36} | {'median':>10} | {'p95':>10} | {'queries':>7} | {'rows':>8}")
+    print('-' * 84)
+    for name, result in results.items():
+        print(f"{name:>36} | {result['median'] * 1000:>8.1f}ms | {result['p95'] * 1000:>8.1f}ms | "
+              f"{result.get('queries', ''):>7} | {result.get('rows', ''):>8}")
+    print(f"\nHasil disimpan di {output}")
+    
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
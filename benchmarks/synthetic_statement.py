@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+Generator rekening koran PDF sintetis (tanpa dependency tambahan)
+
+Layout meniru e-statement bank: header periode di setiap halaman lalu
+baris "DD/MM KETERANGAN MUTASI CR/DB SALDO". Dipakai benchmark dan test
+ingestion PDF.
+"""
+
+from datetime import date
+
+
+def _escape(text):
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def write_text_pdf(path, pages, font_size=8, leading=10):
+    """
+    Tulis PDF minimal dengan satu baris teks per elemen list
+    
+    Args:
+        path: Lokasi file PDF
+        pages: List halaman, setiap halaman list baris teks
+    """
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        None,  # Pages, diisi setelah semua halaman diketahui
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>',
+    ]
+    page_refs = []
+    for lines in pages:
+        body = [f'BT /F1 {font_size} Tf {leading} TL 36 806 Td'.encode()]
+        for line in lines:
+            body.append(f'({_escape(line)}) Tj T*'.encode('latin-1'))
+        body.append(b'ET')
+        stream = b'\n'.join(body)
+        
+        objects.append(b'<< /Length %d >>\nstream\n' % len(stream) + stream + b'\nendstream')
+        content_ref = len(objects)
+        objects.append(
+            b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] '
+            b'/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>' % content_ref
+        )
+        page_refs.append(len(objects))
+    
+    kids = ' '.join(f'{ref} 0 R' for ref in page_refs)
+    objects[1] = f'<< /Type /Pages /Kids [{kids}] /Count {len(page_refs)} >>'.encode()
+    
+    with open(path, 'wb') as output:
+        output.write(b'%PDF-1.4\n')
+        offsets = []
+        for number, obj in enumerate(objects, start=1):
+            offsets.append(output.tell())
+            output.write(b'%d 0 obj\n' % number + obj + b'\nendobj\n')
+        xref_offset = output.tell()
+        output.write(b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1))
+        for offset in offsets:
+            output.write(b'%010d 00000 n \n' % offset)
+        output.write(b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref_offset))
+
+
+def format_rupiah(amount):
+    """5000000 -> '5,000,000.00' (format e-statement)"""
+    return f'{amount:,.2f}'
+
+
+def statement_pages(transactions, period=date(2026, 10, 1), lines_per_page=60):
+    """
+    Susun transaksi menjadi halaman rekening koran
+    
+    Args:
+        transactions: List (date, description, amount) - amount negatif = debit
+        period: Tanggal di bulan periode rekening koran
+        lines_per_page: Jumlah baris transaksi per halaman
+    
+    Returns:
+        list: Halaman berisi baris teks, siap untuk write_text_pdf
+    """
+    months = ['JANUARI', 'FEBRUARI', 'MARET', 'APRIL', 'MEI', 'JUNI', 'JULI',
+              'AGUSTUS', 'SEPTEMBER', 'OKTOBER', 'NOVEMBER', 'DESEMBER']
+    total_pages = max(1, -(-len(transactions) // lines_per_page))
+    balance = 1000000000
+    pages = []
+    for page in range(total_pages):
+        lines = [
+            'REKENING GIRO - UNIVERSITAS',
+            'NO. REKENING : 0123456789',
+            f'PERIODE : {months[period.month - 1]} {period.year}',
+            f'HALAMAN : {page + 1} / {total_pages}',
+            'TANGGAL KETERANGAN MUTASI SALDO',
+        ]
+        for day, description, amount in transactions[page * lines_per_page:(page + 1) * lines_per_page]:
+            balance += amount
+            kind = 'CR' if amount > 0 else 'DB'
+            lines.append(f'{day:%d/%m} {description} {format_rupiah(abs(amount))} {kind} {format_rupiah(balance)}')
+        lines.append('Bersambung ke halaman berikut' if page + 1 < total_pages else 'SALDO AKHIR ' + format_rupiah(balance))
+        pages.append(lines)
+    return pages
@@ -1,19 +1,69 @@
-#!/usr/bin/env python
-# -*- coding: utf-8 -*-
-import pdfplumber
-
-pdf_path = "1768227613.pdf"
-
-try:
-    with pdfplumber.open(pdf_path) as pdf:
-        print(f"Total pages: {len(pdf.pages)}\n")
-        print("="*80)
-        
-        for page_num, page in enumerate(pdf.pages, 1):
-            text = page.extract_text()
-            print(f"\n--- PAGE {page_num} ---\n")
-            print(text)
-            print("\n" + "="*80)
-            
-except Exception as e:
-    print(f"Error: {e}")
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Extract rekening koran PDF menjadi baris transaksi, opsional langsung direkonsiliasi
+
+    python extract_pdf.py statement.pdf                        # tampilkan baris transaksi
+    python extract_pdf.py statement.pdf --text                 # tampilkan teks mentah per halaman
+    python extract_pdf.py statement.pdf --payment-method-id 1  # rekonsiliasi ke database
+"""
+import argparse
+import pdfplumber
+from app.services.statement_ingestion_service import StatementIngestionService
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('pdf_path', nargs='?', default='1768227613.pdf')
+    parser.add_argument('--text', action='store_true', help='Tampilkan teks mentah per halaman')
+    parser.add_argument('--workers', type=int, default=None, help='Jumlah process extract halaman')
+    parser.add_argument('--year', type=int, default=None, help='Tahun untuk tanggal tanpa header periode')
+    parser.add_argument('--payment-method-id', type=int, default=None,
+                        help='Rekonsiliasi hasil extract ke payment/billing dengan metode pembayaran ini')
+    parser.add_argument('--dry-run', action='store_true', help='Rekonsiliasi tanpa menulis ke database')
+    args = parser.parse_args()
+    
+    try:
+        if args.text:
+            with pdfplumber.open(args.pdf_path) as pdf:
+                print(f"Total pages: {len(pdf.pages)}\n")
+                print("="*80)
+                
+                for page_num, page in enumerate(pdf.pages, 1):
+                    text = page.extract_text()
+                    print(f"\n--- PAGE {page_num} ---\n")
+                    print(text)
+                    print("\n" + "="*80)
+        
+        elif args.payment_method_id is not None:
+            from app import create_app
+            
+            app = create_app()
+            with app.app_context():
+                report = StatementIngestionService(workers=args.workers).ingest(
+                    args.pdf_path, args.payment_method_id, year=args.year, dry_run=args.dry_run
+                )
+            
+            if not report['success']:
+                print(f"Error: {report['message']}")
+            else:
+                extraction = report['extraction']
+                print(f"Pages: {extraction['pages']} ({extraction['cached_pages']} cached), "
+                      f"rows: {extraction['rows']}, extract: {extraction['seconds']}s")
+                print(f"Matched: {report['matched']}, unmatched: {len(report['unmatched'])}, "
+                      f"ambiguous: {len(report['ambiguous'])}, duplicates: {report['duplicates']}")
+        
+        else:
+            extraction = StatementIngestionService(workers=args.workers).extract(args.pdf_path, year=args.year)
+            print(f"Total pages: {extraction['pages']} ({extraction['cached_pages']} cached), "
+                  f"transactions: {len(extraction['rows'])}, {extraction['seconds']}s\n")
+            for row in extraction['rows']:
+                print(f"{row['page']:>4} | {row['date']} | {row['amount']:>15,} | {row['description']}")
+    
+    except Exception as e:
+        print(f"Error: {e}")
+
+
+# Process pool memakai spawn di macOS/Windows, kode top-level harus di balik guard ini
+if __name__ == '__main__':
+    main()
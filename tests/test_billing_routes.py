@@ -0,0 +1,95 @@
+import unittest
+from datetime import datetime, timedelta
+from app import create_app, db
+from app.models.student import Student, ProgramStudi
+from app.models.billing import Billing
+
+class TestBillingRoutes(unittest.TestCase):
+    """Test cases untuk Billing API routes"""
+    
+    def setUp(self):
+        """Setup test database"""
+        self.app = create_app('testing')
+        self.client = self.app.test_client()
+        
+        with self.app.app_context():
+            db.create_all()
+            self.setup_test_data()
+    
+    def tearDown(self):
+        """Cleanup test database"""
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+    
+    def setup_test_data(self):
+        """Create test data: 5 mahasiswa aktif, mahasiswa genap punya tunggakan"""
+        ps = ProgramStudi(name='Teknik Informatika', code='TI', spp_amount=5000000)
+        db.session.add(ps)
+        db.session.commit()
+        
+        for i in range(5):
+            student = Student(
+                nim=f'2021000{i+1}',
+                name=f'Test Student {i+1}',
+                email=f'student{i+1}@test.com',
+                program_studi_id=ps.id,
+                status='active'
+            )
+            db.session.add(student)
+        db.session.add(Student(
+            nim='20210099',
+            name='Inactive Student',
+            email='inactive@test.com',
+            program_studi_id=ps.id,
+            status='inactive'
+        ))
+        db.session.commit()
+        
+        for student in Student.query.filter_by(status='active').all():
+            if student.id % 2 == 0:
+                db.session.add(Billing(
+                    student_id=student.id,
+                    semester='2023/2024-Ganjil',
+                    total_amount=5000000,
+                    paid_amount=1000000,
+                    remaining_amount=4000000,
+                    due_date=datetime.utcnow() + timedelta(days=14),
+                    status=Billing.STATUS_PARTIAL
+                ))
+        db.session.commit()
+    
+    def test_krs_eligibility_report_summary(self):
+        """Test summary laporan eligibility KRS"""
+        response = self.client.get('/api/billing/krs-eligibility-report')
+        data = response.get_json()
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(data['summary'], {
+            'total_students': 5,
+            'eligible_for_krs': 3,
+            'blocked_from_krs': 2,
+            'total_blocked_arrears': 8000000
+        })
+        self.assertEqual(data['pagination']['total'], 5)
+        self.assertEqual(data['students'][0]['program_studi'], 'Teknik Informatika')
+    
+    def test_krs_eligibility_report_filter_and_pagination(self):
+        """Test filter not_eligible dan pagination dijalankan di database"""
+        response = self.client.get('/api/billing/krs-eligibility-report?eligible=not_eligible&limit=1&offset=1')
+        data = response.get_json()
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(data['pagination']['total'], 2)
+        self.assertEqual(len(data['students']), 1)
+        self.assertFalse(data['students'][0]['eligible_for_krs'])
+        self.assertEqual(data['students'][0]['outstanding'], 4000000)
+        self.assertEqual(data['students'][0]['reason'], 'Has unpaid billing')
+        
+        response = self.client.get('/api/billing/krs-eligibility-report?eligible=eligible')
+        data = response.get_json()
+        self.assertEqual(data['pagination']['total'], 3)
+        self.assertTrue(all(s['eligible_for_krs'] for s in data['students']))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,139 +1,292 @@
-# tests/test_billing_service.py
-import unittest
-from datetime import datetime, timedelta
-from app import create_app, db
-from app.models.student import Student, ProgramStudi
-from app.models.billing import Billing, Semester
-from app.services.billing_service import BillingService
-
-class TestBillingService(unittest.TestCase):
-    """Test cases untuk Billing Service"""
-    
-    def setUp(self):
-        """Setup test database"""
-        self.app = create_app('testing')
-        self.client = self.app.test_client()
-        
-        with self.app.app_context():
-            db.create_all()
-            self.setup_test_data()
-    
-    def tearDown(self):
-        """Cleanup test database"""
-        with self.app.app_context():
-            db.session.remove()
-            db.drop_all()
-    
-    def setup_test_data(self):
-        """Create test data"""
-        # Create program studi
-        ps = ProgramStudi(name='Teknik Informatika', code='TI', spp_amount=5000000)
-        db.session.add(ps)
-        db.session.commit()
-        
-        # Create students
-        for i in range(3):
-            student = Student(
-                nim=f'2021000{i+1}',
-                name=f'Test Student {i+1}',
-                email=f'student{i+1}@test.com',
-                program_studi_id=ps.id,
-                status='active'
-            )
-            db.session.add(student)
-        db.session.commit()
-        
-        # Create semester
-        semester = Semester(
-            name='2023/2024-Ganjil',
-            start_date=datetime.utcnow(),
-            end_date=datetime.utcnow() + timedelta(days=120),
-            is_active=True
-        )
-        db.session.add(semester)
-        db.session.commit()
-    
-    def test_generate_billing(self):
-        """Test billing generation"""
-        with self.app.app_context():
-            billing_service = BillingService()
-            semester = Semester.query.first()
-            
-            result = billing_service.generate_billing_for_semester(semester.id)
-            
-            self.assertTrue(result['success'])
-            self.assertEqual(result['created_count'], 3)
-            
-            # Verify billings created
-            billings = Billing.query.all()
-            self.assertEqual(len(billings), 3)
-            
-            # Check billing details
-            for billing in billings:
-                self.assertEqual(billing.total_amount, 5000000)
-                self.assertEqual(billing.status, Billing.STATUS_UNPAID)
-    
-    def test_can_register_krs_no_outstanding(self):
-        """Test KRS registration when no outstanding"""
-        with self.app.app_context():
-            student = Student.query.first()
-            
-            billing_service = BillingService()
-            result = billing_service.can_student_register_krs(student.id)
-            
-            self.assertTrue(result['can_register'])
-            self.assertEqual(result['outstanding'], 0)
-    
-    def test_can_register_krs_with_outstanding(self):
-        """Test KRS registration when has outstanding"""
-        with self.app.app_context():
-            student = Student.query.first()
-            
-            # Create unpaid billing
-            billing = Billing(
-                student_id=student.id,
-                semester='2023/2024-Ganjil',
-                total_amount=5000000,
-                remaining_amount=5000000,
-                due_date=datetime.utcnow() + timedelta(days=14),
-                status=Billing.STATUS_UNPAID
-            )
-            db.session.add(billing)
-            db.session.commit()
-            
-            billing_service = BillingService()
-            result = billing_service.can_student_register_krs(student.id)
-            
-            self.assertFalse(result['can_register'])
-            self.assertEqual(result['outstanding'], 5000000)
-    
-    def test_calculate_penalty(self):
-        """Test penalty calculation"""
-        with self.app.app_context():
-            billing = Billing.query.first()
-            if not billing:
-                # Create billing if not exists
-                student = Student.query.first()
-                billing = Billing(
-                    student_id=student.id,
-                    semester='2023/2024-Ganjil',
-                    total_amount=5000000,
-                    remaining_amount=5000000,
-                    due_date=datetime.utcnow() - timedelta(days=10),
-                    status=Billing.STATUS_UNPAID
-                )
-                db.session.add(billing)
-                db.session.commit()
-            
-            billing_service = BillingService()
-            result = billing_service.calculate_and_update_penalty(
-                billing.id,
-                penalty_per_day=10000,
-                max_penalty=500000
-            )
-            
-            self.assertTrue(result['success'])
-            self.assertGreater(result['penalty'], 0)
-
-if __name__ == '__main__':
-    unittest.main()
+# tests/test_billing_service.py
+import unittest
+from datetime import datetime, timedelta
+from sqlalchemy.dialects import mysql, oracle, postgresql, sqlite
+from sqlalchemy.exc import CompileError
+from app import create_app, db
+from app.models.base import days_between, whole_days_between
+from app.models.student import Student, ProgramStudi
+from app.models.billing import Billing, Semester
+from app.services.billing_service import BillingService
+
+class TestBillingService(unittest.TestCase):
+    """Test cases untuk Billing Service"""
+    
+    def setUp(self):
+        """Setup test database"""
+        self.app = create_app('testing')
+        self.client = self.app.test_client()
+        
+        with self.app.app_context():
+            db.create_all()
+            self.setup_test_data()
+    
+    def tearDown(self):
+        """Cleanup test database"""
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+    
+    def setup_test_data(self):
+        """Create test data"""
+        # Create program studi
+        ps = ProgramStudi(name='Teknik Informatika', code='TI', spp_amount=5000000)
+        db.session.add(ps)
+        db.session.commit()
+        
+        # Create students
+        for i in range(3):
+            student = Student(
+                nim=f'2021000{i+1}',
+                name=f'Test Student {i+1}',
+                email=f'student{i+1}@test.com',
+                program_studi_id=ps.id,
+                status='active'
+            )
+            db.session.add(student)
+        db.session.commit()
+        
+        # Create semester
+        semester = Semester(
+            name='2023/2024-Ganjil',
+            start_date=datetime.utcnow(),
+            end_date=datetime.utcnow() + timedelta(days=120),
+            is_active=True
+        )
+        db.session.add(semester)
+        db.session.commit()
+    
+    def test_generate_billing(self):
+        """Test billing generation"""
+        with self.app.app_context():
+            billing_service = BillingService()
+            semester = Semester.query.first()
+            
+            result = billing_service.generate_billing_for_semester(semester.id)
+            
+            self.assertTrue(result['success'])
+            self.assertEqual(result['created_count'], 3)
+            
+            # Verify billings created
+            billings = Billing.query.all()
+            self.assertEqual(len(billings), 3)
+            
+            # Check billing details
+            for billing in billings:
+                self.assertEqual(billing.total_amount, 5000000)
+                self.assertEqual(billing.status, Billing.STATUS_UNPAID)
+    
+    def test_generate_billing_bulk_skips_existing(self):
+        """Test bulk billing generation hanya membuat billing yang belum ada"""
+        with self.app.app_context():
+            billing_service = BillingService()
+            semester = Semester.query.first()
+            student = Student.query.first()
+            
+            # Billing yang sudah ada tidak boleh dibuat ulang
+            db.session.add(Billing(
+                student_id=student.id,
+                semester=semester.name,
+                total_amount=5000000,
+                remaining_amount=5000000,
+                due_date=datetime.utcnow() + timedelta(days=14),
+                status=Billing.STATUS_UNPAID
+            ))
+            db.session.commit()
+            
+            result = billing_service.generate_billing_for_semester(semester.id, chunk_size=1)
+            
+            self.assertTrue(result['success'])
+            self.assertEqual(result['created_count'], 2)
+            self.assertEqual(result['failed_count'], 0)
+            self.assertEqual(Billing.query.filter_by(semester=semester.name).count(), 3)
+            
+            # Generate ulang tidak membuat duplikat
+            result = billing_service.generate_billing_for_semester(semester.id)
+            self.assertEqual(result['created_count'], 0)
+            self.assertEqual(Billing.query.count(), 3)
+    
+    def test_generate_billing_bulk_matches_loop(self):
+        """Test mode bulk dan mode loop menghasilkan billing yang sama"""
+        with self.app.app_context():
+            billing_service = BillingService()
+            semester = Semester.query.first()
+            
+            billing_service.generate_billing_for_semester(semester.id, bulk=False)
+            loop_rows = sorted(
+                (b.student_id, b.total_amount, b.remaining_amount, b.paid_amount, b.status)
+                for b in Billing.query.all()
+            )
+            
+            Billing.query.delete()
+            db.session.commit()
+            
+            billing_service.generate_billing_for_semester(semester.id, bulk=True)
+            bulk_rows = sorted(
+                (b.student_id, b.total_amount, b.remaining_amount, b.paid_amount, b.status)
+                for b in Billing.query.all()
+            )
+            
+            self.assertEqual(loop_rows, bulk_rows)
+    
+    def test_can_register_krs_no_outstanding(self):
+        """Test KRS registration when no outstanding"""
+        with self.app.app_context():
+            student = Student.query.first()
+            
+            billing_service = BillingService()
+            result = billing_service.can_student_register_krs(student.id)
+            
+            self.assertTrue(result['can_register'])
+            self.assertEqual(result['outstanding'], 0)
+    
+    def test_can_register_krs_with_outstanding(self):
+        """Test KRS registration when has outstanding"""
+        with self.app.app_context():
+            student = Student.query.first()
+            
+            # Create unpaid billing
+            billing = Billing(
+                student_id=student.id,
+                semester='2023/2024-Ganjil',
+                total_amount=5000000,
+                remaining_amount=5000000,
+                due_date=datetime.utcnow() + timedelta(days=14),
+                status=Billing.STATUS_UNPAID
+            )
+            db.session.add(billing)
+            db.session.commit()
+            
+            billing_service = BillingService()
+            result = billing_service.can_student_register_krs(student.id)
+            
+            self.assertFalse(result['can_register'])
+            self.assertEqual(result['outstanding'], 5000000)
+    
+    def test_outstanding_maintained_on_generate_and_delete(self):
+        """Test outstanding_amount/krs_blocked ikut berubah saat billing dibuat dan dihapus"""
+        with self.app.app_context():
+            billing_service = BillingService()
+            semester = Semester.query.first()
+            billing_service.generate_billing_for_semester(semester.id)
+            
+            for student in Student.query.all():
+                self.assertEqual(student.outstanding_amount, 5000000)
+                self.assertTrue(student.krs_blocked)
+                self.assertFalse(student.can_register_krs())
+            
+            student = Student.query.first()
+            db.session.delete(Billing.query.filter_by(student_id=student.id).first())
+            db.session.commit()
+            
+            student = Student.query.get(student.id)
+            self.assertEqual(student.get_total_outstanding(), 0)
+            self.assertTrue(student.can_register_krs())
+    
+    def test_refresh_outstanding_repairs_drift(self):
+        """Test refresh_outstanding membangun ulang saldo dari billings"""
+        with self.app.app_context():
+            billing_service = BillingService()
+            semester = Semester.query.first()
+            billing_service.generate_billing_for_semester(semester.id)
+            
+            Student.query.update({'outstanding_amount': 0, 'krs_blocked': False})
+            db.session.commit()
+            
+            Student.refresh_outstanding()
+            db.session.commit()
+            
+            self.assertEqual(Student.query.filter_by(krs_blocked=True).count(), 3)
+            self.assertEqual(
+                sum(s.outstanding_amount for s in Student.query.all()),
+                3 * 5000000
+            )
+    
+    def test_calculate_penalty(self):
+        """Test penalty calculation"""
+        with self.app.app_context():
+            billing = Billing.query.first()
+            if not billing:
+                # Create billing if not exists
+                student = Student.query.first()
+                billing = Billing(
+                    student_id=student.id,
+                    semester='2023/2024-Ganjil',
+                    total_amount=5000000,
+                    remaining_amount=5000000,
+                    due_date=datetime.utcnow() - timedelta(days=10),
+                    status=Billing.STATUS_UNPAID
+                )
+                db.session.add(billing)
+                db.session.commit()
+            
+            billing_service = BillingService()
+            result = billing_service.calculate_and_update_penalty(
+                billing.id,
+                penalty_per_day=10000,
+                max_penalty=500000
+            )
+            
+            self.assertTrue(result['success'])
+            self.assertGreater(result['penalty'], 0)
+    
+    def test_update_overdue_penalties(self):
+        """Test set-based penalty update hanya mengubah billing yang perlu"""
+        with self.app.app_context():
+            students = Student.query.order_by(Student.id).all()
+            as_of = datetime(2026, 3, 1, 12, 0, 0)
+            
+            cases = [
+                # (student, due_date, status, paid) -> expected (penalty, status)
+                (students[0], as_of - timedelta(days=10, hours=3), Billing.STATUS_UNPAID, 0),
+                (students[1], as_of - timedelta(days=90), Billing.STATUS_PARTIAL, 1000000),
+                (students[2], as_of + timedelta(days=5), Billing.STATUS_UNPAID, 0),
+                (students[2], as_of - timedelta(days=30), Billing.STATUS_PAID, 5000000),
+            ]
+            for i, (student, due_date, status, paid) in enumerate(cases):
+                db.session.add(Billing(
+                    student_id=student.id,
+                    semester=f'SEM-{i}',
+                    total_amount=5000000,
+                    paid_amount=paid,
+                    remaining_amount=5000000 - paid,
+                    due_date=due_date,
+                    status=status
+                ))
+            db.session.commit()
+            
+            billing_service = BillingService()
+            result = billing_service.update_overdue_penalties(10000, 500000, as_of=as_of, chunk_size=2)
+            
+            self.assertTrue(result['success'])
+            self.assertEqual(result['updated_count'], 2)
+            
+            billings = {b.semester: b for b in Billing.query.all()}
+            self.assertEqual((billings['SEM-0'].penalty, billings['SEM-0'].status), (100000, Billing.STATUS_OVERDUE))
+            self.assertEqual((billings['SEM-1'].penalty, billings['SEM-1'].status), (500000, Billing.STATUS_OVERDUE))
+            self.assertEqual((billings['SEM-2'].penalty, billings['SEM-2'].status), (0, Billing.STATUS_UNPAID))
+            self.assertEqual((billings['SEM-3'].penalty, billings['SEM-3'].status), (0, Billing.STATUS_PAID))
+            
+            # Run kedua dengan as-of yang sama tidak menulis apa pun
+            result = billing_service.update_overdue_penalties(10000, 500000, as_of=as_of)
+            self.assertEqual(result['updated_count'], 0)
+    
+    def test_days_between_is_dialect_aware(self):
+        """Selisih hari dikompilasi per dialect, bukan julianday() SQLite di semua database"""
+        expression = whole_days_between(Billing.updated_at, Billing.due_date)
+        compiled = {
+            name: str(expression.compile(dialect=dialect))
+            for name, dialect in (('sqlite', sqlite.dialect()), ('postgresql', postgresql.dialect()),
+                                  ('mysql', mysql.dialect()))
+        }
+        
+        self.assertIn('julianday(billings.updated_at)', compiled['sqlite'])
+        self.assertIn('EXTRACT(EPOCH FROM (billings.updated_at - billings.due_date))', compiled['postgresql'])
+        self.assertIn('TIMESTAMPDIFF(MICROSECOND, billings.due_date, billings.updated_at)', compiled['mysql'])
+        self.assertNotIn('julianday', compiled['postgresql'] + compiled['mysql'])
+        
+        with self.assertRaises(CompileError):
+            days_between(Billing.updated_at, Billing.due_date).compile(dialect=oracle.dialect())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,280 @@
+import unittest
+from datetime import date, datetime, timedelta
+from app import create_app, db
+from app.models.student import Student, ProgramStudi
+from app.models.billing import Billing
+from app.models.payment import Payment
+from app.models.payment_method import PaymentMethod
+from app.models.billing import Semester
+from app.models.rollup import BillingStatusRollup, DailyPaymentRollup, _payment_day, rebuild_rollups
+from app.services.billing_service import BillingService
+from app.services.payment_service import PaymentService
+from app.utils.query_counter import assert_max_queries
+
+class TestDashboardRoutes(unittest.TestCase):
+    """Test cases untuk Dashboard API routes"""
+    
+    def setUp(self):
+        """Setup test database"""
+        self.app = create_app('testing')
+        self.client = self.app.test_client()
+        
+        with self.app.app_context():
+            db.create_all()
+            self.setup_test_data()
+    
+    def tearDown(self):
+        """Cleanup test database"""
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+    
+    def setup_test_data(self):
+        """Create test data: 20 mahasiswa aktif, masing-masing 2 billing"""
+        ps = ProgramStudi(name='Teknik Informatika', code='TI', spp_amount=5000000)
+        db.session.add(ps)
+        db.session.commit()
+        
+        created = datetime.utcnow() - timedelta(days=200)
+        for i in range(20):
+            student = Student(
+                nim=f'2021{i+1:04d}',
+                name=f'Test Student {i+1}',
+                email=f'student{i+1}@test.com',
+                program_studi_id=ps.id,
+                status='active'
+            )
+            db.session.add(student)
+            db.session.flush()
+            
+            # Billing lama sudah lunas, billing terbaru unpaid/partial bergantian
+            db.session.add(Billing(
+                student_id=student.id,
+                semester='2023/2024-Ganjil',
+                total_amount=5000000,
+                paid_amount=5000000,
+                remaining_amount=0,
+                due_date=created + timedelta(days=14),
+                status=Billing.STATUS_PAID,
+                created_at=created
+            ))
+            latest_paid = 0 if i % 2 == 0 else 2000000
+            db.session.add(Billing(
+                student_id=student.id,
+                semester='2023/2024-Genap',
+                total_amount=5000000,
+                paid_amount=latest_paid,
+                remaining_amount=5000000 - latest_paid,
+                due_date=datetime.utcnow() + timedelta(days=14),
+                status=Billing.STATUS_UNPAID if i % 2 == 0 else Billing.STATUS_PARTIAL,
+                created_at=created + timedelta(days=180)
+            ))
+        db.session.commit()
+    
+    def test_students_status_query_count(self):
+        """Test students-status tidak N+1: jumlah query tetap berapa pun jumlah baris"""
+        with assert_max_queries(2):
+            response = self.client.get('/api/dashboard/students-status?limit=20')
+        data = response.get_json()
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(data['students']), 20)
+        self.assertEqual(response.headers['X-Query-Count'], '2')
+        
+        first = data['students'][0]
+        self.assertEqual(first['program_studi'], 'Teknik Informatika')
+        self.assertEqual(first['latest_billing_status'], 'unpaid')
+        self.assertEqual(first['total_outstanding'], 5000000)
+        self.assertFalse(first['can_register_krs'])
+    
+    def test_students_status_filter_lowercase(self):
+        """Test filter status mencocokkan status lowercase yang tersimpan"""
+        response = self.client.get('/api/dashboard/students-status?status=partial')
+        data = response.get_json()
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(data['pagination']['total'], 10)
+        self.assertTrue(all(s['latest_billing_status'] == 'partial' for s in data['students']))
+        
+        response = self.client.get('/api/dashboard/students-status?status=paid&limit=5&offset=5')
+        data = response.get_json()
+        self.assertEqual(data['pagination']['total'], 20)
+        self.assertEqual(len(data['students']), 5)
+    
+    def test_program_studi_stats_grouped(self):
+        """Test statistik program studi dihitung dengan jumlah query tetap dan filter semester"""
+        with self.app.app_context():
+            db.session.add(ProgramStudi(name='Hukum', code='HK', spp_amount=3500000))
+            pm = PaymentMethod(name='BCA Transfer', method_type='bank_transfer', provider='BCA')
+            db.session.add(pm)
+            db.session.commit()
+            
+            # Pembayaran terkonfirmasi untuk billing semester Genap dua mahasiswa pertama
+            for billing in Billing.query.filter_by(semester='2023/2024-Genap').order_by(Billing.id).limit(2):
+                db.session.add(Payment(
+                    student_id=billing.student_id,
+                    billing_id=billing.id,
+                    payment_method_id=pm.id,
+                    transaction_id=f'TXN-{billing.id}',
+                    reference_code=f'REF-{billing.id}',
+                    amount=1000000,
+                    status=Payment.STATUS_CONFIRMED,
+                    confirmation_date=datetime.utcnow()
+                ))
+            db.session.commit()
+        
+        with assert_max_queries(3):
+            response = self.client.get('/api/dashboard/program-studi-stats')
+        stats = {s['program_studi']: s for s in response.get_json()['program_studi_statistics']}
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(stats['Teknik Informatika']['num_students'], 20)
+        self.assertEqual(stats['Teknik Informatika']['total_billed'], 40 * 5000000)
+        self.assertEqual(stats['Teknik Informatika']['total_paid'], 2000000)
+        self.assertEqual(stats['Hukum']['num_students'], 0)
+        self.assertEqual(stats['Hukum']['total_billed'], 0)
+        
+        response = self.client.get('/api/dashboard/program-studi-stats?semester=2023/2024-Ganjil')
+        stats = {s['program_studi']: s for s in response.get_json()['program_studi_statistics']}
+        self.assertEqual(stats['Teknik Informatika']['total_billed'], 20 * 5000000)
+        self.assertEqual(stats['Teknik Informatika']['total_paid'], 0)
+        
+        response = self.client.get('/api/dashboard/program-studi-stats?start_date=not-a-date')
+        self.assertEqual(response.status_code, 400)
+    
+    def rollup_snapshot(self):
+        """Isi tabel rekap (tanpa baris nol) untuk dibandingkan"""
+        billing = sorted(
+            (r.semester, r.program_studi_id, r.status, r.count, r.total, r.remaining)
+            for r in BillingStatusRollup.query.all() if r.count
+        )
+        payment = sorted(
+            (r.date, r.program_studi_id, r.payment_method_id, r.count, r.amount)
+            for r in DailyPaymentRollup.query.all() if r.count
+        )
+        return billing, payment
+    
+    def test_payment_day_is_a_date_on_any_dialect(self):
+        """Test tanggal rekap dibaca lewat tipe Date, bukan strptime string khas SQLite"""
+        with self.app.app_context():
+            pm = PaymentMethod(name='BCA Transfer', method_type='bank_transfer', provider='BCA')
+            db.session.add(pm)
+            db.session.commit()
+            
+            billing = Billing.query.order_by(Billing.id).first()
+            db.session.add(Payment(
+                student_id=billing.student_id,
+                billing_id=billing.id,
+                payment_method_id=pm.id,
+                transaction_id='TXN-DAY',
+                reference_code='REF-DAY',
+                amount=1000000,
+                status=Payment.STATUS_CONFIRMED,
+                confirmation_date=datetime(2024, 3, 5, 14, 30)
+            ))
+            db.session.commit()
+            
+            self.assertIsInstance(_payment_day().type, db.Date)
+            self.assertEqual(db.session.execute(db.select(_payment_day())).scalar_one(), date(2024, 3, 5))
+            
+            rebuild_rollups()
+            db.session.commit()
+            self.assertEqual(DailyPaymentRollup.query.filter(DailyPaymentRollup.count > 0).one().date, date(2024, 3, 5))
+    
+    def test_rollups_incremental_matches_rebuild(self):
+        """Test rekap yang dijaga inkremental sama dengan hasil rebuild penuh"""
+        with self.app.app_context():
+            pm = PaymentMethod(name='BCA Transfer', method_type='bank_transfer', provider='BCA')
+            db.session.add(pm)
+            db.session.add(ProgramStudi(name='Hukum', code='HK', spp_amount=3500000))
+            semester = Semester(
+                name='2024/2025-Ganjil',
+                start_date=datetime.utcnow(),
+                end_date=datetime.utcnow() + timedelta(days=120),
+                is_active=True
+            )
+            db.session.add(semester)
+            db.session.commit()
+            
+            # Rekap awal berasal dari setup_test_data (insert ORM)
+            BillingService().generate_billing_for_semester(semester.id, billing_due_days=-3)
+            BillingService().update_overdue_penalties(10000, 500000)
+            
+            payment_service = PaymentService()
+            billings = Billing.query.filter_by(semester='2024/2025-Ganjil').order_by(Billing.id).limit(3).all()
+            payment_service.process_payment(billings[0].id, 5000000, pm.id, 'TXN-R1')
+            payment_service.process_payment(billings[1].id, 1000000, pm.id, 'TXN-R2')
+            
+            db.session.delete(Billing.query.get(billings[2].id))
+            student = Student.query.get(billings[1].student_id)
+            student.program_studi_id = ProgramStudi.query.filter_by(code='HK').first().id
+            db.session.commit()
+            
+            incremental = self.rollup_snapshot()
+            rebuild_rollups()
+            db.session.commit()
+            rebuilt = self.rollup_snapshot()
+            
+            self.assertEqual(incremental, rebuilt)
+            self.assertEqual(sum(row[3] for row in rebuilt[1]), 2)
+        
+        response = self.client.get('/api/dashboard/billing-breakdown')
+        breakdown = response.get_json()['breakdown']
+        self.assertEqual(breakdown['paid']['count'], 21)
+        self.assertEqual(breakdown['overdue']['count'], 17)
+        
+        response = self.client.get('/api/dashboard/daily-report')
+        summary = response.get_json()['summary']
+        self.assertEqual(summary['payments_received_today'], 6000000)
+        self.assertEqual(summary['payments_count'], 2)
+        self.assertEqual(summary['overdue_count'], 17)
+    
+    def test_dashboard_cache_etag_and_invalidation(self):
+        """Test response dashboard di-cache, mendukung ETag 304, dan invalid setelah write"""
+        first = self.client.get('/api/dashboard/summary')
+        etag = first.headers['ETag']
+        
+        with assert_max_queries(0):
+            second = self.client.get('/api/dashboard/summary')
+        self.assertEqual(second.headers['ETag'], etag)
+        
+        not_modified = self.client.get('/api/dashboard/summary', headers={'If-None-Match': etag})
+        self.assertEqual(not_modified.status_code, 304)
+        
+        with self.app.app_context():
+            pm = PaymentMethod(name='BCA Transfer', method_type='bank_transfer', provider='BCA')
+            db.session.add(pm)
+            db.session.commit()
+            billing = Billing.query.filter_by(status=Billing.STATUS_UNPAID).first()
+            PaymentService().process_payment(billing.id, 5000000, pm.id, 'TXN-CACHE')
+        
+        refreshed = self.client.get('/api/dashboard/summary', headers={'If-None-Match': etag})
+        self.assertEqual(refreshed.status_code, 200)
+        self.assertNotEqual(refreshed.headers['ETag'], etag)
+        self.assertEqual(refreshed.get_json()['metrics']['total_paid'], 5000000)
+    
+    def test_financial_report_aggregates(self):
+        """Test laporan keuangan dihitung dari agregat dengan jumlah query tetap"""
+        with self.app.app_context():
+            pm = PaymentMethod(name='BCA Transfer', method_type='bank_transfer', provider='BCA')
+            db.session.add(pm)
+            db.session.commit()
+            payment_service = PaymentService()
+            for billing in Billing.query.filter_by(status=Billing.STATUS_UNPAID).limit(3).all():
+                payment_service.process_payment(billing.id, 1000000, pm.id, f'TXN-AI-{billing.id}')
+        
+        with assert_max_queries(4):
+            response = self.client.get('/api/dashboard/financial-report?days=365')
+        report = response.get_json()
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(report['revenue_metrics']['total_revenue'], 3000000)
+        self.assertEqual(report['revenue_metrics']['total_payments'], 3)
+        self.assertEqual(report['revenue_metrics']['total_billed'], 40 * 5000000)
+        self.assertEqual(len(report['top_outstanding_billings']), 10)
+        self.assertEqual(report['top_outstanding_billings'][0]['amount'], 5000000)
+        self.assertTrue(report['top_outstanding_billings'][0]['student_nim'].startswith('2021'))
+        self.assertIn('insights', report['ai_insights'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+# tests/test_export.py
+import csv
+import gzip
+import io
+import json
+import unittest
+from datetime import datetime, timedelta
+from app import create_app, db
+from app.models.student import Student, ProgramStudi
+from app.models.billing import Billing
+from app.models.payment import Payment
+from app.models.payment_method import PaymentMethod
+from app.services.export_service import ExportService
+
+SEMESTER = '2023/2024-Ganjil'
+
+class TestStreamingExport(unittest.TestCase):
+    """Test cases untuk streaming export billing dan pembayaran"""
+    
+    NUM_STUDENTS = 12
+    
+    def setUp(self):
+        """Setup test database"""
+        self.app = create_app('testing')
+        self.client = self.app.test_client()
+        
+        with self.app.app_context():
+            db.create_all()
+            self.setup_test_data()
+    
+    def tearDown(self):
+        """Cleanup test database"""
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+    
+    def setup_test_data(self):
+        """Billing dua semester, pembayaran untuk billing semester export"""
+        ps = ProgramStudi(name='Teknik Informatika', code='TI', spp_amount=5000000)
+        pm = PaymentMethod(name='Virtual Account BCA', method_type='virtual_account', provider='BCA')
+        db.session.add_all([ps, pm])
+        db.session.commit()
+        
+        for i in range(self.NUM_STUDENTS):
+            student = Student(
+                nim=f'20210000{i:02d}',
+                name=f'Test Student {i}',
+                email=f'student{i}@test.com',
+                program_studi_id=ps.id,
+                status='active'
+            )
+            db.session.add(student)
+            db.session.flush()
+            
+            for semester in (SEMESTER, '2022/2023-Genap'):
+                billing = Billing(
+                    student_id=student.id,
+                    semester=semester,
+                    total_amount=5000000,
+                    remaining_amount=5000000,
+                    due_date=datetime.utcnow() + timedelta(days=30),
+                    status=Billing.STATUS_UNPAID
+                )
+                db.session.add(billing)
+                db.session.flush()
+            
+            # Billing terakhir (semester lain) tidak ikut export pembayaran
+            if i % 3 == 0:
+                db.session.add(Payment(
+                    student_id=student.id,
+                    billing_id=billing.id - 1,
+                    payment_method_id=pm.id,
+                    transaction_id=f'TRX-{i}',
+                    reference_code=f'PAY-{i}',
+                    amount=1000000,
+                    gateway_name='Midtrans',
+                    status=Payment.STATUS_CONFIRMED,
+                    payment_date=datetime(2023, 9, 1, 10, 0)
+                ))
+        db.session.commit()
+    
+    def test_billing_csv_export(self):
+        response = self.client.get(f'/api/billing/export?semester={SEMESTER}&format=csv')
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'text/csv')
+        self.assertIn('billings-2023-2024-Ganjil.csv', response.headers['Content-Disposition'])
+        
+        rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+        self.assertEqual(len(rows), self.NUM_STUDENTS)
+        self.assertEqual({row['semester'] for row in rows}, {SEMESTER})
+        self.assertEqual(rows[0]['nim'], '2021000000')
+        self.assertEqual(rows[0]['program_studi'], 'TI')
+        self.assertEqual([int(row['id']) for row in rows], sorted(int(row['id']) for row in rows))
+    
+    def test_payment_ndjson_gzip_export(self):
+        response = self.client.get(f'/api/payment/export?semester={SEMESTER}&format=ndjson&gzip=true')
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/gzip')
+        
+        lines = gzip.decompress(response.get_data()).decode().splitlines()
+        payments = [json.loads(line) for line in lines]
+        self.assertEqual(len(payments), 4)
+        self.assertEqual(payments[0]['semester'], SEMESTER)
+        self.assertEqual(payments[0]['payment_method'], 'Virtual Account BCA')
+        self.assertEqual(payments[0]['payment_date'], '2023-09-01T10:00:00')
+    
+    def test_export_streams_in_batches(self):
+        """Export tidak memuat entity ORM ke identity map session"""
+        with self.app.test_request_context():
+            chunks = ExportService(yield_per=5).export_billings(SEMESTER, fmt='ndjson')
+            body = b''.join(chunks).decode()
+            
+            self.assertEqual(len(body.splitlines()), self.NUM_STUDENTS)
+            self.assertEqual(len(db.session.identity_map), 0)
+    
+    def test_export_validation(self):
+        self.assertEqual(self.client.get('/api/billing/export').status_code, 400)
+        response = self.client.get(f'/api/payment/export?semester={SEMESTER}&format=xlsx')
+        self.assertEqual(response.status_code, 400)
+
+if __name__ == '__main__':
+    unittest.main()
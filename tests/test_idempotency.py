@@ -0,0 +1,160 @@
+# tests/test_idempotency.py
+import unittest
+from datetime import datetime, timedelta
+from flask.cli import ScriptInfo
+from app import create_app, db
+from app.cli import purge_idempotency_keys_command
+from app.models.student import Student, ProgramStudi
+from app.models.billing import Billing
+from app.models.payment import Payment
+from app.models.payment_method import PaymentMethod
+from app.models.idempotency import IdempotencyKey
+from app.services.payment_service import PaymentService
+from app.utils.idempotency import purge_idempotency_keys
+
+class TestIdempotency(unittest.TestCase):
+    """Test cases untuk idempotency key pada endpoint pembayaran"""
+    
+    def setUp(self):
+        """Setup test database"""
+        self.app = create_app('testing')
+        self.client = self.app.test_client()
+        
+        with self.app.app_context():
+            db.create_all()
+            self.setup_test_data()
+    
+    def tearDown(self):
+        """Cleanup test database"""
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+    
+    def setup_test_data(self):
+        """Create test data"""
+        ps = ProgramStudi(name='Teknik Informatika', code='TI', spp_amount=5000000)
+        pm = PaymentMethod(name='Test Payment', method_type='bank_transfer', provider='BCA')
+        db.session.add_all([ps, pm])
+        db.session.commit()
+        
+        student = Student(
+            nim='2021000001',
+            name='Test Student',
+            email='student@test.com',
+            program_studi_id=ps.id,
+            status='active'
+        )
+        db.session.add(student)
+        db.session.commit()
+        
+        billing = Billing(
+            student_id=student.id,
+            semester='2023/2024-Ganjil',
+            total_amount=5000000,
+            remaining_amount=5000000,
+            due_date=datetime.utcnow(),
+            status=Billing.STATUS_UNPAID
+        )
+        db.session.add(billing)
+        db.session.commit()
+        
+        self.billing_id = billing.id
+        self.payment_method_id = pm.id
+    
+    def payment_request(self, transaction_id='TXN001', amount=1000000):
+        return {
+            'billing_id': self.billing_id,
+            'amount': amount,
+            'payment_method_id': self.payment_method_id,
+            'transaction_id': transaction_id
+        }
+    
+    def test_replay_returns_original_response(self):
+        """Request ulang dengan transaction_id sama tidak membayar dua kali"""
+        first = self.client.post('/api/payment/process', json=self.payment_request())
+        second = self.client.post('/api/payment/process', json=self.payment_request())
+        
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(second.status_code, 201)
+        self.assertEqual(second.get_json(), first.get_json())
+        self.assertEqual(second.headers.get('Idempotent-Replay'), 'true')
+        
+        with self.app.app_context():
+            self.assertEqual(Payment.query.count(), 1)
+            self.assertEqual(IdempotencyKey.query.count(), 1)
+            self.assertEqual(db.session.get(Billing, self.billing_id).paid_amount, 1000000)
+    
+    def test_replay_survives_memory_cache_loss(self):
+        """Response tersimpan di tabel, tidak hanya di LRU in-memory"""
+        first = self.client.post('/api/payment/process', json=self.payment_request())
+        self.app.extensions['idempotency_store'].clear()
+        
+        second = self.client.post('/api/payment/process', json=self.payment_request())
+        
+        self.assertEqual(second.get_json(), first.get_json())
+        self.assertEqual(second.headers.get('Idempotent-Replay'), 'true')
+    
+    def test_header_key_reused_with_different_body(self):
+        """Idempotency-Key yang sama untuk request berbeda ditolak 422"""
+        headers = {'Idempotency-Key': 'client-key-1'}
+        self.client.post('/api/payment/process', json=self.payment_request('TXN001'), headers=headers)
+        response = self.client.post('/api/payment/process', json=self.payment_request('TXN002'), headers=headers)
+        
+        self.assertEqual(response.status_code, 422)
+        with self.app.app_context():
+            self.assertEqual(Payment.query.count(), 1)
+    
+    def test_failed_response_is_not_stored(self):
+        """Response gagal tidak disimpan sehingga request boleh diulang"""
+        request_data = self.payment_request(amount=0)
+        response = self.client.post('/api/payment/process', json=request_data)
+        
+        self.assertEqual(response.status_code, 400)
+        with self.app.app_context():
+            self.assertEqual(IdempotencyKey.query.count(), 0)
+    
+    def test_service_detects_duplicate_transaction(self):
+        """process_payment mengembalikan pembayaran asli untuk transaction_id ganda"""
+        with self.app.app_context():
+            payment_service = PaymentService()
+            first = payment_service.process_payment(self.billing_id, 1000000, self.payment_method_id, 'TXN001')
+            second = payment_service.process_payment(self.billing_id, 1000000, self.payment_method_id, 'TXN001')
+            
+            self.assertTrue(second['success'])
+            self.assertTrue(second['duplicate'])
+            self.assertEqual(second['payment'].id, first['payment'].id)
+            self.assertEqual(db.session.get(Billing, self.billing_id).paid_amount, 1000000)
+    
+    def test_expired_keys_are_purged(self):
+        """Key lewat masa retensi dihapus dari tabel dan LRU, key baru tetap"""
+        self.client.post('/api/payment/process', json=self.payment_request('TXN001'))
+        self.client.post('/api/payment/process', json=self.payment_request('TXN002'))
+        
+        with self.app.app_context():
+            old = IdempotencyKey.query.filter_by(key='TXN001').one()
+            old.created_at = datetime.utcnow() - timedelta(days=self.app.config['IDEMPOTENCY_RETENTION_DAYS'] + 1)
+            db.session.commit()
+            
+            self.assertEqual(purge_idempotency_keys(chunk_size=1), 1)
+            self.assertEqual([row.key for row in IdempotencyKey.query], ['TXN002'])
+        
+        # Tidak lagi di-replay dari cache memori
+        response = self.client.post('/api/payment/process', json=self.payment_request('TXN001'))
+        self.assertIsNone(response.headers.get('Idempotent-Replay'))
+    
+    def test_purge_idempotency_keys_command(self):
+        self.client.post('/api/payment/process', json=self.payment_request())
+        runner = self.app.test_cli_runner()
+        obj = ScriptInfo(create_app=lambda: self.app)
+        
+        result = runner.invoke(purge_idempotency_keys_command, obj=obj)
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn('0 idempotency key', result.output)
+        
+        result = runner.invoke(purge_idempotency_keys_command, ['--days', '0'], obj=obj)
+        self.assertIn('1 idempotency key', result.output)
+        with self.app.app_context():
+            self.assertEqual(IdempotencyKey.query.count(), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,187 @@
+# tests/test_job_runner.py
+import threading
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from flask.cli import ScriptInfo
+from app import create_app, db
+from app.cli import run_job_command
+from app.models.student import Student, ProgramStudi
+from app.models.billing import Billing, Semester
+from app.models.job_run import JobRun
+from app.schedulers import JobContext, JobRunner
+from app.schedulers.billing_scheduler import generate_billing_job, send_reminder_job, update_penalty_job
+
+class TestJobRunner(unittest.TestCase):
+    """Test cases untuk job runner scheduler: app context, chunk, checkpoint, dan job_runs"""
+    
+    def setUp(self):
+        """Setup test database"""
+        self.app = create_app('testing', {'JOB_CHUNK_SIZE': 2})
+        
+        with self.app.app_context():
+            db.create_all()
+            self.setup_test_data()
+    
+    def tearDown(self):
+        """Cleanup test database"""
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+    
+    def setup_test_data(self):
+        """Create test data: 5 mahasiswa aktif dengan billing lewat jatuh tempo"""
+        ps = ProgramStudi(name='Teknik Informatika', code='TI', spp_amount=5000000)
+        db.session.add(ps)
+        db.session.commit()
+        
+        for i in range(5):
+            student = Student(
+                nim=f'2021000{i+1}',
+                name=f'Test Student {i+1}',
+                email=f'student{i+1}@test.com',
+                program_studi_id=ps.id,
+                status='active'
+            )
+            db.session.add(student)
+        db.session.commit()
+        
+        semester = Semester(
+            name='2023/2024-Ganjil',
+            start_date=datetime.utcnow(),
+            end_date=datetime.utcnow() + timedelta(days=120),
+            is_active=True
+        )
+        db.session.add(semester)
+        db.session.commit()
+        
+        for student in Student.query.order_by(Student.id):
+            db.session.add(Billing(
+                student_id=student.id,
+                semester='2022/2023-Genap',
+                total_amount=5000000,
+                remaining_amount=5000000,
+                due_date=datetime.utcnow() - timedelta(days=5),
+                status=Billing.STATUS_UNPAID
+            ))
+        db.session.commit()
+    
+    def latest_run(self, job_name):
+        with self.app.app_context():
+            return JobRun.query.filter_by(job_name=job_name).order_by(JobRun.id.desc()).first()
+    
+    def test_runs_in_app_context_from_scheduler_thread(self):
+        runner = JobRunner(self.app)
+        results = []
+        
+        def job(run):
+            return Semester.query.filter_by(is_active=True).one().name
+        
+        thread = threading.Thread(target=lambda: results.append(runner.run('context_job', job)))
+        thread.start()
+        thread.join()
+        
+        self.assertEqual(results, ['2023/2024-Ganjil'])
+        self.assertEqual(self.latest_run('context_job').status, JobRun.STATUS_SUCCESS)
+    
+    def test_penalty_job_commits_per_chunk(self):
+        with self.app.app_context():
+            self.assertEqual(update_penalty_job(), 5)
+            
+            run = JobRun.query.filter_by(job_name='update_penalty_job').one()
+            self.assertEqual(run.status, JobRun.STATUS_SUCCESS)
+            self.assertEqual(run.chunks, 3)
+            self.assertEqual(run.rows_scanned, 5)
+            self.assertEqual(run.rows_updated, 5)
+            self.assertEqual(run.checkpoint, {'last_id': Billing.query.count()})
+            self.assertIn('as_of', run.params)
+            self.assertIsNotNone(run.duration_seconds)
+            
+            # Run berikutnya mulai dari awal, tidak ada yang berubah
+            self.assertEqual(update_penalty_job(), 0)
+            self.assertEqual(JobRun.query.filter_by(job_name='update_penalty_job').count(), 2)
+            self.assertIsNone(self.latest_run('update_penalty_job').resumed_from_id)
+    
+    def test_failed_run_resumes_from_checkpoint(self):
+        record_chunk = JobContext.record_chunk
+        calls = []
+        
+        def failing_record_chunk(context, last_id, scanned=0, updated=0):
+            calls.append(last_id)
+            if len(calls) == 2:
+                raise RuntimeError('database is locked')
+            record_chunk(context, last_id, scanned, updated)
+        
+        with self.app.app_context():
+            with patch.object(JobContext, 'record_chunk', failing_record_chunk):
+                self.assertIsNone(update_penalty_job())
+            
+            failed = self.latest_run('update_penalty_job')
+            self.assertEqual(failed.status, JobRun.STATUS_FAILED)
+            self.assertIn('database is locked', failed.error)
+            self.assertEqual(failed.checkpoint, {'last_id': 2})
+            
+            # Chunk pertama sudah ter-commit, chunk kedua di-rollback
+            statuses = [billing.status for billing in Billing.query.order_by(Billing.id)]
+            self.assertEqual(statuses, [Billing.STATUS_OVERDUE] * 2 + [Billing.STATUS_UNPAID] * 3)
+            
+            self.assertEqual(update_penalty_job(), 3)
+            resumed = self.latest_run('update_penalty_job')
+            self.assertEqual(resumed.resumed_from_id, failed.id)
+            self.assertEqual(resumed.params, failed.params)
+            self.assertEqual(resumed.rows_updated, 3)
+            self.assertEqual(Billing.query.filter_by(status=Billing.STATUS_OVERDUE).count(), 5)
+    
+    def test_crashed_run_is_interrupted_and_resumed(self):
+        with self.app.app_context():
+            stale = datetime.utcnow() - timedelta(seconds=self.app.config['JOB_RUN_STALE_SECONDS'] + 1)
+            crashed = JobRun(
+                job_name='send_reminder_job', status=JobRun.STATUS_RUNNING, holder='dead-worker',
+                params={'as_of': datetime.utcnow().isoformat()}, checkpoint={'last_id': 3},
+                started_at=stale, heartbeat_at=stale
+            )
+            db.session.add(crashed)
+            db.session.commit()
+            
+            # Update ke overdue dulu agar semua billing masuk reminder
+            self.assertEqual(update_penalty_job(), 5)
+            self.assertEqual(send_reminder_job(), 2)
+            
+            self.assertEqual(db.session.get(JobRun, crashed.id).status, JobRun.STATUS_INTERRUPTED)
+            run = self.latest_run('send_reminder_job')
+            self.assertEqual(run.resumed_from_id, crashed.id)
+            self.assertEqual(run.checkpoint, {'last_id': 5})
+    
+    def test_skips_while_another_run_is_active(self):
+        with self.app.app_context():
+            db.session.add(JobRun(job_name='update_penalty_job', status=JobRun.STATUS_RUNNING, holder='other-worker'))
+            db.session.commit()
+            
+            self.assertIsNone(update_penalty_job())
+            self.assertEqual(JobRun.query.filter_by(job_name='update_penalty_job').count(), 1)
+            self.assertEqual(Billing.query.filter_by(status=Billing.STATUS_OVERDUE).count(), 0)
+    
+    def test_generate_billing_job_in_chunks(self):
+        with self.app.app_context():
+            self.assertEqual(generate_billing_job(), 5)
+            
+            run = self.latest_run('generate_billing_job')
+            self.assertEqual(run.chunks, 3)
+            self.assertEqual(run.rows_updated, 5)
+            self.assertEqual(Billing.query.filter_by(semester='2023/2024-Ganjil').count(), 5)
+            self.assertIsNotNone(Semester.query.filter_by(is_active=True).one().billing_generation_date)
+            
+            # Sudah di-generate: run berikutnya tidak membuat apa-apa
+            self.assertEqual(generate_billing_job(), 0)
+    
+    def test_run_job_command(self):
+        runner = self.app.test_cli_runner()
+        result = runner.invoke(run_job_command, ['update_penalty_job'], obj=ScriptInfo(create_app=lambda: self.app))
+        
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn('5 baris', result.output)
+        self.assertIn('3 chunk', result.output)
+        self.assertEqual(self.latest_run('update_penalty_job').status, JobRun.STATUS_SUCCESS)
+
+if __name__ == '__main__':
+    unittest.main()
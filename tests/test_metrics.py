@@ -0,0 +1,180 @@
+# tests/test_metrics.py
+import hashlib
+import hmac
+import json
+import threading
+import unittest
+from datetime import datetime, timedelta
+from app import create_app, db
+from app.config import Config
+from app.models.student import Student, ProgramStudi
+from app.models.billing import Billing
+from app.schedulers.billing_scheduler import update_penalty_job
+from app.utils.metrics import (
+    Counter, Histogram, HTTP_REQUEST_DURATION, HTTP_REQUEST_QUERIES,
+    SCHEDULER_JOB_DURATION, SCHEDULER_JOB_ROWS, WEBHOOK_EVENTS, track_job
+)
+
+def _count(histogram, **labels):
+    """Jumlah observasi histogram (registry global, jadi test membandingkan selisih)"""
+    state = histogram.get(**labels)
+    return sum(state[:-1]) if state else 0
+
+class TestMetricPrimitives(unittest.TestCase):
+    """Test cases untuk counter/histogram dan format teks Prometheus"""
+    
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = Histogram('test_latency_seconds', 'Latency test', ('endpoint',), buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(value, endpoint='a')
+        
+        lines = histogram.render()
+        self.assertIn('# TYPE test_latency_seconds histogram', lines)
+        self.assertIn('test_latency_seconds_bucket{endpoint="a",le="0.1"} 2', lines)
+        self.assertIn('test_latency_seconds_bucket{endpoint="a",le="1.0"} 3', lines)
+        self.assertIn('test_latency_seconds_bucket{endpoint="a",le="+Inf"} 4', lines)
+        self.assertIn('test_latency_seconds_sum{endpoint="a"} 3.65', lines)
+        self.assertIn('test_latency_seconds_count{endpoint="a"} 4', lines)
+    
+    def test_counter_is_thread_safe_and_escapes_labels(self):
+        counter = Counter('test_events_total', 'Event test', ('outcome',))
+        
+        def work():
+            for _ in range(1000):
+                counter.inc(outcome='ok "quoted"')
+        
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        self.assertEqual(counter.get(outcome='ok "quoted"'), 8000)
+        self.assertIn('test_events_total{outcome="ok \\"quoted\\""} 8000', counter.render())
+        with self.assertRaises(ValueError):
+            counter.inc(status='ok')
+    
+    def test_track_job_records_status_and_rows(self):
+        @track_job('test_job')
+        def job(rows):
+            return rows
+        
+        success_before = _count(SCHEDULER_JOB_DURATION, job='test_job', status='success')
+        failed_before = _count(SCHEDULER_JOB_DURATION, job='test_job', status='failed')
+        rows_before = SCHEDULER_JOB_ROWS.get(job='test_job') or 0
+        
+        job(7)
+        job(None)
+        
+        self.assertEqual(_count(SCHEDULER_JOB_DURATION, job='test_job', status='success'), success_before + 1)
+        self.assertEqual(_count(SCHEDULER_JOB_DURATION, job='test_job', status='failed'), failed_before + 1)
+        self.assertEqual(SCHEDULER_JOB_ROWS.get(job='test_job'), rows_before + 7)
+
+class TestMetricsEndpoint(unittest.TestCase):
+    """Test cases untuk endpoint /metrics dan instrumentasi request, job, webhook"""
+    
+    def setUp(self):
+        """Setup test database"""
+        self.app = create_app('testing')
+        self.client = self.app.test_client()
+        
+        with self.app.app_context():
+            db.create_all()
+            self.setup_test_data()
+    
+    def tearDown(self):
+        """Cleanup test database"""
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+    
+    def setup_test_data(self):
+        """Satu mahasiswa dengan billing lewat jatuh tempo"""
+        ps = ProgramStudi(name='Teknik Informatika', code='TI', spp_amount=5000000)
+        db.session.add(ps)
+        db.session.commit()
+        
+        student = Student(
+            nim='2021000001',
+            name='Test Student',
+            email='student@test.com',
+            program_studi_id=ps.id,
+            status='active'
+        )
+        db.session.add(student)
+        db.session.flush()
+        
+        db.session.add(Billing(
+            student_id=student.id,
+            semester='2023/2024-Ganjil',
+            total_amount=5000000,
+            remaining_amount=5000000,
+            due_date=datetime.utcnow() - timedelta(days=3),
+            status=Billing.STATUS_UNPAID
+        ))
+        db.session.commit()
+    
+    def test_request_latency_per_endpoint(self):
+        labels = {'endpoint': 'billing.get_outstanding_billings', 'method': 'GET', 'status': '200'}
+        before = _count(HTTP_REQUEST_DURATION, **labels)
+        queries_before = _count(HTTP_REQUEST_QUERIES, endpoint='billing.get_outstanding_billings')
+        
+        self.assertEqual(self.client.get('/api/billing/outstanding').status_code, 200)
+        self.client.get('/api/does-not-exist')
+        
+        self.assertEqual(_count(HTTP_REQUEST_DURATION, **labels), before + 1)
+        self.assertEqual(_count(HTTP_REQUEST_QUERIES, endpoint='billing.get_outstanding_billings'), queries_before + 1)
+        self.assertGreaterEqual(_count(HTTP_REQUEST_DURATION, endpoint='unmatched', method='GET', status='404'), 1)
+        
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'text/plain')
+        body = response.get_data(as_text=True)
+        self.assertIn('# TYPE http_request_duration_seconds histogram', body)
+        self.assertIn(
+            'http_request_duration_seconds_count{endpoint="billing.get_outstanding_billings",'
+            'method="GET",status="200"}', body
+        )
+    
+    def test_metrics_token(self):
+        app = create_app('testing', {'METRICS_TOKEN': 'scrape-secret'})
+        client = app.test_client()
+        
+        self.assertEqual(client.get('/metrics').status_code, 401)
+        response = client.get('/metrics', headers={'Authorization': 'Bearer scrape-secret'})
+        self.assertEqual(response.status_code, 200)
+    
+    def test_metrics_disabled(self):
+        app = create_app('testing', {'METRICS_ENABLED': False})
+        self.assertEqual(app.test_client().get('/metrics').status_code, 404)
+    
+    def test_scheduler_job_metrics(self):
+        before = _count(SCHEDULER_JOB_DURATION, job='update_penalty_job', status='success')
+        rows_before = SCHEDULER_JOB_ROWS.get(job='update_penalty_job') or 0
+        
+        with self.app.app_context():
+            self.assertEqual(update_penalty_job(), 1)
+        
+        self.assertEqual(_count(SCHEDULER_JOB_DURATION, job='update_penalty_job', status='success'), before + 1)
+        self.assertEqual(SCHEDULER_JOB_ROWS.get(job='update_penalty_job'), rows_before + 1)
+    
+    def test_webhook_outcome_counters(self):
+        rejected_before = WEBHOOK_EVENTS.get(source='direct', outcome='rejected') or 0
+        acknowledged_before = WEBHOOK_EVENTS.get(source='direct', outcome='acknowledged') or 0
+        
+        body = json.dumps({
+            'transaction_id': 'TXN-METRICS-1', 'billing_id': 1, 'student_id': 1,
+            'amount': 1000000, 'status': 'pending'
+        }).encode()
+        signature = hmac.new(Config.PAYMENT_GATEWAY_SECRET.encode(), body, hashlib.sha256).hexdigest()
+        
+        self.client.post('/api/webhook/payment', data=body, content_type='application/json',
+                         headers={'X-Signature': 'invalid'})
+        self.client.post('/api/webhook/payment', data=body, content_type='application/json',
+                         headers={'X-Signature': signature})
+        
+        self.assertEqual(WEBHOOK_EVENTS.get(source='direct', outcome='rejected'), rejected_before + 1)
+        self.assertEqual(WEBHOOK_EVENTS.get(source='direct', outcome='acknowledged'), acknowledged_before + 1)
+
+if __name__ == '__main__':
+    unittest.main()
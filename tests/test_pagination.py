@@ -0,0 +1,142 @@
+# tests/test_pagination.py
+import unittest
+from datetime import datetime, timedelta
+from app import create_app, db
+from app.models.student import Student, ProgramStudi
+from app.models.billing import Billing
+from app.utils.pagination import InvalidCursor, decode_cursor, encode_cursor
+
+class TestCursorEncoding(unittest.TestCase):
+    """Test cases untuk encode/decode cursor opaque"""
+    
+    def test_round_trip(self):
+        values = [datetime(2026, 10, 1, 8, 30, 15, 123), 42]
+        self.assertEqual(decode_cursor(encode_cursor(values), 2), values)
+    
+    def test_invalid_cursor(self):
+        with self.assertRaises(InvalidCursor):
+            decode_cursor('not-a-cursor', 1)
+        with self.assertRaises(InvalidCursor):
+            decode_cursor(encode_cursor([1, 2]), 1)
+
+
+class TestKeysetPagination(unittest.TestCase):
+    """Test cases untuk cursor pagination di endpoint list"""
+    
+    NUM_STUDENTS = 25
+    
+    def setUp(self):
+        """Setup test database"""
+        self.app = create_app('testing')
+        self.client = self.app.test_client()
+        
+        with self.app.app_context():
+            db.create_all()
+            self.setup_test_data()
+    
+    def tearDown(self):
+        """Cleanup test database"""
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+    
+    def setup_test_data(self):
+        """Mahasiswa dua program studi, billing dengan created_at kembar"""
+        ti = ProgramStudi(name='Teknik Informatika', code='TI', spp_amount=5000000)
+        ek = ProgramStudi(name='Ekonomi', code='EK', spp_amount=4000000)
+        db.session.add_all([ti, ek])
+        db.session.commit()
+        
+        created = datetime(2026, 8, 1)
+        for i in range(self.NUM_STUDENTS):
+            student = Student(
+                nim=f'20210000{i:02d}',
+                name=f'Test Student {i}',
+                email=f'student{i}@test.com',
+                program_studi_id=ti.id if i % 2 == 0 else ek.id,
+                status='active'
+            )
+            db.session.add(student)
+            db.session.flush()
+            
+            # Tiga billing berbagi created_at yang sama: urutan harus stabil lewat id
+            db.session.add(Billing(
+                student_id=student.id,
+                semester='2023/2024-Ganjil',
+                total_amount=5000000,
+                remaining_amount=5000000,
+                due_date=created + timedelta(days=30),
+                status=Billing.STATUS_UNPAID,
+                created_at=created + timedelta(days=i // 3)
+            ))
+        db.session.commit()
+        self.program_id = ti.id
+    
+    def walk(self, url, key):
+        """Ikuti next_cursor sampai habis, kembalikan semua item dan response per halaman"""
+        items, pages = [], []
+        cursor = None
+        while True:
+            separator = '&' if '?' in url else '?'
+            response = self.client.get(url + (f'{separator}cursor={cursor}' if cursor else ''))
+            self.assertEqual(response.status_code, 200, response.get_json())
+            data = response.get_json()
+            pages.append(data)
+            items.extend(data[key])
+            
+            pagination = data.get('pagination', data)
+            cursor = pagination['next_cursor']
+            if not pagination['has_more']:
+                self.assertIsNone(cursor)
+                return items, pages
+    
+    def test_outstanding_cursor_walk(self):
+        """Semua billing muncul tepat sekali, terbaru dulu, meski created_at kembar"""
+        items, pages = self.walk('/api/billing/outstanding?limit=4', 'billings')
+        
+        ids = [billing['id'] for billing in items]
+        self.assertEqual(len(ids), self.NUM_STUDENTS)
+        self.assertEqual(len(set(ids)), self.NUM_STUDENTS)
+        self.assertEqual(len(pages), 7)
+        
+        with self.app.app_context():
+            expected = [b.id for b in Billing.query.order_by(Billing.created_at.desc(), Billing.id.desc())]
+        self.assertEqual(ids, expected)
+        
+        # Total hanya di halaman pertama (tanpa cursor)
+        self.assertEqual(pages[0]['total'], self.NUM_STUDENTS)
+        self.assertNotIn('total', pages[1])
+    
+    def test_student_lists_paginated(self):
+        items, pages = self.walk('/api/billing/student?limit=10', 'students')
+        self.assertEqual([s['id'] for s in items], sorted(s['id'] for s in items))
+        self.assertEqual(len(items), self.NUM_STUDENTS)
+        self.assertEqual(pages[0]['total'], self.NUM_STUDENTS)
+        
+        items, _ = self.walk(f'/api/billing/student/program/{self.program_id}?limit=5', 'students')
+        self.assertEqual(len(items), 13)
+        
+        items, _ = self.walk('/api/billing/student/search?q=Student&limit=7', 'students')
+        self.assertEqual(len(items), self.NUM_STUDENTS)
+    
+    def test_students_status_and_krs_report_cursor(self):
+        items, pages = self.walk('/api/dashboard/students-status?limit=10', 'students')
+        self.assertEqual(len({s['student_id'] for s in items}), self.NUM_STUDENTS)
+        self.assertEqual(pages[0]['pagination']['total'], self.NUM_STUDENTS)
+        
+        items, pages = self.walk('/api/billing/krs-eligibility-report?limit=10', 'students')
+        self.assertEqual(len({s['student_id'] for s in items}), self.NUM_STUDENTS)
+        self.assertEqual(pages[-1]['pagination']['total'], self.NUM_STUDENTS)
+    
+    def test_include_total_and_invalid_cursor(self):
+        first = self.client.get('/api/billing/student?limit=5&include_total=false').get_json()
+        self.assertNotIn('total', first)
+        
+        second = self.client.get(f"/api/billing/student?limit=5&include_total=true&cursor={first['next_cursor']}")
+        self.assertEqual(second.get_json()['total'], self.NUM_STUDENTS)
+        
+        response = self.client.get('/api/billing/outstanding?cursor=garbage')
+        self.assertEqual(response.status_code, 400)
+
+if __name__ == '__main__':
+    unittest.main()
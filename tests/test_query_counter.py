@@ -0,0 +1,94 @@
+# tests/test_query_counter.py
+import unittest
+from datetime import datetime, timedelta
+from app import create_app, db
+from app.models.student import Student, ProgramStudi
+from app.models.billing import Billing
+from app.models.payment import Payment
+from app.models.payment_method import PaymentMethod
+from app.utils.query_counter import assert_max_queries
+
+class TestQueryCounter(unittest.TestCase):
+    """Test cases untuk penghitung query per request dan deteksi N+1"""
+    
+    def setUp(self):
+        """Setup test database"""
+        self.app = create_app('testing')
+        self.client = self.app.test_client()
+        
+        with self.app.app_context():
+            db.create_all()
+            self.setup_test_data()
+    
+    def tearDown(self):
+        """Cleanup test database"""
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+    
+    def setup_test_data(self):
+        """Satu mahasiswa dengan pembayaran dari lima metode pembayaran berbeda"""
+        ps = ProgramStudi(name='Teknik Informatika', code='TI', spp_amount=5000000)
+        db.session.add(ps)
+        db.session.commit()
+        
+        student = Student(nim='2021000001', name='Test Student', email='student@test.com',
+                          program_studi_id=ps.id, status='active')
+        db.session.add(student)
+        db.session.flush()
+        
+        billing = Billing(student_id=student.id, semester='2023/2024-Ganjil', total_amount=5000000,
+                          remaining_amount=5000000, due_date=datetime.utcnow() + timedelta(days=14),
+                          status=Billing.STATUS_UNPAID)
+        db.session.add(billing)
+        db.session.flush()
+        
+        for i in range(5):
+            pm = PaymentMethod(name=f'Metode {i}', method_type='bank_transfer', provider=f'Bank {i}')
+            db.session.add(pm)
+            db.session.flush()
+            db.session.add(Payment(student_id=student.id, billing_id=billing.id, payment_method_id=pm.id,
+                                   transaction_id=f'TRX-{i}', reference_code=f'PAY-{i}', amount=100000,
+                                   status=Payment.STATUS_CONFIRMED, payment_date=datetime(2023, 9, 1 + i)))
+        db.session.commit()
+        self.student_id = student.id
+    
+    def test_query_headers(self):
+        response = self.client.get('/api/billing/outstanding')
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['X-Query-Count'], '2')
+        self.assertIn('db;dur=', response.headers['Server-Timing'])
+        self.assertIn('desc="2 queries"', response.headers['Server-Timing'])
+        self.assertIn('app;dur=', response.headers['Server-Timing'])
+    
+    def test_student_profile_not_n_plus_one(self):
+        """Metode pembayaran di-join, bukan lazy load per pembayaran"""
+        with assert_max_queries(3):
+            response = self.client.get(f'/api/dashboard/student-profile/{self.student_id}')
+        
+        payments = response.get_json()['recent_payments']
+        self.assertEqual([p['method'] for p in payments], [f'Metode {i}' for i in reversed(range(5))])
+    
+    def test_repeated_statement_logged(self):
+        """Statement identik berulang dalam satu request dicatat sebagai kemungkinan N+1"""
+        @self.app.route('/test/n-plus-one')
+        def n_plus_one():
+            names = [payment.payment_method.name for payment in Payment.query.all()]
+            return {'names': names}
+        
+        with self.assertLogs('SPP_Management', level='WARNING') as logs:
+            response = self.client.get('/test/n-plus-one')
+        
+        self.assertEqual(response.headers['X-Query-Count'], '6')
+        self.assertIn('Possible N+1 on GET /test/n-plus-one: statement executed 5x', logs.output[0])
+    
+    def test_assert_max_queries_fails_with_details(self):
+        with self.assertRaises(AssertionError) as raised:
+            with assert_max_queries(1):
+                self.client.get(f'/api/payment/history/{self.student_id}?include_total=true&limit=1')
+        
+        self.assertIn('Expected at most 1 queries, 2 executed', str(raised.exception))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+# tests/test_query_plan.py
+import unittest
+from datetime import datetime, timedelta
+from app import create_app, db
+from app.models.student import Student, ProgramStudi
+from app.models.billing import Billing, Semester
+from app.models.payment import Payment
+from app.models.payment_method import PaymentMethod
+from app.utils.query_plan import analyze_queries, exercise_routes, explain_statement, record_queries, route_samples
+
+class TestQueryPlanAdvisor(unittest.TestCase):
+    """Test cases untuk index advisor EXPLAIN QUERY PLAN"""
+    
+    def setUp(self):
+        """Setup test database"""
+        self.app = create_app('testing')
+        
+        with self.app.app_context():
+            db.create_all()
+            self.setup_test_data()
+    
+    def tearDown(self):
+        """Cleanup test database"""
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+    
+    def setup_test_data(self):
+        """Mahasiswa dengan billing dan pembayaran terkonfirmasi"""
+        ps = ProgramStudi(name='Teknik Informatika', code='TI', spp_amount=5000000)
+        pm = PaymentMethod(name='Virtual Account BCA', method_type='virtual_account', provider='BCA')
+        db.session.add_all([ps, pm])
+        db.session.add(Semester(name='2023/2024-Ganjil', start_date=datetime.utcnow(),
+                                end_date=datetime.utcnow() + timedelta(days=120), is_active=True))
+        db.session.commit()
+        
+        for i in range(5):
+            student = Student(nim=f'20210000{i:02d}', name=f'Test Student {i}', email=f'student{i}@test.com',
+                              program_studi_id=ps.id, status='active')
+            db.session.add(student)
+            db.session.flush()
+            
+            billing = Billing(student_id=student.id, semester='2023/2024-Ganjil', total_amount=5000000,
+                              remaining_amount=5000000, due_date=datetime.utcnow() + timedelta(days=14),
+                              status=Billing.STATUS_UNPAID)
+            db.session.add(billing)
+            db.session.flush()
+            
+            db.session.add(Payment(student_id=student.id, billing_id=billing.id, payment_method_id=pm.id,
+                                   transaction_id=f'TRX-{i}', reference_code=f'PAY-{i}', amount=1000000,
+                                   status=Payment.STATUS_CONFIRMED, payment_date=datetime.utcnow(),
+                                   confirmation_date=datetime.utcnow()))
+        db.session.commit()
+    
+    def plan(self, query):
+        statement = query.statement.compile(db.engine, compile_kwargs={'literal_binds': True})
+        with db.engine.connect() as connection:
+            return explain_statement(connection, str(statement), ())['plan']
+    
+    def test_hot_filters_use_composite_indexes(self):
+        with self.app.app_context():
+            cases = [
+                (Billing.query.filter_by(student_id=1, semester='2023/2024-Ganjil'), 'ix_billings_student_semester'),
+                (Billing.query.filter(Billing.status == 'unpaid', Billing.due_date < datetime.utcnow()),
+                 'ix_billings_status_due_date'),
+                (Payment.query.filter(Payment.status == 'confirmed', Payment.confirmation_date >= datetime.utcnow()),
+                 'ix_payments_status_confirmation'),
+                (Student.query.filter_by(status='active', program_studi_id=1), 'ix_students_status_program'),
+            ]
+            for query, index_name in cases:
+                self.assertTrue(any(index_name in detail for detail in self.plan(query)), index_name)
+    
+    def test_routes_have_no_unexpected_full_scans(self):
+        """Regresi: query route GET tidak boleh full scan tabel besar"""
+        with self.app.app_context():
+            samples = route_samples()
+            with record_queries(db.engine) as statements:
+                routes = exercise_routes(self.app, samples)
+            results = analyze_queries(db.engine, statements)
+        
+        self.assertGreater(len(routes['visited']), 15)
+        self.assertGreater(len(results), 20)
+        
+        flagged = [result['statement'] for result in results if result['flagged']]
+        # Pencarian substring (ILIKE '%q%') memang tidak bisa memakai index
+        unexpected = [statement for statement in flagged if 'LIKE' not in statement]
+        self.assertEqual(unexpected, [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,212 @@
+# tests/test_reconciliation.py
+import io
+import unittest
+from datetime import datetime
+from app import create_app, db
+from app.models.student import Student, ProgramStudi
+from app.models.billing import Billing
+from app.models.payment import Payment, PaymentReconciliation
+from app.models.payment_method import PaymentMethod
+from app.models.rollup import BillingStatusRollup, DailyPaymentRollup, rebuild_rollups
+from app.services.reconciliation_service import ReconciliationService, parse_amount
+
+class TestParseAmount(unittest.TestCase):
+    """Test cases untuk parsing nominal rekening koran"""
+    
+    def test_formats(self):
+        self.assertEqual(parse_amount('5.000.000,00'), 5000000)
+        self.assertEqual(parse_amount('5,000,000.00'), 5000000)
+        self.assertEqual(parse_amount('Rp 2.500.000'), 2500000)
+        self.assertEqual(parse_amount('2500000'), 2500000)
+        self.assertEqual(parse_amount('2.500.000,00 CR'), 2500000)
+        self.assertEqual(parse_amount('150.000,00 DB'), -150000)
+        self.assertEqual(parse_amount('-75000'), -75000)
+    
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            parse_amount('abc')
+
+
+class TestReconciliationService(unittest.TestCase):
+    """Test cases untuk rekonsiliasi massal rekening koran"""
+    
+    def setUp(self):
+        """Setup test database"""
+        self.app = create_app('testing')
+        self.client = self.app.test_client()
+        
+        with self.app.app_context():
+            db.create_all()
+            self.setup_test_data()
+    
+    def tearDown(self):
+        """Cleanup test database"""
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+    
+    def setup_test_data(self):
+        """Empat mahasiswa dengan billing; tiga punya payment pending"""
+        ps = ProgramStudi(name='Teknik Informatika', code='TI', spp_amount=5000000)
+        pm = PaymentMethod(name='Virtual Account BCA', method_type='virtual_account', provider='BCA')
+        db.session.add_all([ps, pm])
+        db.session.commit()
+        
+        self.billing_ids = []
+        for i in range(4):
+            student = Student(
+                nim=f'20210000{i:02d}',
+                name=f'Test Student {i}',
+                email=f'student{i}@test.com',
+                program_studi_id=ps.id,
+                status='active'
+            )
+            db.session.add(student)
+            db.session.flush()
+            
+            billing = Billing(
+                student_id=student.id,
+                semester='2023/2024-Ganjil',
+                total_amount=5000000,
+                remaining_amount=5000000,
+                due_date=datetime(2026, 12, 31),
+                status=Billing.STATUS_UNPAID
+            )
+            db.session.add(billing)
+            db.session.flush()
+            self.billing_ids.append(billing.id)
+            
+            if i < 3:
+                db.session.add(Payment(
+                    student_id=student.id,
+                    billing_id=billing.id,
+                    payment_method_id=pm.id,
+                    transaction_id=f'PENDING-{i}',
+                    reference_code=f'PAY20261001000000ABCD0{i}',
+                    # Payment 1 dan 2 sama nominal dan tanggalnya -> ambigu
+                    amount=5000000 if i == 0 else 2500000,
+                    gateway_name='Midtrans',
+                    status=Payment.STATUS_PENDING,
+                    payment_date=datetime(2026, 10, 1, 9, 30)
+                ))
+        
+        db.session.commit()
+        self.payment_method_id = pm.id
+    
+    def statement(self):
+        return io.StringIO(
+            'Tanggal,Keterangan,Kredit,Reference,VA\n'
+            '01/10/2026,TRF SPP PAY20261001000000ABCD00,"5.000.000,00",,\n'
+            '02/10/2026,SETORAN VA,"1.500.000,00",,88082021000003\n'
+            '01/10/2026,TRANSFER MASUK,"2.500.000,00",,\n'
+            '03/10/2026,TRANSFER LAIN,"750.000,00",,\n'
+            '03/10/2026,BIAYA ADMIN,"6.500,00 DB",,\n'
+            'kemarin,RUSAK,"100.000,00",,\n'
+        )
+    
+    def test_match_modes_and_report(self):
+        """Reference, VA, ambigu, tidak cocok, debit, dan baris rusak dilaporkan terpisah"""
+        with self.app.app_context():
+            report = ReconciliationService(va_prefix='8808').reconcile_csv(self.statement(), self.payment_method_id)
+            
+            self.assertTrue(report['success'])
+            self.assertEqual(report['total_lines'], 6)
+            self.assertEqual(report['matched'], {'reference': 1, 'va_number': 1, 'amount_date': 0})
+            self.assertEqual(report['matched_amount'], 6500000)
+            self.assertEqual(report['skipped'], 1)
+            self.assertEqual([line['line_no'] for line in report['ambiguous']], [4])
+            self.assertEqual(len(report['ambiguous'][0]['candidates']), 2)
+            self.assertEqual([line['line_no'] for line in report['unmatched']], [5])
+            self.assertEqual([line['line_no'] for line in report['invalid']], [7])
+            
+            paid = db.session.get(Billing, self.billing_ids[0])
+            self.assertEqual(paid.status, Billing.STATUS_PAID)
+            self.assertEqual(paid.version, 2)
+            self.assertEqual(Payment.query.filter_by(transaction_id='PENDING-0').one().status, Payment.STATUS_CONFIRMED)
+            
+            partial = db.session.get(Billing, self.billing_ids[3])
+            self.assertEqual(partial.paid_amount, 1500000)
+            self.assertEqual(partial.status, Billing.STATUS_PARTIAL)
+            va_payment = Payment.query.filter_by(billing_id=partial.id).one()
+            self.assertTrue(va_payment.transaction_id.startswith('BANK-'))
+            self.assertEqual(db.session.get(Student, partial.student_id).outstanding_amount, 3500000)
+            self.assertEqual(db.session.get(Student, paid.student_id).outstanding_amount, 0)
+            
+            self.assertEqual(PaymentReconciliation.query.count(), 2)
+    
+    def test_amount_date_match(self):
+        """Nominal + tanggal yang unik mengonfirmasi payment pending"""
+        statement = io.StringIO('date,description,amount\n2026-10-01,TRANSFER,5000000\n')
+        with self.app.app_context():
+            report = ReconciliationService().reconcile_csv(statement, self.payment_method_id)
+            
+            self.assertEqual(report['matched']['amount_date'], 1)
+            self.assertEqual(db.session.get(Billing, self.billing_ids[0]).status, Billing.STATUS_PAID)
+    
+    def test_rollups_stay_consistent(self):
+        """Rekap yang diperbarui manual sama dengan hasil rebuild penuh"""
+        with self.app.app_context():
+            ReconciliationService(va_prefix='8808').reconcile_csv(self.statement(), self.payment_method_id)
+            
+            def snapshot():
+                return (
+                    sorted((r.semester, r.status, r.count, r.total, r.remaining) for r in BillingStatusRollup.query),
+                    sorted((r.date, r.payment_method_id, r.count, r.amount) for r in DailyPaymentRollup.query if r.count)
+                )
+            
+            incremental = snapshot()
+            rebuild_rollups()
+            db.session.commit()
+            self.assertEqual(incremental, snapshot())
+    
+    def test_reimport_is_idempotent(self):
+        """File yang sama diimpor ulang tidak membayar dua kali"""
+        with self.app.app_context():
+            service = ReconciliationService(va_prefix='8808')
+            service.reconcile_csv(self.statement(), self.payment_method_id)
+            report = service.reconcile_csv(self.statement(), self.payment_method_id)
+            
+            self.assertEqual(report['duplicates'], 2)
+            self.assertEqual(sum(report['matched'].values()), 0)
+            self.assertEqual(db.session.get(Billing, self.billing_ids[3]).paid_amount, 1500000)
+            self.assertEqual(PaymentReconciliation.query.count(), 2)
+    
+    def test_dry_run_does_not_write(self):
+        with self.app.app_context():
+            report = ReconciliationService(va_prefix='8808').reconcile_csv(
+                self.statement(), self.payment_method_id, dry_run=True
+            )
+            
+            self.assertEqual(sum(report['matched'].values()), 2)
+            self.assertEqual(db.session.get(Billing, self.billing_ids[0]).paid_amount, 0)
+            self.assertEqual(PaymentReconciliation.query.count(), 0)
+    
+    def test_upload_endpoint(self):
+        """POST /api/payment/reconcile menerima file CSV multipart"""
+        response = self.client.post('/api/payment/reconcile', data={
+            'file': (io.BytesIO(self.statement().getvalue().encode()), 'mutasi.csv'),
+            'payment_method_id': str(self.payment_method_id)
+        }, content_type='multipart/form-data')
+        
+        self.assertEqual(response.status_code, 200, response.get_json())
+        self.assertEqual(response.get_json()['matched']['reference'], 1)
+        
+        missing = self.client.post('/api/payment/reconcile', data={
+            'payment_method_id': str(self.payment_method_id)
+        }, content_type='multipart/form-data')
+        self.assertEqual(missing.status_code, 400)
+    
+    def test_va_prefix_follows_app_config(self):
+        """Service milik route membaca BANK_VA_PREFIX dari app, bukan nilai Config saat import"""
+        self.app.config['BANK_VA_PREFIX'] = '7777'
+        response = self.client.post('/api/payment/reconcile', data={
+            'file': (io.BytesIO(self.statement().getvalue().encode()), 'mutasi.csv'),
+            'payment_method_id': str(self.payment_method_id),
+            'dry_run': 'true'
+        }, content_type='multipart/form-data')
+        
+        self.assertEqual(response.status_code, 200, response.get_json())
+        self.assertEqual(response.get_json()['matched']['va_number'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+# tests/test_scheduler_leader.py
+import unittest
+from datetime import datetime, timedelta
+from app import create_app, db
+from app.models.scheduler_lease import SchedulerLease
+from app.schedulers import LeaderElection, setup_billing_scheduler
+
+class TestSchedulerLeaderElection(unittest.TestCase):
+    """Test cases untuk leader election scheduler berbasis lease database"""
+    
+    def setUp(self):
+        """Setup test database"""
+        self.app = create_app('testing')
+        
+        with self.app.app_context():
+            db.create_all()
+        
+        self.first = LeaderElection(self.app, holder_id='worker-1', ttl=60)
+        self.second = LeaderElection(self.app, holder_id='worker-2', ttl=60)
+    
+    def tearDown(self):
+        """Cleanup test database"""
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+    
+    def get_lease(self):
+        with self.app.app_context():
+            return db.session.get(SchedulerLease, self.app.config['SCHEDULER_LEASE_NAME'])
+    
+    def test_single_leader(self):
+        self.assertTrue(self.first.try_acquire())
+        self.assertFalse(self.second.try_acquire())
+        
+        # Heartbeat memperpanjang lease tanpa mengubah awal kepemimpinan
+        acquired_at = self.get_lease().acquired_at
+        self.assertTrue(self.first.try_acquire())
+        self.assertTrue(self.first.is_leader)
+        self.assertFalse(self.second.is_leader)
+        
+        lease = self.get_lease()
+        self.assertEqual(lease.holder, 'worker-1')
+        self.assertEqual(lease.acquired_at, acquired_at)
+    
+    def test_failover_after_lease_expires(self):
+        self.assertTrue(self.first.try_acquire())
+        
+        # Leader berhenti heartbeat (proses mati) sampai lease kedaluwarsa
+        with self.app.app_context():
+            lease = db.session.get(SchedulerLease, self.app.config['SCHEDULER_LEASE_NAME'])
+            lease.expires_at = datetime.utcnow() - timedelta(seconds=1)
+            db.session.commit()
+        
+        self.assertTrue(self.second.try_acquire())
+        self.assertFalse(self.first.try_acquire())
+        self.assertFalse(self.first.is_leader)
+        self.assertEqual(self.get_lease().holder, 'worker-2')
+    
+    def test_release_hands_over_immediately(self):
+        self.assertTrue(self.first.try_acquire())
+        self.first.release()
+        
+        self.assertIsNone(self.get_lease().holder)
+        self.assertTrue(self.second.try_acquire())
+    
+    def test_jobs_run_only_on_leader(self):
+        calls = []
+        
+        def job():
+            calls.append(1)
+            return len(calls)
+        
+        self.assertEqual(self.first.run_if_leader(job), 1)
+        self.assertIsNone(self.second.run_if_leader(job))
+        self.assertEqual(self.first.run_if_leader(job), 2)
+        self.assertEqual(len(calls), 2)
+    
+    def test_scheduler_disabled(self):
+        self.assertFalse(self.app.config['SCHEDULER_ENABLED'])
+        self.assertIsNone(setup_billing_scheduler(self.app))
+        self.assertIsNone(self.get_lease())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+# tests/test_seed_data.py
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+from flask.cli import ScriptInfo
+from sqlalchemy import func, inspect
+from app import create_app, db
+from app.cli import seed_data_command
+from app.models.student import Student
+from app.models.billing import Billing, Semester
+from app.models.payment import Payment
+from app.models.rollup import BillingStatusRollup
+from app.utils.seed_data import _deferred_indexes, seed_synthetic_data
+
+class TestSeedData(unittest.TestCase):
+    """Test cases untuk generator data sintetis dan command seed-data"""
+    
+    def setUp(self):
+        """Setup test database"""
+        self.app = create_app('testing')
+        
+        with self.app.app_context():
+            db.create_all()
+    
+    def tearDown(self):
+        """Cleanup test database"""
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+    
+    def test_seed_is_consistent(self):
+        with self.app.app_context():
+            result = seed_synthetic_data(300, num_semesters=3, seed=7, now=datetime(2026, 10, 1))
+            
+            self.assertEqual(Student.query.count(), 300)
+            self.assertEqual(Billing.query.count(), result['billings'])
+            self.assertEqual(Payment.query.count(), result['payments'])
+            self.assertEqual(result['semesters'], ['2025/2026-Ganjil', '2025/2026-Genap', '2026/2027-Ganjil'])
+            self.assertEqual(Semester.query.filter_by(is_active=True).one().name, '2026/2027-Ganjil')
+            
+            # Semua status billing muncul
+            statuses = dict(db.session.query(Billing.status, func.count(Billing.id)).group_by(Billing.status).all())
+            self.assertEqual(statuses, {status: count for status, count in result['billing_status'].items() if count})
+            self.assertEqual(set(statuses), set(Billing.VALID_STATUSES))
+            
+            # paid_amount sama dengan jumlah pembayaran confirmed per billing
+            confirmed = dict(db.session.query(Payment.billing_id, func.sum(Payment.amount))
+                             .filter(Payment.status == Payment.STATUS_CONFIRMED).group_by(Payment.billing_id).all())
+            for billing in Billing.query.all():
+                self.assertEqual(billing.paid_amount, confirmed.get(billing.id, 0))
+                self.assertEqual(billing.paid_amount + billing.remaining_amount, billing.total_amount)
+            
+            # Saldo mahasiswa dan tabel rekap ikut dibangun
+            open_total = db.session.query(func.sum(Billing.remaining_amount)).filter(
+                Billing.status.in_(Billing.OPEN_STATUSES)).scalar()
+            self.assertEqual(db.session.query(func.sum(Student.outstanding_amount)).scalar(), open_total)
+            self.assertEqual(db.session.query(func.sum(BillingStatusRollup.count)).scalar(), result['billings'])
+            self.assertGreater(Payment.query.filter_by(status=Payment.STATUS_PENDING).count(), 0)
+    
+    def test_seed_is_reproducible_and_appends(self):
+        with self.app.app_context():
+            seed_synthetic_data(50, num_semesters=2, seed=1)
+            names = [student.name for student in Student.query.order_by(Student.id)]
+            
+            seed_synthetic_data(50, num_semesters=2, seed=1)
+            
+            self.assertEqual(Student.query.count(), 100)
+            self.assertEqual(Semester.query.count(), 2)
+            self.assertEqual([student.name for student in Student.query.order_by(Student.id).offset(50)], names)
+    
+    def test_indexes_restored_when_insert_fails(self):
+        with self.app.app_context():
+            expected = {index['name'] for index in inspect(db.engine).get_indexes('students')}
+            self.assertTrue(expected)
+            
+            with patch('app.utils.seed_data._insert_chunked', side_effect=RuntimeError('disk full')):
+                with self.assertRaises(RuntimeError):
+                    seed_synthetic_data(20, num_semesters=1)
+            
+            # DROP INDEX yang sudah permanen (DDL di luar transaksi) tetap dipulihkan
+            with self.assertRaises(RuntimeError):
+                with _deferred_indexes([Student.__table__]):
+                    db.session.commit()
+                    raise RuntimeError('disk full')
+            
+            db.session.remove()
+            for table in ('students', 'billings', 'payments'):
+                self.assertTrue(inspect(db.engine).get_indexes(table), table)
+            self.assertEqual({index['name'] for index in inspect(db.engine).get_indexes('students')}, expected)
+            self.assertEqual(Student.query.count(), 0)
+    
+    def test_seed_data_command(self):
+        runner = self.app.test_cli_runner()
+        result = runner.invoke(
+            seed_data_command, ['--students', '20', '--semesters', '2'],
+            obj=ScriptInfo(create_app=lambda: self.app)
+        )
+        
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn('20 mahasiswa', result.output)
+        with self.app.app_context():
+            self.assertEqual(Student.query.count(), 20)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+# tests/test_signature.py
+import hashlib
+import hmac
+import json
+import unittest
+from datetime import datetime
+from app import create_app, db
+from app.models.student import Student, ProgramStudi
+from app.models.billing import Billing
+from app.models.payment import Payment
+from app.models.payment_method import PaymentMethod
+from app.utils.signature import WebhookSignatureVerifier
+
+def hmac_hex(secret, body):
+    return hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+class TestWebhookSignatureVerifier(unittest.TestCase):
+    """Test cases untuk verifikasi HMAC atas raw body"""
+    
+    def setUp(self):
+        self.verifier = WebhookSignatureVerifier(['new-secret', 'old-secret'])
+        self.body = b'{"transaction_id": "TXN-001", "amount": 2500000}'
+    
+    def test_valid_signature(self):
+        self.assertTrue(self.verifier.verify(self.body, hmac_hex('new-secret', self.body)))
+        self.assertTrue(self.verifier.verify(self.body, 'sha256=' + hmac_hex('new-secret', self.body)))
+    
+    def test_rotated_secret_still_valid(self):
+        """Secret lama tetap diterima selama masih ada di daftar"""
+        self.assertTrue(self.verifier.verify(self.body, hmac_hex('old-secret', self.body)))
+    
+    def test_invalid_signatures(self):
+        self.assertFalse(self.verifier.verify(self.body, hmac_hex('other-secret', self.body)))
+        self.assertFalse(self.verifier.verify(self.body, None))
+        self.assertFalse(self.verifier.verify(self.body, 'not-hex'))
+        self.assertFalse(self.verifier.verify(self.body + b' ', hmac_hex('new-secret', self.body)))
+    
+    def test_sign_uses_primary_secret(self):
+        self.assertEqual(self.verifier.sign(self.body), hmac_hex('new-secret', self.body))
+    
+    def test_requires_secret(self):
+        with self.assertRaises(ValueError):
+            WebhookSignatureVerifier([])
+
+
+class TestWebhookRouteSignature(unittest.TestCase):
+    """Test cases untuk header signature pada /api/webhook/payment"""
+    
+    def setUp(self):
+        """Setup test database dengan dua secret aktif"""
+        self.app = create_app('testing', config_overrides={
+            'PAYMENT_GATEWAY_SECRETS': ['new-secret', 'old-secret']
+        })
+        self.client = self.app.test_client()
+        
+        with self.app.app_context():
+            db.create_all()
+            self.setup_test_data()
+    
+    def tearDown(self):
+        """Cleanup test database"""
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+    
+    def setup_test_data(self):
+        """Create billing dengan payment pending"""
+        ps = ProgramStudi(name='Teknik Informatika', code='TI', spp_amount=5000000)
+        pm = PaymentMethod(name='Test Payment', method_type='bank_transfer', provider='BCA')
+        db.session.add_all([ps, pm])
+        db.session.commit()
+        
+        student = Student(nim='2021000001', name='Test Student', email='student@test.com',
+                          program_studi_id=ps.id, status='active')
+        db.session.add(student)
+        db.session.commit()
+        
+        billing = Billing(student_id=student.id, semester='2023/2024-Ganjil', total_amount=5000000,
+                          remaining_amount=5000000, due_date=datetime.utcnow(), status=Billing.STATUS_UNPAID)
+        db.session.add(billing)
+        db.session.commit()
+        
+        db.session.add(Payment(student_id=student.id, billing_id=billing.id, payment_method_id=pm.id,
+                               transaction_id='PENDING-001', reference_code='REF-001', amount=5000000,
+                               gateway_name='Midtrans', status=Payment.STATUS_PENDING))
+        db.session.commit()
+        
+        self.billing_id = billing.id
+        self.student_id = student.id
+    
+    def post(self, body, signature):
+        return self.client.post(
+            '/api/webhook/payment',
+            data=body,
+            content_type='application/json',
+            headers={'X-Signature': signature}
+        )
+    
+    def test_signature_over_raw_bytes(self):
+        """Body dengan format bebas (spasi, urutan key) diverifikasi apa adanya"""
+        body = (
+            '{ "status":"success", "amount":2500000, "transaction_id":"TXN-001",'
+            f' "reference_code":"REF-001", "billing_id":{self.billing_id}, "student_id":{self.student_id} }}'
+        ).encode()
+        
+        response = self.post(body, hmac_hex('old-secret', body))
+        
+        self.assertEqual(response.status_code, 200, response.get_json())
+        with self.app.app_context():
+            self.assertEqual(db.session.get(Billing, self.billing_id).paid_amount, 2500000)
+    
+    def test_missing_or_wrong_signature_rejected(self):
+        body = json.dumps({'transaction_id': 'TXN-001', 'status': 'pending'}).encode()
+        
+        self.assertEqual(self.post(body, '').status_code, 401)
+        self.assertEqual(self.post(body, hmac_hex('webhook-secret', body)).status_code, 401)
+    
+    def test_unsigned_replay_does_not_return_stored_response(self):
+        """Signature diverifikasi sebelum lookup idempotency"""
+        body = json.dumps({
+            'transaction_id': 'TXN-001', 'reference_code': 'REF-001', 'billing_id': self.billing_id,
+            'student_id': self.student_id, 'amount': 2500000, 'status': 'success'
+        }).encode()
+        self.assertEqual(self.post(body, hmac_hex('new-secret', body)).status_code, 200)
+        
+        forged = json.dumps({'transaction_id': 'TXN-001', 'status': 'success'}).encode()
+        for signature in ('', hmac_hex('webhook-secret', forged)):
+            response = self.post(forged, signature)
+            self.assertEqual(response.status_code, 401)
+            self.assertIsNone(response.headers.get('Idempotent-Replay'))
+            self.assertNotIn('payment_id', response.get_json())
+    
+    def test_unsigned_batch_with_reused_key_is_rejected(self):
+        body = json.dumps({'notifications': [{'transaction_id': 'TXN-001', 'status': 'pending'}]}).encode()
+        headers = {'Idempotency-Key': 'batch-1'}
+        
+        signed = self.client.post('/api/webhook/payment/batch', data=body, content_type='application/json',
+                                  headers={**headers, 'X-Signature': hmac_hex('new-secret', body)})
+        self.assertEqual(signed.status_code, 200)
+        
+        forged = self.client.post('/api/webhook/payment/batch', data=b'{"notifications": []}',
+                                  content_type='application/json', headers={**headers, 'X-Signature': ''})
+        self.assertEqual(forged.status_code, 401)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+# tests/test_sqlite_profile.py
+import os
+import tempfile
+import unittest
+from sqlalchemy import text
+from app import create_app, db
+from app.config import ProductionConfig
+
+class TestSqliteProductionProfile(unittest.TestCase):
+    """Test cases untuk PRAGMA SQLite profil production"""
+    
+    def setUp(self):
+        """Setup database file sementara dengan PRAGMA production"""
+        fd, self.db_path = tempfile.mkstemp(suffix='.db', prefix='test_sqlite_profile_')
+        os.close(fd)
+        self.app = create_app('testing', config_overrides={
+            'SQLALCHEMY_DATABASE_URI': f'sqlite:///{self.db_path}',
+            'SQLITE_PRAGMAS': ProductionConfig.SQLITE_PRAGMAS
+        })
+    
+    def tearDown(self):
+        """Cleanup database file"""
+        with self.app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.db_path + suffix):
+                os.remove(self.db_path + suffix)
+    
+    def pragma(self, connection, name):
+        return connection.execute(text(f'PRAGMA {name}')).scalar()
+    
+    def test_pragmas_applied_on_every_connection(self):
+        with self.app.app_context():
+            # Dua koneksi pool berbeda, PRAGMA per koneksi harus terpasang di keduanya
+            with db.engine.connect() as first, db.engine.connect() as second:
+                for connection in (first, second):
+                    self.assertEqual(self.pragma(connection, 'journal_mode'), 'wal')
+                    self.assertEqual(self.pragma(connection, 'synchronous'), 1)  # NORMAL
+                    self.assertEqual(self.pragma(connection, 'busy_timeout'), ProductionConfig.SQLITE_BUSY_TIMEOUT_MS)
+                    self.assertEqual(self.pragma(connection, 'cache_size'), ProductionConfig.SQLITE_PRAGMAS['cache_size'])
+                    self.assertEqual(self.pragma(connection, 'temp_store'), 2)  # MEMORY
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,156 @@
+# tests/test_statement_ingestion.py
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from datetime import date, datetime
+from app import create_app, db
+from app.models.student import Student, ProgramStudi
+from app.models.billing import Billing
+from app.models.payment import Payment
+from app.models.payment_method import PaymentMethod
+from app.services.statement_ingestion_service import StatementIngestionService, parse_statement_text
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+from synthetic_statement import statement_pages, write_text_pdf
+
+class TestParseStatementText(unittest.TestCase):
+    """Test cases untuk parsing teks halaman rekening koran"""
+    
+    def test_transaction_lines(self):
+        text = '\n'.join([
+            'REKENING GIRO - UNIVERSITAS',
+            'PERIODE : OKTOBER 2026',
+            'TANGGAL KETERANGAN MUTASI SALDO',
+            '01/10 TRSF E-BANKING PAY20261001000000ABCD00 5,000,000.00 CR 1,005,000,000.00',
+            '02/10 SETORAN TUNAI 2,500,000.00 CR 1,007,500,000.00',
+            'VA 88082021000003',
+            '03/10 BIAYA ADM 6,500.00 DB 1,007,493,500.00',
+            'SALDO AKHIR 1,007,493,500.00',
+        ])
+        
+        rows = parse_statement_text(text)
+        
+        self.assertEqual(rows, [
+            {'date': '2026-10-01', 'amount': 5000000, 'description': 'TRSF E-BANKING PAY20261001000000ABCD00'},
+            {'date': '2026-10-02', 'amount': 2500000, 'description': 'SETORAN TUNAI VA 88082021000003'},
+            {'date': '2026-10-03', 'amount': -6500, 'description': 'BIAYA ADM'},
+        ])
+    
+    def test_year_fallback(self):
+        rows = parse_statement_text('15/01 TRANSFER 1,000.00 CR', year=2027)
+        self.assertEqual(rows[0]['date'], '2027-01-15')
+
+
+class TestStatementIngestion(unittest.TestCase):
+    """Test cases untuk ingestion rekening koran PDF"""
+    
+    def setUp(self):
+        """Setup test database, PDF sintetis, dan direktori cache"""
+        self.workdir = tempfile.mkdtemp(prefix='test_statement_')
+        self.pdf_path = os.path.join(self.workdir, 'statement.pdf')
+        
+        self.app = create_app('testing')
+        
+        with self.app.app_context():
+            db.create_all()
+            self.setup_test_data()
+        
+        transactions = [
+            (date(2026, 10, 1), 'TRSF E-BANKING PAY20261001000000ABCD00', 5000000),
+            (date(2026, 10, 2), 'SETORAN VA 88082021000001', 1500000),
+            (date(2026, 10, 3), 'BIAYA ADM', -6500),
+        ] + [(date(2026, 10, 4), f'TRANSFER LAIN {i}', 100000 + i) for i in range(7)]
+        write_text_pdf(self.pdf_path, statement_pages(transactions, lines_per_page=4))
+    
+    def tearDown(self):
+        """Cleanup test database dan file sementara"""
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+        shutil.rmtree(self.workdir)
+    
+    def setup_test_data(self):
+        """Dua mahasiswa dengan billing, satu punya payment pending"""
+        ps = ProgramStudi(name='Teknik Informatika', code='TI', spp_amount=5000000)
+        pm = PaymentMethod(name='Virtual Account BCA', method_type='virtual_account', provider='BCA')
+        db.session.add_all([ps, pm])
+        db.session.commit()
+        
+        self.billing_ids = []
+        student_ids = []
+        for i in range(2):
+            student = Student(nim=f'20210000{i:02d}', name=f'Test Student {i}', email=f'student{i}@test.com',
+                              program_studi_id=ps.id, status='active')
+            db.session.add(student)
+            db.session.flush()
+            
+            billing = Billing(student_id=student.id, semester='2023/2024-Ganjil', total_amount=5000000,
+                              remaining_amount=5000000, due_date=datetime(2026, 12, 31), status=Billing.STATUS_UNPAID)
+            db.session.add(billing)
+            db.session.flush()
+            self.billing_ids.append(billing.id)
+            student_ids.append(student.id)
+        
+        db.session.add(Payment(student_id=student_ids[0], billing_id=self.billing_ids[0], payment_method_id=pm.id,
+                               transaction_id='PENDING-0', reference_code='PAY20261001000000ABCD00',
+                               amount=5000000, gateway_name='Midtrans', status=Payment.STATUS_PENDING))
+        db.session.commit()
+        self.payment_method_id = pm.id
+    
+    def service(self, workers=1):
+        return StatementIngestionService(cache_dir=os.path.join(self.workdir, 'cache'), workers=workers,
+                                         pages_per_task=1)
+    
+    def test_extract_uses_page_cache(self):
+        """Run kedua untuk file yang sama hanya membaca cache"""
+        first = self.service().extract(self.pdf_path)
+        second = self.service().extract(self.pdf_path)
+        
+        self.assertEqual(first['pages'], 3)
+        self.assertEqual(first['extracted_pages'], 3)
+        self.assertEqual(len(first['rows']), 10)
+        self.assertEqual(second['cached_pages'], 3)
+        self.assertEqual(second['extracted_pages'], 0)
+        self.assertEqual(second['rows'], first['rows'])
+    
+    def test_page_cache_is_keyed_by_year(self):
+        """Tahun fallback berbeda tidak memakai hasil parse tahun lain dari cache"""
+        self.service().extract(self.pdf_path, year=2025)
+        other_year = self.service().extract(self.pdf_path, year=2026)
+        
+        self.assertEqual(other_year['extracted_pages'], 3)
+        self.assertEqual(self.service().extract(self.pdf_path, year=2026)['cached_pages'], 3)
+    
+    def test_cache_dir_follows_app_config(self):
+        """Tanpa argumen, direktori cache diambil dari konfigurasi app aktif"""
+        cache_dir = os.path.join(self.workdir, 'app-cache')
+        self.app.config['STATEMENT_CACHE_DIR'] = cache_dir
+        
+        with self.app.app_context():
+            StatementIngestionService(workers=1).extract(self.pdf_path)
+        
+        self.assertEqual(len(os.listdir(cache_dir)), 1)
+    
+    def test_process_pool_matches_serial(self):
+        serial = StatementIngestionService(cache_dir=os.path.join(self.workdir, 'serial'), workers=1).extract(self.pdf_path)
+        pooled = self.service(workers=2).extract(self.pdf_path)
+        
+        self.assertEqual(pooled['rows'], serial['rows'])
+    
+    def test_ingest_reconciles_rows(self):
+        """Baris PDF masuk ke rekonsiliasi: reference dan VA tercocokkan"""
+        with self.app.app_context():
+            report = self.service().ingest(self.pdf_path, self.payment_method_id)
+            
+            self.assertTrue(report['success'])
+            self.assertEqual(report['extraction']['rows'], 10)
+            self.assertEqual(report['matched'], {'reference': 1, 'va_number': 1, 'amount_date': 0})
+            self.assertEqual(report['skipped'], 1)
+            self.assertEqual(len(report['unmatched']), 7)
+            self.assertEqual(db.session.get(Billing, self.billing_ids[0]).status, Billing.STATUS_PAID)
+            self.assertEqual(db.session.get(Billing, self.billing_ids[1]).paid_amount, 1500000)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,192 @@
+# tests/test_webhook_batch.py
+import hashlib
+import hmac
+import json
+import unittest
+from datetime import datetime
+from app import create_app, db
+from app.config import Config
+from app.models.student import Student, ProgramStudi
+from app.models.billing import Billing
+from app.models.payment import Payment
+from app.models.payment_method import PaymentMethod
+from app.services.payment_service import PaymentService
+
+class TestWebhookBatch(unittest.TestCase):
+    """Test cases untuk endpoint batch webhook (settlement file)"""
+    
+    NUM_STUDENTS = 5
+    
+    def setUp(self):
+        """Setup test database"""
+        self.app = create_app('testing')
+        self.client = self.app.test_client()
+        
+        with self.app.app_context():
+            db.create_all()
+            self.setup_test_data()
+    
+    def tearDown(self):
+        """Cleanup test database"""
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+    
+    def setup_test_data(self):
+        """Create billing dan payment pending per mahasiswa"""
+        ps = ProgramStudi(name='Teknik Informatika', code='TI', spp_amount=5000000)
+        pm = PaymentMethod(name='Test Payment', method_type='bank_transfer', provider='BCA')
+        db.session.add_all([ps, pm])
+        db.session.commit()
+        
+        self.billing_ids = []
+        for i in range(self.NUM_STUDENTS):
+            student = Student(
+                nim=f'20210000{i:02d}',
+                name=f'Test Student {i}',
+                email=f'student{i}@test.com',
+                program_studi_id=ps.id,
+                status='active'
+            )
+            db.session.add(student)
+            db.session.flush()
+            
+            billing = Billing(
+                student_id=student.id,
+                semester='2023/2024-Ganjil',
+                total_amount=5000000,
+                remaining_amount=5000000,
+                due_date=datetime.utcnow(),
+                status=Billing.STATUS_UNPAID
+            )
+            db.session.add(billing)
+            db.session.flush()
+            
+            db.session.add(Payment(
+                student_id=student.id,
+                billing_id=billing.id,
+                payment_method_id=pm.id,
+                transaction_id=f'PENDING-{i}',
+                reference_code=f'REF-{i}',
+                amount=5000000,
+                gateway_name='Midtrans',
+                status=Payment.STATUS_PENDING
+            ))
+            self.billing_ids.append(billing.id)
+        
+        db.session.commit()
+    
+    def notification(self, i, transaction_id=None, status='success', amount=1000000, billing_id=None,
+                     reference_code=None):
+        """Buat satu notifikasi untuk billing ke-i"""
+        payload = {
+            'transaction_id': transaction_id or f'TXN-{i}',
+            'reference_code': reference_code or f'REF-{i}',
+            'billing_id': billing_id or self.billing_ids[i],
+            'student_id': i + 1,
+            'amount': amount,
+            'status': status
+        }
+        return payload
+    
+    def post_batch(self, notifications, secret=None):
+        """Kirim batch dengan header HMAC atas raw body"""
+        body = json.dumps({'notifications': notifications}).encode()
+        signature = hmac.new((secret or Config.PAYMENT_GATEWAY_SECRET).encode(), body, hashlib.sha256).hexdigest()
+        return self.client.post(
+            '/api/webhook/payment/batch',
+            data=body,
+            content_type='application/json',
+            headers={'X-Signature': signature}
+        )
+    
+    def test_batch_returns_per_item_results(self):
+        """Setiap notifikasi mendapat hasil sendiri dalam satu request"""
+        invalid = self.notification(3)
+        del invalid['amount']
+        
+        notifications = [
+            self.notification(0),
+            self.notification(0),  # Transaksi ganda dalam batch yang sama
+            self.notification(1, billing_id=9999),
+            invalid,
+            self.notification(2, status='pending'),
+            self.notification(2, reference_code='REF-UNKNOWN'),
+            self.notification(4, amount=2000000)
+        ]
+        
+        response = self.post_batch(notifications)
+        self.assertEqual(response.status_code, 200)
+        
+        data = response.get_json()
+        statuses = [result['status'] for result in data['results']]
+        self.assertEqual(statuses, [
+            'processed', 'duplicate', 'failed', 'failed', 'acknowledged', 'failed', 'processed'
+        ])
+        self.assertEqual(data['summary'], {
+            'total': 7, 'processed': 2, 'duplicate': 1, 'failed': 3, 'acknowledged': 1
+        })
+        self.assertIn('not found', data['results'][2]['message'])
+        self.assertIn('amount', data['results'][3]['message'])
+        self.assertEqual(data['results'][5]['message'], 'Payment not found')
+        
+        with self.app.app_context():
+            self.assertEqual(db.session.get(Billing, self.billing_ids[0]).paid_amount, 1000000)
+            self.assertEqual(db.session.get(Billing, self.billing_ids[4]).paid_amount, 2000000)
+            self.assertEqual(db.session.get(Billing, self.billing_ids[3]).paid_amount, 0)
+            
+            student = db.session.get(Student, db.session.get(Billing, self.billing_ids[4]).student_id)
+            self.assertEqual(student.outstanding_amount, 3000000)
+    
+    def test_resent_batch_is_duplicate(self):
+        """Settlement yang dikirim ulang tidak membayar dua kali"""
+        notifications = [self.notification(i) for i in range(self.NUM_STUDENTS)]
+        
+        self.post_batch(notifications)
+        response = self.post_batch(notifications)
+        
+        self.assertEqual(response.get_json()['summary'], {'total': 5, 'duplicate': 5})
+        with self.app.app_context():
+            self.assertEqual(Payment.query.filter_by(gateway_name='webhook').count(), self.NUM_STUDENTS)
+    
+    def test_batch_signature_covers_whole_body(self):
+        """Batch dengan signature salah ditolak seluruhnya"""
+        response = self.post_batch([self.notification(0)], secret='wrong-secret')
+        
+        self.assertEqual(response.status_code, 401)
+        with self.app.app_context():
+            self.assertEqual(db.session.get(Billing, self.billing_ids[0]).paid_amount, 0)
+    
+    def test_batch_limit(self):
+        """Batch melebihi WEBHOOK_BATCH_MAX_ITEMS ditolak"""
+        self.app.config['WEBHOOK_BATCH_MAX_ITEMS'] = 2
+        response = self.post_batch([self.notification(i) for i in range(3)])
+        
+        self.assertEqual(response.status_code, 413)
+    
+    def test_service_chunks_and_isolates_errors(self):
+        """Item yang error dikeluarkan, item lain dalam chunk tetap tercatat"""
+        with self.app.app_context():
+            payment_service = PaymentService()
+            payloads = [self.notification(i) for i in range(self.NUM_STUDENTS)]
+            
+            original_stage = payment_service.stage_webhook
+            
+            def stage_with_error(payload, **kwargs):
+                if payload['transaction_id'] == 'TXN-1':
+                    raise ValueError('corrupt notification')
+                return original_stage(payload, **kwargs)
+            
+            payment_service.stage_webhook = stage_with_error
+            results = payment_service.apply_webhook_batch(payloads, chunk_size=2)
+            
+            self.assertEqual(
+                [result['status'] for result in results],
+                ['processed', 'failed', 'processed', 'processed', 'processed']
+            )
+            self.assertEqual(results[1]['message'], 'corrupt notification')
+            self.assertEqual(db.session.get(Billing, self.billing_ids[0]).paid_amount, 1000000)
+            self.assertEqual(db.session.get(Billing, self.billing_ids[1]).paid_amount, 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,289 @@
+# tests/test_webhook_inbox.py
+import hashlib
+import hmac
+import json
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from app import create_app, db
+from app.config import Config
+from app.models.student import Student, ProgramStudi
+from app.models.billing import Billing
+from app.models.payment import Payment
+from app.models.payment_method import PaymentMethod
+from app.models.webhook_inbox import WebhookInbox
+from app.services.webhook_inbox_service import WebhookInboxService
+
+class TestWebhookInbox(unittest.TestCase):
+    """Test cases untuk webhook inbox dan worker processing"""
+    
+    def setUp(self):
+        """Setup test database"""
+        self.app = create_app('testing', config_overrides={'WEBHOOK_INBOX_ENABLED': True})
+        self.client = self.app.test_client()
+        
+        with self.app.app_context():
+            db.create_all()
+            self.setup_test_data()
+    
+    def tearDown(self):
+        """Cleanup test database"""
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+    
+    def setup_test_data(self):
+        """Create student, billing, dan payment pending yang menunggu webhook"""
+        ps = ProgramStudi(name='Teknik Informatika', code='TI', spp_amount=5000000)
+        pm = PaymentMethod(name='Test Payment', method_type='bank_transfer', provider='BCA')
+        db.session.add_all([ps, pm])
+        db.session.commit()
+        
+        student = Student(
+            nim='2021000001',
+            name='Test Student',
+            email='student@test.com',
+            program_studi_id=ps.id,
+            status='active'
+        )
+        db.session.add(student)
+        db.session.commit()
+        
+        billing = Billing(
+            student_id=student.id,
+            semester='2023/2024-Ganjil',
+            total_amount=5000000,
+            remaining_amount=5000000,
+            due_date=datetime.utcnow(),
+            status=Billing.STATUS_UNPAID
+        )
+        db.session.add(billing)
+        db.session.commit()
+        
+        payment = Payment(
+            student_id=student.id,
+            billing_id=billing.id,
+            payment_method_id=pm.id,
+            transaction_id='PENDING-001',
+            reference_code='REF-001',
+            amount=5000000,
+            gateway_name='Midtrans',
+            status=Payment.STATUS_PENDING
+        )
+        db.session.add(payment)
+        db.session.commit()
+        
+        self.billing_id = billing.id
+        self.student_id = student.id
+    
+    def payload(self, transaction_id='TXN-001', reference_code='REF-001', amount=2000000):
+        """Buat payload webhook"""
+        return {
+            'transaction_id': transaction_id,
+            'reference_code': reference_code,
+            'billing_id': self.billing_id,
+            'student_id': self.student_id,
+            'amount': amount,
+            'status': 'success'
+        }
+    
+    def post_signed(self, payload, signature=None, body=None):
+        """Kirim webhook dengan header HMAC atas raw body"""
+        body = body if body is not None else json.dumps(payload).encode()
+        if signature is None:
+            signature = hmac.new(Config.PAYMENT_GATEWAY_SECRET.encode(), body, hashlib.sha256).hexdigest()
+        return self.client.post(
+            '/api/webhook/payment',
+            data=body,
+            content_type='application/json',
+            headers={'X-Signature': signature}
+        )
+    
+    def test_webhook_is_queued_not_processed(self):
+        """Route hanya menyimpan ke inbox dan mengembalikan 202"""
+        response = self.post_signed(self.payload())
+        
+        self.assertEqual(response.status_code, 202)
+        self.assertFalse(response.get_json()['duplicate'])
+        
+        with self.app.app_context():
+            entry = WebhookInbox.query.one()
+            self.assertEqual(entry.transaction_id, 'TXN-001')
+            self.assertEqual(entry.status, WebhookInbox.STATUS_PENDING)
+            self.assertEqual(db.session.get(Billing, self.billing_id).paid_amount, 0)
+    
+    def test_raw_body_is_stored_and_validated_by_worker(self):
+        """Inbox menyimpan raw body yang ditandatangani; payload tidak valid di-dead-letter worker"""
+        body = b'{"transaction_id": "TXN-RAW",  "status": "success", "amount": -5}'
+        response = self.post_signed(None, body=body)
+        self.assertEqual(response.status_code, 202)
+        
+        self.assertEqual(self.post_signed({'transaction_id': 'TXN-PENDING', 'status': 'pending'}).status_code, 202)
+        
+        with self.app.app_context():
+            entry = WebhookInbox.query.filter_by(transaction_id='TXN-RAW').one()
+            self.assertEqual(entry.raw_body.encode(), body)
+            
+            stats = WebhookInboxService().process_batch('test-worker')
+            self.assertEqual(stats['dead'], 1)
+            self.assertEqual(stats['processed'], 1)
+            self.assertEqual(db.session.get(WebhookInbox, entry.id).last_error, 'Invalid webhook payload')
+            self.assertEqual(WebhookInbox.query.filter_by(transaction_id='TXN-PENDING').one().status,
+                             WebhookInbox.STATUS_DONE)
+            self.assertEqual(db.session.get(Billing, self.billing_id).paid_amount, 0)
+    
+    def test_duplicate_transaction_is_acknowledged_once(self):
+        """Retry gateway dengan transaction_id sama tidak membuat entry baru"""
+        first = self.post_signed(self.payload())
+        response = self.post_signed(self.payload())
+        
+        # Replay dijawab dari idempotency store dengan response asli
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.headers.get('Idempotent-Replay'), 'true')
+        self.assertEqual(response.get_json(), first.get_json())
+        
+        with self.app.app_context():
+            self.assertEqual(WebhookInbox.query.count(), 1)
+            
+            # Tanpa idempotency store, inbox tetap menolak transaction_id ganda
+            result = WebhookInboxService().enqueue({'transaction_id': 'TXN-001', 'status': 'success'})
+            self.assertTrue(result['duplicate'])
+            self.assertEqual(WebhookInbox.query.count(), 1)
+    
+    def test_success_after_pending_is_applied(self):
+        """Notifikasi success menggantikan entry pending dengan transaction_id yang sama"""
+        self.post_signed(dict(self.payload(), status='pending'))
+        
+        with self.app.app_context():
+            self.assertEqual(WebhookInboxService().process_batch('test-worker')['processed'], 1)
+        
+        response = self.post_signed(self.payload())
+        self.assertEqual(response.status_code, 202)
+        self.assertFalse(response.get_json()['duplicate'])
+        
+        with self.app.app_context():
+            entry = WebhookInbox.query.one()
+            self.assertEqual(entry.status, WebhookInbox.STATUS_PENDING)
+            self.assertEqual(entry.attempts, 0)
+            self.assertEqual(json.loads(entry.raw_body)['status'], 'success')
+            
+            stats = WebhookInboxService().process_batch('test-worker')
+            self.assertEqual(stats['processed'], 1)
+            self.assertEqual(db.session.get(Billing, self.billing_id).paid_amount, 2000000)
+            
+            # Notifikasi pending yang datang terlambat tidak menimpa success
+            result = WebhookInboxService().enqueue(dict(self.payload(), status='pending'))
+            self.assertTrue(result['duplicate'])
+            self.assertEqual(WebhookInbox.query.one().payload['status'], 'success')
+    
+    def test_success_replacing_entry_in_flight_is_not_lost(self):
+        """Hasil worker untuk entry pending yang diganti di tengah proses dibuang"""
+        self.post_signed(dict(self.payload(), status='pending'))
+        
+        with self.app.app_context():
+            service = WebhookInboxService()
+            [claimed] = service.claim_batch('test-worker')
+            
+            self.assertFalse(service.enqueue(self.payload())['duplicate'])
+            service._process_entry(claimed, 'test-worker')
+            
+            entry = WebhookInbox.query.one()
+            self.assertEqual(entry.status, WebhookInbox.STATUS_PENDING)
+            self.assertEqual(entry.attempts, 0)
+            
+            self.assertEqual(service.process_batch('test-worker')['processed'], 1)
+            self.assertEqual(db.session.get(Billing, self.billing_id).paid_amount, 2000000)
+    
+    def test_invalid_signature_is_rejected(self):
+        """Signature salah ditolak sebelum disimpan"""
+        response = self.post_signed(self.payload(), signature='invalid')
+        
+        self.assertEqual(response.status_code, 401)
+        with self.app.app_context():
+            self.assertEqual(WebhookInbox.query.count(), 0)
+    
+    def test_worker_processes_batch(self):
+        """Worker menerapkan pembayaran dan menandai entry selesai"""
+        self.post_signed(self.payload())
+        
+        with self.app.app_context():
+            stats = WebhookInboxService().process_batch('test-worker')
+            self.assertEqual(stats, {'claimed': 1, 'processed': 1, 'retried': 0, 'dead': 0})
+            
+            entry = WebhookInbox.query.one()
+            self.assertEqual(entry.status, WebhookInbox.STATUS_DONE)
+            self.assertEqual(entry.attempts, 1)
+            self.assertIsNone(entry.locked_by)
+            self.assertEqual(db.session.get(Billing, self.billing_id).paid_amount, 2000000)
+            
+            # Batch berikutnya kosong
+            self.assertEqual(WebhookInboxService().process_batch('test-worker')['claimed'], 0)
+            
+            metrics = WebhookInboxService().get_metrics()
+            self.assertEqual(metrics['depth'][WebhookInbox.STATUS_DONE], 1)
+            self.assertEqual(metrics['backlog'], 0)
+            self.assertEqual(metrics['processed_last_hour'], 1)
+        
+        response = self.client.get('/api/webhook/inbox/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['depth']['done'], 1)
+    
+    def test_failed_webhook_is_retried_then_dead_lettered(self):
+        """Kegagalan sementara dijadwalkan ulang dengan backoff, lalu dead-letter"""
+        self.post_signed(self.payload())
+        
+        with self.app.app_context():
+            inbox_service = WebhookInboxService()
+            transient = {'success': False, 'message': 'database is locked', 'status_code': 500}
+            
+            with patch.object(inbox_service.payment_service, 'apply_webhook', return_value=transient):
+                stats = inbox_service.process_batch('test-worker')
+                self.assertEqual(stats['retried'], 1)
+                
+                entry = WebhookInbox.query.one()
+                self.assertEqual(entry.status, WebhookInbox.STATUS_PENDING)
+                self.assertEqual(entry.attempts, 1)
+                self.assertGreater(entry.next_attempt_at, datetime.utcnow())
+                self.assertEqual(entry.last_error, 'database is locked')
+                
+                # Belum waktunya retry
+                self.assertEqual(inbox_service.process_batch('test-worker')['claimed'], 0)
+                
+                # Percobaan terakhir
+                entry.attempts = self.app.config['WEBHOOK_MAX_ATTEMPTS'] - 1
+                entry.next_attempt_at = datetime.utcnow() - timedelta(seconds=1)
+                db.session.commit()
+                
+                stats = inbox_service.process_batch('test-worker')
+                self.assertEqual(stats['dead'], 1)
+                self.assertEqual(WebhookInbox.query.one().status, WebhookInbox.STATUS_DEAD)
+    
+    def test_client_errors_are_dead_lettered_immediately(self):
+        """Error 4xx (misal payment/billing tidak ditemukan) tidak di-retry"""
+        self.post_signed(self.payload(reference_code='REF-UNKNOWN'))
+        
+        with self.app.app_context():
+            stats = WebhookInboxService().process_batch('test-worker')
+            self.assertEqual(stats['dead'], 1)
+            
+            entry = WebhookInbox.query.one()
+            self.assertEqual(entry.status, WebhookInbox.STATUS_DEAD)
+            self.assertEqual(entry.attempts, 1)
+            self.assertEqual(entry.last_error, 'Payment not found')
+    
+    def test_stale_lease_is_reclaimed(self):
+        """Entry milik worker yang mati diklaim ulang setelah lease habis"""
+        self.post_signed(self.payload())
+        
+        with self.app.app_context():
+            entry = WebhookInbox.query.one()
+            entry.status = WebhookInbox.STATUS_PROCESSING
+            entry.locked_by = 'dead-worker'
+            entry.locked_until = datetime.utcnow() - timedelta(seconds=1)
+            db.session.commit()
+            
+            stats = WebhookInboxService().process_batch('test-worker')
+            self.assertEqual(stats['processed'], 1)
+
+if __name__ == '__main__':
+    unittest.main()